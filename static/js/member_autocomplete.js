@@ -0,0 +1,98 @@
+// Typeahead for <select data-autocomplete-url="..."> member pickers.
+// The select only holds the chosen member; a search box above it fetches
+// matches from the member_autocomplete endpoint as the user types.
+(function() {
+    var DELAY = 250;
+    var MIN_LENGTH = 2;
+
+    function setup(select) {
+        var url = select.getAttribute('data-autocomplete-url');
+        var wrapper = document.createElement('div');
+        wrapper.className = 'position-relative mb-2';
+        var input = document.createElement('input');
+        input.type = 'search';
+        input.className = 'form-control';
+        input.placeholder = 'Type a name or association number';
+        input.setAttribute('autocomplete', 'off');
+        var menu = document.createElement('div');
+        menu.className = 'list-group position-absolute w-100 shadow-sm';
+        menu.style.zIndex = 1050;
+        wrapper.appendChild(input);
+        wrapper.appendChild(menu);
+        select.parentNode.insertBefore(wrapper, select);
+
+        var timer = null;
+        var controller = null;
+
+        function clear() {
+            menu.innerHTML = '';
+        }
+
+        function choose(result) {
+            var option = select.querySelector('option[value="' + result.id + '"]');
+            if (!option) {
+                option = new Option(result.text, result.id);
+                select.appendChild(option);
+            }
+            select.value = String(result.id);
+            select.dispatchEvent(new Event('change', {bubbles: true}));
+            input.value = '';
+            clear();
+        }
+
+        function show(results) {
+            clear();
+            results.forEach(function(result) {
+                var item = document.createElement('button');
+                item.type = 'button';
+                item.className = 'list-group-item list-group-item-action';
+                item.textContent = result.text;
+                item.addEventListener('click', function() { choose(result); });
+                menu.appendChild(item);
+            });
+        }
+
+        function lookup() {
+            var q = input.value.trim();
+            if (q.length < MIN_LENGTH) {
+                clear();
+                return;
+            }
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            var sep = url.indexOf('?') === -1 ? '?' : '&';
+            fetch(url + sep + 'q=' + encodeURIComponent(q), {
+                credentials: 'same-origin',
+                signal: controller.signal
+            })
+                .then(function(response) { return response.ok ? response.json() : {results: []}; })
+                .then(function(data) {
+                    if (input.value.trim() === q) {
+                        show(data.results);
+                    }
+                })
+                .catch(function() {});
+        }
+
+        input.addEventListener('input', function() {
+            clearTimeout(timer);
+            timer = setTimeout(lookup, DELAY);
+        });
+        input.addEventListener('keydown', function(e) {
+            if (e.key === 'Escape') {
+                clear();
+            }
+        });
+        document.addEventListener('click', function(e) {
+            if (!wrapper.contains(e.target)) {
+                clear();
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        document.querySelectorAll('select[data-autocomplete-url]').forEach(setup);
+    });
+})();
@@ -3,7 +3,8 @@
 from django.contrib import admin
 from .models import (State, Rank, Branch, BloodGroup, VeteranMember, Message, UserState, 
                      Document, Notification, MedicalCategory, ECHS, DHQ, Child, 
-                     JobPortal, Matrimonial, ChatMessage, ChatRequest, VeteranUser, CarouselSlide, AccountsUser)
+                     JobPortal, Matrimonial, ChatMessage, ChatRequest, Conversation, VeteranUser, CarouselSlide, AccountsUser,
+                     VerificationPartner)
 Group = Branch  # Backward compatibility
 
 @admin.register(State)
@@ -34,8 +35,21 @@ class VeteranMemberAdmin(admin.ModelAdmin):
     list_display = ['association_id', 'name', 'association_number', 'state', 'rank', 'service_number', 'approved']
     list_filter = ['state', 'rank', 'branch', 'blood_group', 'approved']
     search_fields = ['name', 'service_number', 'association_number', 'p_number', 'association_id', 'alternate_email', 'contact']
+    search_help_text = 'Name, association/service/legacy number, contact, email, city or unit; ID for an exact match'
     readonly_fields = ['association_id', 'created_by', 'created_at', 'updated_at']
     
+    def get_search_results(self, request, queryset, search_term):
+        """Use the indexed full-text search instead of icontains over every search field"""
+        from django.db.models import Q
+        from .member_search import search
+        
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        # A bare number may be an association ID as well as the start of a number or contact
+        also = Q(association_id=int(search_term)) if search_term.isdigit() and len(search_term) < 10 else None
+        return search(queryset, search_term, also=also), False
+    
     fieldsets = (
         ('Association Information', {
             'fields': ('association_number', 'association_date', 'membership', 'subscription_ref_no', 'subscription_paid_on', 'renewal_due_date')
@@ -145,6 +159,12 @@ class MatrimonialAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
     list_editable = ['is_active']
 
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ['member_low', 'member_high', 'last_message_at', 'unread_low', 'unread_high']
+    raw_id_fields = ['member_low', 'member_high', 'last_message']
+    readonly_fields = ['unread_low', 'unread_high']
+
 @admin.register(ChatMessage)
 class ChatMessageAdmin(admin.ModelAdmin):
     list_display = ['sender', 'receiver', 'status', 'is_read', 'created_at']
@@ -184,4 +204,15 @@ class AccountsUserAdmin(admin.ModelAdmin):
         ('Timestamps', {
             'fields': ('created_at', 'updated_at')
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(VerificationPartner)
+class VerificationPartnerAdmin(admin.ModelAdmin):
+    """Keys are issued with manage.py create_verification_partner; here they can be switched off"""
+    list_display = ['name', 'is_active', 'created_at', 'last_used_at']
+    list_filter = ['is_active']
+    search_fields = ['name']
+    readonly_fields = ['created_at', 'last_used_at']
+    
+    def has_add_permission(self, request):
+        return False
@@ -6,4 +6,5 @@ class VeteranAppConfig(AppConfig):
     name = 'veteran_app'
     
     def ready(self):
+        import veteran_app.caching  # registers the shared-cache system check
         import veteran_app.signals
@@ -0,0 +1,216 @@
+"""Buffered, batched audit log writes
+
+Audit rows that are written on hot paths (public verifications, RBAC changes)
+are collected per worker and inserted with one bulk_create every
+AUDIT_BUFFER_MAX_EVENTS events or AUDIT_BUFFER_MAX_AGE seconds, whichever
+comes first. Pending events are flushed when the worker exits normally.
+
+When AUDIT_BUFFER_SPOOL_DIR is set, every event is also appended to a
+per-process spool file that is removed once its rows are in the database.
+Spool files left behind by a crashed worker are replayed by the next flush
+in another worker or by the flush_audit_spool command, so delivery is
+at-least-once.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Spool files written by this process (pids can be reused after a restart)
+_own_spools = set()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _insert(model, rows):
+    """bulk_create rows, falling back to one insert per row if the batch is rejected"""
+    objects = [model(**row) for row in rows]
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(objects, batch_size=500)
+    except IntegrityError:
+        # One bad row (e.g. a user deleted before the flush) must not block the rest
+        for obj, row in zip(objects, rows):
+            try:
+                with transaction.atomic():
+                    obj.save(force_insert=True)
+            except IntegrityError:
+                logger.warning('Dropping audit row for %s: %s', model._meta.label_lower, row)
+
+
+def replay_spool(spool_dir=None):
+    """Insert events from spool files whose owning process is gone; returns the row count"""
+    spool_dir = spool_dir or getattr(settings, 'AUDIT_BUFFER_SPOOL_DIR', None)
+    if not spool_dir or not os.path.isdir(spool_dir):
+        return 0
+
+    replayed = 0
+    for path in sorted(glob.glob(os.path.join(spool_dir, '*.jsonl*'))):
+        # <label>-<writer pid>-<token>.jsonl, or .jsonl.replay-<pid> once claimed
+        name, _, claim = os.path.basename(path).partition('.jsonl')
+        label, writer_pid = name.rsplit('-', 2)[:2]
+        owner_pid = int(claim.rpartition('-')[2]) if claim else int(writer_pid)
+        if path in _own_spools or (owner_pid != os.getpid() and _pid_alive(owner_pid)):
+            continue
+        # Claim the file with an atomic rename so two workers never replay it twice
+        claimed = os.path.join(spool_dir, f'{name}.jsonl.replay-{os.getpid()}')
+        try:
+            os.rename(path, claimed)
+        except OSError:
+            continue
+        with open(claimed) as spool:
+            rows = [json.loads(line) for line in spool if line.strip()]
+        if rows:
+            _insert(apps.get_model(label), rows)
+            replayed += len(rows)
+        os.remove(claimed)
+    return replayed
+
+
+class AuditLogBuffer:
+    """Per-process buffer of pending rows for one audit model"""
+
+    def __init__(self, model_label):
+        self.model_label = model_label
+        self._events = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self._first_event_at = None
+        self._spool_file = None
+        self._pending_spools = []
+        self._replayed = False
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def max_events(self):
+        return getattr(settings, 'AUDIT_BUFFER_MAX_EVENTS', 100)
+
+    @property
+    def max_age(self):
+        return getattr(settings, 'AUDIT_BUFFER_MAX_AGE', 5)
+
+    def _spool_path(self):
+        spool_dir = getattr(settings, 'AUDIT_BUFFER_SPOOL_DIR', None)
+        if not spool_dir:
+            return None
+        os.makedirs(spool_dir, exist_ok=True)
+        return os.path.join(spool_dir, f'{self.model_label}-{os.getpid()}-{uuid.uuid4().hex[:12]}.jsonl')
+
+    def _schedule_flush(self):
+        """Start the max-age timer if none is pending (caller holds the lock)"""
+        if self._timer is None:
+            self._timer = threading.Timer(self.max_age, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def add(self, **fields):
+        """Queue one row; field values must be JSON-serialisable (use *_id for foreign keys)"""
+        if self.max_events <= 1:
+            _insert(self.model, [fields])
+            return
+
+        with self._lock:
+            self._events.append(fields)
+            if self._spool_file is None:
+                spool_path = self._spool_path()
+                if spool_path:
+                    _own_spools.add(spool_path)
+                    self._spool_file = open(spool_path, 'a')
+            if self._spool_file is not None:
+                self._spool_file.write(json.dumps(fields, cls=DjangoJSONEncoder) + '\n')
+                self._spool_file.flush()
+
+            if self._first_event_at is None:
+                self._first_event_at = timezone.now()
+            due = (len(self._events) >= self.max_events
+                   or (timezone.now() - self._first_event_at).total_seconds() >= self.max_age)
+            if not due:
+                self._schedule_flush()
+
+        if due:
+            # Never write inside the caller's transaction: a rollback there would lose the batch
+            transaction.on_commit(self.flush)
+
+    def flush(self):
+        """Write all pending rows; on a database error they stay queued for the next flush"""
+        with self._lock:
+            events, self._events = self._events, []
+            self._first_event_at = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._spool_file is not None:
+                self._spool_file.close()
+                self._pending_spools.append(self._spool_file.name)
+                self._spool_file = None
+            # Spool files move with their events, so a concurrent flush never deletes them early
+            spools, self._pending_spools = self._pending_spools, []
+            replay = not self._replayed
+
+        if not events:
+            return 0
+        try:
+            _insert(self.model, events)
+        except DatabaseError:
+            logger.exception('Audit flush for %s failed; %d rows kept for retry', self.model_label, len(events))
+            with self._lock:
+                self._events[:0] = events
+                self._pending_spools[:0] = spools
+                if self._first_event_at is None:
+                    self._first_event_at = timezone.now()
+                self._schedule_flush()
+            return 0
+
+        for path in spools:
+            if os.path.exists(path):
+                os.remove(path)
+            _own_spools.discard(path)
+        self._replayed = True
+        if replay:
+            replay_spool()
+        return len(events)
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # Timer threads get their own connection; don't leak it
+            connection.close()
+
+
+verification_audit = AuditLogBuffer('veteran_app.associationverification')
+rbac_audit = AuditLogBuffer('veteran_app.roleauditlog')
+
+
+@atexit.register
+def flush_all():
+    """Flush every buffer (also run automatically on normal interpreter exit)"""
+    for buffer in (verification_audit, rbac_audit):
+        try:
+            buffer.flush()
+        except Exception:
+            logger.exception('Audit flush for %s failed at exit', buffer.model_label)
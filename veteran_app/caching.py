@@ -0,0 +1,36 @@
+"""Cache helpers for data that every worker process must agree on
+
+The default cache is LocMemCache (settings.CACHES), one per gunicorn worker.
+Deleting a key or replacing a version token there only reaches the worker
+that handled the write; the others keep their copy until it expires. Code
+that invalidates on writes therefore caps its timeouts with local_timeout()
+unless the cache is shared (Redis, Memcached, database).
+"""
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.conf import settings
+
+
+def is_shared(alias='default'):
+    """Whether all worker processes see the same cache"""
+    return not isinstance(caches[alias], LocMemCache)
+
+
+def local_timeout(timeout, cap):
+    """``timeout``, capped at ``cap`` seconds when each worker has its own cache"""
+    if is_shared():
+        return timeout
+    return cap if timeout is None else min(timeout, cap)
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if getattr(settings, 'VERIFICATION_BLOOM_FILTER', False) and not is_shared():
+        return [checks.Warning(
+            'VERIFICATION_BLOOM_FILTER needs a cache shared by all workers; with LocMemCache other workers '
+            'never rebuild their filter, so it is ignored.',
+            hint='Configure a Redis or Memcached cache, or leave VERIFICATION_BLOOM_FILTER off.',
+            id='veteran_app.W001',
+        )]
+    return []
@@ -0,0 +1,151 @@
+"""iCalendar (.ics) feeds of published events
+
+There is a feed for superusers, one for members without a state and one
+per state, with the same scope rules as events_list. A rendered feed is
+cached under a fingerprint of its events (how many, and when the latest
+was changed), read with one aggregate query per request. Any save, delete
+or move of an event in the scope changes the fingerprint in the database,
+so every worker process sees it, whatever the cache backend. Calendar
+clients polling every few minutes are then served from the cache, usually
+with a 304 from the ETag or Last-Modified check.
+
+Feed URLs carry a signed scope instead of requiring a login, because
+calendar apps cannot sign in.
+"""
+import hashlib
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Event, State
+
+KEY_PREFIX = 'events:feed'
+GLOBAL_SCOPE = 'all'
+EVERY_SCOPE = 'every'
+SIGNING_SALT = 'veteran_app.calendar'
+
+
+def scope_for_state(state):
+    return f's{state.pk}' if state else GLOBAL_SCOPE
+
+
+def scope_for_user(user, state):
+    """Superusers see every event in events_list, so their feed has them all too"""
+    return EVERY_SCOPE if user.is_superuser else scope_for_state(state)
+
+
+def sign_scope(scope):
+    return signing.Signer(salt=SIGNING_SALT, sep='.').sign(scope)
+
+
+def unsign_scope(token):
+    """Return the scope of a feed token, or raise signing.BadSignature"""
+    return signing.Signer(salt=SIGNING_SALT, sep='.').unsign(token)
+
+
+def feed_events(scope):
+    """Published (and recently cancelled) events visible in a scope, as in events_list"""
+    since = timezone.now() - timedelta(days=getattr(settings, 'EVENT_FEED_PAST_DAYS', 30))
+    events = Event.objects.filter(status__in=['published', 'cancelled'], start_date__gte=since)
+    if scope == GLOBAL_SCOPE:
+        events = events.filter(created_by__is_superuser=True)
+    elif scope != EVERY_SCOPE:
+        events = events.filter(
+            Q(state_id=int(scope[1:])) | Q(state__isnull=True) | Q(created_by__is_superuser=True)
+        )
+    return events.select_related('state').order_by('start_date')
+
+
+def _fingerprint(events):
+    """Changes whenever an event enters, leaves or is edited within ``events``"""
+    values = events.order_by().aggregate(count=Count('pk'), last=Max('updated_at'))
+    return values['count'], values['last']
+
+
+def _escape(value):
+    return (str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Fold content lines at 75 octets as RFC 5545 requires"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split inside a multi-byte character
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode('utf-8'))
+        start, limit = end, 74
+    return '\r\n '.join(parts)
+
+
+def _stamp(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def render_ics(events, name, base_url, domain):
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//ICGVWA//Events//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}',
+        'REFRESH-INTERVAL;VALUE=DURATION:PT1H',
+        'X-PUBLISHED-TTL:PT1H',
+    ]
+    for event in events:
+        description = event.description
+        if event.registration_fee > 0:
+            description += f'\n\nRegistration fee: Rs. {event.registration_fee}'
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:event-{event.pk}@{domain}',
+            f'DTSTAMP:{_stamp(event.updated_at)}',
+            f'LAST-MODIFIED:{_stamp(event.updated_at)}',
+            f'DTSTART:{_stamp(event.start_date)}',
+            f'DTEND:{_stamp(event.end_date)}',
+            f'SUMMARY:{_escape(event.title)}',
+            f'LOCATION:{_escape(", ".join(part for part in [event.venue, event.address] if part))}',
+            f'DESCRIPTION:{_escape(description)}',
+            f'URL:{base_url}{reverse("event_detail", args=[event.pk])}',
+            f'STATUS:{"CANCELLED" if event.status == "cancelled" else "CONFIRMED"}',
+            'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+
+def get_feed(scope, base_url, domain):
+    """Return the cached feed for a scope as {'body', 'etag', 'last_modified'}"""
+    name = 'ICGVWA Events'
+    if scope not in (GLOBAL_SCOPE, EVERY_SCOPE):
+        state = State.objects.filter(pk=int(scope[1:])).values_list('name', flat=True).first()
+        if state:
+            name = f'{name} - {state}'
+    events = feed_events(scope)
+    count, last = _fingerprint(events)
+    fingerprint = f'{name}:{base_url}:{count}:{last.isoformat() if last else ""}'
+    key = f'{KEY_PREFIX}:{scope}:{hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()}'
+    feed = cache.get(key)
+    if feed is not None:
+        return feed
+
+    body = render_ics(events, name, base_url, domain)
+    last_modified = last or timezone.now()
+    feed = {
+        'body': body,
+        'etag': hashlib.md5(body.encode('utf-8')).hexdigest(),
+        'last_modified': last_modified,
+    }
+    cache.set(key, feed, getattr(settings, 'EVENT_FEED_CACHE_TIMEOUT', 86400))
+    return feed
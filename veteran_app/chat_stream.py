@@ -0,0 +1,216 @@
+"""Chat delivery over Server-Sent Events
+
+Each open conversation page holds one SSE stream served by an async view,
+so a single ASGI worker can keep many idle streams open at the cost of a
+queue each. New messages reach the streams through a small in-process
+pub/sub:
+
+* ``publish()`` is called after a message is committed, from any thread.
+* A poller thread (one per process, running only while somebody is
+  listening) picks up messages committed by other processes (WSGI
+  workers, admin, other ASGI workers) with one indexed query per interval.
+
+A reconnecting browser sends Last-Event-ID (the id of the last message it
+received), and the stream replays what was missed from the database before
+switching to live delivery.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+# How far back the poller looks, so messages from transactions that commit
+# out of id order are not skipped
+POLL_LOOKBACK = timedelta(seconds=10)
+POLL_PAGE_SIZE = 1000
+
+
+def channel_name(member_id, other_id):
+    low, high = sorted((int(member_id), int(other_id)))
+    return f'chat:{low}:{high}'
+
+
+def message_payload(message):
+    return {
+        'id': message.id,
+        'sender': message.sender_id,
+        'receiver': message.receiver_id,
+        'sender_name': message.sender.name,
+        'message': message.message,
+        'created_at': message.created_at.isoformat(),
+    }
+
+
+def format_event(payload):
+    return f'id: {payload["id"]}\nevent: message\ndata: {json.dumps(payload)}\n\n'
+
+
+def messages_after(member, other, last_id, limit=500):
+    """Messages of a conversation newer than the id a reconnecting client last saw"""
+    from .conversations import get_conversation
+
+    conversation = get_conversation(member, other)
+    if conversation is None:
+        return []
+    messages = ChatMessage.objects.filter(conversation=conversation, id__gt=last_id).select_related('sender')
+    return [message_payload(message) for message in messages.order_by('id')[:limit]]
+
+
+class ChatBroker:
+    """In-process pub/sub from committed messages to the open SSE streams"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # channel -> set of (loop, queue)
+        self._poller = None
+        self._stop = threading.Event()
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=1000))
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+            self._start_poller()
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                listeners = self._subscribers.get(channel)
+                if listeners is not None:
+                    listeners.discard(subscriber)
+                    if not listeners:
+                        del self._subscribers[channel]
+                if not self._subscribers:
+                    self._stop.set()
+
+    def publish(self, channel, payload):
+        """Hand a message to every stream listening on a channel; safe from any thread"""
+        with self._lock:
+            listeners = list(self._subscribers.get(channel, ()))
+        for loop, queue in listeners:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, payload)
+            except RuntimeError:
+                # The stream's event loop has already closed
+                pass
+
+    @staticmethod
+    def _deliver(queue, payload):
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # A stalled client; it catches up from the database when it reconnects
+            pass
+
+    @property
+    def listening(self):
+        with self._lock:
+            return sum(len(listeners) for listeners in self._subscribers.values())
+
+    def _start_poller(self):
+        interval = getattr(settings, 'CHAT_STREAM_POLL_INTERVAL', 2)
+        if not interval or (self._poller and self._poller.is_alive() and not self._stop.is_set()):
+            return
+        self._stop = threading.Event()
+        self._poller = threading.Thread(
+            target=self._poll, args=(interval, self._stop), name='chat-stream-poller', daemon=True
+        )
+        self._poller.start()
+
+    def _poll(self, interval, stop):
+        seen = deque(maxlen=5000)
+        seen_ids = set()
+        since = timezone.now() - POLL_LOOKBACK
+        try:
+            while not stop.wait(interval):
+                try:
+                    close_old_connections()
+                    now = timezone.now()
+                    rows = ChatMessage.objects.filter(created_at__gte=since).select_related('sender').order_by('id')
+                    after = 0
+                    while True:
+                        # Page by id so a burst larger than one page is delivered in full
+                        page = list(rows.filter(id__gt=after)[:POLL_PAGE_SIZE])
+                        for message in page:
+                            if message.id in seen_ids:
+                                continue
+                            if len(seen) == seen.maxlen:
+                                seen_ids.discard(seen[0])
+                            seen.append(message.id)
+                            seen_ids.add(message.id)
+                            self.publish(channel_name(message.sender_id, message.receiver_id), message_payload(message))
+                        if len(page) < POLL_PAGE_SIZE:
+                            break
+                        after = page[-1].id
+                    since = now - POLL_LOOKBACK
+                except Exception:
+                    logger.exception('Chat stream poll failed')
+        finally:
+            connection.close()
+
+
+broker = ChatBroker()
+
+
+def publish_message(message):
+    """Deliver a committed message to streams in this process (others get it from their poller)"""
+    broker.publish(channel_name(message.sender_id, message.receiver_id), message_payload(message))
+
+
+async def stream_conversation(member, other, last_event_id=None, live=True):
+    """SSE body for one conversation: missed messages first, then live ones with keepalives
+
+    With ``live=False`` only the missed messages are sent and the stream
+    ends; the browser reconnects after the retry delay, which turns the
+    stream into cheap polling where long-lived responses are not possible.
+    """
+    keepalive = getattr(settings, 'CHAT_STREAM_KEEPALIVE', 15)
+    max_age = getattr(settings, 'CHAT_STREAM_MAX_AGE', 600)
+    sent = set()
+
+    async def missed():
+        if last_event_id is None:
+            return
+        for payload in await sync_to_async(messages_after)(member, other, last_event_id):
+            sent.add(payload['id'])
+            yield format_event(payload)
+
+    yield f'retry: {getattr(settings, "CHAT_STREAM_RETRY_MS", 3000)}\n\n'
+    if not live:
+        async for event in missed():
+            yield event
+        return
+
+    async with broker.subscribe(channel_name(member.pk, other.pk)) as queue:
+        # Subscribed before reading the backlog, so nothing falls between the two
+        async for event in missed():
+            yield event
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_age
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                # Let the client reconnect with Last-Event-ID rather than hold a stream forever
+                return
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=min(keepalive, remaining))
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if payload['id'] in sent or (last_event_id is not None and payload['id'] <= last_event_id):
+                continue
+            sent.add(payload['id'])
+            yield format_event(payload)
@@ -0,0 +1,137 @@
+"""Offline event check-in: signed attendee manifests and batched uploads
+
+A kiosk downloads the manifest once, looks attendees up in the browser and
+queues check-ins while offline. Queued check-ins are uploaded in batches and
+applied with one UPDATE per batch. Rows that cannot be checked in (cancelled,
+unpaid, waitlisted, from another event) are reported back per registration
+instead of failing the batch.
+"""
+import hashlib
+import json
+
+from django.core import signing
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import EventRegistration
+
+MANIFEST_VERSION = 1
+MANIFEST_COLUMNS = ['id', 'association_number', 'name', 'participants', 'status']
+SIGNING_SALT = 'veteran_app.checkin'
+
+# Statuses listed in the manifest; others cannot check in and are left out
+MANIFEST_STATUSES = ('pending', 'confirmed', 'attended')
+
+
+def _manifest_rows(event):
+    return [
+        list(row) for row in EventRegistration.objects.filter(event=event, status__in=MANIFEST_STATUSES).order_by(
+            'veteran__name'
+        ).values_list('id', 'veteran__association_number', 'veteran__name', 'participants_count', 'status')
+    ]
+
+
+def _digest(rows):
+    """Fingerprint of who can check in; checking people in does not change it"""
+    normalised = [row[:4] + ['confirmed' if row[4] == 'attended' else row[4]] for row in rows]
+    return hashlib.sha256(json.dumps(normalised, separators=(',', ':')).encode('utf-8')).hexdigest()[:16]
+
+
+def build_manifest(event):
+    """Compact attendee list for a kiosk, with a token binding it to the event and its contents"""
+    rows = _manifest_rows(event)
+    generated_at = timezone.now()
+    return {
+        'version': MANIFEST_VERSION,
+        'event': {
+            'id': event.id,
+            'title': event.title,
+            'start_date': event.start_date.isoformat(),
+            'venue': event.venue,
+        },
+        'generated_at': generated_at.isoformat(),
+        'columns': MANIFEST_COLUMNS,
+        'rows': rows,
+        'token': signing.dumps({'event': event.id, 'digest': _digest(rows)}, salt=SIGNING_SALT, compress=True),
+    }
+
+
+def read_token(token, event, max_age=None):
+    """Return the manifest digest from a kiosk token, or raise signing.BadSignature"""
+    data = signing.loads(token, salt=SIGNING_SALT, max_age=max_age)
+    if data.get('event') != event.id:
+        raise signing.BadSignature('Manifest was issued for another event')
+    return data['digest']
+
+
+def _parse_checkins(checkins, now):
+    """Map registration id -> earliest check-in time, ignoring malformed entries"""
+    times = {}
+    for checkin in checkins:
+        try:
+            registration_id = int(checkin['id'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        try:
+            checked_in_at = parse_datetime(str(checkin.get('at') or '')) or now
+        except ValueError:
+            # Well formed but impossible, like 2026-02-30T10:00: the member is still here
+            checked_in_at = now
+        if timezone.is_naive(checked_in_at):
+            checked_in_at = timezone.make_aware(checked_in_at)
+        # Kiosk clocks drift; never record a check-in in the future
+        checked_in_at = min(checked_in_at, now)
+        if registration_id not in times or checked_in_at < times[registration_id]:
+            times[registration_id] = checked_in_at
+    return times
+
+
+def apply_checkins(event, checkins, token=None):
+    """Mark uploaded check-ins as attended in one UPDATE and report the rest
+
+    Returns a dict with the ids checked in, ids that were already checked
+    in, conflicts as {id: reason}, and whether the kiosk's manifest is out
+    of date. Raises signing.BadSignature if the token is not valid for the
+    event.
+    """
+    digest = read_token(token, event) if token else None
+    now = timezone.now()
+    times = _parse_checkins(checkins, now)
+    result = {'checked_in': [], 'already_checked_in': [], 'conflicts': {}, 'manifest_stale': False}
+
+    with transaction.atomic():
+        current = {
+            pk: status for pk, status in EventRegistration.objects.select_for_update().filter(
+                event=event, pk__in=list(times)
+            ).values_list('pk', 'status')
+        }
+        to_check_in = []
+        for registration_id in times:
+            status = current.get(registration_id)
+            if status is None:
+                result['conflicts'][registration_id] = 'unknown_registration'
+            elif status == 'attended':
+                result['already_checked_in'].append(registration_id)
+            elif status == 'confirmed':
+                to_check_in.append(registration_id)
+            else:
+                result['conflicts'][registration_id] = {
+                    'pending': 'payment_pending',
+                    'waitlisted': 'waitlisted',
+                    'cancelled': 'cancelled',
+                }.get(status, status)
+
+        for start in range(0, len(to_check_in), 1000):
+            batch = to_check_in[start:start + 1000]
+            EventRegistration.objects.filter(pk__in=batch, status='confirmed').update(
+                status='attended',
+                checked_in_at=Case(*[When(pk=pk, then=Value(times[pk])) for pk in batch]),
+                updated_at=now
+            )
+        result['checked_in'] = to_check_in
+
+    if digest:
+        result['manifest_stale'] = digest != _digest(_manifest_rows(event))
+    return result
@@ -0,0 +1,95 @@
+"""Chat conversations: sending, reading, inbox and message history
+
+A Conversation row per veteran pair carries the latest message and an
+unread counter per participant. Sending a message and reading a thread
+each adjust those in a single UPDATE with F() expressions, so concurrent
+sends never lose a count. The inbox is then one query over the
+conversation rows, with no per-thread COUNT.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .directory import seek_page
+from .models import ChatMessage, Conversation
+
+INBOX_PAGE_SIZE = 20
+HISTORY_PAGE_SIZE = 50
+
+# Newest first, matching the inbox and chat_message_thread_idx indexes
+INBOX_ORDER = ('-last_message_at', '-id')
+HISTORY_ORDER = ('-created_at', '-id')
+
+
+def get_conversation(member, other, create=False):
+    """The conversation between two members (created on demand if ``create``), or None"""
+    low, high = Conversation.pair(member.pk, other.pk)
+    conversation = Conversation.objects.filter(member_low_id=low, member_high_id=high).first()
+    if conversation is None and create:
+        try:
+            with transaction.atomic():
+                conversation = Conversation.objects.create(member_low_id=low, member_high_id=high)
+        except IntegrityError:
+            # Created by a concurrent first message
+            conversation = Conversation.objects.get(member_low_id=low, member_high_id=high)
+    return conversation
+
+
+def send_message(sender, receiver, text):
+    """Store a message and move the conversation's pointer and receiver's unread count with it"""
+    with transaction.atomic():
+        conversation = get_conversation(sender, receiver, create=True)
+        message = ChatMessage.objects.create(
+            conversation=conversation, sender=sender, receiver=receiver, message=text
+        )
+        unread_field = f'unread_{conversation.side(receiver.pk)}'
+        Conversation.objects.filter(pk=conversation.pk).update(**{
+            'last_message': message,
+            'last_message_at': message.created_at,
+            unread_field: F(unread_field) + 1,
+        })
+    return message
+
+
+def mark_read(conversation, member):
+    """Mark everything sent to a member in a conversation as read; returns how many messages changed
+
+    The conversation row is locked first: a message sent meanwhile then
+    either commits before the UPDATE below (and is marked read) or bumps
+    the counter after it is reset, never in between.
+    """
+    with transaction.atomic():
+        Conversation.objects.select_for_update().filter(pk=conversation.pk).values_list('pk').first()
+        updated = ChatMessage.objects.filter(conversation=conversation, receiver=member, is_read=False).update(
+            is_read=True
+        )
+        Conversation.objects.filter(pk=conversation.pk).update(**{f'unread_{conversation.side(member.pk)}': 0})
+    return updated
+
+
+def inbox_queryset(member):
+    return Conversation.objects.filter(Q(member_low=member) | Q(member_high=member)).select_related(
+        'member_low__state', 'member_high__state', 'last_message'
+    )
+
+
+def inbox_page(member, after=None, before=None, size=INBOX_PAGE_SIZE):
+    """A member's conversations, most recently active first, in one query per page"""
+    return seek_page(inbox_queryset(member), INBOX_ORDER, after=after, before=before, size=size)
+
+
+def unread_total(member):
+    """All unread messages of a member, summed from the conversation counters"""
+    totals = Conversation.objects.filter(Q(member_low=member) | Q(member_high=member)).aggregate(
+        low=Coalesce(Sum('unread_low', filter=Q(member_low=member)), 0),
+        high=Coalesce(Sum('unread_high', filter=Q(member_high=member)), 0),
+    )
+    return totals['low'] + totals['high']
+
+
+def history_page(conversation, older_than=None, size=HISTORY_PAGE_SIZE):
+    """A page of messages, newest first; pass a page's next_cursor to get older ones"""
+    return seek_page(
+        ChatMessage.objects.filter(conversation=conversation).select_related('sender'),
+        HISTORY_ORDER, after=older_than, size=size
+    )
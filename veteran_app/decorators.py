@@ -5,15 +5,20 @@ from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth.decorators import login_required
 
-def rate_limit(max_requests=5, window=300):
-    """Rate limiting decorator"""
+def rate_limit(max_requests=5, window=300, client=None):
+    """Rate limiting decorator
+    
+    Requests are counted per logged-in user, or per ``client(request)`` when
+    given (e.g. an API partner). The counts live in the default cache, so
+    with LocMemCache each worker process counts on its own.
+    """
     def decorator(view_func):
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
             if request.user.is_superuser:
                 return view_func(request, *args, **kwargs)
             
-            key = f"rate_limit_{request.user.id}_{view_func.__name__}"
+            key = f"rate_limit_{client(request) if client else request.user.id}_{view_func.__name__}"
             current_requests = cache.get(key, 0)
             
             if current_requests >= max_requests:
@@ -91,4 +96,26 @@ def require_state_access(state_param='state_id'):
             
             return view_func(request, *args, **kwargs)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+def verification_partner_required(view_func):
+    """Require an active VerificationPartner key (Authorization: Bearer <key>, or X-API-Key)"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        from django.http import JsonResponse
+        from django.utils import timezone
+        from veteran_app.models import VerificationPartner
+        
+        authorization = request.headers.get('Authorization', '')
+        key = authorization[7:].strip() if authorization.startswith('Bearer ') else request.headers.get('X-API-Key', '')
+        partner = None
+        if key:
+            partner = VerificationPartner.objects.filter(key_hash=VerificationPartner.hash_key(key), is_active=True).first()
+        if partner is None:
+            response = JsonResponse({'error': 'A valid partner API key is required'}, status=401)
+            response['WWW-Authenticate'] = 'Bearer'
+            return response
+        VerificationPartner.objects.filter(pk=partner.pk).update(last_used_at=timezone.now())
+        request.verification_partner = partner
+        return view_func(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,165 @@
+"""Keyset (seek) pagination for the chat portal member directory and request lists
+
+Pages are addressed by an opaque cursor holding the sort key of the last
+(or first) row shown. The next page is then one index range scan, so page
+1000 costs the same as page 1, and no COUNT(*) is needed. When a total is
+wanted, it is the planner's estimate.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+from .models import ChatRequest, VeteranMember
+
+DIRECTORY_PAGE_SIZE = 20
+REQUESTS_PAGE_SIZE = 10
+
+# Matches the member_directory_idx index
+DIRECTORY_ORDER = ('state_id', 'name', 'association_id')
+# Matches the chat_request_*_idx indexes (newest first)
+REQUESTS_ORDER = ('-created_at', '-id')
+
+
+class Page:
+    """One page of a seek query, with cursors for its neighbours"""
+
+    def __init__(self, rows, next_cursor=None, previous_cursor=None):
+        self.rows = rows
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def encode_cursor(values):
+    data = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, ordering, model):
+    """Return the key values in a cursor, or None if it is malformed"""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            return None
+        return [model._meta.get_field(field.lstrip('-')).to_python(value) for field, value in zip(ordering, values)]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _seek_condition(queryset, ordering, values, forward):
+    """Row-value comparison such as (state_id, name, association_id) > (%s, %s, %s)
+
+    All columns of the ordering must sort in the same direction. A row
+    comparison is used instead of nested ORs so the planner can start the
+    index scan at the cursor.
+    """
+    table = queryset.model._meta.db_table
+    columns = ', '.join(
+        f'{connection.ops.quote_name(table)}.{connection.ops.quote_name(queryset.model._meta.get_field(field.lstrip("-")).column)}'
+        for field in ordering
+    )
+    descending = ordering[0].startswith('-')
+    operator = '<' if descending == forward else '>'
+    placeholders = ', '.join(['%s'] * len(values))
+    return RawSQL(f'({columns}) {operator} ({placeholders})', values, output_field=BooleanField())
+
+
+def seek_page(queryset, ordering, after=None, before=None, size=DIRECTORY_PAGE_SIZE):
+    """Fetch the page after (or before) a cursor from a queryset ordered by ``ordering``"""
+    after_values = decode_cursor(after, ordering, queryset.model)
+    before_values = None if after_values else decode_cursor(before, ordering, queryset.model)
+
+    if before_values:
+        reverse = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+        rows = list(queryset.filter(_seek_condition(queryset, ordering, before_values, forward=False))
+                    .order_by(*reverse)[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size][::-1]
+        has_previous, has_next = has_more, True
+    else:
+        if after_values:
+            queryset = queryset.filter(_seek_condition(queryset, ordering, after_values, forward=True))
+        rows = list(queryset.order_by(*ordering)[:size + 1])
+        has_next = len(rows) > size
+        rows = rows[:size]
+        has_previous = after_values is not None
+
+    def key(row):
+        return [getattr(row, field.lstrip('-')) for field in ordering]
+
+    return Page(
+        rows,
+        next_cursor=encode_cursor(key(rows[-1])) if rows and has_next else None,
+        previous_cursor=encode_cursor(key(rows[0])) if rows and has_previous else None,
+    )
+
+
+def estimate_count(queryset):
+    """Planner's row estimate for a queryset; None where the database cannot say cheaply"""
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def directory_queryset(viewer=None, state=None, rank=None, city=None, q=None):
+    """Approved members a viewer may contact, with the directory filters applied
+
+    ``viewer`` is the viewer's VeteranMember, or None for superusers, who see everyone.
+    """
+    members = VeteranMember.objects.filter(approved=True)
+    if viewer is not None:
+        members = members.exclude(state_id=viewer.state_id).exclude(association_id=viewer.association_id)
+    if state:
+        members = members.filter(state_id=state)
+    if rank:
+        members = members.filter(rank_id=rank)
+    if city:
+        members = members.filter(living_city__istartswith=city.strip())
+    if q:
+        # Matching only, on names and numbers; the directory keeps its keyset order
+        from .member_search import NAME_WEIGHTS, build_query
+        query = build_query(q, NAME_WEIGHTS)
+        members = members.filter(search_vector=query) if query is not None else members.none()
+    return members
+
+
+def member_directory(viewer=None, filters=None, after=None, before=None, size=DIRECTORY_PAGE_SIZE):
+    filters = filters or {}
+    members = directory_queryset(viewer, **filters).select_related('state', 'rank').only(
+        'association_id', 'name', 'profile_photo', 'state__name', 'rank__name'
+    )
+    return seek_page(members, DIRECTORY_ORDER, after=after, before=before, size=size)
+
+
+def chat_requests_page(viewer, box, after=None, before=None, size=REQUESTS_PAGE_SIZE):
+    """Sent or received chat requests of a member, newest first (all requests for superusers)"""
+    requests = ChatRequest.objects.select_related('requester__state', 'recipient__state')
+    if viewer is not None:
+        requests = requests.filter(**{'requester' if box == 'sent' else 'recipient': viewer})
+    return seek_page(requests, REQUESTS_ORDER, after=after, before=before, size=size)
@@ -1,17 +1,27 @@
+"""Event management and event payment views
+
+The payment gateway SDK is imported by services on first use, so loading
+these views does not pull it in.
+"""
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_POST
 from django.db import models as django_models
-from .models import Event, EventCategory, EventRegistration, PaymentOrder, State
-from .services import PaymentService
+from .models import (State, UserState, Notification, Event, EventCategory, EventRegistration,
+                     PaymentGateway, PaymentOrder)
 
 def is_superuser(user):
     return user.is_superuser
 
+# EVENT MANAGEMENT VIEWS
 @login_required
 def events_list(request):
     """List all events"""
+    from django.utils import timezone
+    from django.core.paginator import Paginator
+    
     # Get user's state if applicable
     user_state = None
     if not request.user.is_superuser:
@@ -26,22 +36,45 @@ def events_list(request):
     
     # Filter events based on user permissions
     if request.user.is_superuser:
-        events = Event.objects.filter(status='published')
+        events_list = Event.objects.filter(status='published')
     elif user_state:
-        events = Event.objects.filter(
+        # Show events created by admin (created_by is superuser) OR events for user's state
+        events_list = Event.objects.filter(
             status='published'
         ).filter(
-            django_models.Q(state=user_state) | django_models.Q(state__isnull=True)
+            django_models.Q(state=user_state) | 
+            django_models.Q(state__isnull=True) |
+            django_models.Q(created_by__is_superuser=True)
         )
     else:
-        events = Event.objects.filter(status='published', state__isnull=True)
+        # Non-state users see only admin events (no state assigned)
+        events_list = Event.objects.filter(
+            status='published',
+            created_by__is_superuser=True
+        )
     
-    events = events.order_by('start_date')
+    # Filter to show only upcoming events (start_date >= today)
+    events_list = events_list.filter(start_date__gte=timezone.now().date()).select_related(
+        'category', 'state'
+    ).order_by('start_date')
     categories = EventCategory.objects.filter(is_active=True)
     
+    paginator = Paginator(events_list, 12)  # 12 per page
+    page_number = request.GET.get('page')
+    events = paginator.get_page(page_number)
+    
+    from django.urls import reverse
+    from .calendar_feeds import scope_for_user, sign_scope
+    calendar_url = request.build_absolute_uri(
+        reverse('event_calendar_feed', args=[sign_scope(scope_for_user(request.user, user_state))])
+    )
+    
     return render(request, 'veteran_app/events_list.html', {
         'events': events,
-        'categories': categories
+        'categories': categories,
+        'page_obj': events,
+        'calendar_url': calendar_url,
+        'calendar_webcal_url': 'webcal://' + calendar_url.split('://', 1)[1],
     })
 
 @login_required
@@ -61,14 +94,16 @@ def event_detail(request, event_id):
                 existing_registration = EventRegistration.objects.filter(
                     event=event, veteran=veteran
                 ).first()
-                can_register = not existing_registration and event.is_registration_open()
+                can_register = not existing_registration and event.accepts_registrations()
         except:
             pass
     
     return render(request, 'veteran_app/event_detail.html', {
         'event': event,
         'can_register': can_register,
-        'existing_registration': existing_registration
+        'event_full': not event.is_registration_open(),
+        'existing_registration': existing_registration,
+        'waitlist_place': existing_registration.get_waitlist_place() if existing_registration else None
     })
 
 @login_required
@@ -86,63 +121,108 @@ def register_for_event(request, event_id):
         messages.error(request, 'Only veterans can register for events.')
         return redirect('event_detail', event_id=event.id)
     
-    # Check if already registered
-    if EventRegistration.objects.filter(event=event, veteran=veteran).exists():
+    # An unpaid cancelled or lapsed registration does not stop the member from signing up again
+    existing_registration = EventRegistration.objects.filter(event=event, veteran=veteran).exclude(
+        django_models.Q(status='cancelled') & ~django_models.Q(payment_status='completed')
+    ).first()
+    if existing_registration:
+        # A registration promoted from the waitlist still has to be paid for
+        if (request.method == 'POST' and existing_registration.status == 'pending'
+                and existing_registration.payment_required and existing_registration.payment_status != 'completed'):
+            return _start_registration_payment(request, event, veteran, existing_registration)
         messages.warning(request, 'You are already registered for this event.')
         return redirect('event_detail', event_id=event.id)
     
-    if not event.is_registration_open():
+    if not event.accepts_registrations():
         messages.error(request, 'Registration is closed for this event.')
         return redirect('event_detail', event_id=event.id)
     
     if request.method == 'POST':
-        participants_count = int(request.POST.get('participants_count', 1))
+        from django.db import IntegrityError
+        from .registrations import register
+        try:
+            participants_count = max(int(request.POST.get('participants_count', 1)), 1)
+        except ValueError:
+            participants_count = 1
         special_requirements = request.POST.get('special_requirements', '')
         
-        # Create registration
-        registration = EventRegistration.objects.create(
-            event=event,
-            veteran=veteran,
-            participants_count=participants_count,
-            special_requirements=special_requirements,
-            payment_required=event.registration_fee > 0,
-            payment_amount=event.registration_fee * participants_count
-        )
+        try:
+            registration = register(event, veteran, participants_count, special_requirements)
+        except IntegrityError:
+            messages.warning(request, 'You are already registered for this event.')
+            return redirect('event_detail', event_id=event.id)
         
-        # Handle payment if required
-        if event.registration_fee > 0:
-            try:
-                payment_service = PaymentService()
-                payment_order, razorpay_order = payment_service.create_order(
-                    veteran=veteran,
-                    order_type='event_registration',
-                    amount=registration.payment_amount,
-                    description=f'Registration for {event.title}',
-                    event_registration=registration
-                )
-                
-                return render(request, 'veteran_app/payment_page.html', {
-                    'event': event,
-                    'registration': registration,
-                    'payment_order': payment_order,
-                    'razorpay_order': razorpay_order,
-                    'razorpay_key': payment_service.gateway.api_key
-                })
-            except Exception as e:
-                registration.delete()
-                messages.error(request, f'Payment setup failed: {str(e)}')
-                return redirect('event_detail', event_id=event.id)
-        else:
-            # Free event - confirm registration
-            registration.status = 'confirmed'
-            registration.save()
-            messages.success(request, 'Registration successful!')
+        if registration is None:
+            messages.error(request, 'Registration is closed, or your party is larger than the event allows.')
             return redirect('event_detail', event_id=event.id)
+        if registration.status == 'waitlisted':
+            messages.info(
+                request,
+                f'The event is full. You are number {registration.get_waitlist_place()} on the waitlist '
+                'and will be moved up automatically when places free up.'
+            )
+            return redirect('event_detail', event_id=event.id)
+        
+        # Handle payment if required
+        if registration.payment_required:
+            return _start_registration_payment(request, event, veteran, registration, new=True)
+        messages.success(request, 'Registration successful!')
+        return redirect('event_detail', event_id=event.id)
     
     return render(request, 'veteran_app/event_registration.html', {
         'event': event
     })
 
+def _start_registration_payment(request, event, veteran, registration, new=False):
+    """Create a gateway order for a registration and show the payment page"""
+    try:
+        from .services import PaymentService
+        payment_service = PaymentService()
+        payment_order, razorpay_order = payment_service.create_order(
+            veteran=veteran,
+            order_type='event_registration',
+            amount=registration.payment_amount,
+            description=f'Registration for {event.title}',
+            event_registration=registration
+        )
+        
+        return render(request, 'veteran_app/payment_page.html', {
+            'event': event,
+            'registration': registration,
+            'payment_order': payment_order,
+            'razorpay_order': razorpay_order,
+            'razorpay_key': payment_service.gateway.api_key
+        })
+    except Exception as e:
+        if new:
+            from .registrations import promote_waitlist
+            registration.delete()
+            promote_waitlist(event)
+        messages.error(request, f'Payment setup failed: {str(e)}')
+        return redirect('event_detail', event_id=event.id)
+
+@login_required
+@require_POST
+def cancel_event_registration(request, event_id):
+    """Let a veteran cancel their own registration or leave the waitlist"""
+    from .registrations import cancel_registrations
+    
+    try:
+        veteran = request.user.veteran_profile.veteran_member
+    except:
+        messages.error(request, 'Only veterans can cancel event registrations.')
+        return redirect('event_detail', event_id=event_id)
+    
+    registration = get_object_or_404(EventRegistration, event_id=event_id, veteran=veteran)
+    if registration.payment_status == 'completed':
+        messages.error(request, 'This registration has been paid for. Please contact the organisers to cancel it.')
+    elif registration.status in ('cancelled', 'attended'):
+        messages.warning(request, 'This registration can no longer be cancelled.')
+    else:
+        cancel_registrations(registration.event, [registration.pk])
+        messages.success(request, 'Your registration has been cancelled.')
+    return redirect('event_detail', event_id=event_id)
+
 @login_required
 def payment_success(request):
     """Handle successful payment"""
@@ -156,6 +236,7 @@ def payment_success(request):
     
     try:
         payment_order = PaymentOrder.objects.get(gateway_order_id=order_id)
+        from .services import PaymentService
         payment_service = PaymentService()
         
         if payment_service.verify_payment(payment_id, order_id, signature):
@@ -177,28 +258,104 @@ def payment_failed(request):
     messages.error(request, 'Payment failed. Please try again.')
     return redirect('events_list')
 
+@require_POST
+def payment_webhook(request):
+    """Receive gateway webhooks; they are verified, stored and applied later by process_webhooks"""
+    import hashlib
+    import hmac
+    import json
+    from django.db import IntegrityError
+    from .models import PaymentWebhook
+
+    gateway = PaymentGateway.objects.filter(name='razorpay', is_active=True).only('id', 'webhook_secret').first()
+    if not gateway or not gateway.webhook_secret:
+        return HttpResponse(status=404)
+
+    signature = request.headers.get('X-Razorpay-Signature', '')
+    expected = hmac.new(gateway.webhook_secret.encode('utf-8'), request.body, hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, signature):
+        return HttpResponse(status=400)
+
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return HttpResponse(status=400)
+
+    payment = payload.get('payload', {}).get('payment', {}).get('entity', {})
+    try:
+        PaymentWebhook.objects.create(
+            gateway=gateway,
+            event_type=str(payload.get('event', ''))[:100],
+            gateway_event_id=request.headers.get('X-Razorpay-Event-Id', '')[:100],
+            gateway_payment_id=str(payment.get('id', ''))[:200],
+            payload=payload
+        )
+    except IntegrityError:
+        # Redelivery of an event we already have; acknowledge so the gateway stops retrying
+        pass
+    return HttpResponse(status=200)
+
 @login_required
-@user_passes_test(is_superuser)
 def manage_events(request):
-    """Manage events - Admin only"""
-    events = Event.objects.all().order_by('-created_at')
+    """Manage events - Superadmin and State Admins can view events"""
+    from django.core.paginator import Paginator
+    
+    # Get user's state if applicable
+    user_state = None
+    if not request.user.is_superuser:
+        try:
+            user_state = request.user.state_profile
+            if not user_state.approved:
+                messages.error(request, 'Your account is pending approval.')
+                return redirect('index')
+            user_state = user_state.state
+        except UserState.DoesNotExist:
+            messages.error(request, 'Access denied. Only state admins and superadmin can manage events.')
+            return redirect('index')
+    
+    # Filter events based on user permissions
+    if request.user.is_superuser:
+        events_list = Event.objects.all()
+    else:
+        # State admins can see events for their state and all-state events
+        events_list = Event.objects.filter(
+            django_models.Q(state=user_state) | django_models.Q(state__isnull=True)
+        )
+    
+    events_list = events_list.select_related('category', 'state').order_by('-created_at')
     categories = EventCategory.objects.filter(is_active=True)
     
+    paginator = Paginator(events_list, 15)  # 15 per page
+    page_number = request.GET.get('page')
+    events = paginator.get_page(page_number)
+    
     return render(request, 'veteran_app/manage_events.html', {
         'events': events,
-        'categories': categories
+        'categories': categories,
+        'page_obj': events,
+        'user_state': user_state
     })
 
 @login_required
-@user_passes_test(is_superuser)
 def create_event(request):
-    """Create new event"""
+    """Create new event - Superadmin and State Admins"""
+    # Check permissions
+    user_state = None
+    if not request.user.is_superuser:
+        try:
+            user_state = request.user.state_profile
+            if not user_state.approved:
+                messages.error(request, 'Your account is pending approval.')
+                return redirect('index')
+            user_state = user_state.state
+        except UserState.DoesNotExist:
+            messages.error(request, 'Access denied. Only state admins and superadmin can create events.')
+            return redirect('index')
+    
     if request.method == 'POST':
-        from datetime import datetime
-        
         title = request.POST.get('title')
         description = request.POST.get('description')
-        category_id = request.POST.get('category')
+        category_name = request.POST.get('category', '').strip()
         state_id = request.POST.get('state')
         start_date = request.POST.get('start_date')
         end_date = request.POST.get('end_date')
@@ -209,33 +366,27 @@ def create_event(request):
         registration_fee = request.POST.get('registration_fee', 0)
         max_participants = request.POST.get('max_participants')
         
-        if all([title, description, category_id, start_date, end_date, venue, address, contact_person, contact_phone]):
-            # Validate dates
-            try:
-                start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
-                end_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
-                today = datetime.now().date()
-                
-                if start_dt < today:
-                    messages.error(request, 'Event start date cannot be in the past.')
-                    return redirect('create_event')
-                
-                if end_dt < start_dt:
-                    messages.error(request, 'Event end date must be after start date.')
-                    return redirect('create_event')
-                    
-            except ValueError:
-                messages.error(request, 'Invalid date format.')
-                return redirect('create_event')
+        if all([title, description, category_name, start_date, end_date, venue, address, contact_person, contact_phone]):
+            # Get or create category
+            category, created = EventCategory.objects.get_or_create(
+                name=category_name,
+                defaults={'is_active': True}
+            )
             
-            category = get_object_or_404(EventCategory, id=category_id)
-            state = State.objects.get(id=state_id) if state_id else None
+            # Handle state assignment
+            event_state = None
+            if request.user.is_superuser:
+                # Superadmin can create events for any state or all states
+                event_state = State.objects.get(id=state_id) if state_id else None
+            else:
+                # State admins can only create events for their state
+                event_state = user_state
             
             event = Event.objects.create(
                 title=title,
                 description=description,
                 category=category,
-                state=state,
+                state=event_state,
                 start_date=start_date,
                 end_date=end_date,
                 venue=venue,
@@ -249,15 +400,326 @@ def create_event(request):
                 status='published'
             )
             
-            messages.success(request, f'Event "{title}" created successfully!')
+            # Create notification for the event
+            from datetime import datetime, timedelta
+            notification_message = f'New event "{title}" has been announced. Registration is now open!'
+            if event_state:
+                notification_message += f' This event is for {event_state.name} members.'
+            else:
+                notification_message += ' This event is open to all state members.'
+            
+            Notification.objects.create(
+                title=f'New Event: {title}',
+                message=notification_message,
+                notification_type='info',
+                state=event_state,
+                expires_at=datetime.now() + timedelta(days=30)  # Notification expires in 30 days
+            )
+            
+            messages.success(request, f'Event "{title}" created successfully and notification sent to members!')
             return redirect('manage_events')
         else:
             messages.error(request, 'Please fill all required fields.')
     
-    categories = EventCategory.objects.filter(is_active=True)
-    states = State.objects.all().order_by('name')
+    # Get available states based on user permissions
+    if request.user.is_superuser:
+        states = State.objects.all().order_by('name')
+    else:
+        states = [user_state] if user_state else []
     
     return render(request, 'veteran_app/create_event.html', {
-        'categories': categories,
-        'states': states
-    })
\ No newline at end of file
+        'states': states,
+        'user_state': user_state
+    })
+
+@login_required
+def edit_event(request, event_id):
+    """Edit existing event - Superadmin and State Admins"""
+    event = get_object_or_404(Event, id=event_id)
+    
+    # Check permissions
+    user_state = None
+    if not request.user.is_superuser:
+        try:
+            user_state = request.user.state_profile
+            if not user_state.approved:
+                messages.error(request, 'Your account is pending approval.')
+                return redirect('index')
+            user_state = user_state.state
+            
+            # State admins can only edit events for their state or all-state events
+            if event.state and event.state != user_state:
+                messages.error(request, 'You can only edit events for your state.')
+                return redirect('manage_events')
+        except UserState.DoesNotExist:
+            messages.error(request, 'Access denied.')
+            return redirect('index')
+    
+    if request.method == 'POST':
+        event.title = request.POST.get('title')
+        event.description = request.POST.get('description')
+        category_name = request.POST.get('category', '').strip()
+        state_id = request.POST.get('state')
+        event.start_date = request.POST.get('start_date')
+        event.end_date = request.POST.get('end_date')
+        event.venue = request.POST.get('venue')
+        event.address = request.POST.get('address')
+        event.contact_person = request.POST.get('contact_person')
+        event.contact_phone = request.POST.get('contact_phone')
+        event.registration_fee = request.POST.get('registration_fee', 0)
+        event.max_participants = request.POST.get('max_participants') or None
+        
+        if category_name:
+            category, created = EventCategory.objects.get_or_create(
+                name=category_name,
+                defaults={'is_active': True}
+            )
+            event.category = category
+        
+        # Handle state assignment based on user permissions
+        if request.user.is_superuser:
+            event.state = State.objects.get(id=state_id) if state_id else None
+        # State admins cannot change the state of existing events
+        
+        if 'banner_image' in request.FILES:
+            event.banner_image = request.FILES['banner_image']
+        
+        event.save()
+        # Raising the capacity (or removing it) frees places for the waitlist
+        from .registrations import promote_waitlist
+        promoted = promote_waitlist(event)
+        messages.success(request, f'Event "{event.title}" updated successfully!')
+        if promoted:
+            messages.info(request, f'{promoted} registrations promoted from the waitlist.')
+        return redirect('manage_events')
+    
+    # Get available states based on user permissions
+    if request.user.is_superuser:
+        states = State.objects.all().order_by('name')
+    else:
+        states = [user_state] if user_state else []
+    
+    return render(request, 'veteran_app/edit_event.html', {
+        'event': event,
+        'states': states,
+        'user_state': user_state
+    })
+
+@login_required
+def delete_event(request, event_id):
+    """Delete event - Superadmin and State Admins"""
+    event = get_object_or_404(Event, id=event_id)
+    
+    # Check permissions
+    if not request.user.is_superuser:
+        try:
+            user_state = request.user.state_profile
+            if not user_state.approved:
+                messages.error(request, 'Your account is pending approval.')
+                return redirect('index')
+            
+            # State admins can only delete events for their state or all-state events
+            if event.state and event.state != user_state.state:
+                messages.error(request, 'You can only delete events for your state.')
+                return redirect('manage_events')
+        except UserState.DoesNotExist:
+            messages.error(request, 'Access denied.')
+            return redirect('manage_events')
+    
+    title = event.title
+    event.delete()
+    messages.success(request, f'Event "{title}" deleted successfully!')
+    return redirect('manage_events')
+
+def _can_manage_event(user, event):
+    """Superadmins, and approved state admins for their state's or all-state events"""
+    if user.is_superuser:
+        return True
+    try:
+        state_profile = user.state_profile
+    except UserState.DoesNotExist:
+        return False
+    return state_profile.approved and (event.state_id is None or event.state_id == state_profile.state_id)
+
+@login_required
+def manage_event_registrations(request, event_id):
+    """Registrations and waitlist of one event, with bulk actions - Superadmin and State Admins"""
+    from django.db.models import Count, Sum
+    from .registrations import (cancel_registrations, confirm_registrations, mark_attended,
+                                parse_scanned_numbers, promote_waitlist)
+    
+    event = get_object_or_404(Event.objects.select_related('category', 'state'), id=event_id)
+    if not _can_manage_event(request.user, event):
+        messages.error(request, 'You can only manage events for your state.')
+        return redirect('manage_events')
+    
+    if request.method == 'POST':
+        action = request.POST.get('action')
+        selected = [int(pk) for pk in request.POST.getlist('registration_ids') if pk.isdigit()]
+        
+        if action == 'confirm':
+            try:
+                limit = int(request.POST.get('confirm_count') or 0)
+            except ValueError:
+                limit = 0
+            if selected:
+                confirmed = confirm_registrations(event, registration_ids=selected)
+            elif limit > 0:
+                confirmed = confirm_registrations(event, limit=limit)
+            else:
+                confirmed = 0
+            messages.success(request, f'{confirmed} registrations confirmed.')
+        elif action == 'cancel' and selected:
+            cancelled, promoted = cancel_registrations(event, selected)
+            messages.success(request, f'{cancelled} registrations cancelled, {promoted} promoted from the waitlist.')
+        elif action == 'attended':
+            numbers = parse_scanned_numbers(request.POST.get('scanned_numbers'))
+            updated, unknown = mark_attended(event, numbers)
+            messages.success(request, f'{updated} registrations marked as attended.')
+            if unknown:
+                messages.warning(request, f'No confirmed registration for: {", ".join(unknown[:50])}')
+        elif action == 'promote':
+            promoted = promote_waitlist(event)
+            messages.success(request, f'{promoted} registrations promoted from the waitlist.')
+        else:
+            messages.error(request, 'Select registrations or enter the details for this action.')
+        return redirect('manage_event_registrations', event_id=event.id)
+    
+    registrations = EventRegistration.objects.filter(event=event).select_related('veteran').only(
+        'id', 'status', 'participants_count', 'payment_required', 'payment_status', 'waitlist_position',
+        'registered_at', 'special_requirements', 'veteran__name', 'veteran__association_number', 'veteran__contact'
+    )
+    totals = {
+        row['status']: row for row in EventRegistration.objects.filter(event=event).order_by().values('status').annotate(
+            registrations=Count('id'), participants=Sum('participants_count')
+        )
+    }
+    status_summary = [
+        (label, totals.get(status, {}).get('registrations', 0), totals.get(status, {}).get('participants') or 0)
+        for status, label in EventRegistration.REGISTRATION_STATUS
+    ]
+    
+    return render(request, 'veteran_app/manage_event_registrations.html', {
+        'event': event,
+        'waitlist': registrations.filter(status='waitlisted').order_by('waitlist_position'),
+        'registrations': registrations.exclude(status='waitlisted').order_by('status', 'registered_at'),
+        'status_summary': status_summary,
+    })
+
+@login_required
+def event_checkin_kiosk(request, event_id):
+    """Check-in kiosk page; works offline once the manifest is loaded"""
+    event = get_object_or_404(Event, id=event_id)
+    if not _can_manage_event(request.user, event):
+        messages.error(request, 'You can only manage events for your state.')
+        return redirect('manage_events')
+    
+    return render(request, 'veteran_app/event_checkin_kiosk.html', {
+        'event': event
+    })
+
+@login_required
+def event_checkin_manifest(request, event_id):
+    """Signed attendee manifest for the check-in kiosk"""
+    from .checkin import build_manifest
+    
+    event = get_object_or_404(Event, id=event_id)
+    if not _can_manage_event(request.user, event):
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    
+    response = JsonResponse(build_manifest(event), json_dumps_params={'separators': (',', ':')})
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+@login_required
+@require_POST
+def event_checkin_upload(request, event_id):
+    """Apply a batch of check-ins queued by a kiosk"""
+    import json
+    from django.core import signing
+    from .checkin import apply_checkins
+    
+    event = get_object_or_404(Event, id=event_id)
+    if not _can_manage_event(request.user, event):
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    
+    try:
+        data = json.loads(request.body)
+        checkins = data['checkins']
+        token = data['token']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected JSON with "token" and "checkins".'}, status=400)
+    if not isinstance(checkins, list) or len(checkins) > 5000:
+        return JsonResponse({'error': 'Upload at most 5000 check-ins per batch.'}, status=400)
+    
+    try:
+        result = apply_checkins(event, checkins, token=token)
+    except signing.BadSignature:
+        return JsonResponse({'error': 'The kiosk manifest is not valid for this event. Reload it.'}, status=409)
+    return JsonResponse(result)
+
+@login_required
+def event_checkin_service_worker(request, event_id):
+    """Service worker that keeps the kiosk page and manifest available offline"""
+    from django.urls import reverse
+    
+    response = render(request, 'veteran_app/event_checkin_sw.js', {
+        'kiosk_url': reverse('event_checkin_kiosk', args=[event_id]),
+        'manifest_url': reverse('event_checkin_manifest', args=[event_id]),
+    }, content_type='application/javascript')
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+def event_calendar_feed(request, token):
+    """iCalendar feed for calendar apps; the signed token in the URL stands in for a login"""
+    from django.core import signing
+    from django.http import Http404
+    from django.utils.cache import get_conditional_response
+    from django.utils.http import http_date
+    from .calendar_feeds import get_feed, unsign_scope
+    
+    try:
+        scope = unsign_scope(token)
+    except signing.BadSignature:
+        raise Http404('Unknown calendar feed')
+    
+    feed = get_feed(scope, request.build_absolute_uri('/').rstrip('/'), request.get_host())
+    etag = f'"{feed["etag"]}"'
+    last_modified = int(feed['last_modified'].timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(feed['body'], content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="events.ics"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
+
+@login_required
+@user_passes_test(is_superuser)
+def payment_settings(request):
+    """Payment gateway settings"""
+    gateways = PaymentGateway.objects.all()
+    
+    if request.method == 'POST':
+        gateway_id = request.POST.get('gateway_id')
+        api_key = request.POST.get('api_key')
+        secret_key = request.POST.get('secret_key')
+        is_active = request.POST.get('is_active') == 'on'
+        is_test_mode = request.POST.get('is_test_mode') == 'on'
+        
+        if gateway_id and api_key and secret_key:
+            gateway = get_object_or_404(PaymentGateway, id=gateway_id)
+            gateway.api_key = api_key
+            gateway.secret_key = secret_key
+            gateway.is_active = is_active
+            gateway.is_test_mode = is_test_mode
+            gateway.save()
+            
+            messages.success(request, f'{gateway.display_name} settings updated!')
+        else:
+            messages.error(request, 'Please fill all required fields.')
+    
+    return render(request, 'veteran_app/payment_settings.html', {
+        'gateways': gateways
+    })
@@ -0,0 +1,519 @@
+"""Treasurer and member payment views"""
+from datetime import date
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.http import JsonResponse
+from django.utils.html import escape
+from .models import VeteranMember, VeteranUser, FinancialYear, Transaction, BankAccount
+from . import ledger
+
+# transaction_list / export_transactions query parameters
+TRANSACTION_FILTERS = ('type', 'method', 'from_date', 'to_date')
+
+# Treasurer Financial Management Views
+@login_required
+def treasurer_dashboard(request):
+    """Treasurer dashboard with financial overview"""
+    # Allow superuser and accounts user
+    if not (request.user.is_superuser or request.user.username == 'accounts'):
+        messages.error(request, 'Access denied. Only superuser and accounts user can access treasurer dashboard.')
+        return redirect('index')
+    
+    from django.db.models import Count, Q
+    from datetime import datetime, timedelta
+    
+    # Get current financial year or create default
+    current_year = datetime.now().year
+    financial_year, created = FinancialYear.objects.get_or_create(
+        year=f"{current_year}-{current_year+1}",
+        defaults={
+            'start_date': datetime(current_year, 4, 1).date(),
+            'end_date': datetime(current_year+1, 3, 31).date(),
+            'is_active': True
+        }
+    )
+    
+    # Other transactions (donations, expenses, other income)
+    transactions = Transaction.objects.filter(financial_year=financial_year)
+    
+    # Totals per transaction type for the year, from the ledger rollups
+    by_type = ledger.summarize_transactions(
+        ledger.rollup_rows(financial_year), {'financial_year': financial_year.pk}
+    )['by_type']
+    
+    subscription_income = by_type['subscription']['total']
+    # Count paid subscriptions in current financial year
+    paid_subscriptions = by_type['subscription']['count']
+    other_income = by_type['donation']['total'] + by_type['other_income']['total']
+    total_expenses = by_type['expense']['total']
+    
+    total_income = subscription_income + other_income
+    
+    financial_summary = {
+        'total_income': total_income,
+        'subscription_income': subscription_income,
+        'other_income': other_income,
+        'total_expenses': total_expenses,
+        'net_balance': total_income - total_expenses,
+        'active_members': VeteranMember.objects.filter(membership=True).count(),
+        'paid_subscriptions': paid_subscriptions
+    }
+    
+    # Subscription statistics, with the bands of VeteranMember.get_subscription_status
+    # (due 365 days after payment, "Due Soon" within 15 days either side)
+    from datetime import date
+    today = date.today()
+    subscription_stats = VeteranMember.objects.aggregate(
+        active=Count('pk', filter=Q(subscription_paid_on__gt=today - timedelta(days=350))),
+        due_soon=Count('pk', filter=Q(subscription_paid_on__gte=today - timedelta(days=380),
+                                      subscription_paid_on__lte=today - timedelta(days=350))),
+        overdue=Count('pk', filter=Q(subscription_paid_on__lt=today - timedelta(days=380))),
+        no_payment=Count('pk', filter=Q(subscription_paid_on__isnull=True)),
+    )
+    
+    # Recent transactions (expenses and other income only)
+    recent_transactions = transactions.select_related('veteran').order_by('-created_at')[:10]
+    
+    # Recent subscription payments from veterans
+    recent_subscriptions = VeteranMember.objects.filter(
+        subscription_paid_on__isnull=False
+    ).order_by('-subscription_paid_on')[:5]
+    
+    # Bank accounts
+    bank_accounts = BankAccount.objects.filter(is_active=True)
+    
+    return render(request, 'veteran_app/treasurer_dashboard.html', {
+        'financial_summary': financial_summary,
+        'subscription_stats': subscription_stats,
+        'recent_transactions': recent_transactions,
+        'recent_subscriptions': recent_subscriptions,
+        'bank_accounts': bank_accounts,
+        'financial_year': financial_year,
+        'monthly_trend': ledger.monthly_trend(financial_year)
+    })
+
+@login_required
+def add_transaction(request):
+    """Add new financial transaction"""
+    # Allow superuser and accounts user
+    if not (request.user.is_superuser or request.user.username == 'accounts'):
+        messages.error(request, 'Access denied.')
+        return redirect('index')
+    
+    if request.method == 'POST':
+        import uuid
+        from datetime import datetime
+        from decimal import Decimal, InvalidOperation
+        
+        # Validate and sanitize inputs
+        try:
+            veteran_id = int(request.POST.get('veteran')) if request.POST.get('veteran') else None
+        except (ValueError, TypeError):
+            veteran_id = None
+        
+        transaction_type = request.POST.get('transaction_type', '').strip()
+        payment_method = request.POST.get('payment_method', '').strip()
+        reference_number = escape(request.POST.get('reference_number', '').strip())
+        description = escape(request.POST.get('description', '').strip())
+        
+        # Validate transaction type and payment method
+        valid_types = ['subscription', 'donation', 'expense', 'refund', 'other_income', 'event_fee', 'crowdfunding']
+        valid_methods = ['cash', 'bank_transfer', 'upi', 'cheque', 'online']
+        
+        if transaction_type not in valid_types:
+            messages.error(request, 'Invalid transaction type.')
+            return redirect('treasurer_dashboard')
+        
+        if payment_method not in valid_methods:
+            messages.error(request, 'Invalid payment method.')
+            return redirect('treasurer_dashboard')
+        
+        # Validate amount
+        try:
+            amount = Decimal(request.POST.get('amount', '0'))
+            if amount <= 0 or amount > Decimal('999999.99'):
+                messages.error(request, 'Invalid amount.')
+                return redirect('treasurer_dashboard')
+        except (InvalidOperation, ValueError):
+            messages.error(request, 'Invalid amount format.')
+            return redirect('treasurer_dashboard')
+        
+        # Generate unique transaction ID
+        transaction_id = f"TXN{datetime.now().strftime('%Y%m%d')}{str(uuid.uuid4())[:8].upper()}"
+        
+        try:
+            # Get current financial year
+            current_year = datetime.now().year
+            financial_year = FinancialYear.objects.get(
+                year=f"{current_year}-{current_year+1}"
+            )
+            
+            # Create transaction
+            transaction = Transaction.objects.create(
+                transaction_id=transaction_id,
+                veteran_id=veteran_id,
+                transaction_type=transaction_type,
+                amount=amount,
+                payment_method=payment_method,
+                reference_number=reference_number[:100],  # Limit length
+                description=description[:500],  # Limit length
+                receipt=request.FILES.get('receipt'),
+                financial_year=financial_year,
+                recorded_by=request.user
+            )
+        except FinancialYear.DoesNotExist:
+            messages.error(request, 'Financial year not found.')
+            return redirect('treasurer_dashboard')
+        except Exception:
+            messages.error(request, 'Error creating transaction.')
+            return redirect('treasurer_dashboard')
+        
+        # Update veteran subscription if applicable
+        if transaction.transaction_type == 'subscription' and transaction.veteran:
+            veteran = transaction.veteran
+            veteran.subscription_paid_on = date.today()
+            veteran.membership = True
+            veteran.save()
+        
+        messages.success(request, f'Transaction {transaction_id} added successfully!')
+    
+    return redirect('treasurer_dashboard')
+
+def _rollup_months(from_date, to_date):
+    """The month range of a from/to date filter the ledger rollups can answer, or None"""
+    from django.utils.dateparse import parse_date
+    
+    try:
+        start = parse_date(from_date) if from_date else None
+        end = parse_date(to_date) if to_date else None
+    except ValueError:
+        return None
+    if (from_date and start is None) or (to_date and end is None):
+        return None
+    return ledger.whole_months(start, end)
+
+def _filtered_transactions(params):
+    """Transactions narrowed by the type/method/date parameters, and those parameters"""
+    filters = {name: params[name] for name in TRANSACTION_FILTERS if params.get(name)}
+    transactions = Transaction.objects.select_related('veteran').order_by('-created_at')
+    if filters.get('type'):
+        transactions = transactions.filter(transaction_type=filters['type'])
+    if filters.get('method'):
+        transactions = transactions.filter(payment_method=filters['method'])
+    if filters.get('from_date'):
+        transactions = transactions.filter(created_at__date__gte=filters['from_date'])
+    if filters.get('to_date'):
+        transactions = transactions.filter(created_at__date__lte=filters['to_date'])
+    return transactions, filters
+
+def _transaction_summary(transactions, filters):
+    """The (cached) summary of filtered transactions, from the ledger rollups unless the dates cut through a month"""
+    months = _rollup_months(filters.get('from_date'), filters.get('to_date'))
+    if months:
+        transactions = ledger.rollup_rows(
+            months=months, transaction_type=filters.get('type'), payment_method=filters.get('method')
+        )
+    return ledger.summarize_transactions(transactions, filters)
+
+def _write_summary(writer, summary):
+    """Summary rows of a CSV export: totals, then the breakdown by type and by method"""
+    writer.writerow(['Summary'])
+    writer.writerow(['Total Income', f'₹{summary["income"]}'])
+    writer.writerow(['Total Expenses', f'₹{summary["expenses"]}'])
+    writer.writerow(['Net Balance', f'₹{summary["net"]}'])
+    writer.writerow(['Transactions', summary['count']])
+    for heading, breakdown in (('By Type', summary['by_type']), ('By Payment Method', summary['by_method'])):
+        writer.writerow([])
+        writer.writerow([heading, 'Amount', 'Count'])
+        for row in breakdown.values():
+            if row['count']:
+                writer.writerow([row['label'], f'₹{row["total"]}', row['count']])
+
+@login_required
+def transaction_list(request):
+    """List all transactions with filtering"""
+    # Allow superuser and accounts user
+    if not (request.user.is_superuser or request.user.username == 'accounts'):
+        messages.error(request, 'Access denied.')
+        return redirect('index')
+    
+    from django.core.paginator import Paginator
+    
+    # Apply filters
+    transactions, filters = _filtered_transactions(request.GET)
+    
+    # Calculate summary
+    totals = _transaction_summary(transactions, filters)
+    summary = {
+        'total_income': totals['income'],
+        'total_expenses': totals['expenses'],
+        'net_amount': totals['net']
+    }
+    
+    # Pagination
+    paginator = Paginator(transactions, 25)
+    page_number = request.GET.get('page')
+    transactions = paginator.get_page(page_number)
+    
+    return render(request, 'veteran_app/transaction_list.html', {
+        'transactions': transactions,
+        'summary': summary
+    })
+
+@login_required
+def transaction_detail(request, transaction_id):
+    """Get transaction details for modal view"""
+    # Allow superuser and accounts user
+    if not (request.user.is_superuser or request.user.username == 'accounts'):
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    transaction = get_object_or_404(Transaction, id=transaction_id)
+    
+    html = f"""
+    <div class="row">
+        <div class="col-md-6">
+            <strong>Transaction ID:</strong> {transaction.transaction_id}<br>
+            <strong>Type:</strong> {transaction.get_transaction_type_display()}<br>
+            <strong>Amount:</strong> ₹{transaction.amount}<br>
+            <strong>Payment Method:</strong> {transaction.get_payment_method_display()}<br>
+        </div>
+        <div class="col-md-6">
+            <strong>Date:</strong> {transaction.created_at.strftime('%B %d, %Y at %I:%M %p')}<br>
+            <strong>Member:</strong> {transaction.veteran.name if transaction.veteran else 'N/A'}<br>
+            <strong>Reference:</strong> {transaction.reference_number or 'N/A'}<br>
+            <strong>Recorded By:</strong> {transaction.recorded_by.username}<br>
+        </div>
+    </div>
+    {f'<div class="mt-3"><strong>Description:</strong><br>{transaction.description}</div>' if transaction.description else ''}
+    """
+    
+    return JsonResponse({'html': html})
+
+@login_required
+def delete_transaction(request, transaction_id):
+    """Delete a transaction"""
+    # Allow superuser and accounts user
+    if not (request.user.is_superuser or request.user.username == 'accounts'):
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    
+    if request.method == 'POST':
+        transaction = get_object_or_404(Transaction, id=transaction_id)
+        transaction.delete()
+        messages.success(request, 'Transaction deleted successfully!')
+    
+    return JsonResponse({'success': True})
+
+@login_required
+def generate_financial_report(request):
+    """Generate financial reports
+
+    Used to be shadowed by the member report of the same name in views.py;
+    kept under its own name and not routed, the 'generate_report' URL still
+    serves report_views.generate_report.
+    """
+    # Allow superuser and accounts user
+    if not (request.user.is_superuser or request.user.username == 'accounts'):
+        messages.error(request, 'Access denied.')
+        return redirect('index')
+    
+    if request.method == 'POST':
+        from django.http import HttpResponse
+        import csv
+        from datetime import datetime
+        
+        start_date = request.POST.get('start_date')
+        end_date = request.POST.get('end_date')
+        report_type = request.POST.get('report_type')
+        
+        # Filter transactions
+        transactions, filters = _filtered_transactions({'from_date': start_date, 'to_date': end_date})
+        
+        # Calculate totals
+        summary = _transaction_summary(transactions, filters)
+        
+        # Create CSV response
+        response = HttpResponse(content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="financial_report_{start_date}_to_{end_date}.csv"'
+        
+        writer = csv.writer(response)
+        writer.writerow(['Financial Report', f'{start_date} to {end_date}'])
+        writer.writerow([])
+        _write_summary(writer, summary)
+        writer.writerow([])
+        writer.writerow(['Transaction Details'])
+        writer.writerow(['Date', 'Transaction ID', 'Type', 'Member', 'Amount', 'Method', 'Reference', 'Description'])
+        
+        for transaction in transactions.iterator(chunk_size=2000):
+            writer.writerow([
+                transaction.created_at.strftime('%Y-%m-%d %H:%M'),
+                transaction.transaction_id,
+                transaction.get_transaction_type_display(),
+                transaction.veteran.name if transaction.veteran else 'N/A',
+                transaction.amount,
+                transaction.get_payment_method_display(),
+                transaction.reference_number,
+                transaction.description
+            ])
+        
+        return response
+    
+    return redirect('treasurer_dashboard')
+
+@login_required
+def export_transactions(request):
+    """Export transactions to CSV"""
+    # Allow superuser and accounts user
+    if not (request.user.is_superuser or request.user.username == 'accounts'):
+        messages.error(request, 'Access denied.')
+        return redirect('index')
+    
+    from django.http import HttpResponse
+    import csv
+    
+    # Apply same filters as transaction_list
+    transactions, filters = _filtered_transactions(request.GET)
+    
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="transactions.csv"'
+    
+    writer = csv.writer(response)
+    writer.writerow(['Date', 'Transaction ID', 'Type', 'Member', 'Amount', 'Method', 'Reference', 'Description'])
+    
+    for transaction in transactions.iterator(chunk_size=2000):
+        writer.writerow([
+            transaction.created_at.strftime('%Y-%m-%d %H:%M'),
+            transaction.transaction_id,
+            transaction.get_transaction_type_display(),
+            transaction.veteran.name if transaction.veteran else 'N/A',
+            transaction.amount,
+            transaction.get_payment_method_display(),
+            transaction.reference_number,
+            transaction.description
+        ])
+    
+    writer.writerow([])
+    _write_summary(writer, _transaction_summary(transactions, filters))
+    
+    return response
+
+# VETERAN PAYMENT CRUD VIEWS
+@login_required
+def veteran_add_payment(request):
+    """Veteran adds their own payment transaction"""
+    try:
+        veteran_user = request.user.veteran_profile
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Only veterans can add payments'}, status=403)
+    
+    if request.method == 'POST':
+        import uuid
+        from datetime import datetime
+        from decimal import Decimal
+        
+        transaction_type = request.POST.get('transaction_type', 'subscription')
+        amount = Decimal(request.POST.get('amount', '0'))
+        payment_method = request.POST.get('payment_method', 'online')
+        reference_number = request.POST.get('reference_number', '').strip()
+        description = request.POST.get('description', '').strip()
+        
+        if amount <= 0:
+            return JsonResponse({'success': False, 'error': 'Invalid amount'}, status=400)
+        
+        # Validate transaction type
+        valid_types = ['subscription', 'donation', 'event_fee', 'crowdfunding', 'other_income']
+        if transaction_type not in valid_types:
+            return JsonResponse({'success': False, 'error': 'Invalid transaction type'}, status=400)
+        
+        # Get current financial year
+        current_year = datetime.now().year
+        financial_year, created = FinancialYear.objects.get_or_create(
+            year=f"{current_year}-{current_year+1}",
+            defaults={
+                'start_date': datetime(current_year, 4, 1).date(),
+                'end_date': datetime(current_year+1, 3, 31).date(),
+                'is_active': True
+            }
+        )
+        
+        # Generate transaction ID
+        transaction_id = f"PAY{datetime.now().strftime('%Y%m%d')}{str(uuid.uuid4())[:8].upper()}"
+        
+        # Create transaction
+        Transaction.objects.create(
+            transaction_id=transaction_id,
+            veteran=veteran,
+            transaction_type=transaction_type,
+            amount=amount,
+            payment_method=payment_method,
+            reference_number=reference_number,
+            description=description or f'{transaction_type.replace("_", " ").title()} payment by {veteran.name}',
+            financial_year=financial_year,
+            recorded_by=request.user
+        )
+        
+        return JsonResponse({'success': True, 'message': 'Payment added successfully!'})
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
+
+@login_required
+def veteran_edit_payment(request, transaction_id):
+    """Veteran edits their own payment transaction"""
+    try:
+        veteran_user = request.user.veteran_profile
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
+    
+    transaction = get_object_or_404(Transaction, id=transaction_id, veteran=veteran)
+    
+    if request.method == 'POST':
+        from decimal import Decimal
+        
+        transaction_type = request.POST.get('transaction_type', transaction.transaction_type)
+        amount = Decimal(request.POST.get('amount', '0'))
+        payment_method = request.POST.get('payment_method', transaction.payment_method)
+        reference_number = request.POST.get('reference_number', '').strip()
+        description = request.POST.get('description', '').strip()
+        
+        if amount <= 0:
+            return JsonResponse({'success': False, 'error': 'Invalid amount'}, status=400)
+        
+        # Validate transaction type
+        valid_types = ['subscription', 'donation', 'event_fee', 'crowdfunding', 'other_income']
+        if transaction_type not in valid_types:
+            return JsonResponse({'success': False, 'error': 'Invalid transaction type'}, status=400)
+        
+        transaction.transaction_type = transaction_type
+        transaction.amount = amount
+        transaction.payment_method = payment_method
+        transaction.reference_number = reference_number
+        transaction.description = description
+        transaction.save()
+        
+        return JsonResponse({'success': True, 'message': 'Payment updated successfully!'})
+    
+    # Return transaction data for modal
+    return JsonResponse({
+        'id': transaction.id,
+        'transaction_type': transaction.transaction_type,
+        'amount': str(transaction.amount),
+        'payment_method': transaction.payment_method,
+        'reference_number': transaction.reference_number,
+        'description': transaction.description
+    })
+
+@login_required
+def veteran_delete_payment(request, transaction_id):
+    """Veteran deletes their own payment transaction"""
+    try:
+        veteran_user = request.user.veteran_profile
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
+    
+    transaction = get_object_or_404(Transaction, id=transaction_id, veteran=veteran)
+    transaction.delete()
+    
+    return JsonResponse({'success': True, 'message': 'Payment deleted successfully!'})
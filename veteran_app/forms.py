@@ -10,6 +10,40 @@ from .models import (Rank, Branch, VeteranMember, CarouselSlide, State,
 from .validators import validate_phone_number
 Group = Branch  # Backward compatibility
 
+
+class MemberAutocompleteSelect(forms.Select):
+    """Veteran select filled by typeahead (static/js/member_autocomplete.js)
+
+    Only the selected member is rendered as an option, so the page never
+    loads the whole member table; the script fetches matches from
+    member_autocomplete as the user types. ``params`` are extra query
+    parameters for the endpoint (e.g. approved=1).
+    """
+
+    def __init__(self, attrs=None, params=None):
+        super().__init__(attrs)
+        self.params = params or {}
+
+    def get_context(self, name, value, attrs):
+        from urllib.parse import urlencode
+        from django.urls import reverse
+
+        context = super().get_context(name, value, attrs)
+        url = reverse('member_autocomplete')
+        if self.params:
+            url = f'{url}?{urlencode(self.params)}'
+        context['widget']['attrs']['data-autocomplete-url'] = url
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [str(v) for v in value if v not in ('', None)]
+        options = [self.create_option(name, '', '---------', not selected, 0)]
+        queryset = getattr(self.choices, 'queryset', None)
+        if selected and queryset is not None:
+            for index, member in enumerate(queryset.filter(pk__in=selected), start=1):
+                options.append(self.create_option(name, member.pk, f'{member.name} ({member.association_number})', True, index))
+        return [(None, options, 0)]
+
 class LoginForm(AuthenticationForm):
     username = forms.CharField(
         widget=forms.TextInput(attrs={
@@ -368,7 +402,7 @@ class VeteranRegistrationForm(forms.Form):
 class CreateVeteranUserForm(forms.Form):
     veteran = forms.ModelChoiceField(
         queryset=VeteranMember.objects.none(),
-        widget=forms.Select(attrs={'class': 'form-select'}),
+        widget=MemberAutocompleteSelect(attrs={'class': 'form-select'}, params={'without_account': 1}),
         help_text='Select a veteran without user account'
     )
     username = forms.CharField(
@@ -391,6 +425,8 @@ class CreateVeteranUserForm(forms.Form):
                 user_account__isnull=False
             )
             self.fields['veteran'].queryset = veterans_without_accounts
+            widget = self.fields['veteran'].widget
+            widget.params = {**widget.params, 'state': state.pk}
     
     def clean_username(self):
         username = self.cleaned_data['username']
@@ -554,7 +590,7 @@ class TransactionForm(forms.Form):
     veteran = forms.ModelChoiceField(
         queryset=VeteranMember.objects.filter(approved=True),
         required=False,
-        widget=forms.Select(attrs={'class': 'form-select'})
+        widget=MemberAutocompleteSelect(attrs={'class': 'form-select'}, params={'approved': 1})
     )
     transaction_type = forms.ChoiceField(
         choices=TRANSACTION_TYPES,
@@ -0,0 +1,240 @@
+"""Association ID card views
+
+ReportLab is only imported inside the PDF views so it is not loaded until a
+card is actually downloaded.
+"""
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.http import FileResponse
+from .decorators import require_state_access
+from .models import VeteranMember, State, VeteranUser
+
+# ASSOCIATION ID CARD VIEWS
+@login_required
+def association_id_card(request):
+    """Display Association Identity Card for approved veterans"""
+    try:
+        veteran_user = request.user.veteran_profile
+        if not veteran_user.approved:
+            messages.error(request, 'Your account is pending approval. You cannot access the ID card.')
+            return redirect('veteran_welcome')
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        messages.error(request, 'Only approved veterans can access the Association ID Card.')
+        return redirect('index')
+    
+    # Generate association number if not exists
+    if not veteran.association_number:
+        veteran.generate_association_number()
+        veteran.save()
+    
+    # Check if ID card is valid (not expired)
+    is_valid = veteran.is_id_card_valid()
+    renewal_due_date = veteran.get_renewal_due_date()
+    
+    # Terms and conditions for the back of the card
+    terms_conditions = [
+        "1. This card is the property of the Indian Coast Guard Veteran Welfare Association (ICGVWA).",
+        "2. This card is non-transferable and must be carried by the member at all times during association events.",
+        "3. Loss of this card must be reported immediately to the state association office.",
+        "4. This card is valid for one year and must be renewed annually.",
+        "5. The member agrees to abide by the constitution and by-laws of ICGVWA.",
+        "6. Any misuse of this card will result in immediate cancellation of membership.",
+        "7. The association reserves the right to verify the authenticity of this card at any time.",
+        "8. For any queries or assistance, contact your state head (or) Admin Staff."
+    ]
+    
+    # Issuing authority information
+    issuing_authority = {
+        'title': 'Secretary',
+        'organization': 'Indian Coast Guard Veteran Welfare Association',
+        'signature_line': 'Authorized Signature'
+    }
+    
+    return render(request, 'veteran_app/association_id_card.html', {
+        'veteran': veteran,
+        'is_valid': is_valid,
+        'renewal_due_date': renewal_due_date,
+        'terms_conditions': terms_conditions,
+        'issuing_authority': issuing_authority
+    })
+
+@login_required
+def download_id_card(request):
+    """Download Association ID Card as PDF in A4 format"""
+    try:
+        veteran_user = request.user.veteran_profile
+        if not veteran_user.approved:
+            messages.error(request, 'Your account is pending approval.')
+            return redirect('veteran_welcome')
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        messages.error(request, 'Access denied.')
+        return redirect('index')
+    
+    from django.http import HttpResponse
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch, cm
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+    from reportlab.lib import colors
+    from io import BytesIO
+    import os
+    from .id_cards import get_id_card_styles
+    
+    # Create PDF buffer
+    buffer = BytesIO()
+    
+    # Create A4 PDF document
+    doc = SimpleDocTemplate(buffer, pagesize=A4, 
+                           rightMargin=2*cm, leftMargin=2*cm, 
+                           topMargin=2*cm, bottomMargin=2*cm)
+    
+    # Container for the 'Flowable' objects
+    elements = []
+    
+    # Shared ID card styles (built once per process, never mutated)
+    card_styles = get_id_card_styles()
+    title_style = card_styles['title']
+    heading_style = card_styles['heading']
+    normal_style = card_styles['normal']
+    small_style = card_styles['small']
+    
+    # HEADER
+    elements.append(Paragraph("<b>INDIAN COAST GUARD VETERAN WELFARE ASSOCIATION</b>", title_style))
+    elements.append(Paragraph("<b>ASSOCIATION IDENTITY CARD</b>", heading_style))
+    elements.append(Spacer(1, 1*cm))
+    
+    # MEMBER INFORMATION TABLE
+    photo_cell = "No Photo"
+    if veteran.profile_photo:
+        try:
+            photo_path = veteran.profile_photo.path
+            if os.path.exists(photo_path):
+                photo_cell = Image(photo_path, width=4*cm, height=5*cm)
+        except:
+            pass
+    
+    # Member details
+    member_data = [
+        ['Association Number:', veteran.association_number or 'Not Assigned'],
+        ['Name:', veteran.name],
+        ['Rank:', f"{veteran.rank.name} (Retd.)"],
+        ['Service Number:', veteran.service_number],
+        ['State:', veteran.state.name],
+        ['Blood Group:', veteran.blood_group.name],
+        ['Contact:', veteran.contact],
+        ['Date of Birth:', veteran.date_of_birth.strftime('%d-%m-%Y')],
+        ['Association Date:', veteran.association_date.strftime('%d-%m-%Y') if veteran.association_date else 'N/A'],
+    ]
+    
+    # Create main table with photo and details
+    main_table_data = [[photo_cell, Table(member_data, colWidths=[4*cm, 8*cm])]]
+    main_table = Table(main_table_data, colWidths=[5*cm, 12*cm])
+    main_table.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (0, 0), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('FONTSIZE', (1, 0), (1, 0), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('BACKGROUND', (0, 0), (-1, -1), colors.lightblue),
+        ('LEFTPADDING', (0, 0), (-1, -1), 12),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+        ('TOPPADDING', (0, 0), (-1, -1), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ]))
+    
+    elements.append(main_table)
+    elements.append(Spacer(1, 1*cm))
+    
+    # VALIDITY INFORMATION
+    renewal_date = veteran.get_renewal_due_date()
+    validity_text = f"Valid until: {renewal_date.strftime('%d-%m-%Y')}" if renewal_date else "Validity: Contact Association"
+    elements.append(Paragraph(f"<b>{validity_text}</b>", normal_style))
+    
+    status = "VALID" if veteran.is_id_card_valid() else "EXPIRED"
+    elements.append(Paragraph(f"<b>STATUS: {status}</b>", normal_style))
+    elements.append(Spacer(1, 1*cm))
+    
+    # TERMS AND CONDITIONS
+    elements.append(Paragraph("<b>TERMS AND CONDITIONS</b>", heading_style))
+    
+    terms = [
+        "1. This card is the property of the Indian Coast Guard Veteran Welfare Association (ICGVWA).",
+        "2. This card is non-transferable and must be carried by the member at all times during association events.",
+        "3. Loss of this card must be reported immediately to the state association office.",
+        "4. This card is valid for one year and must be renewed annually.",
+        "5. The member agrees to abide by the constitution and by-laws of ICGVWA.",
+        "6. Any misuse of this card will result in immediate cancellation of membership."
+    ]
+    
+    for term in terms:
+        elements.append(Paragraph(term, small_style))
+    
+    elements.append(Spacer(1, 1*cm))
+    
+    # ISSUING AUTHORITY
+    authority_text = f"""<b>ISSUING AUTHORITY</b><br/>
+Indian Coast Guard Veteran Welfare Association<br/>
+{veteran.state.name} Chapter<br/>
+Issue Date: {veteran.association_date.strftime('%d-%m-%Y') if veteran.association_date else 'N/A'}<br/>
+<br/>
+_________________________<br/>
+Secretary, ICGVWA {veteran.state.name}"""
+    
+    elements.append(Paragraph(authority_text, normal_style))
+    
+    # Build PDF
+    doc.build(elements)
+    
+    # Get PDF data
+    pdf_data = buffer.getvalue()
+    buffer.close()
+    
+    # Create response
+    response = HttpResponse(pdf_data, content_type='application/pdf')
+    filename = f"ICGVWA_ID_Card_{veteran.association_number or veteran.service_number}.pdf"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    
+    return response
+
+@require_state_access()
+def download_state_id_cards(request, state_id):
+    """Download ID cards for a state's approved members, imposed several per A4 sheet
+
+    The PDF is built within the request and ReportLab keeps every page in
+    memory until it is saved, so selections above ID_CARD_SHEETS_MAX_INLINE
+    cards are left to the generate_id_card_sheets command.
+    """
+    import tempfile
+    from django.conf import settings
+    from .id_cards import build_id_card_sheets
+    
+    state = get_object_or_404(State, id=state_id)
+    
+    members = VeteranMember.objects.filter(state=state, approved=True)
+    # Optional subset: ?member=<association_id>&member=...
+    member_ids = [int(pk) for pk in request.GET.getlist('member') if pk.isdigit()]
+    if member_ids:
+        members = members.filter(association_id__in=member_ids)
+    
+    limit = getattr(settings, 'ID_CARD_SHEETS_MAX_INLINE', 500)
+    if members.count() > limit:
+        messages.error(
+            request,
+            f'More than {limit} ID cards are too many to build while you wait. Select fewer members, or ask '
+            f'an administrator to run "manage.py generate_id_card_sheets --state {state.code}".'
+        )
+        return redirect('state_members', state_id=state.id)
+    
+    # The response streams from a temporary file; the canvas itself still holds every page until save()
+    spool = tempfile.TemporaryFile()
+    build_id_card_sheets(members, spool, title=f'ICGVWA ID Cards - {state.name}')
+    spool.seek(0)
+    
+    return FileResponse(
+        spool,
+        content_type='application/pdf',
+        as_attachment=True,
+        filename=f"ICGVWA_ID_Cards_{state.code}.pdf"
+    )
@@ -0,0 +1,175 @@
+"""Association ID card rendering with ReportLab
+
+Shared styles and drawing helpers used by the single-card download and by the
+bulk sheet generator, which imposes several CR80-sized cards on each A4 page.
+"""
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Paragraph
+
+from .thumbnails import get_thumbnail_path
+
+# Standard CR80 card size, imposed 2 x 5 on an A4 sheet
+CARD_WIDTH = 85.6 * mm
+CARD_HEIGHT = 54 * mm
+CARD_COLUMNS = 2
+CARD_ROWS = 5
+CARDS_PER_PAGE = CARD_COLUMNS * CARD_ROWS
+CARD_GAP_X = 6 * mm
+CARD_GAP_Y = 3 * mm
+
+PHOTO_WIDTH = 20 * mm
+PHOTO_HEIGHT = 25 * mm
+# Thumbnail pixels for the photo box (~300 dpi)
+PHOTO_THUMBNAIL_SIZE = (240, 300)
+
+ORGANISATION_NAME = 'INDIAN COAST GUARD VETERAN WELFARE ASSOCIATION'
+HEADER_COLOR = colors.HexColor('#0b3d91')
+
+
+@lru_cache(maxsize=1)
+def get_id_card_styles():
+    """Return the paragraph styles shared by all ID card renderers.
+
+    Styles are built once per process instead of mutating the sample
+    stylesheet on every request.
+    """
+    return {
+        'title': ParagraphStyle('IdCardTitle', fontName='Helvetica-Bold', fontSize=16, leading=20,
+                                textColor=colors.blue, alignment=TA_CENTER, spaceAfter=12),
+        'heading': ParagraphStyle('IdCardHeading', fontName='Helvetica-Bold', fontSize=14, leading=18,
+                                  textColor=colors.black, alignment=TA_CENTER, spaceAfter=12),
+        'normal': ParagraphStyle('IdCardNormal', fontName='Helvetica', fontSize=12, leading=15, spaceAfter=6),
+        'small': ParagraphStyle('IdCardSmall', fontName='Helvetica', fontSize=10, leading=12, spaceAfter=4),
+        'card_name': ParagraphStyle('IdCardName', fontName='Helvetica-Bold', fontSize=8, leading=9.5),
+        'card_text': ParagraphStyle('IdCardText', fontName='Helvetica', fontSize=6.5, leading=8),
+    }
+
+
+def _card_origin(slot):
+    """Bottom-left corner of the card in the given slot (0-based, row-major from the top)"""
+    page_width, page_height = A4
+    block_width = CARD_COLUMNS * CARD_WIDTH + (CARD_COLUMNS - 1) * CARD_GAP_X
+    block_height = CARD_ROWS * CARD_HEIGHT + (CARD_ROWS - 1) * CARD_GAP_Y
+    left = (page_width - block_width) / 2
+    top = page_height - (page_height - block_height) / 2
+
+    row, column = divmod(slot, CARD_COLUMNS)
+    x = left + column * (CARD_WIDTH + CARD_GAP_X)
+    y = top - (row + 1) * CARD_HEIGHT - row * CARD_GAP_Y
+    return x, y
+
+
+def _draw_crop_marks(pdf):
+    """Light cut guides around every card slot"""
+    pdf.saveState()
+    pdf.setStrokeColor(colors.lightgrey)
+    pdf.setLineWidth(0.3)
+    for slot in range(CARDS_PER_PAGE):
+        x, y = _card_origin(slot)
+        pdf.rect(x - 0.5 * mm, y - 0.5 * mm, CARD_WIDTH + 1 * mm, CARD_HEIGHT + 1 * mm, stroke=1, fill=0)
+    pdf.restoreState()
+
+
+def draw_id_card(pdf, veteran, x, y):
+    """Draw one association ID card with its bottom-left corner at (x, y)"""
+    styles = get_id_card_styles()
+    pdf.saveState()
+
+    # Card outline and header band
+    pdf.setStrokeColor(HEADER_COLOR)
+    pdf.setFillColor(colors.HexColor('#eef4ff'))
+    pdf.roundRect(x, y, CARD_WIDTH, CARD_HEIGHT, 3 * mm, stroke=1, fill=1)
+    header_height = 9 * mm
+    pdf.setFillColor(HEADER_COLOR)
+    pdf.rect(x, y + CARD_HEIGHT - header_height, CARD_WIDTH, header_height, stroke=0, fill=1)
+    pdf.setFillColor(colors.white)
+    pdf.setFont('Helvetica-Bold', 6)
+    pdf.drawCentredString(x + CARD_WIDTH / 2, y + CARD_HEIGHT - 4 * mm, ORGANISATION_NAME)
+    pdf.setFont('Helvetica', 5.5)
+    pdf.drawCentredString(x + CARD_WIDTH / 2, y + CARD_HEIGHT - 7.3 * mm, 'ASSOCIATION IDENTITY CARD')
+
+    # Photo box
+    photo_x = x + 3 * mm
+    photo_y = y + CARD_HEIGHT - header_height - 2 * mm - PHOTO_HEIGHT
+    photo_path = get_thumbnail_path(veteran.profile_photo, PHOTO_THUMBNAIL_SIZE)
+    if photo_path:
+        pdf.drawImage(photo_path, photo_x, photo_y, PHOTO_WIDTH, PHOTO_HEIGHT)
+    else:
+        pdf.setFillColor(colors.white)
+        pdf.rect(photo_x, photo_y, PHOTO_WIDTH, PHOTO_HEIGHT, stroke=1, fill=1)
+        pdf.setFillColor(colors.grey)
+        pdf.setFont('Helvetica', 6)
+        pdf.drawCentredString(photo_x + PHOTO_WIDTH / 2, photo_y + PHOTO_HEIGHT / 2, 'No Photo')
+
+    # Member details
+    text_x = photo_x + PHOTO_WIDTH + 3 * mm
+    text_width = x + CARD_WIDTH - 3 * mm - text_x
+    cursor_y = y + CARD_HEIGHT - header_height - 2 * mm
+
+    lines = [
+        Paragraph(veteran.name, styles['card_name']),
+        Paragraph(f"{veteran.rank.name} (Retd.)", styles['card_text']),
+        Paragraph(f"<b>Assn. No:</b> {veteran.association_number or 'Not Assigned'}", styles['card_text']),
+        Paragraph(f"<b>Service No:</b> {veteran.service_number}", styles['card_text']),
+        Paragraph(f"<b>State:</b> {veteran.state.name}", styles['card_text']),
+        Paragraph(f"<b>Blood Group:</b> {veteran.blood_group.name}", styles['card_text']),
+    ]
+    for paragraph in lines:
+        _, height = paragraph.wrapOn(pdf, text_width, CARD_HEIGHT)
+        cursor_y -= height
+        paragraph.drawOn(pdf, text_x, cursor_y)
+        cursor_y -= 0.6 * mm
+
+    # Validity footer
+    renewal_date = veteran.get_renewal_due_date()
+    validity_text = f"Valid until: {renewal_date.strftime('%d-%m-%Y')}" if renewal_date else 'Validity: Contact Association'
+    is_valid = veteran.is_id_card_valid()
+    pdf.setFont('Helvetica', 6)
+    pdf.setFillColor(colors.black)
+    pdf.drawString(x + 3 * mm, y + 3 * mm, validity_text)
+    pdf.setFont('Helvetica-Bold', 6.5)
+    pdf.setFillColor(colors.darkgreen if is_valid else colors.red)
+    pdf.drawRightString(x + CARD_WIDTH - 3 * mm, y + 3 * mm, 'VALID' if is_valid else 'EXPIRED')
+
+    pdf.restoreState()
+
+
+def build_id_card_sheets(members, output, chunk_size=200, title='ICGVWA ID Cards'):
+    """Render members onto imposed A4 sheets and write the PDF to output.
+
+    members is a VeteranMember queryset, fetched from the database in chunks
+    of chunk_size. The ReportLab canvas still keeps every page in memory until
+    save(), so large batches belong in the generate_id_card_sheets command,
+    which splits them into one PDF per --cards-per-file cards.
+    Returns the number of cards drawn.
+    """
+    pdf = canvas.Canvas(output, pagesize=A4, pageCompression=1)
+    pdf.setTitle(title)
+    pdf.setAuthor(ORGANISATION_NAME)
+
+    queryset = members.select_related('rank', 'state', 'blood_group').order_by('name', 'association_id')
+
+    count = 0
+    for veteran in queryset.iterator(chunk_size=chunk_size):
+        slot = count % CARDS_PER_PAGE
+        if slot == 0:
+            if count:
+                pdf.showPage()
+            _draw_crop_marks(pdf)
+        x, y = _card_origin(slot)
+        draw_id_card(pdf, veteran, x, y)
+        count += 1
+
+    if count == 0:
+        pdf.setFont('Helvetica', 12)
+        pdf.drawCentredString(A4[0] / 2, A4[1] / 2, 'No approved members found for this selection.')
+    pdf.showPage()
+    pdf.save()
+    return count
@@ -0,0 +1,157 @@
+"""Matching job seekers (JobPortal entries) to what an employer is looking for
+
+Every entry carries two generated columns with GIN indexes:
+
+* ``search_vector``: skills (weight A), qualification and specialization
+  (B), experience (C) and preferred location (D).
+* ``skill_tags``: the skills list split into lower-cased tags.
+
+Free text matches any field, while the qualification, skill and location
+filters restrict their words to their own weight, so all of them are
+answered by the same index. The text parser drops '+' and '#', so a term
+like c++ or c# would match every word starting with c; such terms match
+only an exact skill tag instead. Free text also matches the extracted resume
+text through its own ``resume_vector`` column (see resume_text.py). Results are ranked in the database by text
+relevance plus the number of requested skills an entry lists as tags.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, F, Q, Value, When
+
+from .models import JobPortal
+
+# Letters, digits and the characters of terms like c++, c#, node.js
+_TERM_RE = re.compile(r'[\w+#.]+')
+# Characters the 'simple' text parser drops; terms with them go to skill_tags
+_TAG_ONLY_RE = re.compile(r'[+#]')
+_SKILL_SPLIT_RE = re.compile(r'\s*[,;|\n]+\s*')
+
+# Each requested skill found as a tag counts as much as a strong text match
+SKILL_TAG_BOOST = 0.5
+# A match in the resume counts for less than the same match in the profile
+RESUME_WEIGHT = 0.5
+
+
+def skill_tags(text):
+    """Split a skills list the way the skill_tags column does"""
+    return [tag for tag in _SKILL_SPLIT_RE.split(text.strip().lower()) if tag]
+
+
+def _terms(text):
+    return [term.strip('.') for term in _TERM_RE.findall(text.lower()) if term.strip('._')]
+
+
+def _text_terms(text):
+    """Terms the text index can match exactly (see _TAG_ONLY_RE)"""
+    return [term for term in _terms(text) if not _TAG_ONLY_RE.search(term)]
+
+
+def tag_terms(text):
+    """Terms like c++ or c# that can only be matched as an exact skill tag"""
+    return [term for term in _terms(text) if _TAG_ONLY_RE.search(term)]
+
+
+def weighted_query(text, weights=''):
+    """AND of prefix matches for each word, limited to lexemes of the given weights
+
+    Returns None when nothing searchable was typed. Terms with '+' or '#'
+    are left out; see tag_terms().
+    """
+    terms = _text_terms(text)
+    if not terms:
+        return None
+    return SearchQuery(
+        ' & '.join(f"'{term}':*{weights}" for term in terms[:8]),
+        search_type='raw', config='simple'
+    )
+
+
+def _any_skill_query(skills):
+    """OR over the requested skills, each an AND of its words within the skills weight
+
+    A skill with a term like c++ is left to its exact tag.
+    """
+    parts = []
+    for skill in skills:
+        terms = _terms(skill)
+        if terms and not any(_TAG_ONLY_RE.search(term) for term in terms):
+            parts.append('(' + ' & '.join(f"'{term}':*A" for term in terms[:4]) + ')')
+    if not parts:
+        return None
+    return SearchQuery(' | '.join(parts[:10]), search_type='raw', config='simple')
+
+
+def match_jobs(queryset=None, q='', skills=(), qualification='', location='', applicant_type='', resumes=True):
+    """Filter and rank job seekers; returns a queryset ordered by relevance, then newest
+
+    ``skills`` are alternatives: an entry matches if it lists any of them,
+    and ranks higher the more it lists. With ``resumes``, free text also
+    matches the extracted resume text (ranked below the profile fields).
+    Free text terms like c++ must each be one of the entry's skill tags.
+    """
+    jobs = JobPortal.objects.filter(is_active=True) if queryset is None else queryset
+    if applicant_type in dict(JobPortal.APPLICANT_TYPE_CHOICES):
+        jobs = jobs.filter(applicant_type=applicant_type)
+
+    free_query = weighted_query(q)
+    required_tags = tag_terms(q)[:4]
+    field_query = None
+    for query in (weighted_query(qualification, 'B'), weighted_query(location, 'D')):
+        if query is not None:
+            field_query = query if field_query is None else field_query & query
+    tags = [tag for skill in skills for tag in skill_tags(skill)][:10]
+    skill_query = _any_skill_query(skills)
+
+    if free_query is None and field_query is None and skill_query is None and not required_tags and not tags:
+        if q or qualification or location or skills:
+            return jobs.none()
+        return jobs.order_by('-created_at', '-id')
+
+    if free_query is not None:
+        if resumes:
+            jobs = jobs.filter(Q(search_vector=free_query) | Q(resume_vector=free_query))
+        else:
+            jobs = jobs.filter(search_vector=free_query)
+    if required_tags:
+        jobs = jobs.filter(skill_tags__contains=required_tags)
+    if field_query is not None:
+        jobs = jobs.filter(search_vector=field_query)
+    if skill_query is not None:
+        # An exact tag (job_skill_tags_idx) or the skill's words among the skills
+        jobs = jobs.filter(Q(skill_tags__overlap=tags) | Q(search_vector=skill_query))
+    elif tags:
+        jobs = jobs.filter(skill_tags__overlap=tags)
+
+    queries = [query for query in (free_query, field_query, skill_query) if query is not None]
+    rank = Value(0.0)
+    if queries:
+        combined = queries[0]
+        for query in queries[1:]:
+            combined &= query
+        rank = SearchRank(F('search_vector'), combined)
+    if free_query is not None and resumes:
+        rank = rank + SearchRank(F('resume_vector'), free_query) * Value(RESUME_WEIGHT)
+    for tag in dict.fromkeys(tags + required_tags):
+        rank = rank + Case(When(skill_tags__contains=[tag], then=Value(SKILL_TAG_BOOST)), default=Value(0.0))
+
+    return jobs.annotate(match_rank=rank).order_by('-match_rank', '-created_at', '-id')
+
+
+def popular_skills(limit=20):
+    """Most listed skill tags among active seekers, for filter suggestions (cached)"""
+    key = f'jobs:popular_skills:{limit}'
+    skills = cache.get(key)
+    if skills is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT tag, count(*) FROM {JobPortal._meta.db_table}, unnest(skill_tags) AS tag '
+                'WHERE is_active GROUP BY tag ORDER BY count(*) DESC, tag LIMIT %s',
+                [limit],
+            )
+            skills = cursor.fetchall()
+        cache.set(key, skills, getattr(settings, 'JOB_POPULAR_SKILLS_CACHE_TIMEOUT', 600))
+    return skills
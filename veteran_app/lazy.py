@@ -0,0 +1,53 @@
+"""Deferred loading of view modules
+
+urls.py refers to feature views through LazyViewModule so that a worker only
+imports a feature area (and the libraries it needs) when one of its URLs is
+first requested.
+"""
+from importlib import import_module
+
+
+class LazyViewModule:
+    """Stand-in for a views module whose attributes are lazily resolved views"""
+
+    def __init__(self, module_path):
+        self.module_path = module_path
+        self._views = {}
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name not in self._views:
+            self._views[name] = self._make_view(name)
+        return self._views[name]
+
+    def _make_view(self, name):
+        module_path = self.module_path
+        resolved = []
+
+        def view(request, *args, **kwargs):
+            if not resolved:
+                resolved.append(getattr(import_module(module_path), name))
+            return resolved[0](request, *args, **kwargs)
+
+        view.__name__ = view.__qualname__ = name
+        view.__module__ = module_path
+        return view
+
+
+    def async_view(self, name):
+        """Lazy stand-in for an async view; Django must see a coroutine function to run it on the event loop"""
+        key = f'async:{name}'
+        if key not in self._views:
+            module_path = self.module_path
+            resolved = []
+
+            async def view(request, *args, **kwargs):
+                if not resolved:
+                    resolved.append(getattr(import_module(module_path), name))
+                return await resolved[0](request, *args, **kwargs)
+
+            view.__name__ = view.__qualname__ = name
+            view.__module__ = module_path
+            self._views[key] = view
+        return self._views[key]
@@ -0,0 +1,247 @@
+"""Ledger rollups: transaction totals per financial year, month, type and method
+
+A TransactionRollup row holds the total and number of the transactions of
+one (financial year, month, transaction type, payment method). Creating,
+changing or deleting a Transaction adjusts its row with a single F()
+UPDATE (see signals.py), so the treasurer's totals, trend chart and list
+summaries add up a few dozen rows instead of scanning Transaction.
+
+Writes that skip the model signals (bulk_create, COPY, raw deletes) must
+call record()/remove() themselves or rebuild() afterwards; the
+rebuild_transaction_rollups command recomputes everything from Transaction.
+
+summarize_transactions() gives income, expenses and the totals per type and
+method of either rollup rows or a Transaction queryset in one query, cached
+per filter under a fingerprint of the rollup table (its row count and latest
+updated_at). Every rollup write changes the fingerprint in the database, so
+all worker processes stop using the old summaries at once.
+"""
+import calendar
+import hashlib
+from collections import defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, DecimalField, F, Max, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Transaction, TransactionRollup
+
+EXPENSE_TYPES = ('expense',)
+SUMMARY_KEY_PREFIX = 'ledger:summary'
+
+
+def month_of(moment):
+    """First day of the (local) month of a datetime"""
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def rollup_key(txn):
+    return txn.financial_year_id, month_of(txn.created_at), txn.transaction_type, txn.payment_method
+
+
+def apply(changes):
+    """Add {key: (amount, count)} deltas to the rollup rows, creating rows for new keys"""
+    for (financial_year_id, month, transaction_type, payment_method), (amount, count) in changes.items():
+        if not amount and not count:
+            continue
+        key = {'financial_year_id': financial_year_id, 'month': month, 'transaction_type': transaction_type,
+               'payment_method': payment_method}
+        delta = {'total': F('total') + amount, 'count': F('count') + count, 'updated_at': timezone.now()}
+        if TransactionRollup.objects.filter(**key).update(**delta) or count < 0:
+            # Taking away from a row that is gone (its financial year was deleted) leaves nothing to do
+            continue
+        try:
+            with transaction.atomic():
+                TransactionRollup.objects.create(total=amount, count=count, **key)
+        except IntegrityError:
+            # Created by a concurrent first transaction of the same key
+            TransactionRollup.objects.filter(**key).update(**delta)
+
+
+def record(transactions, sign=1):
+    """Count saved transactions into their rollup rows (or take them out again with ``sign=-1``)"""
+    changes = defaultdict(lambda: [0, 0])
+    for txn in transactions:
+        change = changes[rollup_key(txn)]
+        change[0] += sign * txn.amount
+        change[1] += sign
+    apply({key: tuple(change) for key, change in changes.items()})
+
+
+def remove(transactions):
+    record(transactions, sign=-1)
+
+
+def computed_rows(financial_year=None):
+    """Rollup values computed from Transaction, for one financial year or all"""
+    transactions = Transaction.objects.order_by()
+    if financial_year is not None:
+        transactions = transactions.filter(financial_year=financial_year)
+    return transactions.values(
+        'financial_year', 'transaction_type', 'payment_method',
+        month=TruncMonth('created_at', output_field=DateField()),
+    ).annotate(total=Sum('amount'), count=Count('pk'))
+
+
+def rebuild(financial_year=None):
+    """Replace the rollup rows with ones computed from Transaction; returns the row count"""
+    rollups = TransactionRollup.objects.all()
+    if financial_year is not None:
+        rollups = rollups.filter(financial_year=financial_year)
+    with transaction.atomic():
+        rollups.delete()
+        created = TransactionRollup.objects.bulk_create([
+            TransactionRollup(financial_year_id=row['financial_year'], month=row['month'],
+                              transaction_type=row['transaction_type'], payment_method=row['payment_method'],
+                              total=row['total'], count=row['count'])
+            for row in computed_rows(financial_year).iterator()
+        ], batch_size=1000)
+    return len(created)
+
+
+def drift(financial_year=None):
+    """Keys whose stored rollup differs from Transaction, as {key: ((total, count) stored, (total, count) actual)}"""
+    stored = TransactionRollup.objects.all()
+    if financial_year is not None:
+        stored = stored.filter(financial_year=financial_year)
+    key_fields = ('financial_year', 'month', 'transaction_type', 'payment_method')
+    stored = {tuple(row[:4]): row[4:] for row in stored.values_list(*key_fields, 'total', 'count')}
+    actual = {tuple(row[field] for field in key_fields): (row['total'], row['count'])
+              for row in computed_rows(financial_year)}
+    empty = (0, 0)
+    return {
+        key: (stored.get(key, empty), actual.get(key, empty))
+        for key in stored.keys() | actual.keys()
+        if stored.get(key, empty) != actual.get(key, empty)
+    }
+
+
+def whole_months(start, end):
+    """(first month, last month) if a date range covers whole months only, else None
+
+    Open ends count as whole: the rollups then simply have no bound there.
+    """
+    if start and start.day != 1:
+        return None
+    if end and end.day != calendar.monthrange(end.year, end.month)[1]:
+        return None
+    return (start, end.replace(day=1) if end else None)
+
+
+def rollup_rows(financial_year=None, months=None, transaction_type=None, payment_method=None):
+    """Rollup rows narrowed like a transaction filter; ``months`` is a whole_months() range"""
+    rows = TransactionRollup.objects.order_by()
+    if financial_year is not None:
+        rows = rows.filter(financial_year=financial_year)
+    if months:
+        first, last = months
+        if first:
+            rows = rows.filter(month__gte=first)
+        if last:
+            rows = rows.filter(month__lte=last)
+    if transaction_type:
+        rows = rows.filter(transaction_type=transaction_type)
+    if payment_method:
+        rows = rows.filter(payment_method=payment_method)
+    return rows
+
+
+def _version():
+    """Fingerprint of the rollup table; any rollup write, delete or rebuild changes it
+
+    The latest updated_at alone could miss a write that commits after a later
+    one, so the counts and totals are summed too, weighted by row so that an
+    amount moved between rows (a changed type or method) also shows.
+    """
+    state = TransactionRollup.objects.order_by().aggregate(
+        rows=Count('pk'), changed=Max('updated_at'),
+        counts=Sum(F('pk') * F('count')), totals=Sum(F('pk') * F('total'), output_field=DecimalField()),
+    )
+    changed = state['changed'].timestamp() if state['changed'] else 0
+    return f'{state["rows"]}-{changed}-{state["counts"] or 0}-{state["totals"] or 0}'
+
+
+def summarize_transactions(rows, filters=None):
+    """Income, expenses, net and the total and count per type and method, in one query
+
+    ``rows`` is a Transaction queryset or rollup_rows(); both give the same
+    summary. With ``filters`` (the parameters that narrowed ``rows``) the
+    summary is cached under them until the next transaction write, at the
+    cost of one small aggregate over the rollup table per call.
+    """
+    key = None
+    if filters is not None:
+        combination = '&'.join(f'{name}={value}' for name, value in sorted(filters.items()))
+        key = f'{SUMMARY_KEY_PREFIX}:{_version()}:{hashlib.md5(combination.encode("utf-8")).hexdigest()}'
+        summary = cache.get(key)
+        if summary is not None:
+            return summary
+
+    if rows.model is TransactionRollup:
+        def total(condition=None):
+            return Sum('total', filter=condition)
+
+        def count(condition=None):
+            return Sum('count', filter=condition)
+    else:
+        def total(condition=None):
+            return Sum('amount', filter=condition)
+
+        def count(condition=None):
+            return Count('pk', filter=condition)
+
+    aggregates = {
+        'income': total(~Q(transaction_type__in=EXPENSE_TYPES)),
+        'expenses': total(Q(transaction_type__in=EXPENSE_TYPES)),
+        'transaction_count': count(),
+    }
+    groups = {'type': ('transaction_type', Transaction.TRANSACTION_TYPES),
+              'method': ('payment_method', Transaction.PAYMENT_METHODS)}
+    for group, (field, choices) in groups.items():
+        for value, _label in choices:
+            aggregates[f'{group}_{value}_total'] = total(Q(**{field: value}))
+            aggregates[f'{group}_{value}_count'] = count(Q(**{field: value}))
+    values = rows.aggregate(**aggregates)
+
+    income, expenses = values['income'] or 0, values['expenses'] or 0
+    summary = {
+        'income': income, 'expenses': expenses, 'net': income - expenses, 'count': values['transaction_count'] or 0,
+    }
+    for group, (field, choices) in groups.items():
+        summary[f'by_{group}'] = {
+            value: {'label': label, 'total': values[f'{group}_{value}_total'] or 0,
+                    'count': values[f'{group}_{value}_count'] or 0}
+            for value, label in choices
+        }
+    if key is not None:
+        cache.set(key, summary, getattr(settings, 'LEDGER_SUMMARY_CACHE_TIMEOUT', 600))
+    return summary
+
+
+def monthly_trend(financial_year):
+    """Income and expenses per month of a financial year, every month present, for charts"""
+    totals = {
+        row['month']: row
+        for row in rollup_rows(financial_year).values('month').annotate(
+            income=Sum('total', filter=~Q(transaction_type__in=EXPENSE_TYPES)),
+            expenses=Sum('total', filter=Q(transaction_type__in=EXPENSE_TYPES)),
+        )
+    }
+    # Transactions are filed under a year by when they were recorded, which can
+    # fall outside its April-March dates, so the chart stretches to cover them
+    month = min([financial_year.start_date.replace(day=1), *totals])
+    last = max([financial_year.end_date, *totals])
+    trend = []
+    while month <= last:
+        row = totals.get(month, {})
+        trend.append({
+            'month': month.strftime('%b %Y'),
+            'income': float(row.get('income') or 0),
+            'expenses': float(row.get('expenses') or 0),
+        })
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return trend
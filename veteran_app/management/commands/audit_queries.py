@@ -0,0 +1,172 @@
+import json
+import os
+import re
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# (name, URL name, URL arguments, GET parameters, who requests it). The views already fixed are
+# held to their query counts by ListViewQueryTests in tests.py; this audit is for finding new ones.
+ENDPOINTS = [
+    ('dashboard', 'dashboard', (), {}, 'superuser'),
+    ('state_dashboard', 'state_dashboard', ('state',), {}, 'state_admin'),
+    ('state_members', 'state_members', ('state',), {}, 'state_admin'),
+    ('member_search', 'member_search', (), {'q': 'singh'}, 'superuser'),
+    ('manage_veteran_users', 'manage_veteran_users', ('state',), {}, 'state_admin'),
+    ('treasurer_dashboard', 'treasurer_dashboard', (), {}, 'accounts'),
+    ('transaction_list', 'transaction_list', (), {}, 'accounts'),
+    ('export_transactions', 'export_transactions', (), {'format': 'csv'}, 'accounts'),
+    ('media_documents', 'media_documents', (), {}, 'state_admin'),
+    ('gallery', 'gallery', (), {}, 'superuser'),
+    ('job_portal', 'job_portal', (), {}, 'veteran'),
+    ('admin_job_portal', 'admin_job_portal', (), {}, 'superuser'),
+    ('matrimonial_portal', 'matrimonial_portal', (), {}, 'veteran'),
+    ('chat_portal', 'chat_portal', (), {}, 'veteran'),
+    ('events_list', 'events_list', (), {}, 'veteran'),
+]
+
+# Literals that vary between otherwise identical statements
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalize(sql):
+    """A statement with its literals replaced, so repeats of one query compare equal"""
+    return _LITERAL_RE.sub('?', sql)
+
+
+class Command(BaseCommand):
+    help = ('Count the queries list views run against a small and a large synthetic data set and report '
+            'views whose query count grows with the rows shown (N+1 queries)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--small', type=int, default=5, help='Rows of each kind in the small data set (default: 5)')
+        parser.add_argument('--large', type=int, default=60, help='Rows of each kind in the large data set (default: 60)')
+        parser.add_argument('--repeat-threshold', type=int, default=10,
+                            help='Report a statement run more often than this in one request (default: 10)')
+        parser.add_argument('--endpoint', action='append', default=None,
+                            help='Only audit this endpoint (repeatable); default: all')
+        parser.add_argument('--output', type=str, default=None, help='Also write the results to this JSON file')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error if any view grows or repeats a statement')
+
+    def handle(self, *args, **options):
+        if options['small'] < 1 or options['large'] <= options['small']:
+            raise CommandError('--large must be greater than --small, which must be at least 1')
+        endpoints = ENDPOINTS
+        if options['endpoint']:
+            unknown = set(options['endpoint']) - {endpoint[0] for endpoint in ENDPOINTS}
+            if unknown:
+                raise CommandError(f"Unknown endpoint(s): {', '.join(sorted(unknown))}")
+            endpoints = [endpoint for endpoint in ENDPOINTS if endpoint[0] in options['endpoint']]
+
+        results = {}
+        # Everything the audit creates is rolled back, including the synthetic rows
+        with transaction.atomic():
+            context = self.setup()
+            self.seed(context, options['small'])
+            small = {endpoint[0]: self.measure(context, *endpoint[1:]) for endpoint in endpoints}
+            self.seed(context, options['large'] - options['small'])
+            large = {endpoint[0]: self.measure(context, *endpoint[1:]) for endpoint in endpoints}
+            transaction.set_rollback(True)
+        cache.clear()
+
+        failures = []
+        for name, *_details in endpoints:
+            before, after = small[name], large[name]
+            repeated = {sql: n for sql, n in after['statements'].items() if n > options['repeat_threshold']}
+            result = {
+                'status': after['status'],
+                'queries_small': before['queries'],
+                'queries_large': after['queries'],
+                'growth': after['queries'] - before['queries'],
+                'repeated': [{'count': n, 'sql': sql[:300]} for sql, n in
+                             sorted(repeated.items(), key=lambda item: -item[1])],
+            }
+            results[name] = result
+            flagged = result['growth'] > 0 or repeated
+            if flagged:
+                failures.append(name)
+            line = (f"{name}: {result['queries_small']} -> {result['queries_large']} queries "
+                    f"(HTTP {before['status']}/{after['status']})")
+            self.stdout.write(self.style.WARNING(line) if flagged else line)
+            for item in result['repeated']:
+                self.stdout.write(f"    {item['count']}x {item['sql'][:160]}")
+            if after['status'] >= 400 or before['status'] >= 400:
+                self.stdout.write(self.style.ERROR(f'    {name} answered with an error'))
+
+        if options['output']:
+            directory = os.path.dirname(options['output'])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(options['output'], 'w') as output:
+                json.dump({
+                    'timestamp': datetime.now().isoformat(timespec='seconds'),
+                    'small': options['small'],
+                    'large': options['large'],
+                    'endpoints': results,
+                }, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if failures and options['fail_on_regression']:
+            raise CommandError(f"Query counts grow with the data or repeat in: {', '.join(failures)}")
+        if not failures:
+            self.stdout.write(self.style.SUCCESS('No view runs more queries for more rows'))
+
+    def setup(self):
+        """The users each endpoint is requested as, created inside the audit transaction"""
+        from veteran_app.models import State, UserState, VeteranMember
+
+        state = State.objects.order_by('pk').first()
+        if state is None or not VeteranMember.objects.exists():
+            raise CommandError('Add at least one state and veteran member first (e.g. manage.py seed_members)')
+        superuser = User.objects.create_superuser('audit_superuser', password=None)
+        accounts = User.objects.filter(username='accounts').first() or User.objects.create_user('accounts')
+        # State admins are recognised by their state_<code> username
+        state_admin, _created = User.objects.get_or_create(username=f'state_{state.code.lower()}')
+        UserState.objects.update_or_create(user=state_admin, defaults={'state': state, 'approved': True})
+        return {
+            'state': state,
+            'users': {'superuser': superuser, 'accounts': accounts, 'state_admin': state_admin},
+            'veterans': [],
+        }
+
+    def seed(self, context, count):
+        from veteran_app import sample_data
+
+        state, users = context['state'], context['users']
+        prefix = sample_data.run_prefix()
+        members = sample_data.members(count, state, users['superuser'], prefix=prefix)
+        sample_data.veteran_users(members, prefix=prefix)
+        sample_data.transactions(count, members, users['accounts'], prefix=prefix)
+        sample_data.documents(count, state, users['superuser'], prefix=prefix)
+        sample_data.job_profiles(count, members)
+        sample_data.matrimonial_profiles(count, members)
+        if 'veteran' not in users:
+            users['veteran'] = members[0].user_account.user
+        context['veterans'].extend(members)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def measure(self, context, url_name, url_args, params, user):
+        """Query count, statement repeats and status of one request"""
+        args = [context[arg].pk for arg in url_args]
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        client = Client(HTTP_HOST=host)
+        client.force_login(context['users'][user])
+        cache.clear()
+        # The request_started signal empties the query log, so start from an empty one
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(reverse(url_name, args=args), params)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+        statements = Counter(normalize(query['sql']) for query in captured.captured_queries)
+        return {'status': response.status_code, 'queries': len(captured.captured_queries), 'statements': statements}
@@ -0,0 +1,153 @@
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+SKILLS = [
+    'python', 'java', 'sql', 'excel', 'tally', 'accounting', 'driving', 'welding', 'electrical wiring',
+    'plumbing', 'security operations', 'logistics', 'inventory management', 'marine engineering',
+    'navigation', 'radar operation', 'first aid', 'fire fighting', 'diesel engines', 'hvac',
+    'project management', 'customer service', 'data entry', 'networking', 'linux', 'c++', 'autocad',
+    'hindi', 'english', 'tamil', 'team leadership', 'procurement', 'quality control', 'sales',
+]
+QUALIFICATIONS = ['B.Tech', 'B.E.', 'Diploma', 'ITI', 'B.Com', 'B.Sc', 'M.Sc', 'MBA', 'BCA', '12th', '10th']
+SPECIALIZATIONS = ['Mechanical', 'Electrical', 'Computer Science', 'Electronics', 'Civil', 'Finance', 'Marine', '']
+LOCATIONS = ['Mumbai', 'Chennai', 'Kochi', 'Goa', 'Visakhapatnam', 'Kolkata', 'Delhi', 'Bengaluru', 'Pune',
+             'Port Blair', 'Mangaluru', 'Hyderabad', 'Anywhere']
+
+# (name, match_jobs arguments)
+SCENARIOS = [
+    ('skill', {'skills': ['python']}),
+    ('two_skills', {'skills': ['welding', 'diesel engines']}),
+    ('free_text', {'q': 'marine engineering'}),
+    ('qualification_location', {'qualification': 'diploma', 'location': 'kochi'}),
+    ('everything', {'q': 'leadership', 'skills': ['logistics'], 'qualification': 'mba',
+                    'location': 'mumbai', 'applicant_type': 'veteran'}),
+    ('recent', {}),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the job portal matching queries against synthetic profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=50000, help='Synthetic profiles to add (default: 50000)')
+        parser.add_argument('--runs', type=int, default=20, help='Runs per scenario; medians are reported (default: 20)')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic profiles instead of rolling back')
+        parser.add_argument('--output-dir', type=str, default=None,
+                            help='Directory for JSON results (default: BASE_DIR/benchmark_results)')
+
+    def handle(self, *args, **options):
+        from veteran_app.models import VeteranMember
+
+        if connection.vendor != 'postgresql':
+            raise CommandError('The job portal search needs PostgreSQL')
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1')
+        veteran_ids = list(VeteranMember.objects.values_list('pk', flat=True)[:1000])
+        if not veteran_ids:
+            raise CommandError('Add at least one veteran member first (e.g. manage.py seed_members)')
+
+        results = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'profiles_added': options['profiles'],
+            'runs': options['runs'],
+            'scenarios': {},
+        }
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                self.seed(options['profiles'], veteran_ids)
+                results['seed_seconds'] = round(time.perf_counter() - start, 2)
+                self.stdout.write(f"Added {options['profiles']} profiles in {results['seed_seconds']} s")
+
+                for name, arguments in SCENARIOS:
+                    results['scenarios'][name] = self.run_scenario(arguments, options['runs'])
+                    data = results['scenarios'][name]
+                    self.stdout.write(
+                        f"{name}: {data['median_ms']:.2f} ms median, {data['p95_ms']:.2f} ms p95, "
+                        f"{data['matches']} matches, indexes: {', '.join(data['indexes']) or 'none'}"
+                    )
+                if not options['keep']:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write('Synthetic profiles rolled back')
+
+        output_dir = options['output_dir'] or os.path.join(settings.BASE_DIR, 'benchmark_results')
+        os.makedirs(output_dir, exist_ok=True)
+        file_path = os.path.join(output_dir, f"job_search_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(file_path, 'w') as output:
+            json.dump(results, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {file_path}'))
+
+    def seed(self, count, veteran_ids):
+        from veteran_app.models import JobPortal
+
+        rng = random.Random(42)
+        batch = []
+        for i in range(count):
+            batch.append(JobPortal(
+                applicant_type=rng.choice(['veteran', 'child']),
+                veteran_id=rng.choice(veteran_ids),
+                name=f'Benchmark Seeker {i}',
+                contact='9876543210',
+                qualification=rng.choice(QUALIFICATIONS),
+                specialization=rng.choice(SPECIALIZATIONS),
+                experience=f'{rng.randint(1, 30)} years in {rng.choice(SKILLS)} and {rng.choice(SKILLS)}',
+                skills=', '.join(rng.sample(SKILLS, rng.randint(2, 6))),
+                preferred_location=rng.choice(LOCATIONS),
+                is_active=rng.random() > 0.1,
+            ))
+            if len(batch) == 5000:
+                JobPortal.objects.bulk_create(batch)
+                batch = []
+        JobPortal.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {JobPortal._meta.db_table}')
+
+    def run_scenario(self, arguments, runs):
+        from veteran_app.job_search import match_jobs
+
+        def first_page():
+            return list(match_jobs(**arguments).select_related('veteran__state')[:15])
+
+        first_page()  # warm up
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            first_page()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+
+        queryset = match_jobs(**arguments)
+        sql, params = queryset[:15].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return {
+            'arguments': arguments,
+            'median_ms': statistics.median(samples),
+            'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            'matches': queryset.count(),
+            'indexes': sorted(_plan_indexes(plan[0]['Plan'])),
+        }
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _plan_indexes(node):
+    """Names of the indexes a query plan reads"""
+    found = {node['Index Name']} if 'Index Name' in node else set()
+    for child in node.get('Plans', ()):
+        found |= _plan_indexes(child)
+    return found
@@ -0,0 +1,151 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Libraries that should stay out of a fresh worker until a feature needs them
+WATCHED_MODULES = ['reportlab', 'razorpay', 'qrcode', 'PIL', 'openpyxl']
+
+CHILD_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.conf import settings
+# __import__ rather than importlib.import_module, which -X importtime does not report
+__import__(settings.ROOT_URLCONF)
+for name in {extra_modules!r}:
+    __import__(name)
+elapsed = (time.perf_counter() - start) * 1000
+try:
+    import resource
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+except ImportError:
+    max_rss_kb = None
+print(json.dumps({{
+    'wall_ms': elapsed,
+    'max_rss_kb': max_rss_kb,
+    'loaded': [m for m in {watched!r} if m in sys.modules],
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Turn `-X importtime` output into {module: (self_us, cumulative_us)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Measure worker startup import time and memory with python -X importtime'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Runs per scenario; medians are reported (default: 5)')
+        parser.add_argument('--top', type=int, default=15, help='Number of slowest modules to record (default: 15)')
+        parser.add_argument('--output-dir', type=str, default=None,
+                            help='Directory for JSON results (default: BASE_DIR/benchmark_results)')
+        parser.add_argument('--compare', type=str, help='Previous results file to compare against')
+
+    def handle(self, *args, **options):
+        from veteran_app import urls
+        from veteran_app.lazy import LazyViewModule
+
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1')
+
+        feature_modules = sorted(
+            value.module_path for value in vars(urls).values() if isinstance(value, LazyViewModule)
+        )
+        scenarios = {
+            'startup': [],
+            'all_views_loaded': feature_modules,
+        }
+
+        results = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'settings': os.environ.get('DJANGO_SETTINGS_MODULE'),
+            'runs': options['runs'],
+            'scenarios': {},
+        }
+        for scenario, extra_modules in scenarios.items():
+            results['scenarios'][scenario] = self.run_scenario(extra_modules, options['runs'], options['top'])
+
+        for scenario, data in results['scenarios'].items():
+            loaded = ', '.join(data['loaded']) or 'none'
+            self.stdout.write(
+                f"{scenario}: {data['import_ms']:.1f} ms imports, {data['wall_ms']:.1f} ms wall, "
+                f"{data['max_rss_kb']} KB max RSS, {data['module_count']} modules (heavy loaded: {loaded})"
+            )
+        leaked = results['scenarios']['startup']['loaded']
+        if leaked:
+            self.stdout.write(self.style.WARNING(f"Loaded at startup: {', '.join(leaked)}"))
+
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+        output_dir = options['output_dir'] or os.path.join(settings.BASE_DIR, 'benchmark_results')
+        os.makedirs(output_dir, exist_ok=True)
+        file_path = os.path.join(output_dir, f"startup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(file_path, 'w') as output:
+            json.dump(results, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {file_path}'))
+
+    def run_scenario(self, extra_modules, runs, top):
+        script = CHILD_SCRIPT.format(extra_modules=extra_modules, watched=WATCHED_MODULES)
+        samples = []
+        for _ in range(runs):
+            # A fresh interpreter each run; bytecode caches are already warm after the first
+            proc = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', script],
+                capture_output=True, text=True, cwd=settings.BASE_DIR, env=os.environ.copy()
+            )
+            if proc.returncode != 0:
+                raise CommandError(f'Startup run failed:\n{proc.stderr[-2000:]}')
+            summary = json.loads(proc.stdout.strip().splitlines()[-1])
+            summary['modules'] = parse_importtime(proc.stderr)
+            samples.append(summary)
+
+        last_modules = samples[-1]['modules']
+        slowest = sorted(last_modules.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        rss = [s['max_rss_kb'] for s in samples if s['max_rss_kb'] is not None]
+        return {
+            'import_ms': statistics.median(sum(v[0] for v in s['modules'].values()) / 1000 for s in samples),
+            'wall_ms': statistics.median(s['wall_ms'] for s in samples),
+            'max_rss_kb': statistics.median(rss) if rss else None,
+            'module_count': len(last_modules),
+            'loaded': samples[-1]['loaded'],
+            'slowest_modules': [
+                {'module': name, 'self_us': self_us, 'cumulative_us': cumulative_us}
+                for name, (self_us, cumulative_us) in slowest
+            ],
+        }
+
+    def compare(self, path, results):
+        try:
+            with open(path) as previous_file:
+                previous = json.load(previous_file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read {path}: {e}')
+
+        for scenario, data in results['scenarios'].items():
+            before = previous.get('scenarios', {}).get(scenario)
+            if not before:
+                continue
+            for key in ('import_ms', 'wall_ms', 'max_rss_kb'):
+                if before.get(key) and data.get(key) is not None:
+                    change = (data[key] - before[key]) / before[key] * 100
+                    self.stdout.write(f'{scenario} {key}: {before[key]:.1f} -> {data[key]:.1f} ({change:+.1f}%)')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from veteran_app.models import VerificationPartner
+
+
+class Command(BaseCommand):
+    help = 'Create a partner organisation for the bulk verification API (or rotate its key) and print the key'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Organisation name, as logged with its verifications')
+        parser.add_argument('--rotate', action='store_true', help='Replace the key of an existing partner')
+
+    def handle(self, *args, **options):
+        partner = VerificationPartner.objects.filter(name=options['name']).first()
+        if partner is not None and not options['rotate']:
+            raise CommandError(f"Partner '{partner.name}' already exists; use --rotate to issue a new key")
+        if partner is None:
+            if options['rotate']:
+                raise CommandError(f"No partner named '{options['name']}'")
+            partner = VerificationPartner(name=options['name'])
+        key = partner.issue_key()
+        partner.save()
+        self.stdout.write(self.style.SUCCESS(f'API key for {partner.name} (shown only once):'))
+        self.stdout.write(key)
+        self.stdout.write('Send it as "Authorization: Bearer <key>" to /api/verify/bulk/')
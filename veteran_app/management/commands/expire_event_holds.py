@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from veteran_app.registrations import expire_holds
+
+
+class Command(BaseCommand):
+    help = ('Cancel pending event registrations still unpaid when their hold runs out, giving the places '
+            'to the waitlist')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep checking instead of exiting after one pass')
+        parser.add_argument('--sleep', type=float, default=60, help='Seconds to wait between passes with --loop')
+
+    def handle(self, *args, **options):
+        expired = promoted = 0
+        try:
+            while True:
+                counts = expire_holds()
+                expired += counts[0]
+                promoted += counts[1]
+                if not options['loop']:
+                    break
+                close_old_connections()
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} registrations, promoted {promoted} from waitlists'))
@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from veteran_app.resume_text import ResumeParseTimeout, process_resume_batch, queue_changed_resumes
+
+
+class Command(BaseCommand):
+    help = 'Extract text from uploaded job portal resumes so they can be searched'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Parser processes (default: 2)')
+        parser.add_argument('--batch-size', type=int, default=20, help='Resumes claimed per transaction')
+        parser.add_argument('--max-attempts', type=int, default=3,
+                            help='Leave resumes that failed this many times for manual review')
+        parser.add_argument('--rescan', action='store_true',
+                            help='Check every resume against its stored hash and parse the changed ones again')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue instead of exiting when empty')
+        parser.add_argument('--sleep', type=float, default=10, help='Seconds to wait between polls with --loop')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers and --batch-size must be at least 1')
+        if options['rescan']:
+            self.stdout.write(f'Queued {queue_changed_resumes()} resumes for a hash check')
+
+        self.workers = options['workers']
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.tried = set()
+        total = 0
+        try:
+            while True:
+                claimed = self.run_batch(options['batch_size'], options['max_attempts'])
+                if claimed:
+                    continue
+                if not options['loop']:
+                    break
+                # Failures are retried on the next poll, not straight away
+                total += len(self.tried)
+                self.tried.clear()
+                close_old_connections()
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+        self.stdout.write(self.style.SUCCESS(f'Processed {total + len(self.tried)} resumes'))
+
+    def run_batch(self, batch_size, max_attempts, ids=None):
+        """Process a batch and return the ids claimed, restarting the pool if a parser crashed or hung"""
+        try:
+            claimed = process_resume_batch(self.pool, batch_size, max_attempts, ids=ids, exclude=self.tried)
+        except ResumeParseTimeout as exc:
+            self.stderr.write('A resume parser timed out; restarting the process pool')
+            self.restart_pool()
+            claimed = exc.resume_ids
+        except BrokenProcessPool as exc:
+            self.stderr.write('A resume parser crashed; restarting the process pool')
+            self.restart_pool()
+            claimed = getattr(exc, 'resume_ids', [])
+            if len(claimed) > 1:
+                # Nothing was recorded; find the culprit one resume at a time
+                claimed = [pk for batch_pk in claimed for pk in self.run_batch(1, max_attempts, ids=[batch_pk])]
+        self.tried.update(claimed)
+        return claimed
+
+    def restart_pool(self):
+        """Replace the pool, stopping its processes so a hung parser does not keep running"""
+        # The executor has no public way to stop a busy worker before Python 3.14
+        processes = list((self.pool._processes or {}).values())
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from veteran_app.audit_buffer import replay_spool
+
+
+class Command(BaseCommand):
+    help = 'Write audit events left in spool files by workers that exited without flushing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spool-dir', type=str, default=None,
+                            help='Spool directory (default: AUDIT_BUFFER_SPOOL_DIR)')
+
+    def handle(self, *args, **options):
+        count = replay_spool(options['spool_dir'])
+        self.stdout.write(self.style.SUCCESS(f'Replayed {count} audit events'))
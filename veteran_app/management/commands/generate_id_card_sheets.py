@@ -0,0 +1,58 @@
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from veteran_app.models import State, VeteranMember
+
+
+class Command(BaseCommand):
+    help = 'Generate imposed A4 ID card sheets for approved members (background job for large batches)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--state', type=str, help='State code (e.g. KA). Omit to generate one file per state')
+        parser.add_argument('--output-dir', type=str, default=None,
+                            help='Directory for generated PDFs (default: MEDIA_ROOT/id_cards)')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Members fetched from the database per chunk (default: 500)')
+        parser.add_argument('--cards-per-file', type=int, default=500,
+                            help='Cards per PDF; a larger state is split into numbered parts, since a PDF is '
+                                 'held in memory until it is written (default: 500)')
+
+    def handle(self, *args, **options):
+        from veteran_app.id_cards import CARDS_PER_PAGE, build_id_card_sheets
+
+        if options['cards_per_file'] < 1:
+            raise CommandError('--cards-per-file must be at least 1')
+        output_dir = options['output_dir'] or os.path.join(settings.MEDIA_ROOT, 'id_cards')
+        os.makedirs(output_dir, exist_ok=True)
+
+        if options['state']:
+            try:
+                states = [State.objects.get(code__iexact=options['state'])]
+            except State.DoesNotExist:
+                raise CommandError(f"State with code '{options['state']}' not found")
+        else:
+            states = list(State.objects.all().order_by('name'))
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # Whole pages per part, so only the last sheet of a state has empty slots
+        per_file = max(options['cards_per_file'] // CARDS_PER_PAGE, 1) * CARDS_PER_PAGE
+        for state in states:
+            members = VeteranMember.objects.filter(state=state, approved=True)
+            # The ids in card order are small; the members themselves are fetched part by part
+            ids = list(members.order_by('name', 'association_id').values_list('association_id', flat=True))
+            parts = [ids[start:start + per_file] for start in range(0, len(ids), per_file)] or [[]]
+            for number, part in enumerate(parts, start=1):
+                suffix = f'_part{number:02d}' if len(parts) > 1 else ''
+                file_path = os.path.join(output_dir, f'ICGVWA_ID_Cards_{state.code}_{timestamp}{suffix}.pdf')
+                title = f'ICGVWA ID Cards - {state.name}'
+                if len(parts) > 1:
+                    title += f' (part {number} of {len(parts)})'
+                with open(file_path, 'wb') as output:
+                    count = build_id_card_sheets(
+                        members.filter(association_id__in=part), output,
+                        chunk_size=options['chunk_size'], title=title
+                    )
+                self.stdout.write(self.style.SUCCESS(f'{state.name}: {count} cards -> {file_path}'))
@@ -0,0 +1,574 @@
+import json
+import os
+import random
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from http.cookiejar import DefaultCookiePolicy
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.middleware.csrf import CSRF_ALLOWED_CHARS, CSRF_SECRET_LENGTH
+from django.shortcuts import resolve_url
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .run_benchmarks import git_commit, percentile
+
+DEFAULT_MIX = 'visitor=4,veteran=4,state_head=1,superuser=1'
+STARTUP_TIMEOUT = 30
+
+
+class _IgnoreServerCookies(DefaultCookiePolicy):
+    """Keep the session and CSRF cookies a virtual user starts with
+
+    With DEBUG off the server marks its cookies Secure, which would replace
+    ours with cookies a plain-HTTP client never sends back.
+    """
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+class VirtualUser:
+    """One simulated browser: a persona, its login session and a random task picker"""
+
+    def __init__(self, harness, persona, user, rng):
+        import requests
+
+        self.harness = harness
+        self.persona = persona
+        self.user = user
+        self.rng = rng
+        self.fixtures = harness.fixtures
+        self.http = requests.Session()
+        self.http.trust_env = False
+        self.http.cookies.set_policy(_IgnoreServerCookies())
+        self.csrf_token = None
+        if user is not None:
+            self.csrf_token = get_random_string(CSRF_SECRET_LENGTH, allowed_chars=CSRF_ALLOWED_CHARS)
+            self.http.cookies.set(settings.SESSION_COOKIE_NAME, harness.login(user))
+            self.http.cookies.set(settings.CSRF_COOKIE_NAME, self.csrf_token)
+            self.http.headers['X-CSRFToken'] = self.csrf_token
+        self.tasks = TASKS[persona]
+        self.weights = [weight for weight, _task in self.tasks]
+
+    def run(self, deadline, think_time):
+        while time.monotonic() < deadline:
+            _weight, task = self.rng.choices(self.tasks, weights=self.weights)[0]
+            task(self)
+            if think_time:
+                time.sleep(self.rng.uniform(0, 2 * think_time))
+
+    def request(self, name, method, path, ok=(200,), **kwargs):
+        import requests
+
+        started = time.perf_counter()
+        error = None
+        status = None
+        try:
+            response = self.http.request(method, self.harness.url + path, timeout=self.harness.timeout, **kwargs)
+            status = response.status_code
+            if status not in ok:
+                error = f'HTTP {status}'
+            elif self.user is not None and urlsplit(response.url).path == self.harness.login_path:
+                error = 'redirected to login'
+        except requests.RequestException as exc:
+            error = type(exc).__name__
+        self.harness.record(self.persona, name, time.perf_counter() - started, status, error)
+
+    def get(self, name, path, params=None, ok=(200,)):
+        self.request(name, 'GET', path, ok=ok, params=params)
+
+    def post(self, name, path, data=None, ok=(200,), **kwargs):
+        self.request(name, 'POST', path, ok=ok, data=data, **kwargs)
+
+
+# Tasks: each picks realistic arguments from the fixtures and makes one or more requests
+
+def home(vu):
+    vu.get('home', reverse('index'))
+
+
+def about(vu):
+    vu.get('about', reverse('about'))
+
+
+def gallery(vu):
+    vu.get('gallery', reverse('gallery'))
+
+
+def verify_number(vu):
+    numbers = vu.fixtures['association_numbers']
+    if numbers and vu.rng.random() < 0.8:
+        number = vu.rng.choice(numbers)
+    else:
+        number = f'ICGVWA/XX/{vu.rng.randint(1, 99999):05d}'
+    vu.get('verify_number', reverse('verify_association_number', args=[number]), ok=(200, 404))
+
+
+def verify_page(vu):
+    numbers = vu.fixtures['association_numbers']
+    vu.get('verify_page', reverse('verification_page'),
+           params={'number': vu.rng.choice(numbers)} if numbers else None)
+
+
+def bulk_verify(vu):
+    """A partner checking a roster, with the harness's temporary partner key
+
+    Past BULK_VERIFY_RATE_LIMIT the server answers 429, which is what a
+    partner would get too, so it counts as a normal response.
+    """
+    numbers = vu.fixtures['association_numbers']
+    batch = vu.rng.sample(numbers, min(len(numbers), 50)) if numbers else ['ICGVWA/XX/00001']
+    vu.post('bulk_verify', reverse('bulk_verify_association'),
+            data=json.dumps({'association_numbers': batch}), ok=(200, 429),
+            headers={'Content-Type': 'application/json', 'Authorization': f'Bearer {vu.fixtures["partner_key"]}'})
+
+
+def dashboard(vu):
+    vu.get('dashboard', reverse('dashboard'))
+
+
+def treasurer_dashboard(vu):
+    vu.get('treasurer_dashboard', reverse('treasurer_dashboard'))
+
+
+def transaction_list(vu):
+    vu.get('transaction_list', reverse('transaction_list'), params={'page': vu.rng.randint(1, 5)})
+
+
+def export_transactions(vu):
+    vu.get('export_transactions', reverse('export_transactions'), params={'type': 'subscription'})
+
+
+def any_state_members(vu):
+    vu.get('state_members', reverse('state_members', args=[vu.rng.choice(vu.fixtures['state_ids'])]))
+
+
+def export_report(vu):
+    vu.post('export_report', reverse('generate_report'), data={
+        'columns': ['association_number', 'name', 'state', 'rank', 'contact', 'membership'],
+        'state_filter': vu.rng.choice(vu.fixtures['state_ids']),
+    })
+
+
+def state_dashboard(vu):
+    vu.get('state_dashboard', reverse('state_dashboard', args=[vu.user.load_test_state_id]))
+
+
+def own_state_members(vu):
+    vu.get('state_members', reverse('state_members', args=[vu.user.load_test_state_id]),
+           params={'page': vu.rng.randint(1, 3)})
+
+
+def member_search(vu):
+    vu.get('member_search', reverse('member_search'), params={'q': vu.rng.choice(vu.fixtures['search_terms'])})
+
+
+def state_report(vu):
+    vu.post('state_report', reverse('generate_state_head_report'), data={
+        'columns': ['association_number', 'name', 'rank', 'contact'],
+    })
+
+
+def veteran_dashboard(vu):
+    vu.get('veteran_dashboard', reverse('veteran_dashboard'))
+
+
+def events_list(vu):
+    vu.get('events_list', reverse('events_list'))
+
+
+def event_detail(vu):
+    event_ids = vu.fixtures['event_ids']
+    if event_ids:
+        vu.get('event_detail', reverse('event_detail', args=[vu.rng.choice(event_ids)]))
+    else:
+        events_list(vu)
+
+
+def register_for_event(vu):
+    """Open the registration form, then register; the harness removes these registrations afterwards
+
+    Only events the veteran had no registration for before the run are
+    picked, so every registration the harness's (veteran, event) pairs
+    lead to is one it made.
+    """
+    event_id = vu.harness.take_registration(vu.user.load_test_veteran_id, vu.rng)
+    if event_id is None:
+        events_list(vu)
+        return
+    path = reverse('register_for_event', args=[event_id])
+    vu.get('event_registration_form', path)
+    vu.post('register_for_event', path, data={'participants_count': 1})
+
+
+def chat_portal(vu):
+    vu.get('chat_portal', reverse('chat_portal'))
+
+
+def job_portal(vu):
+    vu.get('job_portal', reverse('job_portal'))
+
+
+# persona: [(weight, task)]
+TASKS = {
+    'visitor': [(5, home), (1, about), (2, gallery), (3, verify_number), (1, verify_page), (1, bulk_verify)],
+    'superuser': [(3, dashboard), (2, treasurer_dashboard), (2, transaction_list), (2, any_state_members),
+                  (1, export_report), (1, export_transactions)],
+    'state_head': [(3, state_dashboard), (3, own_state_members), (2, member_search), (1, state_report)],
+    'veteran': [(3, veteran_dashboard), (3, events_list), (2, event_detail), (1, register_for_event),
+                (1, chat_portal), (1, job_portal)],
+}
+
+
+def parse_mix(text):
+    """'visitor=4,veteran=1' -> {'visitor': 4.0, 'veteran': 1.0}"""
+    mix = {}
+    for part in filter(None, (part.strip() for part in text.split(','))):
+        persona, _sep, weight = part.partition('=')
+        if persona not in TASKS:
+            raise CommandError(f"Unknown persona '{persona}'; choose from {', '.join(TASKS)}")
+        try:
+            mix[persona] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f"Invalid weight in '{part}'")
+    if not mix or sum(mix.values()) <= 0:
+        raise CommandError('The mix needs at least one persona with a positive weight')
+    return mix
+
+
+def assign_personas(mix, users):
+    """Split virtual users between personas in proportion to the mix (largest remainder)"""
+    total = sum(mix.values())
+    shares = {persona: users * weight / total for persona, weight in mix.items()}
+    counts = {persona: int(share) for persona, share in shares.items()}
+    for persona in sorted(shares, key=lambda persona: shares[persona] - counts[persona], reverse=True):
+        if sum(counts.values()) >= users:
+            break
+        counts[persona] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = ('Load test the site under gunicorn (ASGI with uvicorn workers, as deployed) with visitor, veteran, '
+            'state head and superuser personas, '
+            'reporting throughput, latency percentiles and error rates per endpoint')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users (default: 20)')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds of load (default: 60)')
+        parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which users start (default: 5)')
+        parser.add_argument('--think-time', type=float, default=0.5,
+                            help='Average pause between a user\'s tasks in seconds (default: 0.5)')
+        parser.add_argument('--mix', type=str, default=DEFAULT_MIX,
+                            help=f'Relative share of each persona (default: {DEFAULT_MIX})')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='gunicorn workers (default: WEB_CONCURRENCY or 3)')
+        parser.add_argument('--gunicorn-args', type=str, default='',
+                            help='Extra gunicorn options, e.g. "--max-requests 1000"')
+        parser.add_argument('--wsgi', action='store_true',
+                            help='Serve with sync WSGI workers instead of the ASGI uvicorn workers used in production')
+        parser.add_argument('--url', type=str, default=None,
+                            help='Test an already running server instead of starting gunicorn')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds (default: 30)')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed, for a repeatable task sequence')
+        parser.add_argument('--output-dir', type=str, default=None,
+                            help='Directory for JSON results and the gunicorn log (default: BASE_DIR/benchmark_results)')
+
+    def handle(self, *args, **options):
+        try:
+            import requests  # noqa: F401
+        except ImportError:
+            raise CommandError('The load test needs the requests package')
+        if options['users'] < 1 or options['duration'] <= 0:
+            raise CommandError('--users must be at least 1 and --duration positive')
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f'Testing against {connection.vendor}; production runs on PostgreSQL, so results will differ'
+            ))
+        mix = parse_mix(options['mix'])
+        workers = options['workers'] or int(os.environ.get('WEB_CONCURRENCY', 3))
+        output_dir = options['output_dir'] or os.path.join(settings.BASE_DIR, 'benchmark_results')
+        os.makedirs(output_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+        self.timeout = options['timeout']
+        self.login_path = resolve_url(settings.LOGIN_URL)
+        self.partner = None
+        self.fixtures = self.load_fixtures()
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = defaultdict(Counter)
+        self.persona_samples = defaultdict(list)
+        self.persona_errors = defaultdict(Counter)
+        self.lock = threading.Lock()
+        self.session_keys = []
+        self.registration_pairs = set()
+
+        rng = random.Random(options['seed'])
+        counts = assign_personas(mix, options['users'])
+        virtual_users = []
+        for persona, count in counts.items():
+            logins = self.fixtures['users'][persona]
+            if persona != 'visitor' and not logins:
+                self.stdout.write(self.style.WARNING(
+                    f'No {persona.replace("_", " ")} account to log in as; its {count} users browse as visitors'
+                ))
+                persona = 'visitor'
+            for i in range(count):
+                user = logins[i % len(logins)] if persona != 'visitor' else None
+                virtual_users.append(VirtualUser(self, persona, user, random.Random(rng.random())))
+
+        server = None
+        log_path = os.path.join(output_dir, f'load_{stamp}_gunicorn.log')
+        started_at = timezone.now()
+        try:
+            if options['url']:
+                self.url = options['url'].rstrip('/')
+            else:
+                server = self.start_server(workers, options['gunicorn_args'], log_path, options['wsgi'])
+            self.stdout.write(
+                f"{len(virtual_users)} users ({', '.join(f'{n} {p}' for p, n in Counter(vu.persona for vu in virtual_users).items())}) "
+                f"for {options['duration']:g} s against {self.url}"
+                + (f" ({workers} gunicorn {'WSGI' if options['wsgi'] else 'ASGI'} workers)" if server else '')
+            )
+            elapsed = self.run_load(virtual_users, options['duration'], options['ramp_up'], options['think_time'])
+        finally:
+            if server is not None:
+                self.stop_server(server)
+            self.cleanup()
+
+        results = self.report(elapsed)
+        results.update({
+            'timestamp': timezone.localtime(started_at).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'url': self.url,
+            'gunicorn_workers': workers if server else None,
+            'gunicorn_args': options['gunicorn_args'] if server else None,
+            'interface': ('wsgi' if options['wsgi'] else 'asgi') if server else None,
+            'users': len(virtual_users),
+            'personas': dict(Counter(vu.persona for vu in virtual_users)),
+            'duration_s': options['duration'],
+            'ramp_up_s': options['ramp_up'],
+            'think_time_s': options['think_time'],
+        })
+        file_path = os.path.join(output_dir, f'load_{stamp}.json')
+        with open(file_path, 'w') as output:
+            json.dump(results, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {file_path}'))
+
+    def load_fixtures(self):
+        """Accounts to log in as and the ids and numbers the tasks pick from, read before the load starts"""
+        from django.contrib.auth.models import User
+        from veteran_app.models import (Event, EventRegistration, State, UserState, VerificationPartner, VeteranMember,
+                                        VeteranUser)
+
+        state_heads = []
+        for profile in (UserState.objects.filter(approved=True, user__is_active=True, user__username__startswith='state_')
+                        .select_related('user').order_by('pk')[:50]):
+            profile.user.load_test_state_id = profile.state_id
+            state_heads.append(profile.user)
+        veterans = list(
+            VeteranUser.objects.filter(approved=True, user__is_active=True).select_related('user').order_by('?')[:200]
+        )
+        for account in veterans:
+            account.user.load_test_veteran_id = account.veteran_member_id
+        now = timezone.now()
+        events = Event.objects.filter(status='published', registration_required=True, registration_fee=0,
+                                      start_date__gt=now).exclude(registration_deadline__lt=now)
+        event_ids = list(events.values_list('pk', flat=True).order_by('?')[:200])
+        names = VeteranMember.objects.filter(approved=True).values_list('name', flat=True).order_by('?')[:200]
+        self.partner = VerificationPartner(name=f'Load test {get_random_string(8)}')
+        partner_key = self.partner.issue_key()
+        self.partner.save()
+        return {
+            'users': {
+                'visitor': [],
+                'superuser': list(User.objects.filter(is_superuser=True, is_active=True).order_by('pk')[:5]),
+                'state_head': state_heads,
+                'veteran': [account.user for account in veterans],
+            },
+            # (veteran, event) pairs with a registration before the run; the harness leaves them alone
+            'registered': set(EventRegistration.objects.filter(
+                veteran_id__in=[account.veteran_member_id for account in veterans], event_id__in=event_ids
+            ).values_list('veteran_id', 'event_id')),
+            'state_ids': list(State.objects.values_list('pk', flat=True)) or [0],
+            'event_ids': event_ids,
+            'partner_key': partner_key,
+            'association_numbers': list(
+                VeteranMember.objects.filter(approved=True).exclude(association_number__isnull=True)
+                .values_list('association_number', flat=True).order_by('?')[:500]
+            ),
+            'search_terms': sorted({part for name in names for part in name.split()[:2] if len(part) >= 3})
+                            or ['singh'],
+        }
+
+    def login(self, user):
+        """A logged-in session for a user, stored where the server reads it, as Client.force_login does"""
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.create()
+        self.session_keys.append(store.session_key)
+        return store.session_key
+
+    def start_server(self, workers, extra_args, log_path, wsgi=False):
+        """Start gunicorn as render.yaml does, or with sync WSGI workers if ``wsgi``"""
+        import requests
+
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}'
+        if wsgi:
+            application = ['veteran_project.wsgi:application']
+        else:
+            application = ['veteran_project.asgi:application', '-k', 'uvicorn.workers.UvicornWorker']
+        command = [
+            sys.executable, '-m', 'gunicorn', *application,
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--timeout', '120',
+            '--log-level', 'warning', *shlex.split(extra_args),
+        ]
+        log = open(log_path, 'w')
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, stdout=log, stderr=subprocess.STDOUT)
+        server.log = log
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                break
+            try:
+                requests.get(self.url + '/', timeout=5)
+                return server
+            except requests.RequestException:
+                time.sleep(0.25)
+        self.stop_server(server)
+        with open(log_path) as output:
+            tail = output.read()[-2000:]
+        raise CommandError(f'gunicorn did not start (are gunicorn and uvicorn installed?); log {log_path}:\n{tail}')
+
+    def stop_server(self, server):
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+        server.log.close()
+
+    def run_load(self, virtual_users, duration, ramp_up, think_time):
+        started = time.monotonic()
+        deadline = started + duration
+        threads = []
+        for i, vu in enumerate(virtual_users):
+            delay = ramp_up * i / len(virtual_users)
+            thread = threading.Thread(target=self._run_user, args=(vu, started + delay, deadline, think_time),
+                                      daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return time.monotonic() - started
+
+    def _run_user(self, vu, start, deadline, think_time):
+        time.sleep(max(0, start - time.monotonic()))
+        vu.run(deadline, think_time)
+
+    def record(self, persona, name, seconds, status, error):
+        with self.lock:
+            self.samples[name].append(seconds * 1000)
+            self.statuses[name][status or 'none'] += 1
+            if error:
+                self.errors[name][error] += 1
+            self.persona_samples[persona].append(seconds * 1000)
+            if error:
+                self.persona_errors[persona][error] += 1
+
+    def take_registration(self, veteran_id, rng):
+        """An event for the veteran to register for, recorded for cleanup; None once there is none left"""
+        with self.lock:
+            taken = self.fixtures['registered'] | self.registration_pairs
+            event_ids = [event_id for event_id in self.fixtures['event_ids'] if (veteran_id, event_id) not in taken]
+            if not event_ids:
+                return None
+            event_id = rng.choice(event_ids)
+            self.registration_pairs.add((veteran_id, event_id))
+            return event_id
+
+    def cleanup(self):
+        """Remove the harness's sessions and the event registrations it made"""
+        from django.db.models import Q
+        from veteran_app.models import EventRegistration
+
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        for session_key in self.session_keys:
+            store(session_key).delete()
+        if self.partner is not None:
+            self.partner.delete()
+        if not self.registration_pairs:
+            return
+        # A pair has at most one registration, and these pairs had none before the run
+        pairs = sorted(self.registration_pairs)
+        registration_ids = []
+        for start in range(0, len(pairs), 500):
+            made = Q()
+            for veteran_id, event_id in pairs[start:start + 500]:
+                made |= Q(veteran_id=veteran_id, event_id=event_id)
+            registration_ids += EventRegistration.objects.filter(made).values_list('pk', flat=True)
+        # Deleting (rather than cancelling) gives the places back and lets the next run register again
+        removed, _per_model = EventRegistration.objects.filter(pk__in=registration_ids).delete()
+        if removed:
+            self.stdout.write(f'Removed {removed} event registrations made during the run')
+
+    def report(self, elapsed):
+        def summary(samples, errors):
+            ordered = sorted(samples)
+            failed = sum(errors.values())
+            return {
+                'requests': len(ordered),
+                'errors': failed,
+                'error_rate': round(failed / len(ordered), 4) if ordered else 0,
+                'throughput_rps': round(len(ordered) / elapsed, 2),
+                'mean_ms': round(statistics.fmean(ordered), 1) if ordered else None,
+                **{f'p{pct}_ms': round(percentile(ordered, pct), 1) if ordered else None for pct in (50, 90, 95, 99)},
+                'max_ms': round(ordered[-1], 1) if ordered else None,
+                'error_kinds': dict(errors),
+            }
+
+        endpoints = {
+            name: dict(summary(samples, self.errors[name]), statuses={str(k): v for k, v in self.statuses[name].items()})
+            for name, samples in sorted(self.samples.items())
+        }
+        personas = {
+            persona: summary(samples, self.persona_errors[persona])
+            for persona, samples in sorted(self.persona_samples.items())
+        }
+        total = summary([sample for samples in self.samples.values() for sample in samples],
+                        sum(self.errors.values(), Counter()))
+
+        header = f"{'endpoint':<26}{'reqs':>7}{'err%':>7}{'req/s':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"
+        self.stdout.write(header)
+        for name, data in list(endpoints.items()) + [('TOTAL', total)]:
+            if not data['requests']:
+                continue
+            line = (f"{name:<26}{data['requests']:>7}{data['error_rate'] * 100:>6.1f}%{data['throughput_rps']:>8.1f}"
+                    f"{data['p50_ms']:>8.0f}{data['p95_ms']:>8.0f}{data['p99_ms']:>8.0f}{data['max_ms']:>8.0f}")
+            self.stdout.write(self.style.WARNING(line) if data['errors'] else line)
+            for error, count in data['error_kinds'].items():
+                if name != 'TOTAL':
+                    self.stdout.write(f'    {count}x {error}')
+        self.stdout.write('(latencies in ms)')
+        return {'elapsed_s': round(elapsed, 2), 'total': total, 'endpoints': endpoints, 'personas': personas}
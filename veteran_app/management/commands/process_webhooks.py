@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from veteran_app.services import process_webhook_batch
+
+
+class Command(BaseCommand):
+    help = 'Apply stored payment gateway webhooks to orders, registrations and the ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Webhooks applied per transaction')
+        parser.add_argument('--max-attempts', type=int, default=5,
+                            help='Leave webhooks that failed this many times for manual review')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue instead of exiting when empty')
+        parser.add_argument('--sleep', type=float, default=2, help='Seconds to wait between polls with --loop')
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                count = process_webhook_batch(options['batch_size'], options['max_attempts'])
+                total += count
+                if count:
+                    continue
+                if not options['loop']:
+                    break
+                close_old_connections()
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Processed {total} webhooks'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from veteran_app import ledger
+from veteran_app.models import FinancialYear
+
+
+class Command(BaseCommand):
+    help = ('Recompute the ledger rollups (totals per financial year, month, transaction type and payment '
+            'method) from the transactions, or --check them for drift')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=str, default=None, help='Only this financial year, e.g. 2026-2027')
+        parser.add_argument('--check', action='store_true',
+                            help='Report rollups that differ from the transactions instead of rebuilding; '
+                                 'exits with an error if any do')
+
+    def handle(self, *args, **options):
+        financial_year = None
+        if options['year']:
+            financial_year = FinancialYear.objects.filter(year=options['year']).first()
+            if financial_year is None:
+                raise CommandError(f"No financial year {options['year']}")
+        scope = f'financial year {financial_year}' if financial_year else 'all financial years'
+
+        if options['check']:
+            differences = ledger.drift(financial_year)
+            for (year_id, month, transaction_type, payment_method), (stored, actual) in sorted(differences.items()):
+                self.stdout.write(
+                    f'  year #{year_id} {month:%Y-%m} {transaction_type}/{payment_method}: '
+                    f'rollup ₹{stored[0]} ({stored[1]}), transactions ₹{actual[0]} ({actual[1]})'
+                )
+            if differences:
+                raise CommandError(f'{len(differences)} rollup rows out of step in {scope}; run without --check to rebuild')
+            self.stdout.write(self.style.SUCCESS(f'Rollups match the transactions in {scope}'))
+            return
+
+        rows = ledger.rebuild(financial_year)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} rollup rows for {scope}'))
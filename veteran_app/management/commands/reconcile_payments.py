@@ -0,0 +1,78 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from veteran_app.reconciliation import reconcile_file, write_settlement_fixture
+
+
+def parse_date(value):
+    try:
+        return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+    except ValueError:
+        raise CommandError(f'Invalid date {value!r}; use YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Reconcile payment orders and ledger entries against a gateway settlement export (CSV, JSON or JSON Lines)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('settlement_file', type=str, help='Settlement export to reconcile (or to create with --write-fixture)')
+        parser.add_argument('--format', choices=['csv', 'json'], default=None,
+                            help='File format (default: from the extension; json covers arrays and JSON Lines)')
+        parser.add_argument('--report', type=str, default=None,
+                            help='Diff report CSV (default: <settlement_file>.diff.csv, "-" for stdout)')
+        parser.add_argument('--amount-in-paise', action='store_true', help='Amounts in the file are in paise')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows matched per database round trip')
+        parser.add_argument('--since', type=str, default=None,
+                            help='Start of the settlement window, YYYY-MM-DD (default: earliest matched payment)')
+        parser.add_argument('--until', type=str, default=None,
+                            help='End of the settlement window, YYYY-MM-DD (default: latest matched payment)')
+        parser.add_argument('--write-fixture', action='store_true',
+                            help='Write a settlement CSV from existing orders instead of reconciling')
+        parser.add_argument('--rows', type=int, default=0, help='With --write-fixture, pad the file to this many rows')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='With --write-fixture, fraction of orders dropped, duplicated or given a wrong amount')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        path = options['settlement_file']
+
+        if options['write_fixture']:
+            injected = write_settlement_fixture(path, options['rows'], options['error_rate'], options['seed'])
+            self.stdout.write(self.style.SUCCESS(f'Wrote {path}'))
+            self.stdout.write(json.dumps(injected, indent=2))
+            return
+
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+        since = parse_date(options['since']) if options['since'] else None
+        until = parse_date(options['until']) if options['until'] else None
+
+        report_path = options['report'] or f'{path}.diff.csv'
+        report = sys.stdout if report_path == '-' else open(report_path, 'w', newline='', encoding='utf-8')
+        started = time.perf_counter()
+        try:
+            summary = reconcile_file(
+                path, report,
+                file_format=options['format'],
+                amount_in_paise=options['amount_in_paise'],
+                chunk_size=options['chunk_size'],
+                since=since,
+                until=until
+            )
+        finally:
+            if report is not sys.stdout:
+                report.close()
+        summary['seconds'] = round(time.perf_counter() - started, 2)
+
+        output = self.stderr if report_path == '-' else self.stdout
+        output.write(json.dumps(summary, indent=2))
+        if report_path != '-':
+            output.write(f'Diff report: {report_path}')
+        style = self.style.WARNING if summary['issues'] else self.style.SUCCESS
+        output.write(style(f"{sum(summary['issues'].values())} discrepancies in {summary['rows']} rows"))
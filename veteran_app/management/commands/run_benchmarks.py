@@ -0,0 +1,220 @@
+import json
+import math
+import os
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+REPORT_COLUMNS = ['association_number', 'name', 'state', 'rank', 'branch', 'contact', 'membership', 'approved']
+
+# (name, URL name, URL arguments, method, data, who requests it); None is an anonymous visitor
+ENDPOINTS = [
+    ('index', 'index', (), 'get', {}, None),
+    ('dashboard', 'dashboard', (), 'get', {}, 'superuser'),
+    ('state_dashboard', 'state_dashboard', ('state',), 'get', {}, 'state_admin'),
+    ('treasurer_dashboard', 'treasurer_dashboard', (), 'get', {}, 'accounts'),
+    ('chat_portal', 'chat_portal', (), 'get', {}, 'veteran'),
+    ('gallery', 'gallery', (), 'get', {}, None),
+    ('reports_builder', 'reports_builder', (), 'get', {}, 'superuser'),
+    ('generate_report', 'generate_report', (), 'post', {'columns': REPORT_COLUMNS, 'state_filter': 'state'},
+     'superuser'),
+]
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a sorted list"""
+    return samples[max(0, math.ceil(len(samples) * pct / 100) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Time key views with the test client and record p50/p95 latency and query counts as JSON, '
+            'optionally compared with an earlier run')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20, help='Timed requests per view (default: 20)')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests first (default: 2)')
+        parser.add_argument('--endpoint', action='append', default=None,
+                            help='Only benchmark this view (repeatable); default: all')
+        parser.add_argument('--cold-cache', action='store_true', help='Clear the cache before every request')
+        parser.add_argument('--label', type=str, default='', help='Free text stored with the results')
+        parser.add_argument('--output-dir', type=str, default=None,
+                            help='Directory for JSON results (default: BASE_DIR/benchmark_results)')
+        parser.add_argument('--compare', type=str, default=None, help='An earlier results file to compare with')
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help='Percent p95 slowdown reported as a regression (default: 20)')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error if a view runs more queries or regresses past the threshold')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1 or options['warmup'] < 0:
+            raise CommandError('--runs must be at least 1 and --warmup cannot be negative')
+        endpoints = ENDPOINTS
+        if options['endpoint']:
+            unknown = set(options['endpoint']) - {endpoint[0] for endpoint in ENDPOINTS}
+            if unknown:
+                raise CommandError(f"Unknown endpoint(s): {', '.join(sorted(unknown))}")
+            endpoints = [endpoint for endpoint in ENDPOINTS if endpoint[0] in options['endpoint']]
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as earlier:
+                    baseline = json.load(earlier)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        context = self.context()
+        results = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'label': options['label'],
+            'runs': options['runs'],
+            'cold_cache': options['cold_cache'],
+            'data': self.volumes(),
+            'endpoints': {},
+        }
+        self.stdout.write(', '.join(f'{count} {name}' for name, count in results['data'].items()))
+        for name, *endpoint in endpoints:
+            result = self.benchmark(context, *endpoint, runs=options['runs'], warmup=options['warmup'],
+                                    cold=options['cold_cache'])
+            results['endpoints'][name] = result
+            line = (f"{name}: p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+                    f"{result['queries']} queries, HTTP {result['status']} as {result['user']}")
+            self.stdout.write(self.style.ERROR(line) if result['status'] >= 400 else line)
+
+        output_dir = options['output_dir'] or os.path.join(settings.BASE_DIR, 'benchmark_results')
+        os.makedirs(output_dir, exist_ok=True)
+        suffix = f"_{results['commit']}" if results['commit'] else ''
+        file_path = os.path.join(output_dir, f"views_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}.json")
+        with open(file_path, 'w') as output:
+            json.dump(results, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {file_path}'))
+
+        if baseline is not None:
+            regressions = self.compare(baseline, results, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"Regressions in: {', '.join(regressions)}")
+
+    def context(self):
+        """URL arguments and the users to request views as, falling back to a superuser"""
+        from veteran_app.models import State, UserState, VeteranMember, VeteranUser
+
+        superuser = User.objects.filter(is_superuser=True, is_active=True).order_by('pk').first()
+        if superuser is None:
+            raise CommandError('Create a superuser first')
+        # The state with the most members, so state views see the largest data set
+        state_id = (VeteranMember.objects.values('state').order_by().annotate(n=Count('pk'))
+                    .order_by('-n').values_list('state', flat=True).first())
+        state = State.objects.filter(pk=state_id).first() or State.objects.order_by('pk').first()
+        if state is None:
+            raise CommandError('Add at least one state first')
+        state_admin = UserState.objects.filter(state=state, approved=True, user__is_active=True).select_related('user').first()
+        veteran = VeteranUser.objects.filter(approved=True, user__is_active=True).select_related('user').first()
+        return {
+            'state': state,
+            'users': {
+                None: None,
+                'superuser': superuser,
+                'accounts': User.objects.filter(username='accounts', is_active=True).first() or superuser,
+                'state_admin': state_admin.user if state_admin else superuser,
+                'veteran': veteran.user if veteran else superuser,
+            },
+        }
+
+    def volumes(self):
+        from veteran_app.models import Event, EventRegistration, GalleryImage, Transaction, VeteranMember
+
+        return {
+            'members': VeteranMember.objects.count(),
+            'transactions': Transaction.objects.count(),
+            'events': Event.objects.count(),
+            'registrations': EventRegistration.objects.count(),
+            'gallery_images': GalleryImage.objects.count(),
+        }
+
+    def benchmark(self, context, url_name, url_args, method, data, user, runs, warmup, cold):
+        url = reverse(url_name, args=[context[arg].pk for arg in url_args])
+        # String values naming a context entry (e.g. 'state') stand for its key
+        data = {key: context[value].pk if isinstance(value, str) and value in context else value
+                for key, value in data.items()}
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        client = Client(HTTP_HOST=host)
+        login = context['users'][user]
+        if login is not None:
+            client.force_login(login)
+
+        def request():
+            if cold:
+                cache.clear()
+            response = getattr(client, method)(url, data)
+            size = sum(len(chunk) for chunk in response.streaming_content) if response.streaming else len(response.content)
+            return response, size
+
+        # Queries are counted on the first request, which also warms the caches. The
+        # request_started signal empties the query log, so start from an empty one
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            response, size = request()
+        for _ in range(warmup):
+            request()
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            request()
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        return {
+            'url': url,
+            'method': method.upper(),
+            'user': login.username if login else 'anonymous',
+            'status': response.status_code,
+            'bytes': size,
+            'queries': len(captured.captured_queries),
+            'p50_ms': round(percentile(samples, 50), 2),
+            'p95_ms': round(percentile(samples, 95), 2),
+            'mean_ms': round(statistics.fmean(samples), 2),
+            'min_ms': round(samples[0], 2),
+            'max_ms': round(samples[-1], 2),
+        }
+
+    def compare(self, baseline, results, threshold):
+        """Print the change against an earlier run; returns the views that regressed"""
+        label = baseline.get('commit') or baseline.get('timestamp', 'baseline')
+        self.stdout.write(f'\nCompared with {label} ({baseline.get("label") or "no label"}):')
+        if baseline.get('data') != results['data']:
+            self.stdout.write(self.style.WARNING(f"  data differs: {baseline.get('data')} then, {results['data']} now"))
+        regressions = []
+        for name, now in results['endpoints'].items():
+            then = baseline.get('endpoints', {}).get(name)
+            if then is None:
+                self.stdout.write(f'  {name}: not in the earlier run')
+                continue
+            change = (now['p95_ms'] - then['p95_ms']) / then['p95_ms'] * 100 if then['p95_ms'] else 0
+            regressed = now['queries'] > then['queries'] or change > threshold
+            if regressed:
+                regressions.append(name)
+            line = (f"  {name}: p95 {then['p95_ms']:.1f} -> {now['p95_ms']:.1f} ms ({change:+.0f}%), "
+                    f"queries {then['queries']} -> {now['queries']}")
+            self.stdout.write(self.style.WARNING(line) if regressed else line)
+        return regressions
+
+
+def git_commit():
+    """Short hash of the checked out commit, if the code runs from a git checkout"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True,
+            timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
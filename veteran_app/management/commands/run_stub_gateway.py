@@ -0,0 +1,129 @@
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class StubGatewayHandler(BaseHTTPRequestHandler):
+    """Minimal Razorpay-compatible API: orders and payments, kept in memory"""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, so client connection reuse is visible
+
+    def setup(self):
+        super().setup()
+        # Headers and body are separate writes; avoid Nagle/delayed-ACK stalls on keep-alive
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.stats_lock:
+            self.server.stats['connections'] += 1
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def simulate(self):
+        """Apply configured latency and failures; returns False if the request failed"""
+        with self.server.stats_lock:
+            self.server.stats['requests'] += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.fail_rate and random.random() < self.server.fail_rate:
+            self.send_json(503, {'error': {'code': 'SERVER_ERROR', 'description': 'Stub failure'}})
+            return False
+        return True
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def do_POST(self):
+        body = self.read_body()
+        if not self.simulate():
+            return
+        parts = self.path.split('?')[0].strip('/').split('/')
+
+        if parts == ['v1', 'orders']:
+            order = {
+                'id': f'order_{uuid.uuid4().hex[:14]}',
+                'entity': 'order',
+                'amount': body.get('amount', 0),
+                'amount_paid': 0,
+                'currency': body.get('currency', 'INR'),
+                'receipt': body.get('receipt'),
+                'status': 'created',
+                'created_at': int(time.time()),
+            }
+            self.server.orders[order['id']] = order
+            return self.send_json(200, order)
+
+        if len(parts) == 4 and parts[:2] == ['v1', 'payments'] and parts[3] == 'capture':
+            return self.send_json(200, {'id': parts[2], 'entity': 'payment', 'status': 'captured',
+                                        'amount': body.get('amount', 0)})
+
+        self.send_json(404, {'error': {'code': 'BAD_REQUEST_ERROR', 'description': 'Not found'}})
+
+    def do_GET(self):
+        if not self.simulate():
+            return
+        parts = self.path.split('?')[0].strip('/').split('/')
+
+        if len(parts) == 3 and parts[:2] == ['v1', 'orders']:
+            order = self.server.orders.get(parts[2])
+            if order:
+                return self.send_json(200, order)
+        elif len(parts) == 3 and parts[:2] == ['v1', 'payments']:
+            return self.send_json(200, {'id': parts[2], 'entity': 'payment', 'status': 'captured'})
+
+        self.send_json(404, {'error': {'code': 'BAD_REQUEST_ERROR', 'description': 'Not found'}})
+
+
+class Command(BaseCommand):
+    help = 'Run a local stub payment gateway for benchmarks and testing (set PAYMENT_GATEWAY_BASE_URL to its URL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', type=str, default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0, help='Added latency per request in milliseconds')
+        parser.add_argument('--fail-rate', type=float, default=0, help='Fraction of requests answered with 503')
+        parser.add_argument('--verbose', action='store_true', help='Log every request')
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer((options['host'], options['port']), StubGatewayHandler)
+        server.daemon_threads = True
+        server.latency = options['latency'] / 1000
+        server.fail_rate = options['fail_rate']
+        server.verbose = options['verbose']
+        server.orders = {}
+        server.stats = {'connections': 0, 'requests': 0}
+        server.stats_lock = threading.Lock()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stub gateway listening on http://{options['host']}:{options['port']} "
+            f"(PAYMENT_GATEWAY_BASE_URL=http://{options['host']}:{options['port']})"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(
+                f"{server.stats['requests']} requests over {server.stats['connections']} connections"
+            )
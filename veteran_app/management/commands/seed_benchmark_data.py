@@ -0,0 +1,140 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+# Every synthetic row carries this marker in its unique values, so --clear finds them again
+MARKER = 'BM'
+
+
+class Command(BaseCommand):
+    help = ('Add realistic volumes of synthetic members, transactions, events and registrations for '
+            'benchmarks (see run_benchmarks); --clear removes them again')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=100000, help='Members, spread over the states (default: 100000)')
+        parser.add_argument('--transactions', type=int, default=500000, help='Transactions over the last two years (default: 500000)')
+        parser.add_argument('--events', type=int, default=10000, help='Events (default: 10000)')
+        parser.add_argument('--registrations', type=int, default=20, help='Average registrations per event (default: 20)')
+        parser.add_argument('--veteran-users', type=int, default=1000, help='Members given an approved login (default: 1000)')
+        parser.add_argument('--job-profiles', type=int, default=5000, help='Job portal profiles (default: 5000)')
+        parser.add_argument('--matrimonial-profiles', type=int, default=2000, help='Matrimonial profiles (default: 2000)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, for repeatable data (default: 42)')
+        parser.add_argument('--no-copy', action='store_true', help='Insert with bulk_create instead of COPY')
+        parser.add_argument('--clear', action='store_true', help='Remove earlier benchmark data instead of adding more')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.clear()
+            return
+
+        from veteran_app import ledger, sample_data
+        from veteran_app.models import State, VeteranMember
+
+        states = list(State.objects.order_by('pk'))
+        if not states or not VeteranMember.objects.exists():
+            raise CommandError('Add at least one state and veteran member first (e.g. manage.py seed_members)')
+        if any(options[key] < 0 for key in ('members', 'transactions', 'events', 'registrations')):
+            raise CommandError('Counts cannot be negative')
+        created_by = User.objects.filter(is_superuser=True).order_by('pk').first()
+        if created_by is None:
+            raise CommandError('Create a superuser first; synthetic rows are recorded as created by them')
+
+        rng = random.Random(options['seed'])
+        prefix = MARKER + sample_data.run_prefix()[:4]
+        copy = not options['no_copy'] and connection.vendor == 'postgresql'
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            members = []
+            with self.step('members'):
+                share, extra = divmod(options['members'], len(states))
+                for i, state in enumerate(states):
+                    count = share + (1 if i < extra else 0)
+                    if count:
+                        members += sample_data.members(count, state, created_by, prefix=prefix, rng=rng, copy=copy)
+            if not members:
+                members = list(VeteranMember.objects.only('pk', 'name', 'state_id')[:1000])
+
+            with self.step('veteran logins'):
+                sample_data.veteran_users(rng.sample(members, min(options['veteran_users'], len(members))),
+                                          prefix=prefix)
+            with self.step('transactions'):
+                sample_data.transactions(options['transactions'], members, created_by, prefix=prefix, rng=rng,
+                                         days=730, copy=copy)
+            with self.step('events and registrations'):
+                events = sample_data.events(options['events'], states, created_by, prefix=prefix, rng=rng)
+                sample_data.registrations(events, members, per_event=options['registrations'], rng=rng, copy=copy)
+            with self.step('job and matrimonial profiles'):
+                sample_data.job_profiles(options['job_profiles'], members, rng=rng)
+                sample_data.matrimonial_profiles(options['matrimonial_profiles'], members, rng=rng)
+
+        with self.step('ledger rollups'):
+            ledger.rebuild()
+        with self.step('ANALYZE'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        # Signals did not run for these rows, so cached counts and facets are stale
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Benchmark data {prefix} added in {time.perf_counter() - started:.1f} s; '
+            'remove it with manage.py seed_benchmark_data --clear'
+        ))
+
+    def step(self, name):
+        return _Step(self.stdout, name)
+
+    def clear(self):
+        from django.db.models import Q
+        from veteran_app import ledger
+        from veteran_app.models import Event, EventRegistration, Transaction, VeteranMember
+
+        events = Event.objects.filter(description='Synthetic event', title__contains=f' {MARKER}')
+        members = VeteranMember.objects.filter(association_number__startswith=f'ICGVWA/{MARKER}')
+        with transaction.atomic():
+            with self.step('registrations'):
+                # One statement, skipping the signal that gives each registration's places
+                # back to its event: the events go too, and the rows were added without signals
+                self.delete_rows(EventRegistration.objects.filter(Q(event__in=events) | Q(veteran__in=members)))
+            with self.step('transactions'):
+                # Likewise past the per-row rollup signal; the rollups are rebuilt below
+                self.delete_rows(Transaction.objects.filter(transaction_id__startswith=f'TXN{MARKER}'))
+            with self.step('events'):
+                events.delete()
+            with self.step('members'):
+                members.delete()
+            with self.step('veteran logins'):
+                User.objects.filter(username__startswith=f'vet_{MARKER.lower()}', is_staff=False,
+                                    is_superuser=False).delete()
+            with self.step('ledger rollups'):
+                ledger.rebuild()
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS('Benchmark data removed'))
+
+    def delete_rows(self, queryset):
+        """Delete a queryset's rows in one statement, without signals or cascades"""
+        sql, params = queryset.values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(queryset.model._meta.db_table)} WHERE id IN ({sql})', params
+            )
+
+
+class _Step:
+    """Reports how long one seeding step took"""
+
+    def __init__(self, stdout, name):
+        self.stdout = stdout
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.stdout.write(f'{self.name}...', ending='')
+        self.stdout.flush()
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.stdout.write(f' {time.perf_counter() - self.started:.1f} s')
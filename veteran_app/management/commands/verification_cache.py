@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from veteran_app.verification_cache import (
+    bump_bloom_generation, forget_verifications, get_stats, reset_stats
+)
+
+
+class Command(BaseCommand):
+    help = 'Show verification cache hit rates and manage cached entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset-stats', action='store_true', help='Reset hit/miss counters after printing them')
+        parser.add_argument('--rebuild-bloom', action='store_true',
+                            help='Make every worker rebuild its Bloom filter on its next lookup')
+        parser.add_argument('--forget', nargs='+', metavar='NUMBER',
+                            help='Drop cached results for these numbers in every worker')
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+        self.stdout.write(f"Lookups:        {stats['lookups']}")
+        self.stdout.write(f"Hits:           {stats['hits']}")
+        self.stdout.write(f"Negative hits:  {stats['negative_hits']}")
+        self.stdout.write(f"Bloom rejects:  {stats['bloom_rejects']}")
+        self.stdout.write(f"Misses (DB):    {stats['misses']}")
+        self.stdout.write(f"Hit rate:       {stats['hit_rate']:.1%}")
+
+        if options['forget']:
+            forget_verifications(*options['forget'])
+            self.stdout.write(self.style.SUCCESS(f"Forgot {len(options['forget'])} cached numbers"))
+        if options['rebuild_bloom']:
+            bump_bloom_generation()
+            self.stdout.write(self.style.SUCCESS('Bloom filter generation bumped'))
+        if options['reset_stats']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
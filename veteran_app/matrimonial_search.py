@@ -0,0 +1,186 @@
+"""Faceted search over active matrimonial profiles
+
+Facets are gender, religion, occupation, age band (from the child's date of
+birth) and the parent veteran's state. Their counts come from one grouped
+query over every combination of facet values; the count shown for each
+value is then worked out from those groups with the other selected facets
+applied, so picking a religion still shows how many profiles each other
+religion has. Counts are cached per facet combination under a version token
+that changes to profiles, children, a member's state or a state's name
+replace (see signals.py).
+
+The token lives in the default cache, which is per worker process unless a
+shared cache is configured (see caching.py). With LocMemCache the other
+workers keep showing the old counts for up to
+MATRIMONIAL_FACET_CACHE_TIMEOUT (600 seconds); the listed profiles are
+always current, only the counts beside the filters lag.
+
+Profiles are listed newest first with keyset pagination.
+"""
+import hashlib
+import uuid
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, Value, When
+from django.db.models.functions import Lower, Trim
+
+from .directory import seek_page
+from .models import Matrimonial, State
+from .thumbnails import get_thumbnail_path, get_thumbnail_url
+
+KEY_PREFIX = 'matrimonial:facets'
+PAGE_SIZE = 12
+ORDER = ('-created_at', '-id')
+THUMBNAIL_SIZE = (400, 300)
+MAX_FACET_VALUES = 12
+
+# (key, label, minimum age, age below which the band ends)
+AGE_BANDS = [
+    ('under_25', 'Under 25', None, 25),
+    ('25_29', '25 - 29', 25, 30),
+    ('30_34', '30 - 34', 30, 35),
+    ('35_plus', '35 and above', 35, None),
+]
+UNKNOWN_AGE = 'unknown'
+
+FACETS = ('gender', 'religion', 'occupation', 'age_band', 'state')
+
+
+def _years_ago(today, years):
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        # 29 February
+        return today.replace(year=today.year - years, day=28)
+
+
+def age_band_expression(today=None):
+    """Age band of the child as a SQL CASE on child_dob"""
+    today = today or date.today()
+    whens = []
+    for key, _label, minimum, below in AGE_BANDS:
+        condition = {}
+        if minimum is not None:
+            condition['child__child_dob__lte'] = _years_ago(today, minimum)
+        if below is not None:
+            condition['child__child_dob__gt'] = _years_ago(today, below)
+        whens.append(When(then=Value(key), **condition))
+    return Case(*whens, default=Value(UNKNOWN_AGE), output_field=CharField())
+
+
+def profiles_queryset(today=None):
+    """Active profiles annotated with their facet values"""
+    return Matrimonial.objects.filter(is_active=True).annotate(
+        religion_key=Lower(Trim('religion')),
+        occupation_key=Lower(Trim('occupation')),
+        age_band=age_band_expression(today),
+    )
+
+
+FACET_FIELDS = {
+    'gender': 'gender',
+    'religion': 'religion_key',
+    'occupation': 'occupation_key',
+    'age_band': 'age_band',
+    'state': 'veteran__state_id',
+}
+
+
+def clean_filters(params):
+    """Selected facet values from request parameters (several values of a facet are alternatives)"""
+    filters = {}
+    for facet in FACETS:
+        values = sorted({value.strip().lower() for value in params.getlist(facet) if value.strip()})[:10]
+        if facet == 'state':
+            values = [int(value) for value in values if value.isdigit()]
+        if values:
+            filters[facet] = values
+    return filters
+
+
+def apply_filters(queryset, filters):
+    for facet, values in filters.items():
+        queryset = queryset.filter(**{f'{FACET_FIELDS[facet]}__in': values})
+    return queryset
+
+
+def _version():
+    key = f'{KEY_PREFIX}:version'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_facets():
+    """Drop every cached facet count, e.g. after a profile is saved or deleted"""
+    cache.set(f'{KEY_PREFIX}:version', uuid.uuid4().hex, timeout=None)
+
+
+def _labels(facet, values):
+    if facet == 'gender':
+        return dict(Matrimonial.GENDER_CHOICES)
+    if facet == 'age_band':
+        return {key: label for key, label, _minimum, _below in AGE_BANDS} | {UNKNOWN_AGE: 'Not given'}
+    if facet == 'state':
+        return dict(State.objects.filter(pk__in=values).values_list('pk', 'name'))
+    return {value: value.title() for value in values}
+
+
+def facet_counts(filters, today=None):
+    """{facet: [{'value', 'label', 'count', 'selected'}]} for the selected filters (cached)"""
+    today = today or date.today()
+    combination = '&'.join(f'{facet}={",".join(map(str, values))}' for facet, values in sorted(filters.items()))
+    key = f'{KEY_PREFIX}:{_version()}:{today.isoformat()}:{hashlib.md5(combination.encode("utf-8")).hexdigest()}'
+    facets = cache.get(key)
+    if facets is not None:
+        return facets
+
+    fields = [FACET_FIELDS[facet] for facet in FACETS]
+    groups = [
+        (dict(zip(FACETS, (row[field] for field in fields))), row['n'])
+        for row in profiles_queryset(today).values(*fields).annotate(n=Count('id')).order_by()
+    ]
+
+    facets = {}
+    for facet in FACETS:
+        others = {other: set(values) for other, values in filters.items() if other != facet}
+        counts = {}
+        for values, n in groups:
+            if all(values[other] in selected for other, selected in others.items()):
+                value = values[facet]
+                if value not in (None, ''):
+                    counts[value] = counts.get(value, 0) + n
+        selected = set(filters.get(facet, ()))
+        ordered = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+        if facet not in ('gender', 'age_band'):
+            # Long tails of free-text values; selected values always stay visible
+            ordered = ordered[:MAX_FACET_VALUES] + [item for item in ordered[MAX_FACET_VALUES:] if item[0] in selected]
+        elif facet == 'age_band':
+            order = [band[0] for band in AGE_BANDS] + [UNKNOWN_AGE]
+            ordered = sorted(ordered, key=lambda item: order.index(item[0]))
+        labels = _labels(facet, [value for value, _n in ordered])
+        facets[facet] = [
+            {'value': value, 'label': labels.get(value, value), 'count': n, 'selected': value in selected}
+            for value, n in ordered
+        ]
+    cache.set(key, facets, getattr(settings, 'MATRIMONIAL_FACET_CACHE_TIMEOUT', 600))
+    return facets
+
+
+def search_profiles(filters, after=None, before=None, size=PAGE_SIZE):
+    """A keyset page of matching profiles, newest first, with a thumbnail_url on each"""
+    profiles = apply_filters(profiles_queryset(), filters).select_related('child', 'veteran__state')
+    page = seek_page(profiles, ORDER, after=after, before=before, size=size)
+    for profile in page:
+        profile.thumbnail_url = get_thumbnail_url(profile.photo, THUMBNAIL_SIZE) if profile.photo else None
+    return page
+
+
+def make_thumbnail(profile):
+    """Render a profile's listing thumbnail ahead of time so the portal never resizes uploads"""
+    if profile.photo:
+        get_thumbnail_path(profile.photo, THUMBNAIL_SIZE)
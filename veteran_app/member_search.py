@@ -0,0 +1,154 @@
+"""Ranked member search over VeteranMember.search_vector
+
+search_vector is a stored generated column (name, association number,
+service number, contact, city, unit served and legacy numbers) with a GIN
+index, so a search is one index lookup instead of icontains scans over
+every column. Each typed word matches as a prefix, so results narrow while
+typing. Where pg_trgm is installed, names within a typo or two also match
+via the member_name_trgm_idx trigram index.
+
+Users who only see names (the chat directory) search with NAME_WEIGHTS, so
+their words cannot match a member's contact number, email or city.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.functions import Collate, Upper
+
+from .models import UserState, VeteranMember
+
+MAX_RESULTS = 50
+MIN_TRIGRAM_LENGTH = 3
+AUTOCOMPLETE_LIMIT = 10
+# search_vector weight of the name, association and service numbers
+NAME_WEIGHTS = 'A'
+
+# Letters, digits and '/' (association numbers parse as one token with their slashes)
+_TERM_RE = re.compile(r'[\w/]+')
+
+_trigram_available = None
+
+
+def trigram_available():
+    """Whether pg_trgm is installed in this database (checked once per process)"""
+    global _trigram_available
+    if not getattr(settings, 'MEMBER_SEARCH_TRIGRAM', True) or connection.vendor != 'postgresql':
+        return False
+    if _trigram_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_available = cursor.fetchone() is not None
+    return _trigram_available
+
+
+def build_query(text, weights=''):
+    """AND of prefix matches for each word, limited to lexemes of the given weights
+
+    Returns None if nothing searchable was typed.
+    """
+    terms = [term.strip('/') for term in _TERM_RE.findall(text.lower()) if term.strip('/_')]
+    if not terms:
+        return None
+    return SearchQuery(' & '.join(f"'{term}':*{weights}" for term in terms[:8]), search_type='raw', config='simple')
+
+
+def search(queryset, text, also=None, weights=''):
+    """Filter a VeteranMember queryset by a search and order it by relevance
+
+    ``also`` is an extra Q whose matches are included too (e.g. an exact id).
+    """
+    query = build_query(text, weights)
+    if query is None:
+        return queryset.filter(also) if also is not None else queryset.none()
+    rank = SearchRank(F('search_vector'), query)
+    condition = Q(search_vector=query)
+    if also is not None:
+        condition |= also
+    name = text.strip()
+    if len(name) >= MIN_TRIGRAM_LENGTH and trigram_available():
+        condition |= Q(name__trigram_similar=name)
+        rank = rank + TrigramSimilarity('name', name)
+    return queryset.filter(condition).annotate(search_rank=rank).order_by('-search_rank', 'name', 'association_id')
+
+
+def searchable_members(user):
+    """Members a user may search, and whether they may see contact details
+
+    Without contact details, search with weights=NAME_WEIGHTS.
+
+    Superusers and the accounts user search everyone, state admins their own state, and approved
+    veterans the chat directory (approved members of other states, names only).
+    Returns (None, False) for anyone else.
+    """
+    if user.is_superuser or user.username == 'accounts':
+        return VeteranMember.objects.all(), True
+    try:
+        user_state = user.state_profile
+        if user_state.approved:
+            return VeteranMember.objects.filter(state_id=user_state.state_id), True
+    except UserState.DoesNotExist:
+        pass
+    try:
+        veteran_user = user.veteran_profile
+    except Exception:
+        return None, False
+    if not veteran_user.approved:
+        return None, False
+    from .directory import directory_queryset
+    return directory_queryset(veteran_user.veteran_member), False
+
+
+def member_result(member, detailed):
+    result = {
+        'id': member.association_id,
+        'name': member.name,
+        'state': member.state.name,
+        'rank': member.rank.name,
+    }
+    if detailed:
+        result.update({
+            'association_number': member.association_number,
+            'service_number': member.service_number,
+            'contact': member.contact,
+            'city': member.living_city,
+            'approved': member.approved,
+        })
+    return result
+
+
+def prefix_key(field):
+    """Upper-cased, byte-ordered key of a field, matching the member_*_prefix_idx indexes"""
+    return Collate(Upper(field), 'C')
+
+
+def _prefix_range(field, prefix):
+    """Rows whose field starts with prefix (case-insensitive), as a range the index reads in order"""
+    prefix = prefix.upper()
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return {f'{field}_key__gte': prefix, f'{field}_key__lt': upper_bound}
+
+
+def autocomplete(members, text, limit=AUTOCOMPLETE_LIMIT, weights=''):
+    """Suggestions for a typeahead: name and association number prefixes first, then word matches
+
+    The prefix lookups are ordered range scans that stop after ``limit``
+    rows however common the prefix is. Only when they come up short are
+    word-prefix matches (surnames, service numbers, cities) added from the
+    full-text index.
+    """
+    text = text.strip()
+    if not text:
+        return []
+    found = list(
+        members.annotate(name_key=prefix_key('name')).filter(**_prefix_range('name', text)).order_by('name_key', 'pk')[:limit]
+    )
+    if len(found) < limit and any(ch.isdigit() or ch == '/' for ch in text):
+        found += members.annotate(association_number_key=prefix_key('association_number')).filter(
+            **_prefix_range('association_number', text)
+        ).exclude(pk__in=[member.pk for member in found]).order_by('association_number_key')[:limit - len(found)]
+    if len(found) < limit:
+        found += search(members, text, weights=weights).exclude(pk__in=[member.pk for member in found])[:limit - len(found)]
+    return found
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0029_associationverification_permission_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='associationverification',
+            name='verification_date',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='roleauditlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0030_audit_timestamps_default_now'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentwebhook',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='paymentwebhook',
+            name='gateway_event_id',
+            field=models.CharField(blank=True, help_text='Gateway event ID, used to drop redelivered webhooks', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='paymentwebhook',
+            name='gateway_payment_id',
+            field=models.CharField(blank=True, db_index=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='paymentwebhook',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='paymentwebhook',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='paymentorder',
+            name='gateway_order_id',
+            field=models.CharField(blank=True, db_index=True, max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='paymentwebhook',
+            index=models.Index(condition=models.Q(('processed', False)), fields=['created_at'], name='payment_webhook_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentwebhook',
+            constraint=models.UniqueConstraint(condition=models.Q(('gateway_event_id', ''), _negated=True), fields=('gateway', 'gateway_event_id'), name='unique_payment_webhook_event'),
+        ),
+    ]
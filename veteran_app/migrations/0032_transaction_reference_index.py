@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0031_payment_webhook_queue'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='reference_number',
+            field=models.CharField(blank=True, db_index=True, help_text='Cheque/UPI/Bank reference', max_length=100),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:24
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_confirmed_participants(apps, schema_editor):
+    """Count places taken by existing registrations in one UPDATE"""
+    Event = apps.get_model('veteran_app', 'Event')
+    EventRegistration = apps.get_model('veteran_app', 'EventRegistration')
+    taken = EventRegistration.objects.filter(event=OuterRef('pk')).exclude(status='cancelled').order_by().values(
+        'event'
+    ).annotate(total=Sum('participants_count')).values('total')
+    Event.objects.update(confirmed_participants=Coalesce(Subquery(taken), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0032_transaction_reference_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='confirmed_participants',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Places taken by registrations that are not cancelled; only changed through reserve_places/release_places'),
+        ),
+        migrations.RunPython(backfill_confirmed_participants, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0033_event_confirmed_participants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='waitlist_sequence',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Last waitlist position issued'),
+        ),
+        migrations.AddField(
+            model_name='eventregistration',
+            name='waitlist_position',
+            field=models.PositiveIntegerField(blank=True, help_text='Queue order while waitlisted', null=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='confirmed_participants',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Places taken by pending, confirmed and attended registrations; only changed with F() updates'),
+        ),
+        migrations.AlterField(
+            model_name='eventregistration',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('waitlisted', 'Waitlisted'), ('cancelled', 'Cancelled'), ('attended', 'Attended')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='eventregistration',
+            index=models.Index(condition=models.Q(('status', 'waitlisted')), fields=['event', 'waitlist_position'], name='event_reg_waitlist_idx'),
+        ),
+    ]
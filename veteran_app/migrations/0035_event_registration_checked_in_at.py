@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0034_event_registration_waitlist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventregistration',
+            name='checked_in_at',
+            field=models.DateTimeField(blank=True, help_text='When the attendee was checked in', null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0035_event_registration_checked_in_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatrequest',
+            index=models.Index(fields=['requester', '-created_at', '-id'], name='chat_request_sent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatrequest',
+            index=models.Index(fields=['recipient', '-created_at', '-id'], name='chat_request_received_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='veteranmember',
+            index=models.Index(condition=models.Q(('approved', True)), fields=['state', 'name', 'association_id'], name='member_directory_idx'),
+        ),
+    ]
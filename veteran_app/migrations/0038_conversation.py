@@ -0,0 +1,86 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest, Least
+
+
+def backfill_conversations(apps, schema_editor):
+    """One conversation per pair that has messages, with last message and unread counts"""
+    ChatMessage = apps.get_model('veteran_app', 'ChatMessage')
+    Conversation = apps.get_model('veteran_app', 'Conversation')
+    pairs = ChatMessage.objects.annotate(
+        low=Least('sender_id', 'receiver_id'), high=Greatest('sender_id', 'receiver_id')
+    ).exclude(low=models.F('high')).order_by().values('low', 'high').annotate(last_id=Max('id'), last_at=Max('created_at'))
+    Conversation.objects.bulk_create([
+        Conversation(member_low_id=pair['low'], member_high_id=pair['high'], last_message_id=pair['last_id'],
+                     last_message_at=pair['last_at'])
+        for pair in pairs.iterator()
+    ], batch_size=1000)
+
+    ChatMessage.objects.update(conversation=Subquery(
+        Conversation.objects.filter(
+            member_low=Least(OuterRef('sender_id'), OuterRef('receiver_id')),
+            member_high=Greatest(OuterRef('sender_id'), OuterRef('receiver_id'))
+        ).values('pk')[:1]
+    ))
+
+    def unread(member_field):
+        return Coalesce(Subquery(
+            ChatMessage.objects.filter(
+                conversation=OuterRef('pk'), receiver=OuterRef(member_field), is_read=False
+            ).order_by().values('conversation').annotate(total=Count('pk')).values('total')
+        ), 0)
+
+    Conversation.objects.update(unread_low=unread('member_low'), unread_high=unread('member_high'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0037_chat_message_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('unread_low', models.PositiveIntegerField(default=0, help_text='Messages member_low has not read')),
+                ('unread_high', models.PositiveIntegerField(default=0, help_text='Messages member_high has not read')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='veteran_app.chatmessage')),
+                ('member_high', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='veteran_app.veteranmember')),
+                ('member_low', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='veteran_app.veteranmember')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='veteran_app.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['conversation', 'created_at', 'id'], name='chat_message_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['member_low', '-last_message_at'], name='conversation_low_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['member_high', '-last_message_at'], name='conversation_high_inbox_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('member_low', 'member_high'), name='conversation_pair_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.CheckConstraint(condition=models.Q(('member_low__lt', models.F('member_high'))), name='conversation_pair_ordered'),
+        ),
+        migrations.RunPython(backfill_conversations, reverse_code=migrations.RunPython.noop),
+    ]
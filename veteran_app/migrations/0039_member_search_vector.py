@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:39
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+# pg_trgm powers fuzzy name matching. It is optional: where the extension is
+# not available (or the role may not create it) search works without typo
+# tolerance, see member_search.trigram_available().
+CREATE_TRIGRAM_INDEX = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS member_name_trgm_idx
+            ON veteran_app_veteranmember USING gin (name gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm is not available; fuzzy member search is disabled';
+    END IF;
+EXCEPTION WHEN insufficient_privilege THEN
+    RAISE NOTICE 'Not allowed to create pg_trgm; fuzzy member search is disabled';
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0038_conversation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='veteranmember',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('name', 'association_number', 'service_number', config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector(django.db.models.functions.text.Replace('association_number', models.Value('/'), models.Value(' ')), 'contact', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('living_city', 'unit_served', config='simple', weight='C'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('p_number', 'alternate_email', config='simple', weight='D'), django.contrib.postgres.search.SearchConfig('simple')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='veteranmember',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='member_search_vector_idx'),
+        ),
+        migrations.RunSQL(CREATE_TRIGRAM_INDEX, reverse_sql='DROP INDEX IF EXISTS member_name_trgm_idx;'),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:41
+
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0039_member_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='veteranmember',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('name'), 'C'), name='member_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='veteranmember',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('association_number'), 'C'), name='member_assn_prefix_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:43
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0040_member_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobportal',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('skills', config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector('qualification', 'specialization', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('experience', config='simple', weight='C'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('preferred_location', config='simple', weight='D'), django.contrib.postgres.search.SearchConfig('simple')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddField(
+            model_name='jobportal',
+            name='skill_tags',
+            field=models.GeneratedField(db_persist=True, expression=models.Func(models.Func(django.db.models.functions.text.Trim(django.db.models.functions.text.Lower('skills')), models.Value('\\s*[,;|\\n]+\\s*'), function='regexp_split_to_array'), models.Value(''), function='array_remove'), output_field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=200), size=None)),
+        ),
+        migrations.AddIndex(
+            model_name='jobportal',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='job_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobportal',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['skill_tags'], name='job_skill_tags_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobportal',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='job_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobportal',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['applicant_type', '-created_at'], name='job_active_type_idx'),
+        ),
+    ]
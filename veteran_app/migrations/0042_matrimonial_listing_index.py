@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0041_job_portal_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matrimonial',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='matrimonial_active_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:48
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+def queue_existing_resumes(apps, schema_editor):
+    """Resumes uploaded before extraction existed go through the extract_resumes worker once"""
+    JobPortal = apps.get_model('veteran_app', 'JobPortal')
+    JobPortal.objects.exclude(resume='').exclude(resume__isnull=True).update(resume_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0042_matrimonial_listing_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobportal',
+            name='resume_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobportal',
+            name='resume_error',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='jobportal',
+            name='resume_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobportal',
+            name='resume_sha256',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of the resume file the text was extracted from', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='jobportal',
+            name='resume_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobportal',
+            name='resume_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('resume_text', config='simple', weight='C'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='jobportal',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['resume_vector'], name='job_resume_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobportal',
+            index=models.Index(condition=models.Q(('resume_pending', True)), fields=['updated_at'], name='job_resume_pending_idx'),
+        ),
+        migrations.RunPython(queue_existing_resumes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-19 20:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    """Totals of the existing transactions, per financial year, month, type and method"""
+    Transaction = apps.get_model('veteran_app', 'Transaction')
+    TransactionRollup = apps.get_model('veteran_app', 'TransactionRollup')
+    rows = Transaction.objects.order_by().values(
+        'financial_year', 'transaction_type', 'payment_method', month=TruncMonth('created_at', output_field=models.DateField())
+    ).annotate(total=Sum('amount'), count=Count('pk'))
+    TransactionRollup.objects.bulk_create([
+        TransactionRollup(financial_year_id=row['financial_year'], month=row['month'],
+                          transaction_type=row['transaction_type'], payment_method=row['payment_method'],
+                          total=row['total'], count=row['count'])
+        for row in rows.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0043_job_portal_resume_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('transaction_type', models.CharField(choices=[('subscription', 'Subscription Payment'), ('donation', 'Donation'), ('expense', 'Expense'), ('refund', 'Refund'), ('other_income', 'Other Income'), ('event_fee', 'Event Fee'), ('crowdfunding', 'Crowd Funding')], max_length=20)),
+                ('payment_method', models.CharField(choices=[('cash', 'Cash'), ('bank_transfer', 'Bank Transfer'), ('upi', 'UPI'), ('cheque', 'Cheque'), ('online', 'Online Payment')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('financial_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='veteran_app.financialyear')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month'], name='transaction_rollup_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('financial_year', 'month', 'transaction_type', 'payment_method'), name='transaction_rollup_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 20:22
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def start_existing_holds(apps, schema_editor):
+    """Unpaid pending registrations so far held their places forever; give them two days from now to pay"""
+    EventRegistration = apps.get_model('veteran_app', 'EventRegistration')
+    EventRegistration.objects.filter(status='pending').exclude(payment_status='completed').update(
+        hold_expires_at=timezone.now() + timedelta(hours=48)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0044_transaction_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventregistration',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, help_text='A pending registration gives its places back if still unpaid by then', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='eventregistration',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['hold_expires_at'], name='event_reg_hold_idx'),
+        ),
+        migrations.RunPython(start_existing_holds, migrations.RunPython.noop),
+    ]
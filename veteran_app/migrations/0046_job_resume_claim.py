@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 20:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0045_event_registration_hold'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobportal',
+            name='resume_claimed_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When an extract_resumes worker took the resume off the queue', null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0046_job_resume_claim'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerificationPartner',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('key_hash', models.CharField(editable=False, max_length=64, unique=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(blank=True, editable=False, null=True)),
+            ],
+            options={
+                'verbose_name': 'Verification Partner',
+                'verbose_name_plural': 'Verification Partners',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0047_verification_partner'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerificationCacheStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Verification Cache Stat',
+                'verbose_name_plural': 'Verification Cache Stats',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteran_app', '0048_verification_cache_stat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentgateway',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -6,6 +6,11 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator, FileExtensionValidator
 from django.core.exceptions import ValidationError
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models import Func, Value
+from django.db.models.functions import Collate, Lower, Replace, Trim, Upper
 from django.utils import timezone
 import json
 from .validators import (
@@ -87,7 +92,7 @@ class RoleAuditLog(models.Model):
     permission = models.ForeignKey(Permission, on_delete=models.SET_NULL, null=True, blank=True)
     details = models.JSONField(default=dict, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         ordering = ['-timestamp']
@@ -281,6 +286,33 @@ class VeteranMember(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Maintained by PostgreSQL on every write (see member_search.py); association
+    # numbers are also indexed split on '/' so their last segment matches alone
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('name', 'association_number', 'service_number', weight='A', config='simple')
+            + SearchVector(Replace('association_number', Value('/'), Value(' ')), 'contact', weight='B', config='simple')
+            + SearchVector('living_city', 'unit_served', weight='C', config='simple')
+            + SearchVector('p_number', 'alternate_email', weight='D', config='simple')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='member_search_vector_idx'),
+            # Autocomplete: case-insensitive prefix ranges read in order, see member_search.prefix_key
+            models.Index(Collate(Upper('name'), 'C'), name='member_name_prefix_idx'),
+            models.Index(Collate(Upper('association_number'), 'C'), name='member_assn_prefix_idx'),
+            # Chat portal directory order, for keyset pagination
+            models.Index(
+                fields=['state', 'name', 'association_id'],
+                condition=models.Q(approved=True),
+                name='member_directory_idx'
+            ),
+        ]
+    
     def __str__(self):
         # Prefer service_number when available, fall back to Assn. Number (p_number) for legacy records
         sn = self.service_number or getattr(self, 'p_number', 'N/A')
@@ -697,10 +729,60 @@ class JobPortal(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Maintained by PostgreSQL on every write (see job_search.py). Skills are
+    # weighted A, qualification B, experience C and preferred location D, so
+    # one GIN index answers free text as well as per-field filters.
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('skills', weight='A', config='simple')
+            + SearchVector('qualification', 'specialization', weight='B', config='simple')
+            + SearchVector('experience', weight='C', config='simple')
+            + SearchVector('preferred_location', weight='D', config='simple')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    # Text of the uploaded resume, filled in by the extract_resumes worker (see resume_text.py)
+    resume_text = models.TextField(blank=True, editable=False)
+    resume_sha256 = models.CharField(max_length=64, blank=True, editable=False,
+                                     help_text='Hash of the resume file the text was extracted from')
+    resume_pending = models.BooleanField(default=False, editable=False)
+    resume_attempts = models.PositiveSmallIntegerField(default=0, editable=False)
+    resume_error = models.CharField(max_length=255, blank=True, editable=False)
+    resume_claimed_at = models.DateTimeField(null=True, blank=True, editable=False,
+                                             help_text='When an extract_resumes worker took the resume off the queue')
+    resume_vector = models.GeneratedField(
+        expression=SearchVector('resume_text', weight='C', config='simple'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    # The skills list split on commas, semicolons, '|' and new lines, lower-cased
+    skill_tags = models.GeneratedField(
+        expression=Func(
+            Func(Trim(Lower('skills')), Value(r'\s*[,;|\n]+\s*'), function='regexp_split_to_array'),
+            Value(''),
+            function='array_remove',
+        ),
+        output_field=ArrayField(models.CharField(max_length=200)),
+        db_persist=True,
+    )
+    
     class Meta:
         verbose_name = 'Job Portal Entry'
         verbose_name_plural = 'Job Portal'
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='job_search_vector_idx'),
+            GinIndex(fields=['skill_tags'], name='job_skill_tags_idx'),
+            GinIndex(fields=['resume_vector'], name='job_resume_vector_idx'),
+            # Resumes waiting for text extraction
+            models.Index(fields=['updated_at'], condition=models.Q(resume_pending=True), name='job_resume_pending_idx'),
+            # Newest active seekers, overall and per applicant type
+            models.Index(fields=['-created_at'], condition=models.Q(is_active=True), name='job_active_recent_idx'),
+            models.Index(
+                fields=['applicant_type', '-created_at'], condition=models.Q(is_active=True), name='job_active_type_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.get_applicant_type_display()}"
@@ -743,11 +825,59 @@ class Matrimonial(models.Model):
         verbose_name = 'Matrimonial Profile'
         verbose_name_plural = 'Matrimonial Profiles'
         ordering = ['-created_at']
+        indexes = [
+            # Portal listing order, for keyset pagination
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(is_active=True), name='matrimonial_active_recent_idx'
+            ),
+        ]
     
     def __str__(self):
         name = self.child_name if self.child_name else (self.child.child_name if self.child else 'Unknown')
         return f"{name} - {self.get_gender_display()}"
 
+class Conversation(models.Model):
+    """Chat thread between two veterans, keyed by the ordered pair (lower id first)
+
+    Keeps a pointer to the latest message and an unread counter per
+    participant, both updated in the same UPDATE as a send or read, so the
+    inbox is a single query without per-thread COUNTs.
+    """
+    member_low = models.ForeignKey(VeteranMember, on_delete=models.CASCADE, related_name='+')
+    member_high = models.ForeignKey(VeteranMember, on_delete=models.CASCADE, related_name='+')
+    last_message = models.ForeignKey('ChatMessage', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(default=timezone.now)
+    unread_low = models.PositiveIntegerField(default=0, help_text='Messages member_low has not read')
+    unread_high = models.PositiveIntegerField(default=0, help_text='Messages member_high has not read')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['member_low', 'member_high'], name='conversation_pair_unique'),
+            models.CheckConstraint(condition=models.Q(member_low__lt=models.F('member_high')), name='conversation_pair_ordered'),
+        ]
+        indexes = [
+            models.Index(fields=['member_low', '-last_message_at'], name='conversation_low_inbox_idx'),
+            models.Index(fields=['member_high', '-last_message_at'], name='conversation_high_inbox_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Conversation {self.member_low_id} <-> {self.member_high_id}"
+    
+    @staticmethod
+    def pair(member_id, other_id):
+        return tuple(sorted((int(member_id), int(other_id))))
+    
+    def side(self, member_id):
+        """'low' or 'high': which end of the pair a member is"""
+        return 'low' if member_id == self.member_low_id else 'high'
+    
+    def other_member(self, member_id):
+        return self.member_high if member_id == self.member_low_id else self.member_low
+    
+    def unread_for(self, member_id):
+        return getattr(self, f'unread_{self.side(member_id)}')
+
 class ChatMessage(models.Model):
     """Chat messages between veterans across states"""
     MESSAGE_STATUS_CHOICES = [
@@ -756,6 +886,7 @@ class ChatMessage(models.Model):
         ('rejected', 'Rejected'),
     ]
     
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, null=True, blank=True, related_name='messages')
     sender = models.ForeignKey(VeteranMember, on_delete=models.CASCADE, related_name='sent_messages')
     receiver = models.ForeignKey(VeteranMember, on_delete=models.CASCADE, related_name='received_messages')
     message = models.TextField()
@@ -767,6 +898,12 @@ class ChatMessage(models.Model):
         verbose_name = 'Chat Message'
         verbose_name_plural = 'Chat Messages'
         ordering = ['created_at']
+        indexes = [
+            # Chat stream poller scans recent messages
+            models.Index(fields=['created_at'], name='chat_message_created_idx'),
+            # Message history, keyset-paginated by (created_at, id)
+            models.Index(fields=['conversation', 'created_at', 'id'], name='chat_message_thread_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sender.name} -> {self.receiver.name}: {self.message[:50]}"
@@ -791,6 +928,10 @@ class ChatRequest(models.Model):
         verbose_name_plural = 'Chat Requests'
         ordering = ['-created_at']
         unique_together = ['requester', 'recipient']
+        indexes = [
+            models.Index(fields=['requester', '-created_at', '-id'], name='chat_request_sent_idx'),
+            models.Index(fields=['recipient', '-created_at', '-id'], name='chat_request_received_idx'),
+        ]
     
     def __str__(self):
         return f"{self.requester.name} -> {self.recipient.name} ({self.status})"
@@ -845,7 +986,7 @@ class Transaction(models.Model):
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHODS)
-    reference_number = models.CharField(max_length=100, blank=True, help_text='Cheque/UPI/Bank reference')
+    reference_number = models.CharField(max_length=100, blank=True, db_index=True, help_text='Cheque/UPI/Bank reference')
     description = models.TextField(blank=True)
     receipt = models.FileField(
         upload_to='receipts/%Y/%m/', 
@@ -863,6 +1004,34 @@ class Transaction(models.Model):
     def __str__(self):
         return f"{self.transaction_id} - ₹{self.amount}"
 
+class TransactionRollup(models.Model):
+    """Ledger totals per financial year, month, transaction type and payment method
+
+    Adjusted with F() updates whenever a transaction is created, changed or
+    deleted (see ledger.py), so dashboards add up a few of these rows
+    instead of scanning Transaction. Rebuild with rebuild_transaction_rollups.
+    """
+    financial_year = models.ForeignKey(FinancialYear, on_delete=models.CASCADE, related_name='rollups')
+    month = models.DateField(help_text='First day of the month')
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPES)
+    payment_method = models.CharField(max_length=20, choices=Transaction.PAYMENT_METHODS)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['financial_year', 'month', 'transaction_type', 'payment_method'], name='transaction_rollup_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['month'], name='transaction_rollup_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%b %Y} {self.transaction_type}/{self.payment_method}: ₹{self.total} ({self.count})"
+
 class ExpenseCategory(models.Model):
     """Categories for expenses"""
     name = models.CharField(max_length=100, unique=True)
@@ -988,6 +1157,11 @@ class Event(models.Model):
     registration_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     max_participants = models.PositiveIntegerField(null=True, blank=True)
     registration_deadline = models.DateTimeField(null=True, blank=True)
+    confirmed_participants = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text='Places taken by pending, confirmed and attended registrations; only changed with F() updates'
+    )
+    waitlist_sequence = models.PositiveIntegerField(default=0, editable=False, help_text='Last waitlist position issued')
     
     # Media
     banner_image = models.ImageField(
@@ -1015,27 +1189,69 @@ class Event(models.Model):
     def __str__(self):
         return self.title
     
+    # Maintained with F() updates under a row lock; a plain save() must not write back a stale copy
+    COUNTER_FIELDS = ('confirmed_participants', 'waitlist_sequence')
+    
+    def save(self, *args, **kwargs):
+        if self.pk and not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     def get_registration_count(self):
-        return self.registrations.filter(status='confirmed').count()
+        return self.confirmed_participants
     
-    def is_registration_open(self):
-        from django.utils import timezone
-        now = timezone.now()
-        if self.registration_deadline and now > self.registration_deadline:
-            return False
-        if self.max_participants and self.get_registration_count() >= self.max_participants:
+    def accepts_registrations(self):
+        """Published and before the deadline, whether or not places are left"""
+        if self.registration_deadline and timezone.now() > self.registration_deadline:
             return False
         return self.status == 'published'
+    
+    def is_registration_open(self):
+        if self.max_participants and self.confirmed_participants >= self.max_participants:
+            return False
+        return self.accepts_registrations()
+    
+    def reserve_places(self, participants):
+        """Take places with one conditional UPDATE; returns False if the event is full or closed
+        
+        The UPDATE locks the event row, so concurrent registrations are
+        serialised by the database and can never oversubscribe the event.
+        """
+        updated = Event.objects.filter(
+            models.Q(registration_deadline__isnull=True) | models.Q(registration_deadline__gte=timezone.now()),
+            models.Q(max_participants__isnull=True) |
+            models.Q(confirmed_participants__lte=models.F('max_participants') - participants),
+            pk=self.pk,
+            status='published'
+        ).update(confirmed_participants=models.F('confirmed_participants') + participants)
+        if updated:
+            self.confirmed_participants += participants
+        return bool(updated)
+    
+    def release_places(self, participants):
+        """Give places back after a registration is cancelled or deleted"""
+        from django.db.models.functions import Greatest
+        Event.objects.filter(pk=self.pk).update(
+            confirmed_participants=Greatest(models.F('confirmed_participants') - participants, 0)
+        )
+        self.confirmed_participants = max(self.confirmed_participants - participants, 0)
 
 class EventRegistration(models.Model):
     """Event registrations by veterans"""
     REGISTRATION_STATUS = [
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
+        ('waitlisted', 'Waitlisted'),
         ('cancelled', 'Cancelled'),
         ('attended', 'Attended'),
     ]
     
+    # Statuses counted in Event.confirmed_participants
+    PLACE_HOLDING_STATUSES = ('pending', 'confirmed', 'attended')
+    
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='registrations')
     veteran = models.ForeignKey(VeteranMember, on_delete=models.CASCADE, related_name='event_registrations')
     
@@ -1050,15 +1266,40 @@ class EventRegistration(models.Model):
     payment_id = models.CharField(max_length=100, blank=True)
     
     status = models.CharField(max_length=20, choices=REGISTRATION_STATUS, default='pending')
+    waitlist_position = models.PositiveIntegerField(null=True, blank=True, help_text='Queue order while waitlisted')
+    checked_in_at = models.DateTimeField(null=True, blank=True, help_text='When the attendee was checked in')
+    hold_expires_at = models.DateTimeField(
+        null=True, blank=True, help_text='A pending registration gives its places back if still unpaid by then'
+    )
     registered_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['event', 'veteran']
         ordering = ['-registered_at']
+        indexes = [
+            models.Index(
+                fields=['event', 'waitlist_position'],
+                condition=models.Q(status='waitlisted'),
+                name='event_reg_waitlist_idx'
+            ),
+            models.Index(
+                fields=['hold_expires_at'],
+                condition=models.Q(status='pending'),
+                name='event_reg_hold_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.veteran.name} - {self.event.title}"
+    
+    def get_waitlist_place(self):
+        """1-based place in the event's waitlist, or None if not waitlisted"""
+        if self.status != 'waitlisted' or self.waitlist_position is None:
+            return None
+        return EventRegistration.objects.filter(
+            event_id=self.event_id, status='waitlisted', waitlist_position__lt=self.waitlist_position
+        ).count() + 1
 
 # PAYMENT INTEGRATION MODELS
 class PaymentGateway(models.Model):
@@ -1078,6 +1319,7 @@ class PaymentGateway(models.Model):
     is_active = models.BooleanField(default=False)
     is_test_mode = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Workers reload their gateway client when it moves
     
     def __str__(self):
         return self.display_name
@@ -1112,7 +1354,7 @@ class PaymentOrder(models.Model):
     
     # Payment gateway details
     gateway = models.ForeignKey(PaymentGateway, on_delete=models.CASCADE)
-    gateway_order_id = models.CharField(max_length=200, blank=True)
+    gateway_order_id = models.CharField(max_length=200, blank=True, db_index=True)
     gateway_payment_id = models.CharField(max_length=200, blank=True)
     
     # Related objects
@@ -1133,16 +1375,36 @@ class PaymentOrder(models.Model):
         return f"{self.order_id} - ₹{self.amount}"
 
 class PaymentWebhook(models.Model):
-    """Webhook logs from payment gateways"""
+    """Webhook logs from payment gateways
+
+    Rows are written by the webhook endpoint as received and applied later by
+    the process_webhooks command.
+    """
     gateway = models.ForeignKey(PaymentGateway, on_delete=models.CASCADE)
     event_type = models.CharField(max_length=100)
+    gateway_event_id = models.CharField(max_length=100, blank=True, help_text='Gateway event ID, used to drop redelivered webhooks')
+    gateway_payment_id = models.CharField(max_length=200, blank=True, db_index=True)
     payload = models.JSONField()
     order = models.ForeignKey(PaymentOrder, on_delete=models.CASCADE, null=True, blank=True)
     processed = models.BooleanField(default=False)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['gateway', 'gateway_event_id'],
+                condition=~models.Q(gateway_event_id=''),
+                name='unique_payment_webhook_event'
+            ),
+        ]
+        indexes = [
+            # Queue scan for process_webhooks
+            models.Index(fields=['created_at'], condition=models.Q(processed=False), name='payment_webhook_pending_idx'),
+        ]
     
     def __str__(self):
         return f"{self.gateway.name} - {self.event_type}"
@@ -1151,7 +1413,8 @@ class AssociationVerification(models.Model):
     """Association number verification log"""
     association_number = models.CharField(max_length=30, db_index=True)
     verified_by = models.CharField(max_length=200, blank=True, help_text='Organization or person who verified')
-    verification_date = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when a buffered batch is flushed (see audit_buffer.py)
+    verification_date = models.DateTimeField(default=timezone.now, editable=False)
     verification_method = models.CharField(max_length=50, choices=[
         ('qr_scan', 'QR Code Scan'),
         ('manual', 'Manual Verification'),
@@ -1167,6 +1430,57 @@ class AssociationVerification(models.Model):
     def __str__(self):
         return f"{self.association_number} - {self.verification_date.strftime('%Y-%m-%d')}"
 
+class VerificationPartner(models.Model):
+    """An organisation allowed to call the bulk verification API with its own key
+
+    Only the SHA-256 of the key is stored; the key itself is shown once, by
+    the create_verification_partner command.
+    """
+    name = models.CharField(max_length=200, unique=True)
+    key_hash = models.CharField(max_length=64, unique=True, editable=False)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    class Meta:
+        verbose_name = 'Verification Partner'
+        verbose_name_plural = 'Verification Partners'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    @staticmethod
+    def hash_key(key):
+        import hashlib
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    def issue_key(self):
+        """Give the partner a new key (replacing any old one) and return it; the caller saves"""
+        import secrets
+        key = secrets.token_urlsafe(32)
+        self.key_hash = self.hash_key(key)
+        return key
+
+
+class VerificationCacheStat(models.Model):
+    """A verification cache counter summed over every worker
+
+    Each worker counts in memory and adds its counts here every
+    VERIFICATION_STATS_FLUSH_INTERVAL seconds (see verification_cache.py).
+    """
+    name = models.CharField(max_length=32, unique=True)
+    count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Verification Cache Stat'
+        verbose_name_plural = 'Verification Cache Stats'
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name}: {self.count}"
+
 # TWO-FACTOR AUTHENTICATION MODELS
 class TwoFactorAuth(models.Model):
     """Two-factor authentication settings for users"""
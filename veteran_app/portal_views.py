@@ -0,0 +1,622 @@
+"""Job, matrimonial and chat portal views"""
+from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib import messages
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from .models import VeteranMember, State, VeteranUser, JobPortal, Matrimonial, ChatRequest
+from .forms import JobPortalForm, MatrimonialForm
+
+def is_superuser(user):
+    return user.is_superuser
+
+FACET_TITLES = {
+    'gender': 'Gender',
+    'religion': 'Religion',
+    'occupation': 'Occupation',
+    'age_band': 'Age',
+    'state': 'State',
+}
+
+# Portal Views
+@login_required
+def job_portal(request):
+    """Job portal listing"""
+    from django.core.paginator import Paginator
+    
+    # Check if veteran is approved
+    if not request.user.is_superuser:
+        try:
+            veteran_user = request.user.veteran_profile
+            if not veteran_user.approved:
+                return redirect('veteran_welcome')
+        except VeteranUser.DoesNotExist:
+            pass
+    
+    from .job_search import match_jobs, popular_skills
+    
+    filters = {
+        'q': request.GET.get('q', '').strip()[:100],
+        'qualification': request.GET.get('qualification', '').strip()[:100],
+        'location': request.GET.get('location', '').strip()[:100],
+        'applicant_type': request.GET.get('type', ''),
+    }
+    skills = [skill.strip() for value in request.GET.getlist('skill') for skill in value.split(',') if skill.strip()][:10]
+    job_seekers_list = match_jobs(skills=skills, **filters).select_related('veteran__state')
+    paginator = Paginator(job_seekers_list, 15)  # 15 per page
+    page_number = request.GET.get('page')
+    job_seekers = paginator.get_page(page_number)
+    
+    query = request.GET.copy()
+    query.pop('page', None)
+    return render(request, 'veteran_app/job_portal.html', {
+        'job_seekers': job_seekers,
+        'page_obj': job_seekers,
+        'filters': filters,
+        'skills': ', '.join(skills),
+        'applicant_types': JobPortal.APPLICANT_TYPE_CHOICES,
+        'popular_skills': popular_skills(),
+        'filter_query': query.urlencode(),
+        'filtered': any(filters.values()) or bool(skills),
+    })
+
+@login_required
+def job_portal_add(request):
+    """Add job seeker profile"""
+    if request.user.is_superuser:
+        messages.info(request, 'Superadmin: Select a veteran to add job profile for.')
+        return redirect('job_portal')
+    
+    try:
+        veteran_user = request.user.veteran_profile
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        messages.error(request, 'Only veterans can add job profiles.')
+        return redirect('job_portal')
+    
+    if request.method == 'POST':
+        form = JobPortalForm(request.POST, request.FILES)
+        if form.is_valid():
+            job_profile = form.save(commit=False)
+            job_profile.veteran = veteran
+            job_profile.save()
+            messages.success(request, 'Job profile added successfully!')
+            return redirect('job_portal')
+    else:
+        form = JobPortalForm()
+        # Pre-populate veteran's children for selection
+        form.fields['child'].queryset = veteran.children.all()
+    
+    return render(request, 'veteran_app/job_portal_form.html', {'form': form})
+
+@login_required
+def job_portal_edit(request, job_id):
+    """Edit job seeker profile"""
+    try:
+        veteran_user = request.user.veteran_profile
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        messages.error(request, 'Only veterans can edit job profiles.')
+        return redirect('job_portal')
+    
+    job_profile = get_object_or_404(JobPortal, id=job_id, veteran=veteran)
+    
+    if request.method == 'POST':
+        form = JobPortalForm(request.POST, request.FILES, instance=job_profile)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Job profile updated successfully!')
+            return redirect('job_portal')
+    else:
+        form = JobPortalForm(instance=job_profile)
+        form.fields['child'].queryset = veteran.children.all()
+    
+    return render(request, 'veteran_app/job_portal_form.html', {
+        'form': form,
+        'editing_job': job_profile
+    })
+
+@login_required
+def job_portal_delete(request, job_id):
+    """Delete job seeker profile"""
+    try:
+        veteran_user = request.user.veteran_profile
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        messages.error(request, 'Only veterans can delete job profiles.')
+        return redirect('job_portal')
+    
+    job_profile = get_object_or_404(JobPortal, id=job_id, veteran=veteran)
+    job_name = job_profile.name
+    job_profile.delete()
+    messages.success(request, f'Job profile for {job_name} deleted successfully!')
+    return redirect('job_portal')
+
+@login_required
+@user_passes_test(is_superuser)
+def admin_job_portal(request):
+    """Admin view for managing job applications with resume access"""
+    from django.core.paginator import Paginator
+    
+    from .job_search import match_jobs
+    
+    query = request.GET.get('q', '').strip()[:100]
+    job_applications_list = JobPortal.objects.select_related(
+        'veteran', 'veteran__state', 'veteran__rank', 'child'
+    ).defer('resume_text').order_by('-created_at')
+    if query:
+        # Server-side, so resume contents are searched too
+        job_applications_list = match_jobs(job_applications_list, q=query)
+    states = State.objects.all().order_by('name')
+    
+    paginator = Paginator(job_applications_list, 20)  # 20 per page
+    page_number = request.GET.get('page')
+    job_applications = paginator.get_page(page_number)
+    
+    return render(request, 'veteran_app/admin_job_portal.html', {
+        'job_applications': job_applications,
+        'states': states,
+        'page_obj': job_applications,
+        'query': query,
+    })
+
+@login_required
+@user_passes_test(is_superuser)
+def job_application_details(request, job_id):
+    """Get job application details for modal view"""
+    from django.utils.html import escape
+    
+    job = get_object_or_404(JobPortal, id=job_id)
+    
+    if job.resume_text:
+        excerpt = escape(job.resume_text[:3000]) + ('&hellip;' if len(job.resume_text) > 3000 else '')
+        resume_text = (f'<div class="mt-3"><strong>Resume text:</strong>'
+                       f'<pre class="border rounded p-2 mt-1" style="white-space: pre-wrap; max-height: 300px;">{excerpt}</pre></div>')
+    elif job.resume and job.resume_pending:
+        resume_text = '<div class="mt-2 text-muted small">Resume text is being extracted.</div>'
+    elif job.resume and job.resume_error:
+        resume_text = f'<div class="mt-2 text-danger small">Resume text could not be extracted: {escape(job.resume_error)}</div>'
+    else:
+        resume_text = ''
+    
+    html = f"""
+    <div class="row">
+        <div class="col-md-6">
+            <p><strong>Name:</strong> {job.name}</p>
+            <p><strong>Type:</strong> {job.get_applicant_type_display()}</p>
+            <p><strong>Veteran:</strong> {job.veteran.name}</p>
+            <p><strong>Rank:</strong> {job.veteran.rank.name}</p>
+            <p><strong>State:</strong> {job.veteran.state.name}</p>
+        </div>
+        <div class="col-md-6">
+            <p><strong>Contact:</strong> {job.contact}</p>
+            <p><strong>Email:</strong> {job.email or 'N/A'}</p>
+            <p><strong>Qualification:</strong> {job.qualification}</p>
+            <p><strong>Specialization:</strong> {job.specialization or 'N/A'}</p>
+            <p><strong>Preferred Location:</strong> {job.preferred_location or 'N/A'}</p>
+        </div>
+    </div>
+    {f'<div class="mt-3"><strong>Experience:</strong><br>{job.experience}</div>' if job.experience else ''}
+    {f'<div class="mt-3"><strong>Skills:</strong><br>{job.skills}</div>' if job.skills else ''}
+    {f'<div class="mt-3"><a href="{job.resume.url}" class="btn btn-success" download><i class="fas fa-download"></i> Download Resume</a></div>' if job.resume else '<div class="mt-3 text-muted">No resume uploaded</div>'}
+    {resume_text}
+    """
+    
+    return JsonResponse({'html': html})
+
+@login_required
+def matrimonial_portal(request):
+    """Matrimonial portal listing with facet filters"""
+    from urllib.parse import urlencode
+    from .matrimonial_search import FACETS, clean_filters, facet_counts, search_profiles
+    
+    # Check if veteran is approved
+    if not request.user.is_superuser:
+        try:
+            veteran_user = request.user.veteran_profile
+            if not veteran_user.approved:
+                return redirect('veteran_welcome')
+        except VeteranUser.DoesNotExist:
+            pass
+    
+    filters = clean_filters(request.GET)
+    profiles = search_profiles(filters, after=request.GET.get('after'), before=request.GET.get('before'))
+    facets = facet_counts(filters)
+    
+    return render(request, 'veteran_app/matrimonial_portal.html', {
+        'profiles': profiles,
+        'page_obj': profiles,
+        'facets': [(facet, FACET_TITLES[facet], facets[facet]) for facet in FACETS],
+        'filtered': bool(filters),
+        'filter_query': urlencode([(facet, value) for facet, values in filters.items() for value in values]),
+    })
+
+@login_required
+def matrimonial_add(request):
+    """Add matrimonial profile"""
+    if request.user.is_superuser:
+        messages.info(request, 'Superadmin: Select a veteran to add matrimonial profile for.')
+        return redirect('matrimonial_portal')
+    
+    try:
+        veteran_user = request.user.veteran_profile
+        if not veteran_user.approved:
+            messages.error(request, 'Your account is pending approval. You cannot add matrimonial profiles.')
+            return redirect('index')
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        messages.error(request, 'Only veterans can add matrimonial profiles.')
+        return redirect('matrimonial_portal')
+    
+    if request.method == 'POST':
+        form = MatrimonialForm(request.POST, request.FILES)
+        if form.is_valid():
+            profile = form.save(commit=False)
+            profile.veteran = veteran
+            profile.save()
+            messages.success(request, 'Matrimonial profile added successfully!')
+            return redirect('matrimonial_portal')
+    else:
+        form = MatrimonialForm()
+        # Pre-populate veteran's children for selection
+        form.fields['child'].queryset = veteran.children.all()
+    
+    return render(request, 'veteran_app/matrimonial_form.html', {'form': form})
+
+@login_required
+def matrimonial_edit(request, profile_id):
+    """Edit matrimonial profile"""
+    try:
+        veteran_user = request.user.veteran_profile
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        messages.error(request, 'Only veterans can edit matrimonial profiles.')
+        return redirect('matrimonial_portal')
+    
+    profile = get_object_or_404(Matrimonial, id=profile_id, veteran=veteran)
+    
+    if request.method == 'POST':
+        form = MatrimonialForm(request.POST, request.FILES, instance=profile)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Matrimonial profile updated successfully!')
+            return redirect('matrimonial_portal')
+    else:
+        form = MatrimonialForm(instance=profile)
+        form.fields['child'].queryset = veteran.children.all()
+    
+    return render(request, 'veteran_app/matrimonial_form.html', {
+        'form': form,
+        'editing_profile': profile
+    })
+
+@login_required
+def matrimonial_delete(request, profile_id):
+    """Delete matrimonial profile"""
+    try:
+        veteran_user = request.user.veteran_profile
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        messages.error(request, 'Only veterans can delete matrimonial profiles.')
+        return redirect('matrimonial_portal')
+    
+    profile = get_object_or_404(Matrimonial, id=profile_id, veteran=veteran)
+    child_name = profile.child.child_name
+    profile.delete()
+    messages.success(request, f'Matrimonial profile for {child_name} deleted successfully!')
+    return redirect('matrimonial_portal')
+
+def _chat_portal_viewer(request):
+    """The requesting veteran's member record (None for superusers), or a redirect"""
+    if request.user.is_superuser:
+        return None, None
+    try:
+        veteran_user = request.user.veteran_profile
+        if not veteran_user.approved:
+            messages.error(request, 'Your account is pending approval. You cannot access chat portal.')
+            return None, redirect('veteran_welcome')
+        return veteran_user.veteran_member, None
+    except VeteranUser.DoesNotExist:
+        messages.error(request, 'Only veterans can access chat portal.')
+        return None, redirect('index')
+
+@login_required
+def chat_portal(request):
+    """Chat portal - list veterans from other states"""
+    from django.conf import settings
+    from django.utils.http import urlencode
+    from .conversations import unread_total
+    from .directory import directory_queryset, estimate_count, member_directory
+    from .models import Rank
+    
+    # Superadmin can view all veterans and chat requests
+    veteran, response = _chat_portal_viewer(request)
+    if response:
+        return response
+    
+    filters = {
+        'state': request.GET.get('state', '').strip(),
+        'rank': request.GET.get('rank', '').strip(),
+        'city': request.GET.get('city', '').strip(),
+        'q': request.GET.get('q', '').strip()[:100],
+    }
+    filters = {key: value for key, value in filters.items() if value and (key in ('city', 'q') or value.isdigit())}
+    
+    # Keyset pages: flat cost at any depth, no COUNT(*)
+    other_veterans = member_directory(
+        veteran, filters, after=request.GET.get('after'), before=request.GET.get('before')
+    )
+    estimated_total = None
+    if getattr(settings, 'CHAT_DIRECTORY_ESTIMATE_COUNT', True):
+        estimated_total = estimate_count(directory_queryset(veteran, **filters))
+    
+    states = State.objects.order_by('name')
+    if veteran is not None:
+        states = states.exclude(pk=veteran.state_id)
+    
+    return render(request, 'veteran_app/chat_portal.html', {
+        'other_veterans': other_veterans,
+        'estimated_total': estimated_total,
+        'filters': filters,
+        'filter_query': urlencode(filters),
+        'states': states,
+        'ranks': Rank.objects.order_by('name'),
+        'unread_total': unread_total(veteran) if veteran is not None else 0,
+        'page_obj': other_veterans
+    })
+
+@login_required
+def chat_requests(request, box):
+    """One page of sent or received chat requests, loaded into the chat portal on demand"""
+    from .directory import chat_requests_page
+    
+    if box not in ('sent', 'received'):
+        return JsonResponse({'error': 'Unknown request list.'}, status=404)
+    veteran, response = _chat_portal_viewer(request)
+    if response:
+        return JsonResponse({'error': 'Not allowed.'}, status=403)
+    
+    page = chat_requests_page(veteran, box, after=request.GET.get('after'), before=request.GET.get('before'))
+    return render(request, 'veteran_app/includes/chat_requests.html', {
+        'box': box,
+        'page': page,
+    })
+
+def _chat_partner(user, veteran_id):
+    """(own member, other member) for a conversation the user may take part in
+
+    Raises PermissionDenied unless a chat request between the two was accepted.
+    """
+    from django.core.exceptions import PermissionDenied
+    from django.db.models import Q
+    
+    try:
+        veteran_user = user.veteran_profile
+    except (VeteranUser.DoesNotExist, AttributeError):
+        raise PermissionDenied('Only veterans can chat.')
+    if not veteran_user.approved:
+        raise PermissionDenied('Your account is pending approval.')
+    member = veteran_user.veteran_member
+    other = get_object_or_404(VeteranMember, association_id=veteran_id)
+    accepted = ChatRequest.objects.filter(
+        Q(requester=member, recipient=other) | Q(requester=other, recipient=member), status='accepted'
+    ).exists()
+    if not accepted:
+        raise PermissionDenied('There is no accepted chat request with this veteran.')
+    return member, other
+
+@login_required
+def chat_inbox(request):
+    """Conversations of the logged-in veteran with unread counts, most recent first"""
+    from .conversations import inbox_page
+    
+    veteran, response = _chat_portal_viewer(request)
+    if response:
+        return response
+    if veteran is None:
+        messages.info(request, 'The inbox is for veterans; chat requests are listed in the chat portal.')
+        return redirect('chat_portal')
+    
+    page = inbox_page(veteran, after=request.GET.get('after'), before=request.GET.get('before'))
+    threads = [
+        {
+            'conversation': conversation,
+            'other': conversation.other_member(veteran.pk),
+            'unread': conversation.unread_for(veteran.pk),
+        }
+        for conversation in page
+    ]
+    return render(request, 'veteran_app/chat_inbox.html', {
+        'threads': threads,
+        'page_obj': page,
+    })
+
+@login_required
+def chat_conversation(request, veteran_id):
+    """Conversation page; new messages arrive over the chat_stream SSE endpoint"""
+    from django.core.exceptions import PermissionDenied
+    from .conversations import get_conversation, history_page, mark_read
+    
+    try:
+        member, other = _chat_partner(request.user, veteran_id)
+    except PermissionDenied as e:
+        messages.error(request, str(e))
+        return redirect('chat_portal')
+    
+    conversation = get_conversation(member, other)
+    history, older_cursor = [], None
+    if conversation is not None:
+        page = history_page(conversation)
+        history, older_cursor = page.rows[::-1], page.next_cursor
+        if conversation.unread_for(member.pk):
+            mark_read(conversation, member)
+    
+    return render(request, 'veteran_app/chat_conversation.html', {
+        'member': member,
+        'other': other,
+        'history': history,
+        'older_cursor': older_cursor,
+        'last_message_id': max((message.id for message in history), default=0),
+    })
+
+@login_required
+def chat_history(request, veteran_id):
+    """Older messages of a conversation as JSON, one keyset page at a time"""
+    from django.core.exceptions import PermissionDenied
+    from .chat_stream import message_payload
+    from .conversations import get_conversation, history_page
+    
+    try:
+        member, other = _chat_partner(request.user, veteran_id)
+    except PermissionDenied as e:
+        return JsonResponse({'error': str(e)}, status=403)
+    
+    conversation = get_conversation(member, other)
+    if conversation is None:
+        return JsonResponse({'messages': [], 'older': None})
+    page = history_page(conversation, older_than=request.GET.get('before'))
+    return JsonResponse({
+        'messages': [message_payload(message) for message in page],
+        'older': page.next_cursor,
+    })
+
+@login_required
+@require_POST
+def mark_chat_read(request, veteran_id):
+    """Clear the unread count of a conversation the user has open"""
+    from django.core.exceptions import PermissionDenied
+    from .conversations import get_conversation, mark_read
+    
+    try:
+        member, other = _chat_partner(request.user, veteran_id)
+    except PermissionDenied as e:
+        return JsonResponse({'error': str(e)}, status=403)
+    
+    conversation = get_conversation(member, other)
+    return JsonResponse({'marked': mark_read(conversation, member) if conversation else 0})
+
+@login_required
+@require_POST
+def send_chat_message(request, veteran_id):
+    """Store a message and hand it to open streams once committed"""
+    from django.core.exceptions import PermissionDenied
+    from django.db import transaction
+    from .chat_stream import message_payload, publish_message
+    from .conversations import send_message
+    
+    try:
+        member, other = _chat_partner(request.user, veteran_id)
+    except PermissionDenied as e:
+        return JsonResponse({'error': str(e)}, status=403)
+    
+    text = request.POST.get('message', '').strip()
+    if not text:
+        return JsonResponse({'error': 'Message is empty.'}, status=400)
+    if len(text) > 2000:
+        return JsonResponse({'error': 'Message is too long (2000 characters at most).'}, status=400)
+    
+    message = send_message(member, other, text)
+    transaction.on_commit(lambda: publish_message(message))
+    return JsonResponse(message_payload(message), status=201)
+
+async def chat_stream(request, veteran_id):
+    """Server-Sent Events stream of one conversation
+
+    Under ASGI the stream stays open and idles on a queue. Under WSGI it
+    only sends what the client missed and closes, so it never ties up a
+    worker thread.
+    """
+    from asgiref.sync import sync_to_async
+    from django.core.exceptions import PermissionDenied
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import HttpResponse, StreamingHttpResponse
+    from .chat_stream import stream_conversation
+    
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse('Login required.', status=401)
+    try:
+        member, other = await sync_to_async(_chat_partner)(user, veteran_id)
+    except PermissionDenied as e:
+        return HttpResponse(str(e), status=403)
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    response = StreamingHttpResponse(
+        stream_conversation(member, other, last_event_id, live=isinstance(request, ASGIRequest)),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: do not buffer the stream
+    return response
+
+@login_required
+def send_chat_request(request, veteran_id):
+    """Send chat request to another veteran"""
+    try:
+        veteran_user = request.user.veteran_profile
+        requester = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        messages.error(request, 'Only veterans can send chat requests.')
+        return redirect('index')
+    
+    recipient = get_object_or_404(VeteranMember, association_id=veteran_id)
+    
+    # Check if request already exists
+    existing_request = ChatRequest.objects.filter(requester=requester, recipient=recipient).first()
+    if existing_request:
+        messages.warning(request, 'Chat request already sent to this veteran.')
+        return redirect('chat_portal')
+    
+    if request.method == 'POST':
+        message = request.POST.get('message', '')
+        ChatRequest.objects.create(
+            requester=requester,
+            recipient=recipient,
+            message=message
+        )
+        messages.success(request, f'Chat request sent to {recipient.name}!')
+        return redirect('chat_portal')
+    
+    return render(request, 'veteran_app/send_chat_request.html', {'recipient': recipient})
+
+@login_required
+def accept_chat_request(request, request_id):
+    """Accept a chat request"""
+    try:
+        veteran_user = request.user.veteran_profile
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        messages.error(request, 'Only veterans can manage chat requests.')
+        return redirect('index')
+    
+    chat_request = get_object_or_404(ChatRequest, id=request_id, recipient=veteran)
+    chat_request.status = 'accepted'
+    chat_request.responded_at = timezone.now()
+    chat_request.save()
+    
+    messages.success(request, f'Chat request from {chat_request.requester.name} accepted!')
+    return redirect('chat_portal')
+
+@login_required
+def reject_chat_request(request, request_id):
+    """Reject a chat request"""
+    try:
+        veteran_user = request.user.veteran_profile
+        veteran = veteran_user.veteran_member
+    except VeteranUser.DoesNotExist:
+        messages.error(request, 'Only veterans can manage chat requests.')
+        return redirect('index')
+    
+    chat_request = get_object_or_404(ChatRequest, id=request_id, recipient=veteran)
+    chat_request.status = 'rejected'
+    chat_request.responded_at = timezone.now()
+    chat_request.save()
+    
+    messages.warning(request, f'Chat request from {chat_request.requester.name} rejected.')
+    return redirect('chat_portal')
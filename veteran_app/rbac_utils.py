@@ -1,8 +1,10 @@
 from django.contrib.auth.models import User
 from django.core.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from functools import wraps
-from .models import Role, Permission, UserRole, RoleAuditLog
+from .audit_buffer import rbac_audit
+from .models import Role, Permission, UserRole
 
 def get_client_ip(request):
     """Get client IP address from request"""
@@ -14,16 +16,17 @@ def get_client_ip(request):
     return ip
 
 def log_rbac_action(action, user, target_user=None, role=None, permission=None, details=None, request=None):
-    """Log RBAC actions for audit trail"""
+    """Log RBAC actions for audit trail (buffered and written in batches)"""
     ip_address = get_client_ip(request) if request else None
-    RoleAuditLog.objects.create(
+    rbac_audit.add(
         action=action,
-        user=user,
-        target_user=target_user,
-        role=role,
-        permission=permission,
+        user_id=user.pk if user else None,
+        target_user_id=target_user.pk if target_user else None,
+        role_id=role.pk if role else None,
+        permission_id=permission.pk if permission else None,
         details=details or {},
-        ip_address=ip_address
+        ip_address=ip_address,
+        timestamp=timezone.now()
     )
 
 def has_permission(user, permission_codename):
@@ -0,0 +1,349 @@
+"""Reconcile payment orders and ledger entries against gateway settlement exports
+
+The settlement file (CSV, JSON Lines or a JSON array) is streamed in chunks.
+Each chunk is matched against the database with one indexed IN query for
+orders and one for ledger Transactions, then discarded. Only 64-bit digests
+of the ids already seen are kept for the whole file; duplicate detection and
+the final pass for orders missing from the file need them.
+
+Discrepancies are written to a CSV diff report as they are found.
+"""
+import csv
+import hashlib
+import json
+import random
+import uuid
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from .models import PaymentOrder, Transaction
+
+REPORT_FIELDS = ['issue', 'line', 'gateway_order_id', 'gateway_payment_id', 'order_id', 'file_value', 'db_value']
+ISSUES = (
+    'invalid_row',
+    'duplicate_payment',
+    'duplicate_order',
+    'missing_in_db',
+    'amount_mismatch',
+    'status_mismatch',
+    'payment_id_mismatch',
+    'missing_ledger_entry',
+    'missing_in_file',
+    'ledger_not_in_file',
+)
+
+CAPTURED_STATUSES = {'captured', 'settled', 'paid', 'processed'}
+FAILED_STATUSES = {'failed'}
+
+_ORDER_ID_COLUMNS = ('gateway_order_id', 'order_id')
+_PAYMENT_ID_COLUMNS = ('gateway_payment_id', 'payment_id', 'entity_id')
+
+
+def _digest(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def _first(row, columns):
+    for column in columns:
+        value = row.get(column)
+        if value not in (None, ''):
+            return str(value).strip()
+    return ''
+
+
+def _iter_json_array(stream, read_size=65536):
+    """Yield the items of a top-level JSON array without loading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer, eof = stream.read(read_size).lstrip(), False
+    if not buffer.startswith('['):
+        raise ValueError('Expected a JSON array or JSON Lines')
+    buffer = buffer[1:]
+    while True:
+        if len(buffer) < read_size and not eof:
+            chunk = stream.read(read_size)
+            eof = not chunk
+            buffer += chunk
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']') or (eof and not buffer):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except ValueError:
+            if eof:
+                raise
+            chunk = stream.read(read_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def iter_settlement_rows(path, file_format=None):
+    """Yield (line number, row) from a settlement export without reading it all into memory
+
+    For JSON arrays the "line" is the item's position in the array.
+    """
+    if file_format is None:
+        file_format = 'csv' if path.lower().endswith('.csv') else 'json'
+    with open(path, newline='', encoding='utf-8') as stream:
+        if file_format == 'csv':
+            # Line 1 is the header
+            yield from enumerate(csv.DictReader(stream), start=2)
+            return
+        head = stream.read(256).lstrip()
+        stream.seek(0)
+        if head.startswith('['):
+            yield from enumerate(_iter_json_array(stream), start=1)
+            return
+        for number, line in enumerate(stream, start=1):
+            if line.strip():
+                yield number, json.loads(line)
+
+
+class SettlementRow:
+    """One payment line of a settlement export, normalised"""
+
+    __slots__ = ('line', 'order_id', 'payment_id', 'amount', 'status')
+
+    def __init__(self, line, order_id, payment_id, amount, status):
+        self.line = line
+        self.order_id = order_id
+        self.payment_id = payment_id
+        self.amount = amount
+        self.status = status
+
+
+class Reconciliation:
+    """Streams a settlement file against the database and writes a diff report"""
+
+    def __init__(self, report, amount_in_paise=False, chunk_size=2000):
+        self.report = csv.DictWriter(report, fieldnames=REPORT_FIELDS)
+        self.report.writeheader()
+        self.amount_in_paise = amount_in_paise
+        self.chunk_size = chunk_size
+        self.counts = dict.fromkeys(ISSUES, 0)
+        self.rows = self.matched = self.skipped = 0
+        self.queries = 0
+        self._seen_orders = set()
+        self._captured_orders = set()
+        self._seen_payments = set()
+        self._paid_range = [None, None]
+
+    def flag(self, issue, row=None, order=None, file_value='', db_value='', **ids):
+        self.counts[issue] += 1
+        self.report.writerow({
+            'issue': issue,
+            'line': row.line if row else '',
+            'gateway_order_id': ids.get('gateway_order_id', row.order_id if row else ''),
+            'gateway_payment_id': ids.get('gateway_payment_id', row.payment_id if row else ''),
+            'order_id': order.order_id if order else ids.get('order_id', ''),
+            'file_value': file_value,
+            'db_value': db_value,
+        })
+
+    def _parse(self, line, raw):
+        """Normalise a raw row; returns None for non-payment rows (refunds, adjustments)"""
+        if raw.get('type', 'payment') not in ('payment', ''):
+            self.skipped += 1
+            return None
+        order_id, payment_id = _first(raw, _ORDER_ID_COLUMNS), _first(raw, _PAYMENT_ID_COLUMNS)
+        try:
+            amount = Decimal(str(raw.get('amount', '')).strip())
+        except InvalidOperation:
+            amount = None
+        if not (order_id or payment_id) or amount is None:
+            self.flag('invalid_row', SettlementRow(line, order_id, payment_id, None, ''),
+                      file_value=json.dumps(raw, default=str)[:500])
+            return None
+        if self.amount_in_paise:
+            amount = amount / 100
+        return SettlementRow(line, order_id, payment_id, amount, str(raw.get('status', 'captured')).lower())
+
+    def _dedupe(self, row):
+        """Record the row's ids; returns False if they were already seen in the file"""
+        if row.payment_id:
+            digest = _digest(row.payment_id)
+            if digest in self._seen_payments:
+                self.flag('duplicate_payment', row)
+                return False
+            self._seen_payments.add(digest)
+        if row.order_id:
+            digest = _digest(row.order_id)
+            self._seen_orders.add(digest)
+            if row.status in CAPTURED_STATUSES:
+                if digest in self._captured_orders:
+                    # A second capture against the same order: the member was charged twice
+                    self.flag('duplicate_order', row)
+                    return False
+                self._captured_orders.add(digest)
+        return True
+
+    def _match_chunk(self, rows):
+        order_ids = {row.order_id for row in rows if row.order_id}
+        orphan_payment_ids = {row.payment_id for row in rows if not row.order_id}
+        fields = ('order_id', 'gateway_order_id', 'gateway_payment_id', 'amount', 'status', 'paid_at')
+
+        by_order_id, by_payment_id = {}, {}
+        if order_ids:
+            self.queries += 1
+            for order in PaymentOrder.objects.filter(gateway_order_id__in=order_ids).only(*fields):
+                by_order_id[order.gateway_order_id] = order
+        if orphan_payment_ids:
+            self.queries += 1
+            for order in PaymentOrder.objects.filter(gateway_payment_id__in=orphan_payment_ids).only(*fields):
+                by_payment_id[order.gateway_payment_id] = order
+
+        payment_ids = {row.payment_id for row in rows if row.payment_id}
+        self.queries += 1
+        booked = set(
+            Transaction.objects.filter(payment_method='online', reference_number__in=payment_ids)
+            .values_list('reference_number', flat=True)
+        )
+
+        for row in rows:
+            order = by_order_id.get(row.order_id) if row.order_id else by_payment_id.get(row.payment_id)
+            if order is None:
+                self.flag('missing_in_db', row, file_value=row.amount)
+                continue
+            self.matched += 1
+            self._track_paid_at(order.paid_at)
+            # Rows matched by payment id alone name no order; mark the order seen so it is not missing_in_file
+            if order.gateway_order_id:
+                self._seen_orders.add(_digest(order.gateway_order_id))
+
+            if order.amount != row.amount:
+                self.flag('amount_mismatch', row, order, row.amount, order.amount)
+            captured = row.status in CAPTURED_STATUSES
+            if (captured and order.status not in ('completed', 'refunded')) or (
+                    row.status in FAILED_STATUSES and order.status == 'completed'
+                    and order.gateway_payment_id == row.payment_id):
+                self.flag('status_mismatch', row, order, row.status, order.status)
+            if captured and row.payment_id and order.gateway_payment_id and order.gateway_payment_id != row.payment_id:
+                self.flag('payment_id_mismatch', row, order, row.payment_id, order.gateway_payment_id)
+            if captured and row.payment_id and row.payment_id not in booked:
+                self.flag('missing_ledger_entry', row, order, row.amount)
+
+    def _track_paid_at(self, paid_at):
+        if paid_at is None:
+            return
+        low, high = self._paid_range
+        self._paid_range = [min(low, paid_at) if low else paid_at, max(high, paid_at) if high else paid_at]
+
+    def _find_unsettled(self, since, until):
+        """Flag completed orders and online ledger entries in the window that the file never mentioned"""
+        orders = PaymentOrder.objects.filter(status='completed').exclude(gateway_order_id='')
+        ledger = Transaction.objects.filter(payment_method='online').exclude(reference_number='')
+        if since:
+            orders, ledger = orders.filter(paid_at__gte=since), ledger.filter(created_at__gte=since)
+        if until:
+            orders, ledger = orders.filter(paid_at__lte=until), ledger.filter(created_at__lte=until)
+
+        self.queries += 2
+        for order_id, gateway_order_id, gateway_payment_id, amount in orders.values_list(
+                'order_id', 'gateway_order_id', 'gateway_payment_id', 'amount').iterator(chunk_size=self.chunk_size):
+            if _digest(gateway_order_id) not in self._seen_orders:
+                self.flag('missing_in_file', db_value=amount, order_id=order_id,
+                          gateway_order_id=gateway_order_id, gateway_payment_id=gateway_payment_id)
+        for transaction_id, reference_number, amount in ledger.values_list(
+                'transaction_id', 'reference_number', 'amount').iterator(chunk_size=self.chunk_size):
+            if _digest(reference_number) not in self._seen_payments:
+                self.flag('ledger_not_in_file', db_value=amount, order_id=transaction_id,
+                          gateway_order_id='', gateway_payment_id=reference_number)
+
+    def run(self, rows, since=None, until=None):
+        """Reconcile (line, raw row) pairs; the window defaults to the paid_at range of matched orders"""
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.chunk_size))
+            if not batch:
+                break
+            self.rows += len(batch)
+            chunk = []
+            for line, raw in batch:
+                row = self._parse(line, raw)
+                if row is not None and self._dedupe(row):
+                    chunk.append(row)
+            if chunk:
+                self._match_chunk(chunk)
+
+        since = since or self._paid_range[0]
+        until = until or self._paid_range[1]
+        if since and until:
+            self._find_unsettled(since, until)
+        return self.summary(since, until)
+
+    def summary(self, since=None, until=None):
+        return {
+            'rows': self.rows,
+            'matched': self.matched,
+            'skipped': self.skipped,
+            'window': [since.isoformat() if since else None, until.isoformat() if until else None],
+            'queries': self.queries,
+            'issues': {issue: count for issue, count in self.counts.items() if count},
+        }
+
+
+def reconcile_file(path, report, file_format=None, amount_in_paise=False, chunk_size=2000, since=None, until=None):
+    """Reconcile one settlement export, writing the diff to the open text stream `report`"""
+    reconciliation = Reconciliation(report, amount_in_paise=amount_in_paise, chunk_size=chunk_size)
+    return reconciliation.run(iter_settlement_rows(path, file_format), since=since, until=until)
+
+
+def write_settlement_fixture(path, rows=0, error_rate=0.0, seed=None):
+    """Write a Razorpay-style settlement CSV from existing orders, as a local stand-in for the gateway
+
+    With error_rate > 0 that fraction of orders is dropped, duplicated or
+    given a wrong amount. The file is padded with orders the database does
+    not know about up to `rows` lines. Returns the number of each injected
+    error.
+    """
+    rng = random.Random(seed)
+    injected = {'dropped': 0, 'duplicated': 0, 'amount_changed': 0, 'unknown': 0}
+    fieldnames = ['entity_id', 'type', 'order_id', 'amount', 'currency', 'fee', 'tax', 'status', 'settled_at']
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as stream:
+        writer = csv.DictWriter(stream, fieldnames=fieldnames)
+        writer.writeheader()
+        orders = PaymentOrder.objects.filter(status__in=['completed', 'failed']).exclude(gateway_order_id='')
+        for gateway_order_id, gateway_payment_id, amount, status, paid_at in orders.values_list(
+                'gateway_order_id', 'gateway_payment_id', 'amount', 'status', 'paid_at').iterator(chunk_size=2000):
+            line = {
+                'entity_id': gateway_payment_id or f'pay_{uuid.uuid4().hex[:14]}',
+                'type': 'payment',
+                'order_id': gateway_order_id,
+                'amount': amount,
+                'currency': 'INR',
+                'fee': (amount * Decimal('0.02')).quantize(Decimal('0.01')),
+                'tax': (amount * Decimal('0.0036')).quantize(Decimal('0.01')),
+                'status': 'captured' if status == 'completed' else 'failed',
+                'settled_at': paid_at.isoformat() if paid_at else '',
+            }
+            error = rng.choice(['dropped', 'duplicated', 'amount_changed']) if rng.random() < error_rate else None
+            if error:
+                injected[error] += 1
+            if error == 'dropped':
+                continue
+            if error == 'amount_changed':
+                line['amount'] = amount + 1
+            writer.writerow(line)
+            written += 1
+            if error == 'duplicated':
+                writer.writerow(line)
+                written += 1
+
+        while written < rows:
+            writer.writerow({
+                'entity_id': f'pay_{uuid.uuid4().hex[:14]}',
+                'type': 'payment',
+                'order_id': f'order_{uuid.uuid4().hex[:14]}',
+                'amount': Decimal(rng.randrange(100, 500000)) / 100,
+                'currency': 'INR',
+                'fee': '0.00',
+                'tax': '0.00',
+                'status': 'captured',
+                'settled_at': '',
+            })
+            injected['unknown'] += 1
+            written += 1
+    return injected
@@ -0,0 +1,228 @@
+"""Event registration, waitlist and bulk admin operations
+
+Every operation that changes the places an event has taken first locks the
+event row with select_for_update, so sign-ups, cancellations and waitlist
+promotions for one event run one after another, and
+Event.confirmed_participants always matches the registrations that hold
+places. All multi-row changes are single set-based UPDATEs.
+
+A pending (unpaid) registration holds its places only until hold_expires_at.
+expire_holds(), run by the expire_event_holds command and before every
+sign-up, cancels the ones still unpaid by then and promotes the waitlist.
+"""
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Event, EventRegistration
+
+
+def _lock_event(event_id):
+    return Event.objects.select_for_update().get(pk=event_id)
+
+
+def hold_until(event, window):
+    """When a payment hold taken now runs out: after ``window``, but never after the event starts"""
+    return min(timezone.now() + window, event.start_date)
+
+
+def payment_hold(event):
+    return hold_until(event, timedelta(minutes=getattr(settings, 'EVENT_PAYMENT_HOLD_MINUTES', 60)))
+
+
+def offer_hold(event):
+    """Hold for a place offered from the waitlist, longer than a sign-up's as the member has to notice it first"""
+    return hold_until(event, timedelta(hours=getattr(settings, 'EVENT_WAITLIST_OFFER_HOURS', 48)))
+
+
+def _expire_event_holds(event, now):
+    """Cancel the event's pending registrations whose hold ran out (event row locked); returns (expired, promoted)"""
+    overdue = list(EventRegistration.objects.filter(
+        event_id=event.pk, status='pending', hold_expires_at__lt=now
+    ).exclude(payment_status='completed').values_list('pk', flat=True))
+    if not overdue:
+        return 0, 0
+    return cancel_registrations(event, overdue)
+
+
+def expire_holds(now=None):
+    """Give back the places of every unpaid registration whose hold ran out; returns (expired, promoted)"""
+    now = now or timezone.now()
+    event_ids = EventRegistration.objects.filter(status='pending', hold_expires_at__lt=now).exclude(
+        payment_status='completed'
+    ).order_by().values_list('event_id', flat=True).distinct()
+    expired = promoted = 0
+    for event_id in list(event_ids):
+        with transaction.atomic():
+            counts = _expire_event_holds(_lock_event(event_id), now)
+        expired += counts[0]
+        promoted += counts[1]
+    return expired, promoted
+
+
+def register(event, veteran, participants_count, special_requirements=''):
+    """Create a registration, or a waitlisted one if the event is full
+
+    Returns None if the event no longer accepts registrations or the party is
+    larger than the event. An unpaid cancelled (or lapsed) registration of the
+    member is reused; any other duplicate raises IntegrityError and leaves the
+    event untouched.
+    """
+    with transaction.atomic():
+        event = _lock_event(event.pk)
+        if not event.accepts_registrations():
+            return None
+        # Places of lapsed holds go to the waitlist first, then to this sign-up
+        if _expire_event_holds(event, timezone.now())[0]:
+            event.refresh_from_db(fields=Event.COUNTER_FIELDS)
+
+        paid = event.registration_fee > 0
+        position = None
+        if event.reserve_places(participants_count):
+            status = 'pending' if paid else 'confirmed'
+        elif event.max_participants and participants_count <= event.max_participants:
+            status = 'waitlisted'
+            Event.objects.filter(pk=event.pk).update(waitlist_sequence=F('waitlist_sequence') + 1)
+            position = event.waitlist_sequence + 1
+        else:
+            return None
+
+        values = {
+            'participants_count': participants_count,
+            'special_requirements': special_requirements,
+            'payment_required': paid,
+            'payment_amount': event.registration_fee * participants_count,
+            'status': status,
+            'waitlist_position': position,
+            'hold_expires_at': payment_hold(event) if status == 'pending' else None,
+        }
+        previous = EventRegistration.objects.filter(event=event, veteran=veteran, status='cancelled').exclude(
+            payment_status='completed'
+        ).first()
+        if previous is None:
+            return EventRegistration.objects.create(event=event, veteran=veteran, **values)
+        for name, value in values.items():
+            setattr(previous, name, value)
+        previous.payment_status = 'pending'
+        previous.payment_id = ''
+        previous.save()
+        return previous
+
+
+def promote_waitlist(event):
+    """Move waitlisted registrations into free places in queue order; returns how many moved
+
+    A party too large for the places left is skipped so smaller parties
+    behind it are not held up; it keeps its position for the next opening.
+    For a paid event the promoted registrations become pending with an
+    offer hold (EVENT_WAITLIST_OFFER_HOURS); unpaid by then, their places
+    pass on to the next in the queue like any other expired hold.
+    """
+    with transaction.atomic():
+        event = _lock_event(event.pk)
+        if event.status != 'published':
+            return 0
+
+        free = None
+        if event.max_participants:
+            free = event.max_participants - event.confirmed_participants
+            if free <= 0:
+                return 0
+
+        promoted, taken = [], 0
+        waiting = EventRegistration.objects.filter(event=event, status='waitlisted').order_by(
+            'waitlist_position'
+        ).values_list('pk', 'participants_count')
+        for pk, participants in waiting.iterator():
+            if free is not None and taken + participants > free:
+                continue
+            promoted.append(pk)
+            taken += participants
+            if free is not None and taken == free:
+                break
+
+        if not promoted:
+            return 0
+        paid = event.registration_fee > 0
+        EventRegistration.objects.filter(pk__in=promoted).update(
+            status='pending' if paid else 'confirmed',
+            waitlist_position=None,
+            hold_expires_at=offer_hold(event) if paid else None,
+            updated_at=timezone.now()
+        )
+        Event.objects.filter(pk=event.pk).update(confirmed_participants=F('confirmed_participants') + taken)
+        return len(promoted)
+
+
+def cancel_registrations(event, registration_ids):
+    """Cancel registrations, release their places and promote from the waitlist
+
+    Attended registrations are left alone. Returns (cancelled, promoted).
+    """
+    with transaction.atomic():
+        event = _lock_event(event.pk)
+        registrations = EventRegistration.objects.filter(event=event, pk__in=registration_ids).exclude(
+            status__in=['cancelled', 'attended']
+        )
+        freed = registrations.filter(status__in=EventRegistration.PLACE_HOLDING_STATUSES).aggregate(
+            total=Sum('participants_count')
+        )['total'] or 0
+        cancelled = registrations.update(
+            status='cancelled', waitlist_position=None, hold_expires_at=None, updated_at=timezone.now()
+        )
+        if freed:
+            event.release_places(freed)
+        promoted = promote_waitlist(event) if cancelled else 0
+    return cancelled, promoted
+
+
+def confirm_registrations(event, registration_ids=None, limit=None):
+    """Confirm pending registrations (e.g. paid offline), oldest first; returns the number confirmed
+
+    Pending registrations already hold their places, so the counter is unchanged.
+    """
+    with transaction.atomic():
+        _lock_event(event.pk)
+        pending = EventRegistration.objects.filter(event_id=event.pk, status='pending')
+        if registration_ids is not None:
+            pending = pending.filter(pk__in=registration_ids)
+        if limit:
+            pending = EventRegistration.objects.filter(
+                pk__in=list(pending.order_by('registered_at').values_list('pk', flat=True)[:limit])
+            )
+        return pending.update(status='confirmed', hold_expires_at=None, updated_at=timezone.now())
+
+
+def parse_scanned_numbers(text):
+    """Association numbers from scanner input: raw numbers or verification URLs, any separator"""
+    numbers = []
+    for token in re.split(r'[\s,;]+', text or ''):
+        if '/verify/' in token:
+            token = token.split('/verify/', 1)[1].split('?', 1)[0]
+        elif 'number=' in token:
+            token = token.split('number=', 1)[1].split('&', 1)[0]
+        token = token.strip('/').strip()
+        if token:
+            numbers.append(token)
+    return list(dict.fromkeys(numbers))
+
+
+def mark_attended(event, association_numbers):
+    """Mark confirmed registrations of the scanned members as attended
+
+    Scanning someone twice is harmless. Returns (updated count, numbers
+    without a confirmed or attended registration).
+    """
+    with transaction.atomic():
+        _lock_event(event.pk)
+        found = set(EventRegistration.objects.filter(
+            event_id=event.pk, status__in=['confirmed', 'attended'], veteran__association_number__in=association_numbers
+        ).values_list('veteran__association_number', flat=True))
+        updated = EventRegistration.objects.filter(
+            event_id=event.pk, status='confirmed', veteran__association_number__in=found
+        ).update(status='attended', checked_in_at=timezone.now(), updated_at=timezone.now())
+    return updated, [number for number in association_numbers if number not in found]
@@ -0,0 +1,213 @@
+"""Text extraction from uploaded job portal resumes
+
+Extraction runs in the extract_resumes worker, never in a request: saving a
+JobPortal entry with a new resume only marks it pending (see signals.py).
+The worker claims pending rows with SKIP LOCKED and commits the claim,
+reads the files and hands them to a process pool, where ``extract_resume`` hashes each file and parses
+it only if the hash differs from the one the stored text came from. Parsers
+can crash on malformed files, so a batch that breaks the pool is retried one
+resume at a time, and each failure counts an attempt. A parse that runs past
+RESUME_PARSE_TIMEOUT counts as a failure too, and its stuck pool process is
+replaced.
+
+The text goes into JobPortal.resume_text, whose generated resume_vector
+column (GIN indexed) lets job_search match free text against resumes.
+"""
+import hashlib
+import io
+import logging
+import os
+import re
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import JobPortal
+
+logger = logging.getLogger(__name__)
+
+MAX_TEXT_LENGTH = 100000
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+class UnsupportedResume(ValueError):
+    """A resume format that cannot be read; retrying will not help"""
+
+
+class ResumeParseTimeout(Exception):
+    """A resume took longer than RESUME_PARSE_TIMEOUT; the pool process parsing it is still busy"""
+
+
+def _pdf_text(data):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise UnsupportedResume('PDF extraction needs the pypdf package')
+    reader = PdfReader(io.BytesIO(data))
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+def _docx_text(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        document = ElementTree.fromstring(archive.read('word/document.xml'))
+    paragraphs = []
+    for paragraph in document.iter(f'{WORD_NAMESPACE}p'):
+        paragraphs.append(''.join(node.text or '' for node in paragraph.iter(f'{WORD_NAMESPACE}t')))
+    return '\n'.join(paragraphs)
+
+
+def clean_text(text):
+    """Collapse whitespace and drop characters PostgreSQL text cannot hold"""
+    text = text.replace('\x00', '')
+    text = re.sub(r'[ \t\r\f\v]+', ' ', text)
+    text = re.sub(r'\s*\n\s*', '\n', text)
+    return text.strip()[:MAX_TEXT_LENGTH]
+
+
+def extract_resume(data, name, known_sha256=''):
+    """Hash a resume and extract its text; runs in a pool process
+
+    Returns (sha256, text), with text None when the file is unchanged since
+    the last extraction.
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    if sha256 == known_sha256:
+        return sha256, None
+    extension = os.path.splitext(name)[1].lower()
+    if extension == '.pdf':
+        text = _pdf_text(data)
+    elif extension == '.docx':
+        text = _docx_text(data)
+    else:
+        raise UnsupportedResume(f'Cannot extract text from {extension or "extensionless"} files')
+    return sha256, clean_text(text)
+
+
+def _read(job):
+    with job.resume.open('rb') as resume:
+        return resume.read()
+
+
+def _failure(error, final=False):
+    """Field updates recording a failed attempt"""
+    return {
+        'resume_attempts': F('resume_attempts') + 1,
+        'resume_error': str(error)[:255],
+        'resume_pending': not final,
+    }
+
+
+def claim_resumes(batch_size=20, max_attempts=3, ids=None, exclude=()):
+    """Take a batch of pending resumes off the queue; returns (jobs, claim time)
+
+    The claim is committed straight away, so no row lock is held while the
+    files are parsed. A claim older than RESUME_CLAIM_TIMEOUT (a worker that
+    died mid-batch) no longer counts.
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=getattr(settings, 'RESUME_CLAIM_TIMEOUT', 900))
+    with transaction.atomic():
+        queue = JobPortal.objects.select_for_update(skip_locked=True).filter(
+            Q(resume_claimed_at__isnull=True) | Q(resume_claimed_at__lt=expired),
+            resume_pending=True, resume_attempts__lt=max_attempts,
+        )
+        if ids is not None:
+            queue = queue.filter(pk__in=ids)
+        if exclude:
+            queue = queue.exclude(pk__in=exclude)
+        jobs = list(queue.only('pk', 'resume', 'resume_sha256').order_by('updated_at')[:batch_size])
+        JobPortal.objects.filter(pk__in=[job.pk for job in jobs]).update(resume_claimed_at=now)
+    return jobs, now
+
+
+def process_resume_batch(pool, batch_size=20, max_attempts=3, ids=None, exclude=()):
+    """Extract one batch of pending resumes with a process pool
+
+    Runs in three steps: claim the batch (claim_resumes), read and parse
+    the files with no transaction open, then write the results in one
+    short transaction. A result is only written while the claim still
+    stands, so a resume replaced during parsing stays queued.
+
+    Returns the ids of the resumes taken from the queue; ``exclude`` skips
+    ids already tried, so a failure is not retried at once. If a parser takes
+    its pool process down, BrokenProcessPool is raised so the caller can
+    start a new pool. Its ``resume_ids`` are the resumes in flight: for a
+    single resume the failure has been recorded, for several their claims
+    are released and they should be retried one at a time to find the
+    culprit. If a parse runs past RESUME_PARSE_TIMEOUT, its failure is
+    recorded, the resumes not yet collected are released, and
+    ResumeParseTimeout is raised with that one resume in ``resume_ids``;
+    the caller must stop the pool's processes, as the parser is still running.
+    """
+    jobs, claimed_at = claim_resumes(batch_size, max_attempts, ids, exclude)
+    # Tasks start in submission order, so each wait below starts no earlier than its parse
+    timeout = getattr(settings, 'RESUME_PARSE_TIMEOUT', 60)
+    if not jobs:
+        return []
+
+    results, futures, crashed = {}, {}, None
+    for job in jobs:
+        if not job.resume:
+            results[job.pk] = {'resume_pending': False, 'resume_text': '', 'resume_sha256': '', 'resume_error': ''}
+            continue
+        try:
+            futures[job] = pool.submit(extract_resume, _read(job), job.resume.name, job.resume_sha256)
+        except OSError as exc:
+            logger.warning('Resume of job portal entry %s could not be read: %s', job.pk, exc)
+            results[job.pk] = _failure(exc)
+
+    for job, future in futures.items():
+        try:
+            sha256, text = future.result(timeout=timeout)
+        except TimeoutError:
+            logger.error('Resume parser took over %s seconds on job portal entry %s', timeout, job.pk)
+            results[job.pk] = _failure(f'The resume parser took over {timeout} seconds on this file')
+            crashed = ResumeParseTimeout(job.pk)
+            crashed.resume_ids = [job.pk]
+            break
+        except BrokenProcessPool as exc:
+            crashed = exc
+            crashed.resume_ids = [job.pk for job in futures]
+            if len(futures) > 1:
+                for pk in crashed.resume_ids:
+                    results.pop(pk, None)
+                break
+            logger.error('Resume parser crashed on job portal entry %s', job.pk)
+            results[job.pk] = _failure('The resume parser crashed on this file')
+            continue
+        except UnsupportedResume as exc:
+            results[job.pk] = _failure(exc, final=True)
+            continue
+        except Exception as exc:
+            logger.warning('Resume of job portal entry %s could not be parsed: %s', job.pk, exc)
+            results[job.pk] = _failure(exc)
+            continue
+        fields = {'resume_pending': False, 'resume_sha256': sha256, 'resume_attempts': 0, 'resume_error': ''}
+        if text is not None:
+            fields['resume_text'] = text
+        results[job.pk] = fields
+
+    with transaction.atomic():
+        for pk, fields in results.items():
+            JobPortal.objects.filter(pk=pk, resume_claimed_at=claimed_at).update(resume_claimed_at=None, **fields)
+        # Release whatever got no result (the rest of a crashed or timed out batch) for an immediate retry
+        JobPortal.objects.filter(pk__in=[job.pk for job in jobs], resume_claimed_at=claimed_at).exclude(
+            pk__in=list(results)
+        ).update(resume_claimed_at=None)
+
+    if crashed is not None:
+        raise crashed
+    return [job.pk for job in jobs]
+
+
+def queue_changed_resumes():
+    """Queue every resume for a hash check; only files whose content changed are parsed again"""
+    return JobPortal.objects.exclude(resume='').filter(resume_pending=False).update(
+        resume_pending=True, resume_attempts=0
+    )
@@ -0,0 +1,324 @@
+"""Synthetic rows for query audits and benchmarks
+
+Rows are inserted with bulk_create, or for large volumes with PostgreSQL
+COPY (``copy=True``); either way model save() and signals do not run, so
+callers clear caches that signals would have invalidated. Unique values
+carry a per-run prefix, so several runs (or a run against a real database
+inside a rolled-back transaction) never collide.
+"""
+import csv
+import io
+import json
+import random
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+
+from .models import (Child, Document, Event, EventCategory, EventRegistration, FinancialYear, JobPortal, Matrimonial,
+                     Transaction, VeteranMember, VeteranUser)
+
+BATCH_SIZE = 2000
+COPY_BATCH_SIZE = 50000
+# How COPY spells NULL; empty strings stay empty strings
+COPY_NULL = r'\N'
+
+
+def run_prefix():
+    return uuid.uuid4().hex[:6].upper()
+
+
+def _copy(instance, **overrides):
+    """An unsaved copy of a model instance, without its key and generated columns"""
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if not field.primary_key and not field.generated
+    }
+    values.update(overrides)
+    return type(instance)(**values)
+
+
+def _copy_value(field, instance, now):
+    value = getattr(instance, field.attname)
+    if value is None and (getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)):
+        value = now
+    if value is None:
+        return COPY_NULL
+    if field.get_internal_type() == 'JSONField':
+        return json.dumps(value, cls=field.encoder)
+    value = field.get_db_prep_save(value, connection)
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return value
+
+
+def copy_instances(instances, batch_size=COPY_BATCH_SIZE):
+    """Insert unsaved instances of one model with COPY; returns how many were written
+
+    Instances may come from a generator, so millions of rows never sit in
+    memory at once. Unlike bulk_create, primary keys are not set on them.
+    Falls back to bulk_create on databases other than PostgreSQL.
+    """
+    instances = iter(instances)
+    written = 0
+    while True:
+        batch = list(islice(instances, batch_size))
+        if not batch:
+            return written
+        model = type(batch[0])
+        if connection.vendor != 'postgresql':
+            model.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+            written += len(batch)
+            continue
+        fields = [field for field in model._meta.concrete_fields if not field.primary_key and not field.generated]
+        now = timezone.now()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for instance in batch:
+            writer.writerow([_copy_value(field, instance, now) for field in fields])
+        buffer.seek(0)
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) "
+                f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                buffer,
+            )
+        written += len(batch)
+
+
+def members(count, state, created_by, template=None, prefix=None, approved=True, rng=None, copy=False):
+    """Members of a state copied from a template member, with unique numbers and varied names
+
+    With ``copy`` the members are written with COPY and read back with only
+    their key, name and state loaded.
+    """
+    template = template or VeteranMember.objects.first()
+    if template is None:
+        raise ValueError('Synthetic members are copied from an existing member; add one first')
+    prefix = prefix or run_prefix()
+    rng = rng or random.Random(0)
+    today = date.today()
+    rows = (
+        _copy(
+            template,
+            state_id=state.pk,
+            created_by_id=created_by.pk,
+            name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {prefix}{i}',
+            service_number=f'{prefix}-{state.pk}-{i:07d}',
+            association_number=f'ICGVWA/{prefix}/{state.pk}/{i:07d}',
+            p_number=None,
+            approved=approved,
+            subscription_paid_on=today - timedelta(days=rng.randint(0, 800)) if rng.random() < 0.9 else None,
+            profile_photo='',
+            document='',
+        )
+        for i in range(count)
+    )
+    if not copy:
+        return VeteranMember.objects.bulk_create(list(rows), batch_size=BATCH_SIZE)
+    copy_instances(rows)
+    return list(
+        VeteranMember.objects.filter(service_number__startswith=f'{prefix}-{state.pk}-')
+        .only('pk', 'name', 'state_id').order_by('pk')
+    )
+
+
+def veteran_users(veterans, prefix=None, approved=True):
+    """A login (with an unusable password) and VeteranUser profile for each member"""
+    prefix = prefix or run_prefix()
+    users = User.objects.bulk_create(
+        [User(username=f'vet_{prefix.lower()}_{member.pk}', password='!') for member in veterans],
+        batch_size=BATCH_SIZE,
+    )
+    return VeteranUser.objects.bulk_create(
+        [VeteranUser(user=user, veteran_member=member, approved=approved) for user, member in zip(users, veterans)],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def financial_year(today=None):
+    """The financial year (April to March) containing today, created if missing"""
+    today = today or date.today()
+    start_year = today.year if today.month >= 4 else today.year - 1
+    year, _created = FinancialYear.objects.get_or_create(
+        year=f'{start_year}-{start_year + 1}',
+        defaults={'start_date': date(start_year, 4, 1), 'end_date': date(start_year + 1, 3, 31), 'is_active': True},
+    )
+    return year
+
+
+def transactions(count, veterans, recorded_by, prefix=None, rng=None, days=365, copy=False):
+    """Transactions spread over the last ``days`` days, most of them linked to a member
+
+    Each falls in the financial year of its date. Returns how many were added.
+    """
+    prefix = prefix or run_prefix()
+    rng = rng or random.Random(0)
+    types = [value for value, _label in Transaction.TRANSACTION_TYPES]
+    methods = [value for value, _label in Transaction.PAYMENT_METHODS]
+    veteran_ids = [member.pk for member in veterans]
+    now = timezone.now()
+    years = {}
+
+    def rows():
+        for i in range(count):
+            transaction_type = rng.choice(types)
+            created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+            day = timezone.localtime(created_at).date()
+            start_year = day.year if day.month >= 4 else day.year - 1
+            if start_year not in years:
+                years[start_year] = financial_year(day)
+            yield Transaction(
+                transaction_id=f'TXN{prefix}{i:08d}',
+                veteran_id=rng.choice(veteran_ids) if veteran_ids and transaction_type != 'expense' else None,
+                transaction_type=transaction_type,
+                amount=Decimal(rng.randint(100, 50000)),
+                payment_method=rng.choice(methods),
+                reference_number=f'REF{prefix}{i}',
+                financial_year=years[start_year],
+                recorded_by=recorded_by,
+                created_at=created_at,
+            )
+
+    if copy:
+        return copy_instances(rows())
+    created = Transaction.objects.bulk_create(list(rows()), batch_size=BATCH_SIZE)
+    # bulk_create stamps auto_now_add fields with the current time; restore the spread
+    Transaction.objects.bulk_update(created, ['created_at'], batch_size=BATCH_SIZE)
+    return len(created)
+
+
+def documents(count, state, uploaded_by, prefix=None):
+    prefix = prefix or run_prefix()
+    return Document.objects.bulk_create(
+        [
+            Document(title=f'Circular {prefix}-{i}', file=f'documents/sample/{prefix}-{i}.pdf', state=state,
+                     uploaded_by=uploaded_by)
+            for i in range(count)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def events(count, states, created_by, prefix=None, rng=None, days=365):
+    """Published and completed events from ``days`` ago to ``days`` ahead, some open to all states"""
+    prefix = prefix or run_prefix()
+    rng = rng or random.Random(0)
+    category = EventCategory.objects.filter(is_active=True).first()
+    if category is None:
+        category, _created = EventCategory.objects.get_or_create(name='General')
+    now = timezone.now()
+    rows = []
+    for i in range(count):
+        start = timezone.make_aware(datetime.combine(
+            (now + timedelta(days=rng.randint(-days, days))).date(), time(rng.choice([9, 10, 11, 15, 17]))
+        ))
+        rows.append(Event(
+            title=f'{rng.choice(EVENT_KINDS)} {prefix}-{i}',
+            description='Synthetic event',
+            category=category,
+            state=rng.choice(states) if states and rng.random() < 0.8 else None,
+            start_date=start,
+            end_date=start + timedelta(hours=rng.choice([2, 4, 8])),
+            venue='Community Hall',
+            address='Synthetic address',
+            contact_person='Event Coordinator',
+            contact_phone='9876543210',
+            max_participants=rng.choice([None, 50, 100, 200]),
+            status='completed' if start < now else 'published',
+            created_by=created_by,
+        ))
+    return Event.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def registrations(events, veterans, per_event=20, rng=None, copy=False):
+    """Registrations by distinct members, about ``per_event`` for each event
+
+    Keeps each event's confirmed_participants in step. Returns how many were added.
+    """
+    rng = rng or random.Random(0)
+    veteran_ids = [member.pk for member in veterans]
+    taken = {}
+
+    def rows():
+        for event in events:
+            limit = event.max_participants or len(veteran_ids)
+            wanted = min(rng.randint(0, per_event * 2), limit, len(veteran_ids))
+            places = 0
+            for veteran_id in rng.sample(veteran_ids, wanted):
+                participants = rng.choice([1, 1, 1, 2, 3])
+                status = rng.choice(['confirmed', 'confirmed', 'pending', 'cancelled'])
+                if event.status == 'completed' and status == 'confirmed':
+                    status = 'attended'
+                if status != 'cancelled':
+                    places += participants
+                yield EventRegistration(event_id=event.pk, veteran_id=veteran_id, participants_count=participants,
+                                        status=status)
+            taken[event.pk] = places
+
+    if copy:
+        written = copy_instances(rows())
+    else:
+        written = len(EventRegistration.objects.bulk_create(list(rows()), batch_size=BATCH_SIZE))
+    for event in events:
+        event.confirmed_participants = taken.get(event.pk, 0)
+    Event.objects.bulk_update(events, ['confirmed_participants'], batch_size=BATCH_SIZE)
+    return written
+
+
+def job_profiles(count, veterans, rng=None):
+    rng = rng or random.Random(0)
+    return JobPortal.objects.bulk_create(
+        [
+            JobPortal(
+                applicant_type='veteran',
+                veteran=member,
+                name=member.name,
+                contact='9876543210',
+                qualification=rng.choice(['Diploma', 'B.Tech', 'ITI', 'B.Com']),
+                skills=', '.join(rng.sample(SKILLS, 3)),
+                preferred_location=rng.choice(['Mumbai', 'Chennai', 'Kochi', 'Goa']),
+            )
+            for member in (veterans[i % len(veterans)] for i in range(count))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def matrimonial_profiles(count, veterans, rng=None):
+    """Profiles, each for a new child of one of the members"""
+    rng = rng or random.Random(0)
+    today = date.today()
+    parents = [veterans[i % len(veterans)] for i in range(count)]
+    children = Child.objects.bulk_create(
+        [
+            Child(veteran=parent, child_name=f'Child of {parent.name}',
+                  child_dob=today - timedelta(days=rng.randint(20 * 365, 38 * 365)), searching_for_alliance=True)
+            for parent in parents
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return Matrimonial.objects.bulk_create(
+        [
+            Matrimonial(child=child, veteran=parent, gender=rng.choice(['male', 'female']),
+                        religion=rng.choice(['Hindu', 'Christian', 'Muslim', 'Sikh']),
+                        occupation=rng.choice(['Engineer', 'Teacher', 'Doctor', 'Nurse', 'Officer']))
+            for child, parent in zip(children, parents)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+FIRST_NAMES = ['Arjun', 'Ravi', 'Rahul', 'Sanjay', 'Vivek', 'Amit', 'Rakesh', 'Suresh', 'Manoj', 'Vikram',
+               'Karan', 'Deepak', 'Rohit', 'Vikas', 'Naveen', 'Sunil', 'Harish', 'Anil', 'Pawan', 'Prakash']
+LAST_NAMES = ['Singh', 'Kumar', 'Sharma', 'Patel', 'Gupta', 'Yadav', 'Reddy', 'Das', 'Nair', 'Bose',
+              'Chauhan', 'Verma', 'Mishra', 'Ghosh', 'Mehta', 'Jain', 'Agarwal', 'Thakur', 'Bhat', 'Shetty']
+SKILLS = ['python', 'excel', 'tally', 'accounting', 'driving', 'welding', 'electrical wiring', 'logistics',
+          'navigation', 'first aid', 'fire fighting', 'diesel engines', 'security operations', 'sales']
+EVENT_KINDS = ['Veterans Meet', 'Health Camp', 'Pension Adalat', 'Sports Day', 'Welfare Drive', 'Job Fair']
@@ -0,0 +1,101 @@
+"""Member search endpoints"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+
+from .member_search import (AUTOCOMPLETE_LIMIT, MAX_RESULTS, NAME_WEIGHTS, autocomplete, member_result, search,
+                            searchable_members, trigram_available)
+
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_MAX_LIMIT = 20
+
+
+@login_required
+def member_search(request):
+    """Ranked member search as JSON, limited to the members the user may see
+
+    ?q=<text>&state=<id>&limit=<n>; used by state_members, chat_portal and admin.
+    """
+    members, detailed = searchable_members(request.user)
+    if members is None:
+        return JsonResponse({'error': 'You do not have permission to search members.'}, status=403)
+
+    query = request.GET.get('q', '').strip()[:100]
+    state = request.GET.get('state', '')
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 20)), MAX_RESULTS))
+    except ValueError:
+        limit = 20
+    if state.isdigit():
+        members = members.filter(state_id=int(state))
+    if not query:
+        return JsonResponse({'query': query, 'results': []})
+
+    weights = '' if detailed else NAME_WEIGHTS
+    results = search(members.select_related('state', 'rank'), query, weights=weights)[:limit]
+    return JsonResponse({
+        'query': query,
+        'fuzzy': trigram_available(),
+        'results': [member_result(member, detailed) for member in results],
+    })
+
+
+def _search_scope(user, detailed):
+    """Cache scope of a user's searchable members: everyone, a state, or one veteran's directory"""
+    if user.is_superuser or user.username == 'accounts':
+        return 'all'
+    if detailed:
+        return f's{user.state_profile.state_id}'
+    return f'v{user.veteran_profile.veteran_member_id}'
+
+
+@login_required
+def member_autocomplete(request):
+    """Typeahead suggestions for member selection dropdowns
+
+    ?q=<at least 2 characters>&limit=<n>&state=<id>&approved=1&without_account=1.
+    Returns [{'id', 'text'}] ready for an <option>; results are cached
+    briefly per scope and query, since every keystroke asks again.
+    """
+    members, detailed = searchable_members(request.user)
+    if members is None:
+        return JsonResponse({'error': 'You do not have permission to search members.'}, status=403)
+
+    query = request.GET.get('q', '').strip()[:100]
+    state = request.GET.get('state', '')
+    approved = request.GET.get('approved') == '1'
+    without_account = request.GET.get('without_account') == '1'
+    try:
+        limit = max(1, min(int(request.GET.get('limit', AUTOCOMPLETE_LIMIT)), AUTOCOMPLETE_MAX_LIMIT))
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    if len(query) < AUTOCOMPLETE_MIN_LENGTH:
+        return JsonResponse({'query': query, 'results': []})
+
+    params = f'{query.upper()}|{limit}|{state}|{approved:d}|{without_account:d}'
+    key = f'members:autocomplete:{_search_scope(request.user, detailed)}:{hashlib.md5(params.encode("utf-8")).hexdigest()}'
+    results = cache.get(key)
+    if results is None:
+        if state.isdigit():
+            members = members.filter(state_id=int(state))
+        if approved:
+            members = members.filter(approved=True)
+        if without_account:
+            members = members.filter(user_account__isnull=True)
+        members = members.select_related('state').only('association_id', 'name', 'association_number', 'state__name')
+        results = [
+            {
+                'id': member.association_id,
+                'text': f'{member.name} ({member.association_number})' if detailed else f'{member.name} ({member.state.name})',
+            }
+            for member in autocomplete(members, query, limit, weights='' if detailed else NAME_WEIGHTS)
+        ]
+        cache.set(key, results, getattr(settings, 'MEMBER_AUTOCOMPLETE_CACHE_TIMEOUT', 60))
+
+    response = JsonResponse({'query': query, 'results': results})
+    patch_cache_control(response, private=True, max_age=getattr(settings, 'MEMBER_AUTOCOMPLETE_CACHE_TIMEOUT', 60))
+    return response
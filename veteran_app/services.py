@@ -1,17 +1,98 @@
-import razorpay
+import logging
+import threading
 import uuid
+from datetime import date
 from decimal import Decimal
 from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
-from .models import PaymentGateway, PaymentOrder, EventRegistration
+from .models import (PaymentGateway, PaymentOrder, PaymentWebhook, Event, EventRegistration, Transaction,
+                     FinancialYear)
+from . import ledger
+from .registrations import cancel_registrations
+
+logger = logging.getLogger(__name__)
+
+_registry_lock = threading.Lock()
+_gateway_clients = {}
+
+
+def _build_http_session():
+    """Keep-alive session with connection pooling, default timeouts and retries
+
+    Connection errors are retried for every method (nothing reached the
+    gateway); read errors and 502/503/504 only for GET, since order creation
+    is not idempotent.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    timeout = getattr(settings, 'PAYMENT_GATEWAY_TIMEOUT', (3.05, 10))
+    retries = getattr(settings, 'PAYMENT_GATEWAY_RETRIES', 2)
+    pool_size = getattr(settings, 'PAYMENT_GATEWAY_POOL_SIZE', 10)
+
+    class GatewaySession(requests.Session):
+        def request(self, method, url, **kwargs):
+            kwargs.setdefault('timeout', timeout)
+            return super().request(method, url, **kwargs)
+
+    retry = Retry(
+        total=retries, connect=retries, read=retries, status=retries,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = GatewaySession()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_gateway_client(name='razorpay'):
+    """Return (gateway, client) for the active gateway, reused across requests in this process
+
+    The entry is rebuilt when the gateway row changes: its id and updated_at
+    are read from the database on every call, so a save in any worker (or
+    the admin) reaches all of them, as does deleting and re-adding it.
+    Returns (None, None) when no gateway is active.
+    """
+    version = PaymentGateway.objects.filter(name=name).values_list('pk', 'updated_at').first()
+    entry = _gateway_clients.get(name)
+    if entry and entry['version'] == version:
+        return entry['gateway'], entry['client']
+
+    with _registry_lock:
+        gateway = PaymentGateway.objects.filter(name=name, is_active=True).first()
+        client = None
+        if gateway:
+            # Imported here so workers that never take a payment don't load the SDK
+            import razorpay
+            previous = _gateway_clients.get(name)
+            session = previous['session'] if previous else _build_http_session()
+            options = {}
+            base_url = getattr(settings, 'PAYMENT_GATEWAY_BASE_URL', '')
+            if base_url:
+                options['base_url'] = base_url
+            client = razorpay.Client(session=session, auth=(gateway.api_key, gateway.secret_key), **options)
+        else:
+            session = None
+        _gateway_clients[name] = {
+            'gateway': gateway, 'client': client, 'session': session,
+            'version': version,
+        }
+        return gateway, client
+
 
 class PaymentService:
     """Service class for handling payments"""
     
     def __init__(self):
-        self.gateway = PaymentGateway.objects.filter(name='razorpay', is_active=True).first()
-        if self.gateway:
-            self.client = razorpay.Client(auth=(self.gateway.api_key, self.gateway.secret_key))
+        self.gateway, self.client = get_gateway_client('razorpay')
     
     def create_order(self, veteran, order_type, amount, description, event_registration=None):
         """Create payment order"""
@@ -56,18 +137,253 @@ class PaymentService:
             return False
     
     def process_successful_payment(self, payment_order, payment_id):
-        """Process successful payment"""
-        payment_order.status = 'completed'
-        payment_order.gateway_payment_id = payment_id
-        payment_order.paid_at = timezone.now()
-        payment_order.save()
-        
-        # Update related objects
-        if payment_order.event_registration:
-            registration = payment_order.event_registration
-            registration.payment_status = 'completed'
-            registration.payment_id = payment_id
-            registration.status = 'confirmed'
-            registration.save()
-        
-        return payment_order
\ No newline at end of file
+        """Process successful payment
+
+        Shares the idempotent state transition with the webhook worker, so
+        whichever of the two arrives second is a no-op.
+        """
+        with transaction.atomic():
+            order = PaymentOrder.objects.select_for_update(of=('self',)).select_related(
+                'event_registration', 'veteran'
+            ).get(pk=payment_order.pk)
+            apply_payment_events([PaymentEvent(order, 'captured', payment_id)])
+        return order
+
+
+PAYMENT_TRANSACTION_TYPES = {
+    'subscription': 'subscription',
+    'membership_fee': 'subscription',
+    'donation': 'donation',
+    'event_registration': 'event_fee',
+}
+
+
+class PaymentEvent:
+    """One gateway outcome ('captured' or 'failed') to apply to a locked PaymentOrder"""
+
+    def __init__(self, order, outcome, payment_id, method='', failure_reason=''):
+        self.order = order
+        self.outcome = outcome
+        self.payment_id = payment_id
+        self.method = method
+        self.failure_reason = failure_reason
+
+
+def get_payment_financial_year(today=None):
+    """Financial year (April-March) that online payments are booked into"""
+    today = today or timezone.localdate()
+    financial_year = FinancialYear.objects.filter(start_date__lte=today, end_date__gte=today).first()
+    if financial_year:
+        return financial_year
+    start_year = today.year if today.month >= 4 else today.year - 1
+    financial_year, created = FinancialYear.objects.get_or_create(
+        year=f"{start_year}-{start_year + 1}",
+        defaults={
+            'start_date': date(start_year, 4, 1),
+            'end_date': date(start_year + 1, 3, 31),
+            'is_active': True
+        }
+    )
+    return financial_year
+
+
+def get_payment_system_user():
+    """User recorded on transactions created from gateway callbacks"""
+    user, created = User.objects.get_or_create(
+        username='system_payments',
+        defaults={'email': 'system_payments@example.com', 'is_active': False}
+    )
+    if created:
+        user.set_unusable_password()
+        user.save(update_fields=['password'])
+    return user
+
+
+def apply_payment_events(events):
+    """Apply payment outcomes to orders, registrations and the ledger in bulk
+
+    Must run inside a transaction with the orders locked. Idempotent per
+    gateway payment id: an order already completed is never downgraded, and
+    a ledger Transaction is only created if none references the payment.
+    A failed payment cancels its unpaid registration, giving the places back
+    to the waitlist; a payment captured after that takes places again if
+    any are left. Returns the number of events that changed anything.
+    """
+    if not events:
+        return 0
+
+    payment_ids = {event.payment_id for event in events if event.payment_id}
+    booked = set(
+        Transaction.objects.filter(payment_method='online', reference_number__in=payment_ids)
+        .values_list('reference_number', flat=True)
+    )
+
+    now = timezone.now()
+    orders, registrations, transactions = {}, {}, []
+    released = {}  # registration pk -> event pk, for failed payments
+    financial_year = recorded_by = None
+    changed = 0
+
+    for event in events:
+        order = event.order
+        if event.outcome == 'captured':
+            if order.status != 'completed':
+                order.status = 'completed'
+                order.gateway_payment_id = event.payment_id
+                order.paid_at = order.paid_at or now
+                order.payment_method = event.method or order.payment_method
+                order.failure_reason = ''
+                orders[order.pk] = order
+
+            registration = order.event_registration
+            if registration and registration.payment_status != 'completed':
+                registration.payment_status = 'completed'
+                registration.payment_id = event.payment_id
+                released.pop(registration.pk, None)
+                if registration.status == 'pending':
+                    registration.status = 'confirmed'
+                elif registration.status == 'cancelled':
+                    # Paid after its hold lapsed or an earlier attempt failed
+                    if Event(pk=registration.event_id).reserve_places(registration.participants_count):
+                        registration.status = 'confirmed'
+                    else:
+                        logger.warning('Registration %s was paid (%s) after its places went to others; '
+                                       'refund it', registration.pk, event.payment_id)
+                registration.hold_expires_at = None
+                registrations[registration.pk] = registration
+
+            if event.payment_id and event.payment_id not in booked:
+                if financial_year is None:
+                    financial_year = get_payment_financial_year()
+                    recorded_by = get_payment_system_user()
+                transactions.append(Transaction(
+                    transaction_id=f"PAY{now.strftime('%Y%m%d')}{uuid.uuid4().hex[:8].upper()}",
+                    veteran=order.veteran,
+                    transaction_type=PAYMENT_TRANSACTION_TYPES.get(order.order_type, 'other_income'),
+                    amount=order.amount,
+                    payment_method='online',
+                    reference_number=event.payment_id,
+                    description=f'Online payment for order {order.order_id}: {order.description}'[:500],
+                    financial_year=financial_year,
+                    recorded_by=recorded_by
+                ))
+                booked.add(event.payment_id)
+                changed += 1
+            elif order.pk in orders:
+                changed += 1
+
+        elif event.outcome == 'failed' and order.status not in ('completed', 'refunded'):
+            order.status = 'failed'
+            order.gateway_payment_id = event.payment_id or order.gateway_payment_id
+            order.failure_reason = event.failure_reason
+            orders[order.pk] = order
+            registration = order.event_registration
+            if registration and registration.status == 'pending' and registration.payment_status != 'completed':
+                released[registration.pk] = registration.event_id
+            changed += 1
+
+    if orders:
+        PaymentOrder.objects.bulk_update(
+            orders.values(), ['status', 'gateway_payment_id', 'paid_at', 'payment_method', 'failure_reason']
+        )
+    if registrations:
+        for registration in registrations.values():
+            registration.updated_at = now
+        EventRegistration.objects.bulk_update(
+            registrations.values(), ['payment_status', 'payment_id', 'status', 'hold_expires_at', 'updated_at']
+        )
+    if released:
+        by_event = {}
+        for registration_pk, event_pk in released.items():
+            by_event.setdefault(event_pk, []).append(registration_pk)
+        for event_pk, registration_pks in by_event.items():
+            cancel_registrations(Event(pk=event_pk), registration_pks)
+    if transactions:
+        Transaction.objects.bulk_create(transactions)
+        # bulk_create sends no post_save, so count the payments into the rollups here
+        ledger.record(transactions)
+    return changed
+
+
+def _parse_webhook(payload):
+    """Extract (outcome, gateway order id, payment id, method, failure reason) from a Razorpay payload"""
+    event_type = payload.get('event', '')
+    entities = payload.get('payload', {})
+    payment = entities.get('payment', {}).get('entity', {})
+    order = entities.get('order', {}).get('entity', {})
+    outcome = {
+        'payment.captured': 'captured',
+        'order.paid': 'captured',
+        'payment.failed': 'failed',
+    }.get(event_type)
+    return (
+        outcome,
+        payment.get('order_id') or order.get('id') or '',
+        payment.get('id', ''),
+        payment.get('method', ''),
+        payment.get('error_description') or '',
+    )
+
+
+def _apply_webhooks(webhooks):
+    """Apply claimed webhooks and mark them processed (caller holds the row locks)"""
+    parsed = {webhook.pk: _parse_webhook(webhook.payload) for webhook in webhooks}
+    order_ids = {values[1] for values in parsed.values() if values[0] and values[1]}
+    orders = {
+        order.gateway_order_id: order
+        for order in PaymentOrder.objects.select_for_update(of=('self',))
+        .select_related('event_registration', 'veteran')
+        .filter(gateway_order_id__in=order_ids)
+    }
+
+    events = []
+    now = timezone.now()
+    for webhook in webhooks:
+        outcome, gateway_order_id, payment_id, method, failure_reason = parsed[webhook.pk]
+        order = orders.get(gateway_order_id)
+        webhook.attempts += 1
+        webhook.processed = True
+        webhook.processed_at = now
+        webhook.last_error = ''
+        if outcome and order is None:
+            webhook.last_error = f'No order for gateway order id {gateway_order_id!r}'
+        elif outcome:
+            webhook.order = order
+            events.append(PaymentEvent(order, outcome, payment_id, method, failure_reason))
+
+    apply_payment_events(events)
+    PaymentWebhook.objects.bulk_update(webhooks, ['attempts', 'processed', 'processed_at', 'last_error', 'order'])
+
+
+def process_webhook_batch(batch_size=100, max_attempts=5, ids=None):
+    """Apply one batch of unprocessed webhooks in a single transaction
+
+    Rows are claimed with SKIP LOCKED so several workers can drain the queue
+    side by side. If the batch fails it is retried one webhook at a time, and
+    a webhook that still fails has its attempt and error recorded. Returns the
+    number of webhooks taken from the queue.
+    """
+    with transaction.atomic():
+        queue = PaymentWebhook.objects.select_for_update(skip_locked=True).filter(
+            processed=False, attempts__lt=max_attempts
+        )
+        if ids is not None:
+            queue = queue.filter(pk__in=ids)
+        webhooks = list(queue.order_by('created_at')[:batch_size])
+        if not webhooks:
+            return 0
+        try:
+            with transaction.atomic():
+                _apply_webhooks(webhooks)
+            return len(webhooks)
+        except Exception as exc:
+            if len(webhooks) > 1:
+                logger.exception('Webhook batch of %d failed; retrying one at a time', len(webhooks))
+            else:
+                logger.exception('Webhook %s failed', webhooks[0].pk)
+                PaymentWebhook.objects.filter(pk=webhooks[0].pk).update(
+                    attempts=F('attempts') + 1, last_error=str(exc)[:1000]
+                )
+                return 1
+
+    return sum(process_webhook_batch(1, max_attempts, ids=[webhook.pk]) for webhook in webhooks)
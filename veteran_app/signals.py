@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import State, VeteranMember, VeteranUser, Rank, Group, BloodGroup
+from .models import (State, VeteranMember, VeteranUser, Rank, Group, BloodGroup, Event, EventRegistration,
+                     Child, JobPortal, Matrimonial, FinancialYear, Transaction)
+from . import ledger
+from .verification_cache import invalidate_all_verifications, invalidate_verification
+from .matrimonial_search import invalidate_facets, make_thumbnail
 from datetime import date
 import random
 
@@ -80,4 +85,107 @@ def setup_state_chat_functionality(sender, instance, created, **kwargs):
                     'approved': True,
                     'created_by_admin': True
                 }
-            )
\ No newline at end of file
+            )
+
+@receiver(pre_save, sender=VeteranMember)
+def remember_member_number(sender, instance, **kwargs):
+    """Keep the previous association number (so a renumbered member's old entry is dropped too) and state"""
+    instance._verification_old_number = instance._facet_old_state_id = None
+    if instance.pk:
+        previous = VeteranMember.objects.filter(pk=instance.pk).values_list('association_number', 'state_id').first()
+        if previous:
+            instance._verification_old_number, instance._facet_old_state_id = previous
+
+@receiver(post_save, sender=VeteranMember)
+@receiver(post_delete, sender=VeteranMember)
+def invalidate_member_verification(sender, instance, **kwargs):
+    """Drop cached verification results once a member change is committed"""
+    numbers = (instance.association_number, getattr(instance, '_verification_old_number', None))
+    transaction.on_commit(lambda: invalidate_verification(*numbers))
+
+@receiver(post_save, sender=VeteranMember)
+def invalidate_moved_member_facets(sender, instance, created, **kwargs):
+    """A member moved to another state moves their children's profiles between state facets"""
+    if not created and getattr(instance, '_facet_old_state_id', None) != instance.state_id:
+        transaction.on_commit(invalidate_facets)
+
+@receiver(pre_save, sender=Rank)
+@receiver(pre_save, sender=State)
+def remember_verification_name(sender, instance, **kwargs):
+    instance._verification_old_name = None
+    if instance.pk:
+        instance._verification_old_name = sender.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+@receiver(post_save, sender=Rank)
+@receiver(post_save, sender=State)
+def invalidate_renamed_verifications(sender, instance, created, **kwargs):
+    """Cached payloads carry rank and state names, so a rename drops them all"""
+    if not created and getattr(instance, '_verification_old_name', None) != instance.name:
+        transaction.on_commit(invalidate_all_verifications)
+        if sender is State:
+            # The state facet's labels are cached with the counts
+            transaction.on_commit(invalidate_facets)
+
+@receiver(post_delete, sender=EventRegistration)
+def release_event_places(sender, instance, origin=None, **kwargs):
+    """Give back the places held by a deleted registration"""
+    if isinstance(origin, Event):
+        # The event itself is being deleted
+        return
+    if instance.status in EventRegistration.PLACE_HOLDING_STATUSES:
+        # By event_id, so cascading an event delete does not fetch the event per registration
+        Event(pk=instance.event_id).release_places(instance.participants_count)
+
+@receiver(pre_save, sender=Transaction)
+def remember_transaction_rollup(sender, instance, **kwargs):
+    """Keep the stored transaction so an edit can move its amount between rollup rows"""
+    instance._rollup_previous = None
+    if instance.pk:
+        instance._rollup_previous = Transaction.objects.filter(pk=instance.pk).only(
+            'financial_year', 'transaction_type', 'payment_method', 'amount', 'created_at'
+        ).first()
+
+@receiver(post_save, sender=Transaction)
+def update_transaction_rollup(sender, instance, created, **kwargs):
+    """Count a new or changed transaction into the ledger rollups"""
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is not None:
+        if ledger.rollup_key(previous) == ledger.rollup_key(instance) and previous.amount == instance.amount:
+            return
+        ledger.remove([previous])
+    ledger.record([instance])
+
+@receiver(post_delete, sender=Transaction)
+def remove_transaction_rollup(sender, instance, origin=None, **kwargs):
+    """Take a deleted transaction out of the ledger rollups"""
+    if isinstance(origin, FinancialYear):
+        # Its rollup rows go with the financial year
+        return
+    ledger.remove([instance])
+
+@receiver(post_save, sender=Matrimonial)
+def prepare_matrimonial_thumbnail(sender, instance, **kwargs):
+    """Resize a new or changed profile photo once, instead of on a portal page view"""
+    transaction.on_commit(lambda: make_thumbnail(instance))
+
+@receiver(post_save, sender=Matrimonial)
+@receiver(post_delete, sender=Matrimonial)
+@receiver(post_save, sender=Child)
+@receiver(post_delete, sender=Child)
+def invalidate_matrimonial_facets(sender, instance, **kwargs):
+    """Recount the matrimonial facets after a profile (or a child's date of birth) changes"""
+    transaction.on_commit(invalidate_facets)
+
+@receiver(pre_save, sender=JobPortal)
+def queue_resume_extraction(sender, instance, **kwargs):
+    """Queue a new or replaced resume for the extract_resumes worker"""
+    previous = JobPortal.objects.filter(pk=instance.pk).values_list('resume', flat=True).first() if instance.pk else ''
+    if (instance.resume.name or '') != (previous or ''):
+        instance.resume_pending = bool(instance.resume)
+        instance.resume_attempts = 0
+        instance.resume_error = ''
+        # A worker still parsing the old file must not write its text
+        instance.resume_claimed_at = None
+        if not instance.resume:
+            instance.resume_text = ''
+            instance.resume_sha256 = ''
@@ -0,0 +1,30 @@
+// Check-in kiosk service worker: network first, cached copy when offline
+var CACHE = 'event-checkin-v1';
+var URLS = ['{{ kiosk_url|escapejs }}', '{{ manifest_url|escapejs }}'];
+
+self.addEventListener('install', function (event) {
+    event.waitUntil(caches.open(CACHE).then(function (cache) {
+        return cache.addAll(URLS.map(function (url) { return new Request(url, {credentials: 'same-origin'}); }));
+    }));
+    self.skipWaiting();
+});
+
+self.addEventListener('activate', function (event) {
+    event.waitUntil(self.clients.claim());
+});
+
+self.addEventListener('fetch', function (event) {
+    var url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || URLS.indexOf(url.pathname) === -1) {
+        return;
+    }
+    event.respondWith(fetch(event.request).then(function (response) {
+        if (response.ok) {
+            var copy = response.clone();
+            caches.open(CACHE).then(function (cache) { cache.put(event.request, copy); });
+        }
+        return response;
+    }).catch(function () {
+        return caches.match(event.request);
+    }));
+});
@@ -1,3 +1,246 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import ledger, registrations, sample_data
+from .models import (BloodGroup, Branch, Event, EventCategory, EventRegistration, PaymentGateway, PaymentOrder, Rank,
+                     State, Transaction, TransactionRollup, UserState, VeteranMember)
+from .services import PaymentEvent, apply_payment_events
+
+
+def create_members(count, created_by):
+    """Members of one state; bulk_create skips the State post_save hook, which creates a chat member"""
+    state = State.objects.bulk_create([State(name='Test State', code='TS')])[0]
+    template = VeteranMember.objects.bulk_create([VeteranMember(
+        state=state, enrolled_date=date(1990, 1, 1), name='Template Member', date_of_birth=date(1965, 5, 1),
+        contact='9876543210', address='Address', blood_group=BloodGroup.objects.create(name='O+'),
+        service_number='T-0', rank=Rank.objects.create(name='Test Rank'), branch=Branch.objects.create(name='Test'),
+        date_of_joining=date(1985, 1, 1), retired_on=date(2005, 1, 1), unit_served='Ship', nearest_dhq_text='DHQ',
+        association_date=date(2010, 1, 1), spouse_name='Spouse', created_by=created_by, approved=True,
+    )])[0]
+    return sample_data.members(count, state, created_by, template=template, prefix='T')
+
+
+class LedgerRollupTests(TestCase):
+    """The F() updates from the Transaction signals must end where a rebuild from scratch does"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('treasurer')
+        self.year = sample_data.financial_year()
+        self.number = 0
+
+    def add(self, amount, transaction_type='donation', payment_method='cash'):
+        self.number += 1
+        return Transaction.objects.create(
+            transaction_id=f'TXN-{self.number}', transaction_type=transaction_type, amount=Decimal(amount),
+            payment_method=payment_method, financial_year=self.year, recorded_by=self.user,
+        )
+
+    def assertMatchesRebuild(self):
+        stored = sorted(TransactionRollup.objects.values_list(
+            'financial_year', 'month', 'transaction_type', 'payment_method', 'total', 'count'
+        ))
+        self.assertEqual(ledger.drift(), {})
+        ledger.rebuild()
+        rebuilt = sorted(TransactionRollup.objects.values_list(
+            'financial_year', 'month', 'transaction_type', 'payment_method', 'total', 'count'
+        ))
+        # Rows emptied by edits and deletes stay behind with zero totals; a rebuild has no row for them
+        self.assertEqual([row for row in stored if row[5]], rebuilt)
+
+    def test_record(self):
+        self.add('100.00')
+        self.add('50.50')
+        self.add('30.00', 'expense', 'upi')
+        self.assertMatchesRebuild()
+        summary = ledger.summarize_transactions(ledger.rollup_rows(self.year))
+        self.assertEqual((summary['income'], summary['expenses'], summary['count']),
+                         (Decimal('150.50'), Decimal('30.00'), 3))
+
+    def test_update(self):
+        txn = self.add('100.00')
+        self.add('20.00')
+        txn.amount = Decimal('75.00')
+        txn.save()
+        txn.transaction_type, txn.payment_method = 'expense', 'cheque'
+        txn.save()
+        txn.created_at -= timedelta(days=40)
+        txn.save()
+        self.assertMatchesRebuild()
+
+    def test_delete(self):
+        txn = self.add('100.00')
+        self.add('20.00')
+        txn.delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(ledger.summarize_transactions(ledger.rollup_rows(self.year))['income'], Decimal('20.00'))
+
+    def test_bulk_create_recorded(self):
+        transactions = Transaction.objects.bulk_create([
+            Transaction(transaction_id=f'BULK-{i}', transaction_type='subscription', amount=Decimal('10.00'),
+                        payment_method='online', financial_year=self.year, recorded_by=self.user)
+            for i in range(5)
+        ])
+        ledger.record(transactions)
+        self.assertMatchesRebuild()
+
+
+class EventPlacesTests(TestCase):
+    """Event.confirmed_participants, the waitlist and payment holds"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin')
+        self.members = create_members(4, self.admin)
+        start = timezone.now() + timedelta(days=5)
+        self.event = Event.objects.create(
+            title='Reunion', description='Reunion', category=EventCategory.objects.create(name='General'),
+            start_date=start, end_date=start + timedelta(hours=3), venue='Hall', address='Address',
+            contact_person='Organiser', contact_phone='9876543210', max_participants=3, status='published',
+            created_by=self.admin, registration_fee=Decimal('100.00'),
+        )
+
+    def assertPlaces(self, expected):
+        self.event.refresh_from_db()
+        held = sum(EventRegistration.objects.filter(
+            event=self.event, status__in=EventRegistration.PLACE_HOLDING_STATUSES
+        ).values_list('participants_count', flat=True))
+        self.assertEqual((self.event.confirmed_participants, held), (expected, expected))
+
+    def expire(self, registration):
+        EventRegistration.objects.filter(pk=registration.pk).update(
+            hold_expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        return registrations.expire_holds()
+
+    def test_reserve_places_refuses_to_overbook(self):
+        self.assertTrue(self.event.reserve_places(2))
+        self.assertFalse(self.event.reserve_places(2))
+        self.assertTrue(self.event.reserve_places(1))
+        self.assertFalse(self.event.reserve_places(1))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.confirmed_participants, 3)
+
+    def test_full_event_waitlists(self):
+        first = registrations.register(self.event, self.members[0], 3)
+        second = registrations.register(self.event, self.members[1], 1)
+        self.assertEqual((first.status, second.status), ('pending', 'waitlisted'))
+        self.assertIsNotNone(first.hold_expires_at)
+        self.assertPlaces(3)
+
+    def test_expired_hold_promotes_waitlist(self):
+        first = registrations.register(self.event, self.members[0], 3)
+        second = registrations.register(self.event, self.members[1], 2)
+        self.assertEqual(self.expire(first), (1, 1))
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, second.status), ('cancelled', 'pending'))
+        # A place offered from the waitlist gets its own, longer hold
+        self.assertGreater(second.hold_expires_at, timezone.now() + timedelta(hours=1))
+        self.assertPlaces(2)
+
+    def test_expired_offer_passes_to_next(self):
+        first = registrations.register(self.event, self.members[0], 3)
+        second = registrations.register(self.event, self.members[1], 3)
+        third = registrations.register(self.event, self.members[2], 3)
+        self.expire(first)
+        self.expire(second)
+        second.refresh_from_db()
+        third.refresh_from_db()
+        self.assertEqual((second.status, third.status), ('cancelled', 'pending'))
+        self.assertPlaces(3)
+
+    def test_paid_hold_does_not_expire(self):
+        first = registrations.register(self.event, self.members[0], 1)
+        registrations.confirm_registrations(self.event, [first.pk])
+        self.assertEqual(self.expire(first), (0, 0))
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'confirmed')
+        self.assertPlaces(1)
+
+    def test_register_again_after_lapse(self):
+        first = registrations.register(self.event, self.members[0], 2)
+        self.expire(first)
+        again = registrations.register(self.event, self.members[0], 1)
+        self.assertEqual((again.pk, again.status), (first.pk, 'pending'))
+        self.assertPlaces(1)
+
+    def test_failed_payment_releases_places(self):
+        first = registrations.register(self.event, self.members[0], 3)
+        second = registrations.register(self.event, self.members[1], 1)
+        order = PaymentOrder.objects.create(
+            order_id='ORDER-1', veteran=self.members[0], order_type='event_registration', amount=Decimal('300.00'),
+            description='Reunion', gateway=PaymentGateway.objects.create(
+                name='razorpay', display_name='Razorpay', api_key='key', secret_key='secret'
+            ), event_registration=first,
+        )
+        with transaction.atomic():
+            order = PaymentOrder.objects.select_for_update(of=('self',)).select_related('event_registration').get(pk=order.pk)
+            apply_payment_events([PaymentEvent(order, 'failed', 'pay_1', failure_reason='Declined')])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, second.status), ('cancelled', 'pending'))
+        self.assertPlaces(1)
+
+
+class ListViewQueryTests(TestCase):
+    """The list views audit_queries found N+1 queries in run as many queries for more rows
+
+    Each view is requested with SMALL rows of each kind, then again after
+    LARGE more; the second request may not run more queries than the first.
+    """
+    SMALL = 3
+    LARGE = 30
+
+    def setUp(self):
+        self.superuser = User.objects.create_superuser('admin')
+        self.accounts = User.objects.create_user('accounts')
+        self.members = create_members(self.SMALL, self.superuser)
+        self.state = self.members[0].state
+        # State admins are recognised by their state_<code> username
+        self.state_admin = User.objects.create_user(f'state_{self.state.code.lower()}')
+        UserState.objects.create(user=self.state_admin, state=self.state, approved=True)
+        self.seed(self.SMALL)
+
+    def seed(self, count):
+        prefix = sample_data.run_prefix()
+        members = sample_data.members(count, self.state, self.superuser, template=self.members[0], prefix=prefix)
+        sample_data.transactions(count, members, self.accounts, prefix=prefix)
+        sample_data.documents(count, self.state, self.superuser, prefix=prefix)
+
+    def get(self, url, params=None):
+        cache.clear()
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def assertQueriesFlat(self, user, url, params=None):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as small:
+            self.get(url, params)
+        self.seed(self.LARGE)
+        with self.assertNumQueries(len(small)):
+            self.get(url, params)
+
+    def test_treasurer_dashboard(self):
+        self.assertQueriesFlat(self.accounts, reverse('treasurer_dashboard'))
+
+    def test_transaction_list(self):
+        self.assertQueriesFlat(self.accounts, reverse('transaction_list'))
+
+    def test_export_transactions(self):
+        self.assertQueriesFlat(self.accounts, reverse('export_transactions'), {'format': 'csv'})
+
+    def test_media_documents(self):
+        self.assertQueriesFlat(self.state_admin, reverse('media_documents'))
 
-# Create your tests here.
+    def test_gallery(self):
+        self.assertQueriesFlat(self.superuser, reverse('gallery'))
@@ -0,0 +1,65 @@
+"""Cached thumbnails for uploaded photos
+
+Thumbnails are written once under MEDIA_ROOT/thumbnails/ and reused until
+the source file changes, so bulk renderers (ID card sheets, listings) never
+decode full-size uploads more than once.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+
+THUMBNAIL_DIR = 'thumbnails'
+
+
+def _thumbnail_name(source_path, size):
+    """Build a cache file name from the source path, its mtime and the size"""
+    stat = os.stat(source_path)
+    key = f"{source_path}:{stat.st_mtime_ns}:{stat.st_size}:{size[0]}x{size[1]}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(THUMBNAIL_DIR, f"{size[0]}x{size[1]}", digest[:2], f"{digest}.jpg")
+
+
+def get_thumbnail_path(image_field, size=(240, 300), quality=80):
+    """Return the filesystem path of a cached JPEG thumbnail for image_field.
+
+    Returns None when the field is empty or the source file is missing or
+    unreadable, so callers can fall back to a placeholder.
+    """
+    if not image_field:
+        return None
+    try:
+        source_path = image_field.path
+    except (NotImplementedError, ValueError):
+        return None
+    if not os.path.exists(source_path):
+        return None
+
+    relative_name = _thumbnail_name(source_path, size)
+    thumb_path = os.path.join(settings.MEDIA_ROOT, relative_name)
+    if os.path.exists(thumb_path):
+        return thumb_path
+
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(source_path) as img:
+            img = ImageOps.exif_transpose(img)
+            img = ImageOps.fit(img.convert('RGB'), size, Image.LANCZOS)
+            os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+            # Write to a temp name first so concurrent workers never read a partial file
+            tmp_path = f"{thumb_path}.{os.getpid()}.tmp"
+            img.save(tmp_path, 'JPEG', quality=quality, optimize=True)
+            os.replace(tmp_path, thumb_path)
+    except (OSError, ValueError):
+        return None
+    return thumb_path
+
+
+def get_thumbnail_url(image_field, size=(240, 300)):
+    """Return the media URL of a cached thumbnail, or None"""
+    thumb_path = get_thumbnail_path(image_field, size)
+    if not thumb_path:
+        return None
+    relative = os.path.relpath(thumb_path, settings.MEDIA_ROOT).replace(os.sep, '/')
+    return f"{settings.MEDIA_URL}{relative}"
@@ -1,6 +1,5 @@
 """Two-Factor Authentication Utilities"""
 import pyotp
-import qrcode
 from io import BytesIO
 import base64
 import secrets
@@ -18,6 +17,8 @@ def generate_totp_uri(user, secret_key):
 
 def generate_qr_code(uri):
     """Generate QR code image from URI"""
+    import qrcode
+
     qr = qrcode.QRCode(version=1, box_size=10, border=5)
     qr.add_data(uri)
     qr.make(fit=True)
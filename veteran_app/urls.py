@@ -1,8 +1,18 @@
 from django.urls import path
-from . import views
+from django.views.decorators.csrf import csrf_exempt
+from . import views, verification_views
+from .lazy import LazyViewModule
 from .rbac_urls import rbac_urlpatterns
 from test_rbac_view import test_rbac
 
+# Feature areas are imported on their first request, not at worker startup
+finance_views = LazyViewModule('veteran_app.finance_views')
+report_views = LazyViewModule('veteran_app.report_views')
+id_card_views = LazyViewModule('veteran_app.id_card_views')
+event_views = LazyViewModule('veteran_app.event_views')
+portal_views = LazyViewModule('veteran_app.portal_views')
+search_views = LazyViewModule('veteran_app.search_views')
+
 urlpatterns = [
     path('', views.index, name='index'),
     path('test-rbac/', test_rbac, name='test_rbac'),
@@ -14,6 +24,8 @@ urlpatterns = [
     # State and Member Management
     path('state/<int:state_id>/dashboard/', views.state_dashboard, name='state_dashboard'),
     path('state/<int:state_id>/members/', views.state_members, name='state_members'),
+    path('members/search/', search_views.member_search, name='member_search'),
+    path('members/autocomplete/', search_views.member_autocomplete, name='member_autocomplete'),
     path('state/<int:state_id>/add-member/', views.add_member, name='add_member'),
     path('member/<int:member_id>/edit/', views.edit_member, name='edit_member'),
     path('member/<int:member_id>/delete/', views.delete_member, name='delete_member'),
@@ -48,13 +60,13 @@ urlpatterns = [
     path('reset-user-password/', views.reset_user_password, name='reset_user_password'),
     
     # Treasurer Financial Management (Superuser only)
-    path('treasurer-dashboard/', views.treasurer_dashboard, name='treasurer_dashboard'),
-    path('add-transaction/', views.add_transaction, name='add_transaction'),
-    path('transaction-list/', views.transaction_list, name='transaction_list'),
-    path('transaction-detail/<int:transaction_id>/', views.transaction_detail, name='transaction_detail'),
-    path('delete-transaction/<int:transaction_id>/', views.delete_transaction, name='delete_transaction'),
-    path('generate-report/', views.generate_report, name='generate_report'),
-    path('export-transactions/', views.export_transactions, name='export_transactions'),
+    path('treasurer-dashboard/', finance_views.treasurer_dashboard, name='treasurer_dashboard'),
+    path('add-transaction/', finance_views.add_transaction, name='add_transaction'),
+    path('transaction-list/', finance_views.transaction_list, name='transaction_list'),
+    path('transaction-detail/<int:transaction_id>/', finance_views.transaction_detail, name='transaction_detail'),
+    path('delete-transaction/<int:transaction_id>/', finance_views.delete_transaction, name='delete_transaction'),
+    path('generate-report/', report_views.generate_report, name='generate_report'),
+    path('export-transactions/', finance_views.export_transactions, name='export_transactions'),
     
     # User Profile and Settings
     path('profile/', views.user_profile, name='user_profile'),
@@ -81,20 +93,27 @@ urlpatterns = [
     path('veteran-profile-detail/', views.veteran_profile_detail, name='veteran_profile_detail'),
     
     # Portal Features
-    path('job-portal/', views.job_portal, name='job_portal'),
-    path('job-portal/add/', views.job_portal_add, name='job_portal_add'),
-    path('job-portal/edit/<int:job_id>/', views.job_portal_edit, name='job_portal_edit'),
-    path('job-portal/delete/<int:job_id>/', views.job_portal_delete, name='job_portal_delete'),
-    path('job-portal/admin/', views.admin_job_portal, name='admin_job_portal'),
-    path('job-portal/details/<int:job_id>/', views.job_application_details, name='job_application_details'),
-    path('matrimonial-portal/', views.matrimonial_portal, name='matrimonial_portal'),
-    path('matrimonial-portal/add/', views.matrimonial_add, name='matrimonial_add'),
-    path('matrimonial-portal/edit/<int:profile_id>/', views.matrimonial_edit, name='matrimonial_edit'),
-    path('matrimonial-portal/delete/<int:profile_id>/', views.matrimonial_delete, name='matrimonial_delete'),
-    path('chat-portal/', views.chat_portal, name='chat_portal'),
-    path('chat-request/<int:veteran_id>/', views.send_chat_request, name='send_chat_request'),
-    path('chat-request/accept/<int:request_id>/', views.accept_chat_request, name='accept_chat_request'),
-    path('chat-request/reject/<int:request_id>/', views.reject_chat_request, name='reject_chat_request'),
+    path('job-portal/', portal_views.job_portal, name='job_portal'),
+    path('job-portal/add/', portal_views.job_portal_add, name='job_portal_add'),
+    path('job-portal/edit/<int:job_id>/', portal_views.job_portal_edit, name='job_portal_edit'),
+    path('job-portal/delete/<int:job_id>/', portal_views.job_portal_delete, name='job_portal_delete'),
+    path('job-portal/admin/', portal_views.admin_job_portal, name='admin_job_portal'),
+    path('job-portal/details/<int:job_id>/', portal_views.job_application_details, name='job_application_details'),
+    path('matrimonial-portal/', portal_views.matrimonial_portal, name='matrimonial_portal'),
+    path('matrimonial-portal/add/', portal_views.matrimonial_add, name='matrimonial_add'),
+    path('matrimonial-portal/edit/<int:profile_id>/', portal_views.matrimonial_edit, name='matrimonial_edit'),
+    path('matrimonial-portal/delete/<int:profile_id>/', portal_views.matrimonial_delete, name='matrimonial_delete'),
+    path('chat-portal/', portal_views.chat_portal, name='chat_portal'),
+    path('chat-portal/requests/<str:box>/', portal_views.chat_requests, name='chat_requests'),
+    path('chat/', portal_views.chat_inbox, name='chat_inbox'),
+    path('chat/<int:veteran_id>/', portal_views.chat_conversation, name='chat_conversation'),
+    path('chat/<int:veteran_id>/history/', portal_views.chat_history, name='chat_history'),
+    path('chat/<int:veteran_id>/read/', portal_views.mark_chat_read, name='mark_chat_read'),
+    path('chat/<int:veteran_id>/send/', portal_views.send_chat_message, name='send_chat_message'),
+    path('chat/<int:veteran_id>/stream/', portal_views.async_view('chat_stream'), name='chat_stream'),
+    path('chat-request/<int:veteran_id>/', portal_views.send_chat_request, name='send_chat_request'),
+    path('chat-request/accept/<int:request_id>/', portal_views.accept_chat_request, name='accept_chat_request'),
+    path('chat-request/reject/<int:request_id>/', portal_views.reject_chat_request, name='reject_chat_request'),
     path('manage-children/', views.manage_children, name='manage_children'),
     path('child/<int:child_id>/edit/', views.edit_child, name='edit_child'),
     path('child/<int:child_id>/delete/', views.delete_child, name='delete_child'),
@@ -102,18 +121,26 @@ urlpatterns = [
 
 
     # Event Management
-    path('events/', views.events_list, name='events_list'),
-    path('events/<int:event_id>/', views.event_detail, name='event_detail'),
-    path('events/<int:event_id>/register/', views.register_for_event, name='register_for_event'),
-    path('manage-events/', views.manage_events, name='manage_events'),
-    path('create-event/', views.create_event, name='create_event'),
-    path('edit-event/<int:event_id>/', views.edit_event, name='edit_event'),
-    path('delete-event/<int:event_id>/', views.delete_event, name='delete_event'),
+    path('events/', event_views.events_list, name='events_list'),
+    path('events/calendar/<str:token>.ics', event_views.event_calendar_feed, name='event_calendar_feed'),
+    path('events/<int:event_id>/', event_views.event_detail, name='event_detail'),
+    path('events/<int:event_id>/register/', event_views.register_for_event, name='register_for_event'),
+    path('events/<int:event_id>/cancel-registration/', event_views.cancel_event_registration, name='cancel_event_registration'),
+    path('events/<int:event_id>/registrations/', event_views.manage_event_registrations, name='manage_event_registrations'),
+    path('events/<int:event_id>/checkin/', event_views.event_checkin_kiosk, name='event_checkin_kiosk'),
+    path('events/<int:event_id>/checkin/manifest/', event_views.event_checkin_manifest, name='event_checkin_manifest'),
+    path('events/<int:event_id>/checkin/upload/', event_views.event_checkin_upload, name='event_checkin_upload'),
+    path('events/<int:event_id>/checkin/sw.js', event_views.event_checkin_service_worker, name='event_checkin_service_worker'),
+    path('manage-events/', event_views.manage_events, name='manage_events'),
+    path('create-event/', event_views.create_event, name='create_event'),
+    path('edit-event/<int:event_id>/', event_views.edit_event, name='edit_event'),
+    path('delete-event/<int:event_id>/', event_views.delete_event, name='delete_event'),
     
     # Payment Integration
-    path('payment/success/', views.payment_success, name='payment_success'),
-    path('payment/failed/', views.payment_failed, name='payment_failed'),
-    path('payment-settings/', views.payment_settings, name='payment_settings'),
+    path('payment/success/', event_views.payment_success, name='payment_success'),
+    path('payment/failed/', event_views.payment_failed, name='payment_failed'),
+    path('payment/webhook/', csrf_exempt(event_views.payment_webhook), name='payment_webhook'),
+    path('payment-settings/', event_views.payment_settings, name='payment_settings'),
     
     # Two-Factor Authentication
     path('setup-2fa/', views.setup_2fa, name='setup_2fa'),
@@ -122,14 +149,14 @@ urlpatterns = [
     path('regenerate-backup-codes/', views.regenerate_backup_codes, name='regenerate_backup_codes'),
     
     # Reporting System
-    path('reports/', views.reports_builder, name='reports_builder'),
-    path('reports/generate/', views.generate_report, name='generate_report'),
-    path('reports/save-config/', views.save_report_config, name='save_report_config'),
-    path('reports/load-config/<int:config_id>/', views.load_report_config, name='load_report_config'),
+    path('reports/', report_views.reports_builder, name='reports_builder'),
+    path('reports/generate/', report_views.generate_report, name='generate_report'),
+    path('reports/save-config/', report_views.save_report_config, name='save_report_config'),
+    path('reports/load-config/<int:config_id>/', report_views.load_report_config, name='load_report_config'),
     
     # State Head Reports (No Financial Data)
-    path('state-reports/', views.state_head_reports_builder, name='state_head_reports_builder'),
-    path('state-reports/generate/', views.generate_state_head_report, name='generate_state_head_report'),
+    path('state-reports/', report_views.state_head_reports_builder, name='state_head_reports_builder'),
+    path('state-reports/generate/', report_views.generate_state_head_report, name='generate_state_head_report'),
     
     # Gallery
     path('gallery/', views.gallery, name='gallery'),
@@ -137,13 +164,20 @@ urlpatterns = [
     path('gallery/delete/<int:image_id>/', views.delete_gallery_image, name='delete_gallery_image'),
     
     # Veteran Payment CRUD
-    path('veteran-payment/add/', views.veteran_add_payment, name='veteran_add_payment'),
-    path('veteran-payment/edit/<int:transaction_id>/', views.veteran_edit_payment, name='veteran_edit_payment'),
-    path('veteran-payment/delete/<int:transaction_id>/', views.veteran_delete_payment, name='veteran_delete_payment'),
+    path('veteran-payment/add/', finance_views.veteran_add_payment, name='veteran_add_payment'),
+    path('veteran-payment/edit/<int:transaction_id>/', finance_views.veteran_edit_payment, name='veteran_edit_payment'),
+    path('veteran-payment/delete/<int:transaction_id>/', finance_views.veteran_delete_payment, name='veteran_delete_payment'),
     
     # Association ID Card
-    path('association-id-card/', views.association_id_card, name='association_id_card'),
-    path('download-id-card/', views.download_id_card, name='download_id_card'),
+    path('association-id-card/', id_card_views.association_id_card, name='association_id_card'),
+    path('download-id-card/', id_card_views.download_id_card, name='download_id_card'),
+    path('state/<int:state_id>/id-cards/', id_card_views.download_state_id_cards, name='download_state_id_cards'),
+    
+    # Public Association Number Verification
+    path('verify/', verification_views.verification_page, name='verification_page'),
+    path('verify/<path:association_number>/', verification_views.verification_page, name='verification_page'),
+    path('api/verify/bulk/', verification_views.bulk_verify_association, name='bulk_verify_association'),
+    path('api/verify/<path:association_number>/', verification_views.verify_association_number, name='verify_association_number'),
 ]
 
 # Add RBAC URLs
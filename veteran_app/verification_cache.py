@@ -0,0 +1,257 @@
+"""Cache for public association number verification
+
+Verified members are cached until their ID card validity could change, and
+unknown numbers are cached briefly so repeated scans of a bad QR code do not
+reach the database. Entries are dropped when a member is saved or deleted,
+under both its old and new number, and all of them when a rank or state is
+renamed (see signals.py).
+
+Those invalidations only reach other workers through a shared cache. With
+the per-process LocMemCache every entry is instead capped at
+VERIFICATION_LOCAL_CACHE_TIMEOUT, which bounds how long another worker can
+still vouch for a member who was unapproved or deleted.
+
+Hit/miss counters are kept in memory and added to VerificationCacheStat rows
+every VERIFICATION_STATS_FLUSH_INTERVAL seconds, so the stats cover every
+worker whatever the cache backend. The same sync reads the 'forgets' counter
+that forget_verifications() bumps, and a worker with a per-process cache
+drops all its entries when it moves, so manage.py verification_cache
+--forget reaches every worker within one interval.
+
+With VERIFICATION_BLOOM_FILTER enabled each worker also keeps a Bloom filter
+of approved numbers, so numbers that were never issued are rejected without
+a query. The filter is rebuilt whenever the shared generation token changes,
+so it is only used with a cache shared by all workers (Redis/Memcached).
+"""
+import hashlib
+import math
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime, time, timedelta
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from .caching import is_shared, local_timeout
+from .models import VerificationCacheStat, VeteranMember
+
+KEY_PREFIX = 'verification'
+BLOOM_GENERATION_KEY = f'{KEY_PREFIX}:bloom:generation'
+PAYLOAD_VERSION_KEY = f'{KEY_PREFIX}:payload:version'
+STAT_NAMES = ('hits', 'negative_hits', 'misses', 'bloom_rejects')
+FORGETS = 'forgets'
+
+# Stored for numbers that are unknown or not approved
+NOT_FOUND = 'not-found'
+
+
+def _payload_version():
+    version = cache.get(PAYLOAD_VERSION_KEY)
+    if version is None:
+        cache.add(PAYLOAD_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(PAYLOAD_VERSION_KEY)
+    return version
+
+
+def _cache_key(association_number):
+    digest = hashlib.sha1(association_number.encode('utf-8')).hexdigest()
+    return f'{KEY_PREFIX}:member:{_payload_version()}:{digest}'
+
+
+def _timeout(timeout):
+    return local_timeout(timeout, getattr(settings, 'VERIFICATION_LOCAL_CACHE_TIMEOUT', 60))
+
+
+def _bloom_enabled():
+    return getattr(settings, 'VERIFICATION_BLOOM_FILTER', False) and is_shared()
+
+
+_stats_lock = threading.Lock()
+_stats_state = {'pending': Counter(), 'synced_at': None, 'forgets': None}
+
+
+def _add_counts(counts):
+    for name, count in counts.items():
+        if not VerificationCacheStat.objects.filter(name=name).update(count=F('count') + count):
+            VerificationCacheStat.objects.get_or_create(name=name)
+            VerificationCacheStat.objects.filter(name=name).update(count=F('count') + count)
+
+
+def _sync(force=False):
+    """Flush this worker's counters and pick up forgets, at most once per interval"""
+    interval = getattr(settings, 'VERIFICATION_STATS_FLUSH_INTERVAL', 30)
+    with _stats_lock:
+        synced_at = _stats_state['synced_at']
+        if not force and synced_at is not None and monotonic() - synced_at < interval:
+            return
+        pending, _stats_state['pending'] = _stats_state['pending'], Counter()
+        _stats_state['synced_at'] = monotonic()
+
+    _add_counts(pending)
+    forgets = VerificationCacheStat.objects.filter(name=FORGETS).values_list('count', flat=True).first() or 0
+    with _stats_lock:
+        seen, _stats_state['forgets'] = _stats_state['forgets'], forgets
+    # A shared cache already had the keys deleted by forget_verifications()
+    if seen is not None and seen != forgets and not is_shared():
+        invalidate_all_verifications()
+
+
+def _record(stat):
+    with _stats_lock:
+        _stats_state['pending'][stat] += 1
+    _sync()
+
+
+def get_stats():
+    """Return hit/miss counters over all workers and the resulting hit rate
+
+    Other workers' latest counts show up after their next flush.
+    """
+    _sync(force=True)
+    stored = dict(VerificationCacheStat.objects.filter(name__in=STAT_NAMES).values_list('name', 'count'))
+    stats = {stat: stored.get(stat, 0) for stat in STAT_NAMES}
+    lookups = sum(stats.values())
+    stats['lookups'] = lookups
+    stats['hit_rate'] = (lookups - stats['misses']) / lookups if lookups else 0.0
+    return stats
+
+
+def reset_stats():
+    VerificationCacheStat.objects.filter(name__in=STAT_NAMES).update(count=0)
+
+
+def build_payload(veteran):
+    """Plain, picklable summary of a member for verification responses"""
+    renewal_due = veteran.get_renewal_due_date()
+    return {
+        'association_number': veteran.association_number,
+        'name': veteran.name,
+        'rank': veteran.rank.name,
+        'state': veteran.state.name,
+        'association_date': veteran.association_date,
+        'renewal_due': renewal_due,
+        'id_card_valid': veteran.is_id_card_valid(),
+        'membership': veteran.membership,
+    }
+
+
+def _positive_timeout(payload):
+    """Cache timeout that never outlives the day the card expires"""
+    timeout = getattr(settings, 'VERIFICATION_CACHE_TIMEOUT', 3600)
+    renewal_due = payload['renewal_due']
+    if payload['id_card_valid'] and renewal_due:
+        expires_at = datetime.combine(renewal_due + timedelta(days=1), time.min)
+        timeout = min(timeout, int((expires_at - datetime.now()).total_seconds()))
+    return max(_timeout(timeout), 1)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, value):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(value))
+
+
+_bloom_lock = threading.Lock()
+_bloom_state = {'generation': None, 'filter': None}
+
+
+def _get_bloom_filter():
+    """Return this worker's Bloom filter, rebuilding it if the generation moved"""
+    generation = cache.get(BLOOM_GENERATION_KEY)
+    if generation is None:
+        cache.add(BLOOM_GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(BLOOM_GENERATION_KEY)
+
+    with _bloom_lock:
+        if _bloom_state['filter'] is None or _bloom_state['generation'] != generation:
+            numbers = list(
+                VeteranMember.objects.filter(approved=True, association_number__isnull=False)
+                .values_list('association_number', flat=True)
+            )
+            bloom = BloomFilter(len(numbers) * 2 + 1000)
+            for number in numbers:
+                bloom.add(number)
+            _bloom_state.update(generation=generation, filter=bloom)
+        return _bloom_state['filter']
+
+
+def bump_bloom_generation():
+    """Make every worker rebuild its Bloom filter on its next lookup
+
+    Generations are random tokens rather than a counter, so an evicted key
+    can never come back with a value some worker has already built for.
+    """
+    cache.set(BLOOM_GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def get_verification(association_number):
+    """Return the cached verification payload for a number, or None if not found"""
+    key = _cache_key(association_number)
+    cached = cache.get(key)
+    if cached == NOT_FOUND:
+        _record('negative_hits')
+        return None
+    if cached is not None:
+        _record('hits')
+        return cached
+
+    if _bloom_enabled() and association_number not in _get_bloom_filter():
+        _record('bloom_rejects')
+        return None
+
+    _record('misses')
+    veteran = VeteranMember.objects.filter(
+        association_number=association_number,
+        approved=True
+    ).select_related('rank', 'state').first()
+
+    if veteran is None:
+        cache.set(key, NOT_FOUND, _timeout(getattr(settings, 'VERIFICATION_NEGATIVE_CACHE_TIMEOUT', 300)))
+        return None
+
+    payload = build_payload(veteran)
+    cache.set(key, payload, _positive_timeout(payload))
+    return payload
+
+
+def invalidate_verification(*association_numbers):
+    """Forget any cached result for these numbers after their member changed"""
+    keys = [_cache_key(number) for number in set(association_numbers) if number]
+    if keys:
+        cache.delete_many(keys)
+    if _bloom_enabled():
+        bump_bloom_generation()
+
+
+def forget_verifications(*association_numbers):
+    """Drop cached results for these numbers in every worker
+
+    With a per-process cache other workers cannot delete single keys, so
+    they drop all their entries at their next sync instead.
+    """
+    invalidate_verification(*association_numbers)
+    _add_counts({FORGETS: 1})
+
+
+def invalidate_all_verifications():
+    """Forget every cached payload, e.g. after a rank or state is renamed"""
+    cache.set(PAYLOAD_VERSION_KEY, uuid.uuid4().hex, timeout=None)
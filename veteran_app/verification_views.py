@@ -1,116 +1,130 @@
 # Association Number Verification Views
 
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
 from .models import VeteranMember, AssociationVerification
+from .audit_buffer import verification_audit
+from .decorators import rate_limit, verification_partner_required
+from .verification_cache import get_verification
 import json
 
 def verify_association_number(request, association_number):
     """Public verification endpoint for association numbers"""
-    try:
-        veteran = VeteranMember.objects.get(
-            association_number=association_number,
-            approved=True
-        )
-        
-        # Check if ID card is still valid
-        is_valid = veteran.is_id_card_valid()
-        
-        verification_data = {
-            'valid': True,
-            'association_number': veteran.association_number,
-            'name': veteran.name,
-            'rank': veteran.rank.name,
-            'state': veteran.state.name,
-            'id_card_valid': is_valid,
-            'renewal_due': veteran.get_renewal_due_date().strftime('%Y-%m-%d') if veteran.get_renewal_due_date() else None,
-            'association_date': veteran.association_date.strftime('%Y-%m-%d') if veteran.association_date else None
-        }
-        
-        # Log verification attempt
-        AssociationVerification.objects.create(
-            association_number=association_number,
-            verification_method='online',
-            notes=f'Online verification from IP: {request.META.get("REMOTE_ADDR", "Unknown")}'
-        )
-        
-        return JsonResponse(verification_data)
-        
-    except VeteranMember.DoesNotExist:
+    verification = get_verification(association_number)
+    if verification is None:
         return JsonResponse({
             'valid': False,
             'error': 'Association number not found or member not approved'
         }, status=404)
+    
+    verification_data = {
+        'valid': True,
+        'association_number': verification['association_number'],
+        'name': verification['name'],
+        'rank': verification['rank'],
+        'state': verification['state'],
+        'id_card_valid': verification['id_card_valid'],
+        'renewal_due': verification['renewal_due'].strftime('%Y-%m-%d') if verification['renewal_due'] else None,
+        'association_date': verification['association_date'].strftime('%Y-%m-%d') if verification['association_date'] else None
+    }
+    
+    # Log verification attempt (buffered and written in batches)
+    verification_audit.add(
+        association_number=association_number,
+        verification_method='online',
+        notes=f'Online verification from IP: {request.META.get("REMOTE_ADDR", "Unknown")}',
+        verification_date=timezone.now()
+    )
+    
+    return JsonResponse(verification_data)
 
 def verification_page(request, association_number=None):
     """Public verification page"""
-    veteran = None
-    if association_number:
-        try:
-            veteran = VeteranMember.objects.get(
-                association_number=association_number,
-                approved=True
-            )
-        except VeteranMember.DoesNotExist:
-            pass
+    association_number = association_number or request.GET.get('number', '').strip() or None
+    verification = get_verification(association_number) if association_number else None
     
     return render(request, 'veteran_app/verify_association.html', {
-        'veteran': veteran,
+        'verification': verification,
         'association_number': association_number
     })
 
 @csrf_exempt
+@verification_partner_required
+@rate_limit(*getattr(settings, 'BULK_VERIFY_RATE_LIMIT', (30, 3600)),
+            client=lambda request: f'partner{request.verification_partner.pk}')
 def bulk_verify_association(request):
-    """Bulk verification endpoint for organizations"""
+    """Bulk verification endpoint for partner organisations
+
+    Callers authenticate with their VerificationPartner key and are rate
+    limited per partner, as names are returned for every number that
+    resolves. All numbers are resolved with one query and logged with one
+    bulk insert, so a partner can verify a whole roster per request. Results
+    are streamed back in request order, one entry per distinct number.
+    """
     if request.method != 'POST':
         return JsonResponse({'error': 'POST method required'}, status=405)
     
+    max_numbers = getattr(settings, 'BULK_VERIFY_MAX_NUMBERS', 1000)
     try:
         data = json.loads(request.body)
         association_numbers = data.get('association_numbers', [])
-        verifier_org = data.get('organization', 'Unknown')
-        
-        if not association_numbers or len(association_numbers) > 50:
-            return JsonResponse({'error': 'Invalid request - max 50 numbers allowed'}, status=400)
-        
-        results = []
-        for assoc_num in association_numbers:
-            try:
-                veteran = VeteranMember.objects.get(
-                    association_number=assoc_num,
-                    approved=True
-                )
-                
-                results.append({
-                    'association_number': assoc_num,
+    except (json.JSONDecodeError, AttributeError):
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    
+    if not isinstance(association_numbers, list) or not all(isinstance(n, str) for n in association_numbers):
+        return JsonResponse({'error': 'association_numbers must be a list of strings'}, status=400)
+    
+    verifier_org = request.verification_partner.name
+    
+    # Trim and de-duplicate while keeping the caller's order
+    numbers = list(dict.fromkeys(n.strip() for n in association_numbers if n.strip()))
+    if not numbers or len(numbers) > max_numbers:
+        return JsonResponse({'error': f'Invalid request - max {max_numbers} numbers allowed'}, status=400)
+    
+    veterans = {
+        veteran.association_number: veteran
+        for veteran in VeteranMember.objects.filter(
+            association_number__in=numbers,
+            approved=True
+        ).select_related('rank', 'state')
+    }
+    
+    # Log verifications for the numbers that resolved
+    AssociationVerification.objects.bulk_create([
+        AssociationVerification(
+            association_number=number,
+            verified_by=verifier_org,
+            verification_method='manual',
+            notes=f'Bulk verification by {verifier_org}'
+        )
+        for number in numbers if number in veterans
+    ], batch_size=500)
+    
+    def stream_results():
+        yield '{"results": ['
+        for index, number in enumerate(numbers):
+            veteran = veterans.get(number)
+            if veteran:
+                result = {
+                    'association_number': number,
                     'valid': True,
                     'name': veteran.name,
                     'rank': veteran.rank.name,
                     'state': veteran.state.name,
                     'id_card_valid': veteran.is_id_card_valid()
-                })
-                
-                # Log verification
-                AssociationVerification.objects.create(
-                    association_number=assoc_num,
-                    verified_by=verifier_org,
-                    verification_method='manual',
-                    notes=f'Bulk verification by {verifier_org}'
-                )
-                
-            except VeteranMember.DoesNotExist:
-                results.append({
-                    'association_number': assoc_num,
+                }
+            else:
+                result = {
+                    'association_number': number,
                     'valid': False,
                     'error': 'Not found'
-                })
-        
-        return JsonResponse({'results': results})
-        
-    except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400)
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
+                }
+            yield (',' if index else '') + json.dumps(result)
+        yield ']}'
+    
+    return StreamingHttpResponse(stream_results(), content_type='application/json')
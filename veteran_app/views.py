@@ -368,7 +368,13 @@ def state_members(request, state_id):
     # 3. State admins can only access their assigned state
     # 4. Users must be approved to access the system
     
-    members_list = VeteranMember.objects.filter(state=state).order_by('-created_at')
+    query = request.GET.get('q', '').strip()
+    members_list = VeteranMember.objects.filter(state=state).select_related('rank', 'branch')
+    if query:
+        from .member_search import search
+        members_list = search(members_list, query)
+    else:
+        members_list = members_list.order_by('-created_at')
     paginator = Paginator(members_list, 20)  # 20 members per page
     page_number = request.GET.get('page')
     members = paginator.get_page(page_number)
@@ -376,6 +382,7 @@ def state_members(request, state_id):
     return render(request, 'veteran_app/state_detail.html', {
         'state': state,
         'members': members,
+        'query': query,
         'page_obj': members
     })
 
@@ -1077,6 +1084,7 @@ def media_documents(request):
     else:
         # Regular users see only all-state docs
         documents = Document.objects.filter(is_public=True, state__isnull=True)
+    documents = documents.select_related('state', 'uploaded_by')
     
     # Get active notifications
     if request.user.is_superuser:
@@ -1615,363 +1623,6 @@ def veteran_profile_detail(request):
         'veteran_user': veteran_user
     })
 
-# Portal Views
-@login_required
-def job_portal(request):
-    """Job portal listing"""
-    from django.core.paginator import Paginator
-    
-    # Check if veteran is approved
-    if not request.user.is_superuser:
-        try:
-            veteran_user = request.user.veteran_profile
-            if not veteran_user.approved:
-                return redirect('veteran_welcome')
-        except VeteranUser.DoesNotExist:
-            pass
-    
-    job_seekers_list = JobPortal.objects.filter(is_active=True).order_by('-created_at')
-    paginator = Paginator(job_seekers_list, 15)  # 15 per page
-    page_number = request.GET.get('page')
-    job_seekers = paginator.get_page(page_number)
-    
-    return render(request, 'veteran_app/job_portal.html', {
-        'job_seekers': job_seekers,
-        'page_obj': job_seekers
-    })
-
-@login_required
-def job_portal_add(request):
-    """Add job seeker profile"""
-    if request.user.is_superuser:
-        messages.info(request, 'Superadmin: Select a veteran to add job profile for.')
-        return redirect('job_portal')
-    
-    try:
-        veteran_user = request.user.veteran_profile
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        messages.error(request, 'Only veterans can add job profiles.')
-        return redirect('job_portal')
-    
-    if request.method == 'POST':
-        form = JobPortalForm(request.POST, request.FILES)
-        if form.is_valid():
-            job_profile = form.save(commit=False)
-            job_profile.veteran = veteran
-            job_profile.save()
-            messages.success(request, 'Job profile added successfully!')
-            return redirect('job_portal')
-    else:
-        form = JobPortalForm()
-        # Pre-populate veteran's children for selection
-        form.fields['child'].queryset = veteran.children.all()
-    
-    return render(request, 'veteran_app/job_portal_form.html', {'form': form})
-
-@login_required
-def job_portal_edit(request, job_id):
-    """Edit job seeker profile"""
-    try:
-        veteran_user = request.user.veteran_profile
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        messages.error(request, 'Only veterans can edit job profiles.')
-        return redirect('job_portal')
-    
-    job_profile = get_object_or_404(JobPortal, id=job_id, veteran=veteran)
-    
-    if request.method == 'POST':
-        form = JobPortalForm(request.POST, request.FILES, instance=job_profile)
-        if form.is_valid():
-            form.save()
-            messages.success(request, 'Job profile updated successfully!')
-            return redirect('job_portal')
-    else:
-        form = JobPortalForm(instance=job_profile)
-        form.fields['child'].queryset = veteran.children.all()
-    
-    return render(request, 'veteran_app/job_portal_form.html', {
-        'form': form,
-        'editing_job': job_profile
-    })
-
-@login_required
-def job_portal_delete(request, job_id):
-    """Delete job seeker profile"""
-    try:
-        veteran_user = request.user.veteran_profile
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        messages.error(request, 'Only veterans can delete job profiles.')
-        return redirect('job_portal')
-    
-    job_profile = get_object_or_404(JobPortal, id=job_id, veteran=veteran)
-    job_name = job_profile.name
-    job_profile.delete()
-    messages.success(request, f'Job profile for {job_name} deleted successfully!')
-    return redirect('job_portal')
-
-@login_required
-@user_passes_test(is_superuser)
-def admin_job_portal(request):
-    """Admin view for managing job applications with resume access"""
-    from django.core.paginator import Paginator
-    
-    job_applications_list = JobPortal.objects.select_related(
-        'veteran', 'veteran__state', 'veteran__rank', 'child'
-    ).order_by('-created_at')
-    states = State.objects.all().order_by('name')
-    
-    paginator = Paginator(job_applications_list, 20)  # 20 per page
-    page_number = request.GET.get('page')
-    job_applications = paginator.get_page(page_number)
-    
-    return render(request, 'veteran_app/admin_job_portal.html', {
-        'job_applications': job_applications,
-        'states': states,
-        'page_obj': job_applications
-    })
-
-@login_required
-@user_passes_test(is_superuser)
-def job_application_details(request, job_id):
-    """Get job application details for modal view"""
-    job = get_object_or_404(JobPortal, id=job_id)
-    
-    html = f"""
-    <div class="row">
-        <div class="col-md-6">
-            <p><strong>Name:</strong> {job.name}</p>
-            <p><strong>Type:</strong> {job.get_applicant_type_display()}</p>
-            <p><strong>Veteran:</strong> {job.veteran.name}</p>
-            <p><strong>Rank:</strong> {job.veteran.rank.name}</p>
-            <p><strong>State:</strong> {job.veteran.state.name}</p>
-        </div>
-        <div class="col-md-6">
-            <p><strong>Contact:</strong> {job.contact}</p>
-            <p><strong>Email:</strong> {job.email or 'N/A'}</p>
-            <p><strong>Qualification:</strong> {job.qualification}</p>
-            <p><strong>Specialization:</strong> {job.specialization or 'N/A'}</p>
-            <p><strong>Preferred Location:</strong> {job.preferred_location or 'N/A'}</p>
-        </div>
-    </div>
-    {f'<div class="mt-3"><strong>Experience:</strong><br>{job.experience}</div>' if job.experience else ''}
-    {f'<div class="mt-3"><strong>Skills:</strong><br>{job.skills}</div>' if job.skills else ''}
-    {f'<div class="mt-3"><a href="{job.resume.url}" class="btn btn-success" download><i class="fas fa-download"></i> Download Resume</a></div>' if job.resume else '<div class="mt-3 text-muted">No resume uploaded</div>'}
-    """
-    
-    return JsonResponse({'html': html})
-
-@login_required
-def matrimonial_portal(request):
-    """Matrimonial portal listing"""
-    from django.core.paginator import Paginator
-    
-    # Check if veteran is approved
-    if not request.user.is_superuser:
-        try:
-            veteran_user = request.user.veteran_profile
-            if not veteran_user.approved:
-                return redirect('veteran_welcome')
-        except VeteranUser.DoesNotExist:
-            pass
-    
-    profiles_list = Matrimonial.objects.filter(is_active=True).order_by('-created_at')
-    paginator = Paginator(profiles_list, 12)  # 12 per page
-    page_number = request.GET.get('page')
-    profiles = paginator.get_page(page_number)
-    
-    return render(request, 'veteran_app/matrimonial_portal.html', {
-        'profiles': profiles,
-        'page_obj': profiles
-    })
-
-@login_required
-def matrimonial_add(request):
-    """Add matrimonial profile"""
-    if request.user.is_superuser:
-        messages.info(request, 'Superadmin: Select a veteran to add matrimonial profile for.')
-        return redirect('matrimonial_portal')
-    
-    try:
-        veteran_user = request.user.veteran_profile
-        if not veteran_user.approved:
-            messages.error(request, 'Your account is pending approval. You cannot add matrimonial profiles.')
-            return redirect('index')
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        messages.error(request, 'Only veterans can add matrimonial profiles.')
-        return redirect('matrimonial_portal')
-    
-    if request.method == 'POST':
-        form = MatrimonialForm(request.POST, request.FILES)
-        if form.is_valid():
-            profile = form.save(commit=False)
-            profile.veteran = veteran
-            profile.save()
-            messages.success(request, 'Matrimonial profile added successfully!')
-            return redirect('matrimonial_portal')
-    else:
-        form = MatrimonialForm()
-        # Pre-populate veteran's children for selection
-        form.fields['child'].queryset = veteran.children.all()
-    
-    return render(request, 'veteran_app/matrimonial_form.html', {'form': form})
-
-@login_required
-def matrimonial_edit(request, profile_id):
-    """Edit matrimonial profile"""
-    try:
-        veteran_user = request.user.veteran_profile
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        messages.error(request, 'Only veterans can edit matrimonial profiles.')
-        return redirect('matrimonial_portal')
-    
-    profile = get_object_or_404(Matrimonial, id=profile_id, veteran=veteran)
-    
-    if request.method == 'POST':
-        form = MatrimonialForm(request.POST, request.FILES, instance=profile)
-        if form.is_valid():
-            form.save()
-            messages.success(request, 'Matrimonial profile updated successfully!')
-            return redirect('matrimonial_portal')
-    else:
-        form = MatrimonialForm(instance=profile)
-        form.fields['child'].queryset = veteran.children.all()
-    
-    return render(request, 'veteran_app/matrimonial_form.html', {
-        'form': form,
-        'editing_profile': profile
-    })
-
-@login_required
-def matrimonial_delete(request, profile_id):
-    """Delete matrimonial profile"""
-    try:
-        veteran_user = request.user.veteran_profile
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        messages.error(request, 'Only veterans can delete matrimonial profiles.')
-        return redirect('matrimonial_portal')
-    
-    profile = get_object_or_404(Matrimonial, id=profile_id, veteran=veteran)
-    child_name = profile.child.child_name
-    profile.delete()
-    messages.success(request, f'Matrimonial profile for {child_name} deleted successfully!')
-    return redirect('matrimonial_portal')
-
-@login_required
-def chat_portal(request):
-    """Chat portal - list veterans from other states"""
-    from django.core.paginator import Paginator
-    
-    if request.user.is_superuser:
-        # Superadmin can view all veterans and chat requests
-        other_veterans_list = VeteranMember.objects.filter(approved=True).select_related('state', 'rank')
-        sent_requests = ChatRequest.objects.all().select_related('requester', 'recipient')
-        received_requests = ChatRequest.objects.all().select_related('requester', 'recipient')
-    else:
-        try:
-            veteran_user = request.user.veteran_profile
-            if not veteran_user.approved:
-                messages.error(request, 'Your account is pending approval. You cannot access chat portal.')
-                return redirect('veteran_welcome')
-            veteran = veteran_user.veteran_member
-        except VeteranUser.DoesNotExist:
-            messages.error(request, 'Only veterans can access chat portal.')
-            return redirect('index')
-        
-        # Get veterans from other states (exclude own state and self)
-        other_veterans_list = VeteranMember.objects.exclude(
-            state=veteran.state
-        ).exclude(
-            association_id=veteran.association_id
-        ).filter(
-            approved=True
-        ).select_related('state', 'rank').order_by('state__name', 'name')
-        
-        # Get existing chat requests
-        sent_requests = ChatRequest.objects.filter(requester=veteran).select_related('recipient', 'recipient__state')
-        received_requests = ChatRequest.objects.filter(recipient=veteran).select_related('requester', 'requester__state')
-    
-    paginator = Paginator(other_veterans_list, 20)  # 20 per page
-    page_number = request.GET.get('page')
-    other_veterans = paginator.get_page(page_number)
-    
-    return render(request, 'veteran_app/chat_portal.html', {
-        'other_veterans': other_veterans,
-        'sent_requests': sent_requests,
-        'received_requests': received_requests,
-        'page_obj': other_veterans
-    })
-
-@login_required
-def send_chat_request(request, veteran_id):
-    """Send chat request to another veteran"""
-    try:
-        veteran_user = request.user.veteran_profile
-        requester = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        messages.error(request, 'Only veterans can send chat requests.')
-        return redirect('index')
-    
-    recipient = get_object_or_404(VeteranMember, association_id=veteran_id)
-    
-    # Check if request already exists
-    existing_request = ChatRequest.objects.filter(requester=requester, recipient=recipient).first()
-    if existing_request:
-        messages.warning(request, 'Chat request already sent to this veteran.')
-        return redirect('chat_portal')
-    
-    if request.method == 'POST':
-        message = request.POST.get('message', '')
-        ChatRequest.objects.create(
-            requester=requester,
-            recipient=recipient,
-            message=message
-        )
-        messages.success(request, f'Chat request sent to {recipient.name}!')
-        return redirect('chat_portal')
-    
-    return render(request, 'veteran_app/send_chat_request.html', {'recipient': recipient})
-
-@login_required
-def accept_chat_request(request, request_id):
-    """Accept a chat request"""
-    try:
-        veteran_user = request.user.veteran_profile
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        messages.error(request, 'Only veterans can manage chat requests.')
-        return redirect('index')
-    
-    chat_request = get_object_or_404(ChatRequest, id=request_id, recipient=veteran)
-    chat_request.status = 'accepted'
-    chat_request.responded_at = timezone.now()
-    chat_request.save()
-    
-    messages.success(request, f'Chat request from {chat_request.requester.name} accepted!')
-    return redirect('chat_portal')
-
-@login_required
-def reject_chat_request(request, request_id):
-    """Reject a chat request"""
-    try:
-        veteran_user = request.user.veteran_profile
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        messages.error(request, 'Only veterans can manage chat requests.')
-        return redirect('index')
-    
-    chat_request = get_object_or_404(ChatRequest, id=request_id, recipient=veteran)
-    chat_request.status = 'rejected'
-    chat_request.responded_at = timezone.now()
-    chat_request.save()
-    
-    messages.warning(request, f'Chat request from {chat_request.requester.name} rejected.')
-    return redirect('chat_portal')
 
 @login_required
 def manage_children(request):
@@ -2198,429 +1849,60 @@ def reset_user_password(request):
     
     return redirect('password_reset_admin')
 
-# Treasurer Financial Management Views
-@login_required
-def treasurer_dashboard(request):
-    """Treasurer dashboard with financial overview"""
-    # Allow superuser and accounts user
-    if not (request.user.is_superuser or request.user.username == 'accounts'):
-        messages.error(request, 'Access denied. Only superuser and accounts user can access treasurer dashboard.')
-        return redirect('index')
-    
-    from django.db.models import Sum, Count, Q
-    from datetime import datetime, timedelta
-    
-    # Get current financial year or create default
-    current_year = datetime.now().year
-    financial_year, created = FinancialYear.objects.get_or_create(
-        year=f"{current_year}-{current_year+1}",
-        defaults={
-            'start_date': datetime(current_year, 4, 1).date(),
-            'end_date': datetime(current_year+1, 3, 31).date(),
-            'is_active': True
-        }
-    )
-    
-    # Other transactions (donations, expenses, other income)
-    transactions = Transaction.objects.filter(financial_year=financial_year)
-    
-    # Calculate actual subscription income from transactions
-    subscription_income = transactions.filter(
-        transaction_type='subscription'
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    # Count paid subscriptions in current financial year
-    paid_subscriptions = transactions.filter(
-        transaction_type='subscription'
-    ).count()
-    other_income = transactions.filter(transaction_type__in=['donation', 'other_income']).aggregate(Sum('amount'))['amount__sum'] or 0
-    total_expenses = transactions.filter(transaction_type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    total_income = subscription_income + other_income
-    
-    financial_summary = {
-        'total_income': total_income,
-        'subscription_income': subscription_income,
-        'other_income': other_income,
-        'total_expenses': total_expenses,
-        'net_balance': total_income - total_expenses,
-        'active_members': VeteranMember.objects.filter(membership=True).count(),
-        'paid_subscriptions': paid_subscriptions
-    }
-    
-    # Subscription statistics
-    from datetime import date
-    today = date.today()
-    all_members = VeteranMember.objects.all()
-    subscription_stats = {
-        'active': 0, 'due_soon': 0, 'overdue': 0, 'no_payment': 0
-    }
-    
-    for member in all_members:
-        status = member.get_subscription_status()
-        if status['status'] == 'Active':
-            subscription_stats['active'] += 1
-        elif status['status'] == 'Due Soon':
-            subscription_stats['due_soon'] += 1
-        elif status['status'] == 'Overdue':
-            subscription_stats['overdue'] += 1
-        else:
-            subscription_stats['no_payment'] += 1
-    
-    # Recent transactions (expenses and other income only)
-    recent_transactions = transactions.order_by('-created_at')[:10]
-    
-    # Recent subscription payments from veterans
-    recent_subscriptions = VeteranMember.objects.filter(
-        subscription_paid_on__isnull=False
-    ).order_by('-subscription_paid_on')[:5]
-    
-    # Bank accounts
-    bank_accounts = BankAccount.objects.filter(is_active=True)
-    
-    # Veterans for dropdown
-    veterans = VeteranMember.objects.filter(approved=True).order_by('name')
-    
-    return render(request, 'veteran_app/treasurer_dashboard.html', {
-        'financial_summary': financial_summary,
-        'subscription_stats': subscription_stats,
-        'recent_transactions': recent_transactions,
-        'recent_subscriptions': recent_subscriptions,
-        'bank_accounts': bank_accounts,
-        'veterans': veterans,
-        'financial_year': financial_year
-    })
 
+# User Profile and Settings Views
 @login_required
-def add_transaction(request):
-    """Add new financial transaction"""
-    # Allow superuser and accounts user
-    if not (request.user.is_superuser or request.user.username == 'accounts'):
-        messages.error(request, 'Access denied.')
-        return redirect('index')
-    
+@rate_limit(max_requests=10, window=300)
+def user_profile(request):
+    """User profile page"""
     if request.method == 'POST':
-        import uuid
-        from datetime import datetime
-        from decimal import Decimal, InvalidOperation
-        
-        # Validate and sanitize inputs
-        try:
-            veteran_id = int(request.POST.get('veteran')) if request.POST.get('veteran') else None
-        except (ValueError, TypeError):
-            veteran_id = None
-        
-        transaction_type = request.POST.get('transaction_type', '').strip()
-        payment_method = request.POST.get('payment_method', '').strip()
-        reference_number = escape(request.POST.get('reference_number', '').strip())
-        description = escape(request.POST.get('description', '').strip())
-        
-        # Validate transaction type and payment method
-        valid_types = ['subscription', 'donation', 'expense', 'refund', 'other_income', 'event_fee', 'crowdfunding']
-        valid_methods = ['cash', 'bank_transfer', 'upi', 'cheque', 'online']
-        
-        if transaction_type not in valid_types:
-            messages.error(request, 'Invalid transaction type.')
-            return redirect('treasurer_dashboard')
-        
-        if payment_method not in valid_methods:
-            messages.error(request, 'Invalid payment method.')
-            return redirect('treasurer_dashboard')
+        from django.core.validators import validate_email
+        from django.core.exceptions import ValidationError
         
-        # Validate amount
-        try:
-            amount = Decimal(request.POST.get('amount', '0'))
-            if amount <= 0 or amount > Decimal('999999.99'):
-                messages.error(request, 'Invalid amount.')
-                return redirect('treasurer_dashboard')
-        except (InvalidOperation, ValueError):
-            messages.error(request, 'Invalid amount format.')
-            return redirect('treasurer_dashboard')
+        user = request.user
+        email = escape(request.POST.get('email', '').strip())
+        first_name = escape(request.POST.get('first_name', '').strip())
+        last_name = escape(request.POST.get('last_name', '').strip())
         
-        # Generate unique transaction ID
-        transaction_id = f"TXN{datetime.now().strftime('%Y%m%d')}{str(uuid.uuid4())[:8].upper()}"
+        # Handle profile photo upload
+        if 'profile_photo' in request.FILES:
+            profile_photo = request.FILES['profile_photo']
+            # Check if user has veteran profile or state profile
+            if hasattr(user, 'veteran_profile'):
+                veteran = user.veteran_profile.veteran_member
+                veteran.profile_photo = profile_photo
+                veteran.save()
+            elif hasattr(user, 'state_profile'):
+                state_profile = user.state_profile
+                state_profile.profile_photo = profile_photo
+                state_profile.save()
         
-        try:
-            # Get current financial year
-            current_year = datetime.now().year
-            financial_year = FinancialYear.objects.get(
-                year=f"{current_year}-{current_year+1}"
-            )
-            
-            # Create transaction
-            transaction = Transaction.objects.create(
-                transaction_id=transaction_id,
-                veteran_id=veteran_id,
-                transaction_type=transaction_type,
-                amount=amount,
-                payment_method=payment_method,
-                reference_number=reference_number[:100],  # Limit length
-                description=description[:500],  # Limit length
-                receipt=request.FILES.get('receipt'),
-                financial_year=financial_year,
-                recorded_by=request.user
-            )
-        except FinancialYear.DoesNotExist:
-            messages.error(request, 'Financial year not found.')
-            return redirect('treasurer_dashboard')
-        except Exception:
-            messages.error(request, 'Error creating transaction.')
-            return redirect('treasurer_dashboard')
+        # Validate email
+        if email:
+            try:
+                validate_email(email)
+                user.email = email
+            except ValidationError:
+                messages.error(request, 'Invalid email address.')
+                return redirect('user_profile')
         
-        # Update veteran subscription if applicable
-        if transaction.transaction_type == 'subscription' and transaction.veteran:
-            veteran = transaction.veteran
-            veteran.subscription_paid_on = date.today()
-            veteran.membership = True
-            veteran.save()
+        # Validate names (max 150 chars, no special chars)
+        if len(first_name) > 150 or len(last_name) > 150:
+            messages.error(request, 'Names must be less than 150 characters.')
+            return redirect('user_profile')
         
-        messages.success(request, f'Transaction {transaction_id} added successfully!')
-    
-    return redirect('treasurer_dashboard')
-
-@login_required
-def transaction_list(request):
-    """List all transactions with filtering"""
-    # Allow superuser and accounts user
-    if not (request.user.is_superuser or request.user.username == 'accounts'):
-        messages.error(request, 'Access denied.')
-        return redirect('index')
-    
-    from django.core.paginator import Paginator
-    from django.db.models import Sum, Q
-    
-    transactions = Transaction.objects.all().order_by('-created_at')
-    
-    # Apply filters
-    if request.GET.get('type'):
-        transactions = transactions.filter(transaction_type=request.GET.get('type'))
-    
-    if request.GET.get('method'):
-        transactions = transactions.filter(payment_method=request.GET.get('method'))
-    
-    if request.GET.get('from_date'):
-        transactions = transactions.filter(created_at__date__gte=request.GET.get('from_date'))
-    
-    if request.GET.get('to_date'):
-        transactions = transactions.filter(created_at__date__lte=request.GET.get('to_date'))
-    
-    # Calculate summary
-    income = transactions.exclude(transaction_type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-    expenses = transactions.filter(transaction_type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    summary = {
-        'total_income': income,
-        'total_expenses': expenses,
-        'net_amount': income - expenses
-    }
-    
-    # Pagination
-    paginator = Paginator(transactions, 25)
-    page_number = request.GET.get('page')
-    transactions = paginator.get_page(page_number)
+        user.first_name = first_name
+        user.last_name = last_name
+        user.save()
+        messages.success(request, 'Profile updated successfully!')
+        return redirect('user_profile')
     
-    return render(request, 'veteran_app/transaction_list.html', {
-        'transactions': transactions,
-        'summary': summary
-    })
+    return render(request, 'veteran_app/user_profile.html')
 
 @login_required
-def transaction_detail(request, transaction_id):
-    """Get transaction details for modal view"""
-    # Allow superuser and accounts user
-    if not (request.user.is_superuser or request.user.username == 'accounts'):
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
-    transaction = get_object_or_404(Transaction, id=transaction_id)
-    
-    html = f"""
-    <div class="row">
-        <div class="col-md-6">
-            <strong>Transaction ID:</strong> {transaction.transaction_id}<br>
-            <strong>Type:</strong> {transaction.get_transaction_type_display()}<br>
-            <strong>Amount:</strong> ₹{transaction.amount}<br>
-            <strong>Payment Method:</strong> {transaction.get_payment_method_display()}<br>
-        </div>
-        <div class="col-md-6">
-            <strong>Date:</strong> {transaction.created_at.strftime('%B %d, %Y at %I:%M %p')}<br>
-            <strong>Member:</strong> {transaction.veteran.name if transaction.veteran else 'N/A'}<br>
-            <strong>Reference:</strong> {transaction.reference_number or 'N/A'}<br>
-            <strong>Recorded By:</strong> {transaction.recorded_by.username}<br>
-        </div>
-    </div>
-    {f'<div class="mt-3"><strong>Description:</strong><br>{transaction.description}</div>' if transaction.description else ''}
-    """
-    
-    return JsonResponse({'html': html})
-
-@login_required
-def delete_transaction(request, transaction_id):
-    """Delete a transaction"""
-    # Allow superuser and accounts user
-    if not (request.user.is_superuser or request.user.username == 'accounts'):
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
-    if request.method == 'POST':
-        transaction = get_object_or_404(Transaction, id=transaction_id)
-        transaction.delete()
-        messages.success(request, 'Transaction deleted successfully!')
-    
-    return JsonResponse({'success': True})
-
-@login_required
-def generate_report(request):
-    """Generate financial reports"""
-    # Allow superuser and accounts user
-    if not (request.user.is_superuser or request.user.username == 'accounts'):
-        messages.error(request, 'Access denied.')
-        return redirect('index')
-    
-    if request.method == 'POST':
-        from django.http import HttpResponse
-        from django.db.models import Sum
-        import csv
-        from datetime import datetime
-        
-        start_date = request.POST.get('start_date')
-        end_date = request.POST.get('end_date')
-        report_type = request.POST.get('report_type')
-        
-        # Filter transactions
-        transactions = Transaction.objects.filter(
-            created_at__date__range=[start_date, end_date]
-        ).order_by('-created_at')
-        
-        # Calculate totals
-        income = transactions.exclude(transaction_type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-        expenses = transactions.filter(transaction_type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        # Create CSV response
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="financial_report_{start_date}_to_{end_date}.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Financial Report', f'{start_date} to {end_date}'])
-        writer.writerow([])
-        writer.writerow(['Summary'])
-        writer.writerow(['Total Income', f'₹{income}'])
-        writer.writerow(['Total Expenses', f'₹{expenses}'])
-        writer.writerow(['Net Balance', f'₹{income - expenses}'])
-        writer.writerow([])
-        writer.writerow(['Transaction Details'])
-        writer.writerow(['Date', 'Transaction ID', 'Type', 'Member', 'Amount', 'Method', 'Reference', 'Description'])
-        
-        for transaction in transactions:
-            writer.writerow([
-                transaction.created_at.strftime('%Y-%m-%d %H:%M'),
-                transaction.transaction_id,
-                transaction.get_transaction_type_display(),
-                transaction.veteran.name if transaction.veteran else 'N/A',
-                transaction.amount,
-                transaction.get_payment_method_display(),
-                transaction.reference_number,
-                transaction.description
-            ])
-        
-        return response
-    
-    return redirect('treasurer_dashboard')
-
-@login_required
-def export_transactions(request):
-    """Export transactions to CSV"""
-    # Allow superuser and accounts user
-    if not (request.user.is_superuser or request.user.username == 'accounts'):
-        messages.error(request, 'Access denied.')
-        return redirect('index')
-    
-    from django.http import HttpResponse
-    import csv
-    
-    transactions = Transaction.objects.all().order_by('-created_at')
-    
-    # Apply same filters as transaction_list
-    if request.GET.get('type'):
-        transactions = transactions.filter(transaction_type=request.GET.get('type'))
-    if request.GET.get('method'):
-        transactions = transactions.filter(payment_method=request.GET.get('method'))
-    if request.GET.get('from_date'):
-        transactions = transactions.filter(created_at__date__gte=request.GET.get('from_date'))
-    if request.GET.get('to_date'):
-        transactions = transactions.filter(created_at__date__lte=request.GET.get('to_date'))
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="transactions.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Date', 'Transaction ID', 'Type', 'Member', 'Amount', 'Method', 'Reference', 'Description'])
-    
-    for transaction in transactions:
-        writer.writerow([
-            transaction.created_at.strftime('%Y-%m-%d %H:%M'),
-            transaction.transaction_id,
-            transaction.get_transaction_type_display(),
-            transaction.veteran.name if transaction.veteran else 'N/A',
-            transaction.amount,
-            transaction.get_payment_method_display(),
-            transaction.reference_number,
-            transaction.description
-        ])
-    
-    return response
-
-# User Profile and Settings Views
-@login_required
-@rate_limit(max_requests=10, window=300)
-def user_profile(request):
-    """User profile page"""
-    if request.method == 'POST':
-        from django.core.validators import validate_email
-        from django.core.exceptions import ValidationError
-        
-        user = request.user
-        email = escape(request.POST.get('email', '').strip())
-        first_name = escape(request.POST.get('first_name', '').strip())
-        last_name = escape(request.POST.get('last_name', '').strip())
-        
-        # Handle profile photo upload
-        if 'profile_photo' in request.FILES:
-            profile_photo = request.FILES['profile_photo']
-            # Check if user has veteran profile or state profile
-            if hasattr(user, 'veteran_profile'):
-                veteran = user.veteran_profile.veteran_member
-                veteran.profile_photo = profile_photo
-                veteran.save()
-            elif hasattr(user, 'state_profile'):
-                state_profile = user.state_profile
-                state_profile.profile_photo = profile_photo
-                state_profile.save()
-        
-        # Validate email
-        if email:
-            try:
-                validate_email(email)
-                user.email = email
-            except ValidationError:
-                messages.error(request, 'Invalid email address.')
-                return redirect('user_profile')
-        
-        # Validate names (max 150 chars, no special chars)
-        if len(first_name) > 150 or len(last_name) > 150:
-            messages.error(request, 'Names must be less than 150 characters.')
-            return redirect('user_profile')
-        
-        user.first_name = first_name
-        user.last_name = last_name
-        user.save()
-        messages.success(request, 'Profile updated successfully!')
-        return redirect('user_profile')
-    
-    return render(request, 'veteran_app/user_profile.html')
-
-@login_required
-def user_settings(request):
-    """User settings page"""
-    return render(request, 'veteran_app/user_settings.html')
+def user_settings(request):
+    """User settings page"""
+    return render(request, 'veteran_app/user_settings.html')
 
 @login_required
 @rate_limit(max_requests=3, window=300)
@@ -2650,452 +1932,6 @@ def update_preferences(request):
     
     return redirect('user_settings')
 
-# EVENT MANAGEMENT VIEWS
-@login_required
-def events_list(request):
-    """List all events"""
-    from django.utils import timezone
-    from django.core.paginator import Paginator
-    
-    # Get user's state if applicable
-    user_state = None
-    if not request.user.is_superuser:
-        try:
-            user_state = request.user.state_profile.state
-        except:
-            try:
-                veteran_user = request.user.veteran_profile
-                user_state = veteran_user.veteran_member.state
-            except:
-                pass
-    
-    # Filter events based on user permissions
-    if request.user.is_superuser:
-        events_list = Event.objects.filter(status='published')
-    elif user_state:
-        # Show events created by admin (created_by is superuser) OR events for user's state
-        events_list = Event.objects.filter(
-            status='published'
-        ).filter(
-            django_models.Q(state=user_state) | 
-            django_models.Q(state__isnull=True) |
-            django_models.Q(created_by__is_superuser=True)
-        )
-    else:
-        # Non-state users see only admin events (no state assigned)
-        events_list = Event.objects.filter(
-            status='published',
-            created_by__is_superuser=True
-        )
-    
-    # Filter to show only upcoming events (start_date >= today)
-    events_list = events_list.filter(start_date__gte=timezone.now().date()).order_by('start_date')
-    categories = EventCategory.objects.filter(is_active=True)
-    
-    paginator = Paginator(events_list, 12)  # 12 per page
-    page_number = request.GET.get('page')
-    events = paginator.get_page(page_number)
-    
-    return render(request, 'veteran_app/events_list.html', {
-        'events': events,
-        'categories': categories,
-        'page_obj': events
-    })
-
-@login_required
-def event_detail(request, event_id):
-    """Event detail and registration"""
-    event = get_object_or_404(Event, id=event_id, status='published')
-    
-    # Check if user can register
-    can_register = False
-    existing_registration = None
-    
-    if hasattr(request.user, 'veteran_profile'):
-        try:
-            veteran_user = request.user.veteran_profile
-            if veteran_user.approved:
-                veteran = veteran_user.veteran_member
-                existing_registration = EventRegistration.objects.filter(
-                    event=event, veteran=veteran
-                ).first()
-                can_register = not existing_registration and event.is_registration_open()
-        except:
-            pass
-    
-    return render(request, 'veteran_app/event_detail.html', {
-        'event': event,
-        'can_register': can_register,
-        'existing_registration': existing_registration
-    })
-
-@login_required
-def register_for_event(request, event_id):
-    """Register for an event"""
-    event = get_object_or_404(Event, id=event_id, status='published')
-    
-    try:
-        veteran_user = request.user.veteran_profile
-        if not veteran_user.approved:
-            messages.error(request, 'Your account is pending approval.')
-            return redirect('event_detail', event_id=event.id)
-        veteran = veteran_user.veteran_member
-    except:
-        messages.error(request, 'Only veterans can register for events.')
-        return redirect('event_detail', event_id=event.id)
-    
-    # Check if already registered
-    if EventRegistration.objects.filter(event=event, veteran=veteran).exists():
-        messages.warning(request, 'You are already registered for this event.')
-        return redirect('event_detail', event_id=event.id)
-    
-    if not event.is_registration_open():
-        messages.error(request, 'Registration is closed for this event.')
-        return redirect('event_detail', event_id=event.id)
-    
-    if request.method == 'POST':
-        participants_count = int(request.POST.get('participants_count', 1))
-        special_requirements = request.POST.get('special_requirements', '')
-        
-        # Create registration
-        registration = EventRegistration.objects.create(
-            event=event,
-            veteran=veteran,
-            participants_count=participants_count,
-            special_requirements=special_requirements,
-            payment_required=event.registration_fee > 0,
-            payment_amount=event.registration_fee * participants_count
-        )
-        
-        # Handle payment if required
-        if event.registration_fee > 0:
-            try:
-                from .services import PaymentService
-                payment_service = PaymentService()
-                payment_order, razorpay_order = payment_service.create_order(
-                    veteran=veteran,
-                    order_type='event_registration',
-                    amount=registration.payment_amount,
-                    description=f'Registration for {event.title}',
-                    event_registration=registration
-                )
-                
-                return render(request, 'veteran_app/payment_page.html', {
-                    'event': event,
-                    'registration': registration,
-                    'payment_order': payment_order,
-                    'razorpay_order': razorpay_order,
-                    'razorpay_key': payment_service.gateway.api_key
-                })
-            except Exception as e:
-                registration.delete()
-                messages.error(request, f'Payment setup failed: {str(e)}')
-                return redirect('event_detail', event_id=event.id)
-        else:
-            # Free event - confirm registration
-            registration.status = 'confirmed'
-            registration.save()
-            messages.success(request, 'Registration successful!')
-            return redirect('event_detail', event_id=event.id)
-    
-    return render(request, 'veteran_app/event_registration.html', {
-        'event': event
-    })
-
-@login_required
-def payment_success(request):
-    """Handle successful payment"""
-    payment_id = request.GET.get('razorpay_payment_id')
-    order_id = request.GET.get('razorpay_order_id')
-    signature = request.GET.get('razorpay_signature')
-    
-    if not all([payment_id, order_id, signature]):
-        messages.error(request, 'Invalid payment response.')
-        return redirect('events_list')
-    
-    try:
-        payment_order = PaymentOrder.objects.get(gateway_order_id=order_id)
-        from .services import PaymentService
-        payment_service = PaymentService()
-        
-        if payment_service.verify_payment(payment_id, order_id, signature):
-            payment_service.process_successful_payment(payment_order, payment_id)
-            messages.success(request, 'Payment successful! Your registration is confirmed.')
-            
-            if payment_order.event_registration:
-                return redirect('event_detail', event_id=payment_order.event_registration.event.id)
-        else:
-            messages.error(request, 'Payment verification failed.')
-    except Exception as e:
-        messages.error(request, f'Payment processing error: {str(e)}')
-    
-    return redirect('events_list')
-
-@login_required
-def payment_failed(request):
-    """Handle failed payment"""
-    messages.error(request, 'Payment failed. Please try again.')
-    return redirect('events_list')
-
-@login_required
-def manage_events(request):
-    """Manage events - Superadmin and State Admins can view events"""
-    from django.core.paginator import Paginator
-    
-    # Get user's state if applicable
-    user_state = None
-    if not request.user.is_superuser:
-        try:
-            user_state = request.user.state_profile
-            if not user_state.approved:
-                messages.error(request, 'Your account is pending approval.')
-                return redirect('index')
-            user_state = user_state.state
-        except UserState.DoesNotExist:
-            messages.error(request, 'Access denied. Only state admins and superadmin can manage events.')
-            return redirect('index')
-    
-    # Filter events based on user permissions
-    if request.user.is_superuser:
-        events_list = Event.objects.all()
-    else:
-        # State admins can see events for their state and all-state events
-        events_list = Event.objects.filter(
-            django_models.Q(state=user_state) | django_models.Q(state__isnull=True)
-        )
-    
-    events_list = events_list.order_by('-created_at')
-    categories = EventCategory.objects.filter(is_active=True)
-    
-    paginator = Paginator(events_list, 15)  # 15 per page
-    page_number = request.GET.get('page')
-    events = paginator.get_page(page_number)
-    
-    return render(request, 'veteran_app/manage_events.html', {
-        'events': events,
-        'categories': categories,
-        'page_obj': events,
-        'user_state': user_state
-    })
-
-@login_required
-def create_event(request):
-    """Create new event - Superadmin and State Admins"""
-    # Check permissions
-    user_state = None
-    if not request.user.is_superuser:
-        try:
-            user_state = request.user.state_profile
-            if not user_state.approved:
-                messages.error(request, 'Your account is pending approval.')
-                return redirect('index')
-            user_state = user_state.state
-        except UserState.DoesNotExist:
-            messages.error(request, 'Access denied. Only state admins and superadmin can create events.')
-            return redirect('index')
-    
-    if request.method == 'POST':
-        title = request.POST.get('title')
-        description = request.POST.get('description')
-        category_name = request.POST.get('category', '').strip()
-        state_id = request.POST.get('state')
-        start_date = request.POST.get('start_date')
-        end_date = request.POST.get('end_date')
-        venue = request.POST.get('venue')
-        address = request.POST.get('address')
-        contact_person = request.POST.get('contact_person')
-        contact_phone = request.POST.get('contact_phone')
-        registration_fee = request.POST.get('registration_fee', 0)
-        max_participants = request.POST.get('max_participants')
-        
-        if all([title, description, category_name, start_date, end_date, venue, address, contact_person, contact_phone]):
-            # Get or create category
-            category, created = EventCategory.objects.get_or_create(
-                name=category_name,
-                defaults={'is_active': True}
-            )
-            
-            # Handle state assignment
-            event_state = None
-            if request.user.is_superuser:
-                # Superadmin can create events for any state or all states
-                event_state = State.objects.get(id=state_id) if state_id else None
-            else:
-                # State admins can only create events for their state
-                event_state = user_state
-            
-            event = Event.objects.create(
-                title=title,
-                description=description,
-                category=category,
-                state=event_state,
-                start_date=start_date,
-                end_date=end_date,
-                venue=venue,
-                address=address,
-                contact_person=contact_person,
-                contact_phone=contact_phone,
-                registration_fee=registration_fee,
-                max_participants=max_participants if max_participants else None,
-                banner_image=request.FILES.get('banner_image'),
-                created_by=request.user,
-                status='published'
-            )
-            
-            # Create notification for the event
-            from datetime import datetime, timedelta
-            notification_message = f'New event "{title}" has been announced. Registration is now open!'
-            if event_state:
-                notification_message += f' This event is for {event_state.name} members.'
-            else:
-                notification_message += ' This event is open to all state members.'
-            
-            Notification.objects.create(
-                title=f'New Event: {title}',
-                message=notification_message,
-                notification_type='info',
-                state=event_state,
-                expires_at=datetime.now() + timedelta(days=30)  # Notification expires in 30 days
-            )
-            
-            messages.success(request, f'Event "{title}" created successfully and notification sent to members!')
-            return redirect('manage_events')
-        else:
-            messages.error(request, 'Please fill all required fields.')
-    
-    # Get available states based on user permissions
-    if request.user.is_superuser:
-        states = State.objects.all().order_by('name')
-    else:
-        states = [user_state] if user_state else []
-    
-    return render(request, 'veteran_app/create_event.html', {
-        'states': states,
-        'user_state': user_state
-    })
-
-@login_required
-def edit_event(request, event_id):
-    """Edit existing event - Superadmin and State Admins"""
-    event = get_object_or_404(Event, id=event_id)
-    
-    # Check permissions
-    user_state = None
-    if not request.user.is_superuser:
-        try:
-            user_state = request.user.state_profile
-            if not user_state.approved:
-                messages.error(request, 'Your account is pending approval.')
-                return redirect('index')
-            user_state = user_state.state
-            
-            # State admins can only edit events for their state or all-state events
-            if event.state and event.state != user_state:
-                messages.error(request, 'You can only edit events for your state.')
-                return redirect('manage_events')
-        except UserState.DoesNotExist:
-            messages.error(request, 'Access denied.')
-            return redirect('index')
-    
-    if request.method == 'POST':
-        event.title = request.POST.get('title')
-        event.description = request.POST.get('description')
-        category_name = request.POST.get('category', '').strip()
-        state_id = request.POST.get('state')
-        event.start_date = request.POST.get('start_date')
-        event.end_date = request.POST.get('end_date')
-        event.venue = request.POST.get('venue')
-        event.address = request.POST.get('address')
-        event.contact_person = request.POST.get('contact_person')
-        event.contact_phone = request.POST.get('contact_phone')
-        event.registration_fee = request.POST.get('registration_fee', 0)
-        event.max_participants = request.POST.get('max_participants') or None
-        
-        if category_name:
-            category, created = EventCategory.objects.get_or_create(
-                name=category_name,
-                defaults={'is_active': True}
-            )
-            event.category = category
-        
-        # Handle state assignment based on user permissions
-        if request.user.is_superuser:
-            event.state = State.objects.get(id=state_id) if state_id else None
-        # State admins cannot change the state of existing events
-        
-        if 'banner_image' in request.FILES:
-            event.banner_image = request.FILES['banner_image']
-        
-        event.save()
-        messages.success(request, f'Event "{event.title}" updated successfully!')
-        return redirect('manage_events')
-    
-    # Get available states based on user permissions
-    if request.user.is_superuser:
-        states = State.objects.all().order_by('name')
-    else:
-        states = [user_state] if user_state else []
-    
-    return render(request, 'veteran_app/edit_event.html', {
-        'event': event,
-        'states': states,
-        'user_state': user_state
-    })
-
-@login_required
-def delete_event(request, event_id):
-    """Delete event - Superadmin and State Admins"""
-    event = get_object_or_404(Event, id=event_id)
-    
-    # Check permissions
-    if not request.user.is_superuser:
-        try:
-            user_state = request.user.state_profile
-            if not user_state.approved:
-                messages.error(request, 'Your account is pending approval.')
-                return redirect('index')
-            
-            # State admins can only delete events for their state or all-state events
-            if event.state and event.state != user_state.state:
-                messages.error(request, 'You can only delete events for your state.')
-                return redirect('manage_events')
-        except UserState.DoesNotExist:
-            messages.error(request, 'Access denied.')
-            return redirect('manage_events')
-    
-    title = event.title
-    event.delete()
-    messages.success(request, f'Event "{title}" deleted successfully!')
-    return redirect('manage_events')
-
-@login_required
-@user_passes_test(is_superuser)
-def payment_settings(request):
-    """Payment gateway settings"""
-    gateways = PaymentGateway.objects.all()
-    
-    if request.method == 'POST':
-        gateway_id = request.POST.get('gateway_id')
-        api_key = request.POST.get('api_key')
-        secret_key = request.POST.get('secret_key')
-        is_active = request.POST.get('is_active') == 'on'
-        is_test_mode = request.POST.get('is_test_mode') == 'on'
-        
-        if gateway_id and api_key and secret_key:
-            gateway = get_object_or_404(PaymentGateway, id=gateway_id)
-            gateway.api_key = api_key
-            gateway.secret_key = secret_key
-            gateway.is_active = is_active
-            gateway.is_test_mode = is_test_mode
-            gateway.save()
-            
-            messages.success(request, f'{gateway.display_name} settings updated!')
-        else:
-            messages.error(request, 'Please fill all required fields.')
-    
-    return render(request, 'veteran_app/payment_settings.html', {
-        'gateways': gateways
-    })
 
 # TWO-FACTOR AUTHENTICATION VIEWS
 @login_required
@@ -3243,216 +2079,6 @@ def regenerate_backup_codes(request):
     
     return redirect('setup_2fa')
 
-# REPORTING VIEWS
-@login_required
-def reports_builder(request):
-    """Custom report builder"""
-    # Allow superuser and accounts user
-    if not (request.user.is_superuser or request.user.username == 'accounts'):
-        try:
-            user_state = request.user.state_profile
-            if not user_state.approved:
-                messages.error(request, 'Access denied.')
-                return redirect('index')
-        except UserState.DoesNotExist:
-            messages.error(request, 'Access denied.')
-            return redirect('index')
-    
-    user_state = None
-    if not request.user.is_superuser:
-        try:
-            user_state = request.user.state_profile.state
-        except:
-            pass
-    
-    veteran_columns = [
-        {'name': 'association_id', 'label': 'Association ID', 'type': 'text'},
-        {'name': 'name', 'label': 'Name', 'type': 'text'},
-        {'name': 'service_number', 'label': 'Service Number', 'type': 'text'},
-        {'name': 'rank', 'label': 'Rank', 'type': 'text'},
-        {'name': 'branch', 'label': 'Branch', 'type': 'text'},
-        {'name': 'state', 'label': 'State', 'type': 'text'},
-        {'name': 'date_of_birth', 'label': 'Date of Birth', 'type': 'date'},
-        {'name': 'contact', 'label': 'Contact', 'type': 'text'},
-        {'name': 'address', 'label': 'Address', 'type': 'text'},
-        {'name': 'living_city', 'label': 'Living City', 'type': 'text'},
-        {'name': 'zip_code', 'label': 'ZIP Code', 'type': 'text'},
-        {'name': 'alternate_email', 'label': 'Alternate Email', 'type': 'text'},
-        {'name': 'blood_group', 'label': 'Blood Group', 'type': 'text'},
-        {'name': 'medical_category', 'label': 'Medical Category', 'type': 'text'},
-        {'name': 'nearest_echs', 'label': 'Nearest ECHS', 'type': 'text'},
-        {'name': 'nearest_dhq', 'label': 'Nearest DHQ', 'type': 'text'},
-        {'name': 'educational_qualification', 'label': 'Educational Qualification', 'type': 'text'},
-        {'name': 'living_city', 'label': 'Living City', 'type': 'text'},
-        {'name': 'emergency_contact_name', 'label': 'Emergency Contact Name', 'type': 'text'},
-        {'name': 'emergency_contact_phone', 'label': 'Emergency Contact Phone', 'type': 'text'},
-        {'name': 'date_of_joining', 'label': 'Date of Joining', 'type': 'date'},
-        {'name': 'retired_on', 'label': 'Retired On', 'type': 'date'},
-        {'name': 'unit_served', 'label': 'Last Ship Served', 'type': 'text'},
-        {'name': 'specialization', 'label': 'Specialization', 'type': 'text'},
-        {'name': 'decorations', 'label': 'Awards & Decorations', 'type': 'text'},
-        {'name': 'enrolled_date', 'label': 'Enrolled Date', 'type': 'date'},
-        {'name': 'association_date', 'label': 'Association Date', 'type': 'date'},
-        {'name': 'membership', 'label': 'Membership Status', 'type': 'boolean'},
-        {'name': 'subscription_paid_on', 'label': 'Subscription Paid On', 'type': 'date'},
-        {'name': 'spouse_name', 'label': 'Spouse Name', 'type': 'text'},
-        {'name': 'spouse_contact', 'label': 'Spouse Contact', 'type': 'text'},
-        {'name': 'children_count', 'label': 'Children Count', 'type': 'text'},
-        {'name': 'pension_details', 'label': 'Pension Details', 'type': 'text'},
-        {'name': 'bank_account', 'label': 'Bank Account', 'type': 'text'},
-        {'name': 'bank_name', 'label': 'Bank Name', 'type': 'text'},
-        {'name': 'next_of_kin', 'label': 'Next of Kin', 'type': 'text'},
-        {'name': 'next_of_kin_relation', 'label': 'Next of Kin Relation', 'type': 'text'},
-        {'name': 'next_of_kin_contact', 'label': 'Next of Kin Contact', 'type': 'text'},
-        {'name': 'approved', 'label': 'Approval Status', 'type': 'boolean'},
-        {'name': 'created_at', 'label': 'Created At', 'type': 'date'},
-        {'name': 'updated_at', 'label': 'Updated At', 'type': 'date'},
-    ]
-    
-    states = State.objects.all().order_by('name')
-    saved_configs = ReportConfiguration.objects.filter(
-        django_models.Q(created_by=request.user) | django_models.Q(is_template=True)
-    )
-    
-    return render(request, 'veteran_app/reports_builder.html', {
-        'veteran_columns': veteran_columns,
-        'states': states,
-        'saved_configs': saved_configs,
-        'user_state': user_state
-    })
-
-@login_required
-def generate_report(request):
-    """Generate and download report"""
-    if request.method != 'POST':
-        return redirect('reports_builder')
-    
-    import csv
-    from datetime import datetime
-    
-    selected_columns = request.POST.getlist('columns')
-    if not selected_columns:
-        messages.error(request, 'Please select at least one column.')
-        return redirect('reports_builder')
-    
-    state_filter = request.POST.get('state_filter')
-    from_date = request.POST.get('from_date')
-    to_date = request.POST.get('to_date')
-    date_field = request.POST.get('date_field')
-    membership_filter = request.POST.get('membership_filter')
-    approval_filter = request.POST.get('approval_filter')
-    export_format = request.POST.get('export_format', 'csv')
-    
-    # Validate dates don't exceed today
-    today = datetime.now().date()
-    if from_date:
-        from_date_obj = datetime.strptime(from_date, '%Y-%m-%d').date()
-        if from_date_obj > today:
-            messages.error(request, 'From Date cannot be a future date.')
-            return redirect('reports_builder')
-    if to_date:
-        to_date_obj = datetime.strptime(to_date, '%Y-%m-%d').date()
-        if to_date_obj > today:
-            messages.error(request, 'To Date cannot be a future date.')
-            return redirect('reports_builder')
-    if from_date and to_date and from_date > to_date:
-        messages.error(request, 'From Date cannot be later than To Date.')
-        return redirect('reports_builder')
-    
-    queryset = VeteranMember.objects.all()
-    
-    if not request.user.is_superuser:
-        try:
-            user_state = request.user.state_profile.state
-            queryset = queryset.filter(state=user_state)
-        except:
-            pass
-    elif state_filter:
-        queryset = queryset.filter(state_id=state_filter)
-    
-    if from_date and to_date and date_field:
-        filter_kwargs = {f"{date_field}__range": [from_date, to_date]}
-        queryset = queryset.filter(**filter_kwargs)
-    
-    if membership_filter:
-        queryset = queryset.filter(membership=(membership_filter == 'true'))
-    
-    if approval_filter:
-        queryset = queryset.filter(approved=(approval_filter == 'true'))
-    
-    queryset = queryset.select_related('state', 'rank', 'branch', 'blood_group')
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="veteran_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    headers = [col.replace('_', ' ').title() for col in selected_columns]
-    writer.writerow(headers)
-    
-    for member in queryset:
-        row = []
-        for col in selected_columns:
-            if col == 'state':
-                row.append(member.state.name)
-            elif col == 'rank':
-                row.append(member.rank.name)
-            elif col == 'branch':
-                row.append(member.branch.name)
-            elif col == 'blood_group':
-                row.append(member.blood_group.name)
-            elif col == 'medical_category':
-                row.append(member.medical_category.name if member.medical_category else member.medical_category_text or '')
-            elif col == 'nearest_echs':
-                row.append(member.nearest_echs.name if member.nearest_echs else member.nearest_echs_text or '')
-            elif col == 'nearest_dhq':
-                row.append(member.nearest_dhq_text or '')
-            elif col == 'membership':
-                row.append('Active' if member.membership else 'Inactive')
-            elif col == 'approved':
-                row.append('Approved' if member.approved else 'Pending')
-            else:
-                value = getattr(member, col, '')
-                row.append(value if value else '')
-        writer.writerow(row)
-    
-    return response
-
-@login_required
-def save_report_config(request):
-    """Save report configuration"""
-    if request.method == 'POST':
-        name = request.POST.get('config_name')
-        selected_columns = request.POST.getlist('columns')
-        
-        if name and selected_columns:
-            ReportConfiguration.objects.create(
-                name=name,
-                description=request.POST.get('config_description', ''),
-                report_type='veteran',
-                selected_columns=selected_columns,
-                filters={},
-                created_by=request.user
-            )
-            messages.success(request, f'Report configuration "{name}" saved!')
-        else:
-            messages.error(request, 'Please provide a name and select columns.')
-    
-    return redirect('reports_builder')
-
-@login_required
-def load_report_config(request, config_id):
-    """Load saved report configuration"""
-    config = get_object_or_404(ReportConfiguration, id=config_id)
-    
-    if not config.is_template and config.created_by != request.user:
-        messages.error(request, 'Access denied.')
-        return redirect('reports_builder')
-    
-    return JsonResponse({
-        'name': config.name,
-        'columns': config.selected_columns,
-        'filters': config.filters
-    })
 
 # GALLERY VIEWS
 def gallery(request):
@@ -3469,18 +2095,15 @@ def gallery(request):
     
     states = State.objects.all().order_by('name')
     
-    # Calculate statistics per state
-    state_stats = []
-    for state in states:
-        state_images = GalleryImage.objects.filter(state=state, is_public=True)
-        count = state_images.count()
-        total_size = sum([img.image.size for img in state_images if img.image]) / (1024 * 1024)  # MB
-        if count > 0:
-            state_stats.append({
-                'state': state,
-                'count': count,
-                'size': round(total_size, 2)
-            })
+    # Calculate statistics per state from one query over the public images
+    sizes = {}
+    for image in GalleryImage.objects.filter(is_public=True, state__isnull=False).only('state_id', 'image'):
+        count, total_size = sizes.get(image.state_id, (0, 0))
+        sizes[image.state_id] = (count + 1, total_size + (image.image.size if image.image else 0))
+    state_stats = [
+        {'state': state, 'count': sizes[state.pk][0], 'size': round(sizes[state.pk][1] / (1024 * 1024), 2)}  # MB
+        for state in states if state.pk in sizes
+    ]
     
     # Check if user can upload
     can_upload = False
@@ -3507,193 +2130,6 @@ def gallery(request):
         'page_obj': images
     })
 
-# STATE HEAD REPORT BUILDER VIEWS
-@login_required
-def state_head_reports_builder(request):
-    """State Head Report Builder - Excludes financial columns"""
-    # Check if user is a state admin
-    if not request.user.is_superuser:
-        try:
-            user_state = request.user.state_profile
-            if not user_state.approved:
-                messages.error(request, 'Access denied.')
-                return redirect('index')
-        except UserState.DoesNotExist:
-            messages.error(request, 'Access denied. Only state heads can access this report builder.')
-            return redirect('index')
-    
-    user_state = None
-    if not request.user.is_superuser:
-        try:
-            user_state = request.user.state_profile.state
-        except:
-            pass
-    
-    # Define columns available to state heads (excluding financial data)
-    veteran_columns = [
-        {'name': 'association_id', 'label': 'Association ID', 'type': 'text'},
-        {'name': 'association_number', 'label': 'Association Number', 'type': 'text'},
-        {'name': 'name', 'label': 'Name', 'type': 'text'},
-        {'name': 'service_number', 'label': 'Service Number', 'type': 'text'},
-        {'name': 'rank', 'label': 'Rank', 'type': 'text'},
-        {'name': 'branch', 'label': 'Branch', 'type': 'text'},
-        {'name': 'state', 'label': 'State', 'type': 'text'},
-        {'name': 'date_of_birth', 'label': 'Date of Birth', 'type': 'date'},
-        {'name': 'contact', 'label': 'Contact', 'type': 'text'},
-        {'name': 'address', 'label': 'Address', 'type': 'text'},
-        {'name': 'living_city', 'label': 'Living City', 'type': 'text'},
-        {'name': 'zip_code', 'label': 'ZIP Code', 'type': 'text'},
-        {'name': 'alternate_email', 'label': 'Alternate Email', 'type': 'text'},
-        {'name': 'blood_group', 'label': 'Blood Group', 'type': 'text'},
-        {'name': 'medical_category', 'label': 'Medical Category', 'type': 'text'},
-        {'name': 'nearest_echs', 'label': 'Nearest ECHS', 'type': 'text'},
-        {'name': 'nearest_dhq', 'label': 'Nearest DHQ', 'type': 'text'},
-        {'name': 'educational_qualification', 'label': 'Educational Qualification', 'type': 'text'},
-        {'name': 'emergency_contact_name', 'label': 'Emergency Contact Name', 'type': 'text'},
-        {'name': 'emergency_contact_phone', 'label': 'Emergency Contact Phone', 'type': 'text'},
-        {'name': 'date_of_joining', 'label': 'Date of Joining', 'type': 'date'},
-        {'name': 'retired_on', 'label': 'Retired On', 'type': 'date'},
-        {'name': 'unit_served', 'label': 'Last Ship Served', 'type': 'text'},
-        {'name': 'specialization', 'label': 'Specialization', 'type': 'text'},
-        {'name': 'decorations', 'label': 'Awards & Decorations', 'type': 'text'},
-        {'name': 'enrolled_date', 'label': 'Enrolled Date', 'type': 'date'},
-        {'name': 'association_date', 'label': 'Association Date', 'type': 'date'},
-        {'name': 'membership', 'label': 'Membership Status', 'type': 'boolean'},
-        {'name': 'subscription_paid_on', 'label': 'Subscription Paid On', 'type': 'date'},
-        {'name': 'spouse_name', 'label': 'Spouse Name', 'type': 'text'},
-        {'name': 'spouse_contact', 'label': 'Spouse Contact', 'type': 'text'},
-        {'name': 'children_count', 'label': 'Children Count', 'type': 'text'},
-        {'name': 'next_of_kin', 'label': 'Next of Kin', 'type': 'text'},
-        {'name': 'next_of_kin_relation', 'label': 'Next of Kin Relation', 'type': 'text'},
-        {'name': 'next_of_kin_contact', 'label': 'Next of Kin Contact', 'type': 'text'},
-        {'name': 'approved', 'label': 'Approval Status', 'type': 'boolean'},
-        {'name': 'created_at', 'label': 'Created At', 'type': 'date'},
-        {'name': 'updated_at', 'label': 'Updated At', 'type': 'date'},
-    ]
-    
-    # Only show current state for state heads
-    states = []
-    if request.user.is_superuser:
-        states = State.objects.all().order_by('name')
-    elif user_state:
-        states = [user_state]
-    
-    saved_configs = ReportConfiguration.objects.filter(
-        django_models.Q(created_by=request.user) | django_models.Q(is_template=True),
-        report_type='veteran'
-    )
-    
-    return render(request, 'veteran_app/state_head_reports_builder.html', {
-        'veteran_columns': veteran_columns,
-        'states': states,
-        'saved_configs': saved_configs,
-        'user_state': user_state
-    })
-
-@login_required
-def generate_state_head_report(request):
-    """Generate and download state head report (no financial data)"""
-    if request.method != 'POST':
-        return redirect('state_head_reports_builder')
-    
-    import csv
-    from datetime import datetime
-    
-    selected_columns = request.POST.getlist('columns')
-    if not selected_columns:
-        messages.error(request, 'Please select at least one column.')
-        return redirect('state_head_reports_builder')
-    
-    # Validate that no financial columns are selected
-    financial_columns = ['bank_account', 'bank_name', 'pension_details', 'welfare_schemes']
-    if any(col in financial_columns for col in selected_columns):
-        messages.error(request, 'Financial columns are not available in state head reports.')
-        return redirect('state_head_reports_builder')
-    
-    state_filter = request.POST.get('state_filter')
-    from_date = request.POST.get('from_date')
-    to_date = request.POST.get('to_date')
-    date_field = request.POST.get('date_field')
-    membership_filter = request.POST.get('membership_filter')
-    approval_filter = request.POST.get('approval_filter')
-    export_format = request.POST.get('export_format', 'csv')
-    
-    # Validate dates
-    today = datetime.now().date()
-    if from_date:
-        from_date_obj = datetime.strptime(from_date, '%Y-%m-%d').date()
-        if from_date_obj > today:
-            messages.error(request, 'From Date cannot be a future date.')
-            return redirect('state_head_reports_builder')
-    if to_date:
-        to_date_obj = datetime.strptime(to_date, '%Y-%m-%d').date()
-        if to_date_obj > today:
-            messages.error(request, 'To Date cannot be a future date.')
-            return redirect('state_head_reports_builder')
-    if from_date and to_date and from_date > to_date:
-        messages.error(request, 'From Date cannot be later than To Date.')
-        return redirect('state_head_reports_builder')
-    
-    queryset = VeteranMember.objects.all()
-    
-    # State head access control
-    if not request.user.is_superuser:
-        try:
-            user_state = request.user.state_profile.state
-            queryset = queryset.filter(state=user_state)
-        except:
-            messages.error(request, 'Access denied.')
-            return redirect('index')
-    elif state_filter:
-        queryset = queryset.filter(state_id=state_filter)
-    
-    # Apply filters
-    if from_date and to_date and date_field:
-        filter_kwargs = {f"{date_field}__range": [from_date, to_date]}
-        queryset = queryset.filter(**filter_kwargs)
-    
-    if membership_filter:
-        queryset = queryset.filter(membership=(membership_filter == 'true'))
-    
-    if approval_filter:
-        queryset = queryset.filter(approved=(approval_filter == 'true'))
-    
-    queryset = queryset.select_related('state', 'rank', 'branch', 'blood_group')
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="state_head_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    headers = [col.replace('_', ' ').title() for col in selected_columns]
-    writer.writerow(headers)
-    
-    for member in queryset:
-        row = []
-        for col in selected_columns:
-            if col == 'state':
-                row.append(member.state.name)
-            elif col == 'rank':
-                row.append(member.rank.name)
-            elif col == 'branch':
-                row.append(member.branch.name)
-            elif col == 'blood_group':
-                row.append(member.blood_group.name)
-            elif col == 'medical_category':
-                row.append(member.medical_category.name if member.medical_category else member.medical_category_text or '')
-            elif col == 'nearest_echs':
-                row.append(member.nearest_echs.name if member.nearest_echs else member.nearest_echs_text or '')
-            elif col == 'nearest_dhq':
-                row.append(member.nearest_dhq_text or '')
-            elif col == 'membership':
-                row.append('Active' if member.membership else 'Inactive')
-            elif col == 'approved':
-                row.append('Approved' if member.approved else 'Pending')
-            else:
-                value = getattr(member, col, '')
-                row.append(value if value else '')
-        writer.writerow(row)
-    
-    return response
 
 @login_required
 def upload_gallery_image(request):
@@ -3786,328 +2222,3 @@ def delete_gallery_image(request, image_id):
         image_in_sequence_header
     '''
 
-
-# VETERAN PAYMENT CRUD VIEWS
-@login_required
-def veteran_add_payment(request):
-    """Veteran adds their own payment transaction"""
-    try:
-        veteran_user = request.user.veteran_profile
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Only veterans can add payments'}, status=403)
-    
-    if request.method == 'POST':
-        import uuid
-        from datetime import datetime
-        from decimal import Decimal
-        
-        transaction_type = request.POST.get('transaction_type', 'subscription')
-        amount = Decimal(request.POST.get('amount', '0'))
-        payment_method = request.POST.get('payment_method', 'online')
-        reference_number = request.POST.get('reference_number', '').strip()
-        description = request.POST.get('description', '').strip()
-        
-        if amount <= 0:
-            return JsonResponse({'success': False, 'error': 'Invalid amount'}, status=400)
-        
-        # Validate transaction type
-        valid_types = ['subscription', 'donation', 'event_fee', 'crowdfunding', 'other_income']
-        if transaction_type not in valid_types:
-            return JsonResponse({'success': False, 'error': 'Invalid transaction type'}, status=400)
-        
-        # Get current financial year
-        current_year = datetime.now().year
-        financial_year, created = FinancialYear.objects.get_or_create(
-            year=f"{current_year}-{current_year+1}",
-            defaults={
-                'start_date': datetime(current_year, 4, 1).date(),
-                'end_date': datetime(current_year+1, 3, 31).date(),
-                'is_active': True
-            }
-        )
-        
-        # Generate transaction ID
-        transaction_id = f"PAY{datetime.now().strftime('%Y%m%d')}{str(uuid.uuid4())[:8].upper()}"
-        
-        # Create transaction
-        Transaction.objects.create(
-            transaction_id=transaction_id,
-            veteran=veteran,
-            transaction_type=transaction_type,
-            amount=amount,
-            payment_method=payment_method,
-            reference_number=reference_number,
-            description=description or f'{transaction_type.replace("_", " ").title()} payment by {veteran.name}',
-            financial_year=financial_year,
-            recorded_by=request.user
-        )
-        
-        return JsonResponse({'success': True, 'message': 'Payment added successfully!'})
-    
-    return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
-
-@login_required
-def veteran_edit_payment(request, transaction_id):
-    """Veteran edits their own payment transaction"""
-    try:
-        veteran_user = request.user.veteran_profile
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
-    
-    transaction = get_object_or_404(Transaction, id=transaction_id, veteran=veteran)
-    
-    if request.method == 'POST':
-        from decimal import Decimal
-        
-        transaction_type = request.POST.get('transaction_type', transaction.transaction_type)
-        amount = Decimal(request.POST.get('amount', '0'))
-        payment_method = request.POST.get('payment_method', transaction.payment_method)
-        reference_number = request.POST.get('reference_number', '').strip()
-        description = request.POST.get('description', '').strip()
-        
-        if amount <= 0:
-            return JsonResponse({'success': False, 'error': 'Invalid amount'}, status=400)
-        
-        # Validate transaction type
-        valid_types = ['subscription', 'donation', 'event_fee', 'crowdfunding', 'other_income']
-        if transaction_type not in valid_types:
-            return JsonResponse({'success': False, 'error': 'Invalid transaction type'}, status=400)
-        
-        transaction.transaction_type = transaction_type
-        transaction.amount = amount
-        transaction.payment_method = payment_method
-        transaction.reference_number = reference_number
-        transaction.description = description
-        transaction.save()
-        
-        return JsonResponse({'success': True, 'message': 'Payment updated successfully!'})
-    
-    # Return transaction data for modal
-    return JsonResponse({
-        'id': transaction.id,
-        'transaction_type': transaction.transaction_type,
-        'amount': str(transaction.amount),
-        'payment_method': transaction.payment_method,
-        'reference_number': transaction.reference_number,
-        'description': transaction.description
-    })
-
-@login_required
-def veteran_delete_payment(request, transaction_id):
-    """Veteran deletes their own payment transaction"""
-    try:
-        veteran_user = request.user.veteran_profile
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
-    
-    transaction = get_object_or_404(Transaction, id=transaction_id, veteran=veteran)
-    transaction.delete()
-    
-    return JsonResponse({'success': True, 'message': 'Payment deleted successfully!'})
-
-# ASSOCIATION ID CARD VIEWS
-@login_required
-def association_id_card(request):
-    """Display Association Identity Card for approved veterans"""
-    try:
-        veteran_user = request.user.veteran_profile
-        if not veteran_user.approved:
-            messages.error(request, 'Your account is pending approval. You cannot access the ID card.')
-            return redirect('veteran_welcome')
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        messages.error(request, 'Only approved veterans can access the Association ID Card.')
-        return redirect('index')
-    
-    # Generate association number if not exists
-    if not veteran.association_number:
-        veteran.generate_association_number()
-        veteran.save()
-    
-    # Check if ID card is valid (not expired)
-    is_valid = veteran.is_id_card_valid()
-    renewal_due_date = veteran.get_renewal_due_date()
-    
-    # Terms and conditions for the back of the card
-    terms_conditions = [
-        "1. This card is the property of the Indian Coast Guard Veteran Welfare Association (ICGVWA).",
-        "2. This card is non-transferable and must be carried by the member at all times during association events.",
-        "3. Loss of this card must be reported immediately to the state association office.",
-        "4. This card is valid for one year and must be renewed annually.",
-        "5. The member agrees to abide by the constitution and by-laws of ICGVWA.",
-        "6. Any misuse of this card will result in immediate cancellation of membership.",
-        "7. The association reserves the right to verify the authenticity of this card at any time.",
-        "8. For any queries or assistance, contact your state head (or) Admin Staff."
-    ]
-    
-    # Issuing authority information
-    issuing_authority = {
-        'title': 'Secretary',
-        'organization': 'Indian Coast Guard Veteran Welfare Association',
-        'signature_line': 'Authorized Signature'
-    }
-    
-    return render(request, 'veteran_app/association_id_card.html', {
-        'veteran': veteran,
-        'is_valid': is_valid,
-        'renewal_due_date': renewal_due_date,
-        'terms_conditions': terms_conditions,
-        'issuing_authority': issuing_authority
-    })
-
-@login_required
-def download_id_card(request):
-    """Download Association ID Card as PDF in A4 format"""
-    try:
-        veteran_user = request.user.veteran_profile
-        if not veteran_user.approved:
-            messages.error(request, 'Your account is pending approval.')
-            return redirect('veteran_welcome')
-        veteran = veteran_user.veteran_member
-    except VeteranUser.DoesNotExist:
-        messages.error(request, 'Access denied.')
-        return redirect('index')
-    
-    from django.http import HttpResponse
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.units import inch, cm
-    from reportlab.lib.colors import black, blue, red, white
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-    from reportlab.lib import colors
-    from io import BytesIO
-    import os
-    
-    # Create PDF buffer
-    buffer = BytesIO()
-    
-    # Create A4 PDF document
-    doc = SimpleDocTemplate(buffer, pagesize=A4, 
-                           rightMargin=2*cm, leftMargin=2*cm, 
-                           topMargin=2*cm, bottomMargin=2*cm)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles for A4 ID card
-    title_style = styles['Title']
-    title_style.textColor = blue
-    title_style.fontSize = 16
-    title_style.spaceAfter = 12
-    title_style.alignment = 1  # Center
-    
-    heading_style = styles['Heading2']
-    heading_style.textColor = black
-    heading_style.fontSize = 14
-    heading_style.spaceAfter = 12
-    heading_style.alignment = 1  # Center
-    
-    normal_style = styles['Normal']
-    normal_style.fontSize = 12
-    normal_style.spaceAfter = 6
-    
-    small_style = styles['Normal']
-    small_style.fontSize = 10
-    small_style.spaceAfter = 4
-    
-    # HEADER
-    elements.append(Paragraph("<b>INDIAN COAST GUARD VETERAN WELFARE ASSOCIATION</b>", title_style))
-    elements.append(Paragraph("<b>ASSOCIATION IDENTITY CARD</b>", heading_style))
-    elements.append(Spacer(1, 1*cm))
-    
-    # MEMBER INFORMATION TABLE
-    photo_cell = "No Photo"
-    if veteran.profile_photo:
-        try:
-            photo_path = veteran.profile_photo.path
-            if os.path.exists(photo_path):
-                photo_cell = Image(photo_path, width=4*cm, height=5*cm)
-        except:
-            pass
-    
-    # Member details
-    member_data = [
-        ['Association Number:', veteran.association_number or 'Not Assigned'],
-        ['Name:', veteran.name],
-        ['Rank:', f"{veteran.rank.name} (Retd.)"],
-        ['Service Number:', veteran.service_number],
-        ['State:', veteran.state.name],
-        ['Blood Group:', veteran.blood_group.name],
-        ['Contact:', veteran.contact],
-        ['Date of Birth:', veteran.date_of_birth.strftime('%d-%m-%Y')],
-        ['Association Date:', veteran.association_date.strftime('%d-%m-%Y') if veteran.association_date else 'N/A'],
-    ]
-    
-    # Create main table with photo and details
-    main_table_data = [[photo_cell, Table(member_data, colWidths=[4*cm, 8*cm])]]
-    main_table = Table(main_table_data, colWidths=[5*cm, 12*cm])
-    main_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, 0), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('FONTSIZE', (1, 0), (1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (0, 0), (-1, -1), colors.lightblue),
-        ('LEFTPADDING', (0, 0), (-1, -1), 12),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-        ('TOPPADDING', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-    ]))
-    
-    elements.append(main_table)
-    elements.append(Spacer(1, 1*cm))
-    
-    # VALIDITY INFORMATION
-    renewal_date = veteran.get_renewal_due_date()
-    validity_text = f"Valid until: {renewal_date.strftime('%d-%m-%Y')}" if renewal_date else "Validity: Contact Association"
-    elements.append(Paragraph(f"<b>{validity_text}</b>", normal_style))
-    
-    status = "VALID" if veteran.is_id_card_valid() else "EXPIRED"
-    elements.append(Paragraph(f"<b>STATUS: {status}</b>", normal_style))
-    elements.append(Spacer(1, 1*cm))
-    
-    # TERMS AND CONDITIONS
-    elements.append(Paragraph("<b>TERMS AND CONDITIONS</b>", heading_style))
-    
-    terms = [
-        "1. This card is the property of the Indian Coast Guard Veteran Welfare Association (ICGVWA).",
-        "2. This card is non-transferable and must be carried by the member at all times during association events.",
-        "3. Loss of this card must be reported immediately to the state association office.",
-        "4. This card is valid for one year and must be renewed annually.",
-        "5. The member agrees to abide by the constitution and by-laws of ICGVWA.",
-        "6. Any misuse of this card will result in immediate cancellation of membership."
-    ]
-    
-    for term in terms:
-        elements.append(Paragraph(term, small_style))
-    
-    elements.append(Spacer(1, 1*cm))
-    
-    # ISSUING AUTHORITY
-    authority_text = f"""<b>ISSUING AUTHORITY</b><br/>
-Indian Coast Guard Veteran Welfare Association<br/>
-{veteran.state.name} Chapter<br/>
-Issue Date: {veteran.association_date.strftime('%d-%m-%Y') if veteran.association_date else 'N/A'}<br/>
-<br/>
-_________________________<br/>
-Secretary, ICGVWA {veteran.state.name}"""
-    
-    elements.append(Paragraph(authority_text, normal_style))
-    
-    # Build PDF
-    doc.build(elements)
-    
-    # Get PDF data
-    pdf_data = buffer.getvalue()
-    buffer.close()
-    
-    # Create response
-    response = HttpResponse(pdf_data, content_type='application/pdf')
-    filename = f"ICGVWA_ID_Card_{veteran.association_number or veteran.service_number}.pdf"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'veteran_app',
     'django_extensions',
 ]
@@ -155,6 +156,9 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static/')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# ID card sheets built inside a request; larger batches use manage.py generate_id_card_sheets
+ID_CARD_SHEETS_MAX_INLINE = 500
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -225,6 +229,68 @@ CACHES = {
     }
 }
 
+# Association number verification; the bulk API needs a partner key (manage.py create_verification_partner)
+BULK_VERIFY_MAX_NUMBERS = 1000
+# Bulk verification requests allowed per partner: (requests, window in seconds)
+BULK_VERIFY_RATE_LIMIT = (30, 3600)
+VERIFICATION_CACHE_TIMEOUT = 3600  # Also capped at the card's renewal date
+VERIFICATION_NEGATIVE_CACHE_TIMEOUT = 300
+# Cap on both timeouts while the cache is per-process LocMem, where invalidation cannot reach other workers
+VERIFICATION_LOCAL_CACHE_TIMEOUT = 60
+# How often each worker adds its hit/miss counts to the database and picks up --forget
+VERIFICATION_STATS_FLUSH_INTERVAL = 30
+# Reject never-issued numbers without a query; needs a cache shared by all workers
+VERIFICATION_BLOOM_FILTER = config('VERIFICATION_BLOOM_FILTER', default=False, cast=bool)
+
+# Audit log buffering (verification and RBAC logs); set MAX_EVENTS to 1 to write synchronously
+AUDIT_BUFFER_MAX_EVENTS = 100
+AUDIT_BUFFER_MAX_AGE = 5  # seconds
+AUDIT_BUFFER_SPOOL_DIR = os.path.join(BASE_DIR, 'audit_spool')
+
+# Payment gateway HTTP client (shared per worker process)
+PAYMENT_GATEWAY_TIMEOUT = (3.05, 10)  # connect, read seconds
+PAYMENT_GATEWAY_RETRIES = 2
+PAYMENT_GATEWAY_POOL_SIZE = 10
+# Point at the stub server (manage.py run_stub_gateway) for benchmarks and local testing
+PAYMENT_GATEWAY_BASE_URL = config('PAYMENT_GATEWAY_BASE_URL', default='')
+
+# Unpaid event registrations give their places back after this (manage.py expire_event_holds)
+EVENT_PAYMENT_HOLD_MINUTES = 60
+# ... and a place offered from the waitlist after this
+EVENT_WAITLIST_OFFER_HOURS = 48
+
+# Event calendar (.ics) feeds; a cached feed is keyed on its events, so any change shows at once
+EVENT_FEED_CACHE_TIMEOUT = 86400
+EVENT_FEED_PAST_DAYS = 30
+
+# Chat portal directory: show the planner's row estimate instead of running COUNT(*)
+CHAT_DIRECTORY_ESTIMATE_COUNT = True
+
+# Chat delivery over Server-Sent Events (live streams need the ASGI app, see Procfile)
+CHAT_STREAM_POLL_INTERVAL = 2  # seconds between checks for messages sent by other processes; 0 disables
+CHAT_STREAM_KEEPALIVE = 15
+CHAT_STREAM_MAX_AGE = 600  # streams close after this and the browser reconnects with Last-Event-ID
+CHAT_STREAM_RETRY_MS = 3000
+
+# Member search: typo-tolerant name matching when the pg_trgm extension is installed
+MEMBER_SEARCH_TRIGRAM = True
+MEMBER_AUTOCOMPLETE_CACHE_TIMEOUT = 60  # seconds; also the browser's private max-age
+
+# Job portal matching: how long the "popular skills" suggestions are cached
+JOB_POPULAR_SKILLS_CACHE_TIMEOUT = 600
+# Seconds before a resume claimed by an extract_resumes worker that never finished is claimed again
+RESUME_CLAIM_TIMEOUT = 900
+# Seconds one resume may take to parse before it counts as a failed attempt and its parser process is stopped
+RESUME_PARSE_TIMEOUT = 60
+
+# Matrimonial portal facet counts, cached per filter combination until a profile changes
+# (other workers may show old counts this long unless the cache is shared)
+MATRIMONIAL_FACET_CACHE_TIMEOUT = 600
+
+# Treasurer/transaction list summaries, cached per filter and keyed on the ledger rollups,
+# so a transaction written through any worker shows at once
+LEDGER_SUMMARY_CACHE_TIMEOUT = 600
+
 
 
 # D:\Dev_drive\_veteran\veteran_cg\requirements.txt